@@ -1,16 +1,27 @@
 """
 Dependencias para los endpoints de la API
 """
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+import hashlib
+from typing import Optional, List, Type, Any, Callable, Awaitable
+from fastapi import Depends, HTTPException, status, Query, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic_core import to_json
 from uuid import UUID
 
+from app.config import settings
+from app.database.cache import reference_cache
+
 from app.services.auth_service import AuthService
+from app.services.identidad_service import IdentidadService
 from app.models.usuario import Usuario
+from app.models.paciente import PacienteResponse
+from app.models.medico import MedicoResponse
+from app.models.paginacion import decode_cursor
+from app.models.base import BaseModel
 
 security = HTTPBearer()
 auth_service = AuthService()
+identidad_service = IdentidadService()
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Usuario:
@@ -30,32 +41,43 @@ async def get_current_active_user(current_user: Usuario = Depends(get_current_us
     return current_user
 
 
-async def get_current_paciente(current_user: Usuario = Depends(get_current_active_user)) -> dict:
-    """Obtener el paciente actual"""
-    from app.services.paciente_service import PacienteService
-    paciente_service = PacienteService()
+async def get_current_identidad(current_user: Usuario = Depends(get_current_active_user)) -> dict:
+    """
+    Obtener la identidad del usuario actual (usuario, rol, paciente y médico)
     
-    paciente = await paciente_service.get_paciente_by_usuario(current_user["id"])
+    FastAPI cachea esta dependencia por request, así que se resuelve una sola vez
+    aunque la usen varias dependencias del mismo endpoint.
+    """
+    identidad = await identidad_service.get_identidad(current_user["id"])
+    if not identidad:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Perfil de usuario no encontrado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return identidad
+
+
+async def get_current_paciente(identidad: dict = Depends(get_current_identidad)) -> PacienteResponse:
+    """Obtener el paciente actual"""
+    paciente = identidad["paciente"]
     if not paciente:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="El usuario no es un paciente"
         )
-    return paciente
+    return PacienteResponse.desde_fila(paciente)
 
 
-async def get_current_medico(current_user: Usuario = Depends(get_current_active_user)) -> dict:
+async def get_current_medico(identidad: dict = Depends(get_current_identidad)) -> MedicoResponse:
     """Obtener el médico actual"""
-    from app.services.medico_service import MedicoService
-    medico_service = MedicoService()
-    
-    medico = await medico_service.get_medico_by_usuario(current_user["id"])
+    medico = identidad["medico"]
     if not medico:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="El usuario no es un médico"
         )
-    return medico
+    return MedicoResponse.desde_fila(medico)
 
 
 def require_role(required_role: str):
@@ -65,3 +87,75 @@ def require_role(required_role: str):
         # Por simplicidad, asumimos que todos los usuarios activos pueden acceder
         return current_user
     return role_checker
+
+
+async def get_cursor(
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor opaco para paginación por keyset (vacío para la primera página)"
+    )
+) -> Optional[str]:
+    """Validar el cursor de paginación; sin cursor se usa skip/limit"""
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor inválido"
+            )
+    return cursor
+
+
+def get_fields(model: Type[BaseModel]):
+    """Dependencia para el parámetro `fields=` (proyección de columnas)"""
+    async def fields_parser(
+        fields: Optional[str] = Query(
+            None,
+            description="Campos a retornar separados por coma (por defecto todos)"
+        )
+    ) -> Optional[List[str]]:
+        if not fields:
+            return None
+        requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        invalid = [f for f in requested if f not in model.model_fields]
+        if invalid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Campos no válidos: {', '.join(invalid)}"
+            )
+        return requested or None
+    return fields_parser
+
+
+def respuesta_json(content: Any) -> Response:
+    """
+    Serializar directamente a JSON con el codificador de pydantic-core.
+    
+    Para respuestas que no pasan por `response_model` (p. ej. con `fields=`):
+    evita el paso intermedio de `jsonable_encoder` a dict y luego a texto.
+    """
+    return Response(content=to_json(content), media_type="application/json")
+
+
+async def respuesta_cacheada(request: Request, table: str, loader: Callable[[], Awaitable[Any]]) -> Response:
+    """
+    Responder datos de referencia desde el cache en memoria, con soporte de ETag.
+    
+    El cuerpo serializado y su ETag se cachean por ruta y parámetros; si el cliente
+    envía `If-None-Match` con el ETag vigente se responde 304 sin cuerpo.
+    """
+    async def render():
+        body = to_json(await loader())
+        return body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    
+    key = ("response", request.url.path, str(request.query_params))
+    body, etag = await reference_cache.get_or_load(table, key, render)
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={settings.reference_cache_ttl}"}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -49,7 +49,7 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     
     Requiere token JWT válido
     """
-    return UsuarioResponse(**current_user)
+    return UsuarioResponse.desde_fila(current_user)
 
 
 @router.post("/verify-email/{usuario_id}", response_model=UsuarioResponse, summary="Verificar email")
@@ -1,13 +1,14 @@
 """
 Endpoints para la gestión de calificaciones
 """
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 
 from app.models.calificacion import Calificacion, CalificacionCreate, CalificacionUpdate, CalificacionResponse, CalificacionConDetalles
+from app.models.paginacion import Pagina
 from app.services.calificacion_service import CalificacionService
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_cursor, get_fields, respuesta_json
 
 router = APIRouter(prefix="/calificaciones", tags=["Calificaciones"])
 
@@ -33,10 +34,12 @@ async def create_calificacion(
     return await calificacion_service.create_calificacion(calificacion_data)
 
 
-@router.get("/", response_model=List[CalificacionResponse], summary="Listar calificaciones")
+@router.get("/", response_model=Union[List[CalificacionResponse], Pagina[CalificacionResponse]], summary="Listar calificaciones")
 async def get_calificaciones(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(CalificacionResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -44,16 +47,23 @@ async def get_calificaciones(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await calificacion_service.get_calificaciones(skip, limit)
+    result = await calificacion_service.get_calificaciones(skip, limit, cursor, fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
 
 
-@router.get("/detalles", response_model=List[CalificacionConDetalles], summary="Listar calificaciones con detalles")
+@router.get("/detalles", response_model=Union[List[CalificacionConDetalles], Pagina[CalificacionConDetalles]], summary="Listar calificaciones con detalles")
 async def get_calificaciones_with_details(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -61,10 +71,11 @@ async def get_calificaciones_with_details(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
     
     Requiere autenticación
     """
-    return await calificacion_service.get_calificaciones_with_details(skip, limit)
+    return await calificacion_service.get_calificaciones_with_details(skip, limit, cursor)
 
 
 @router.get("/{calificacion_id}", response_model=CalificacionResponse, summary="Obtener calificación por ID")
@@ -175,9 +186,10 @@ async def get_promedio_medico(
     
     - **medico_id**: ID del médico
     
-    Retorna un objeto con la calificación promedio
+    Retorna un objeto con la calificación promedio, el total de calificaciones
+    y la distribución por número de estrellas
     
     Requiere autenticación
     """
-    promedio = await calificacion_service.get_promedio_medico(medico_id)
-    return {"medico_id": str(medico_id), "calificacion_promedio": promedio}
+    resumen = await calificacion_service.get_resumen_medico(medico_id)
+    return {"medico_id": str(medico_id), **resumen}
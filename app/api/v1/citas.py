@@ -1,18 +1,23 @@
 """
 Endpoints para la gestión de citas médicas
 """
-from typing import List
+from typing import Any, Dict, List, Optional, Union
 from uuid import UUID
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 
-from app.models.cita import Cita, CitaCreate, CitaUpdate, CitaResponse, CitaConDetalles
+from app.models.cita import Cita, CitaCreate, CitaUpdate, CitaResponse, CitaConDetalles, CitaAgenda
+from app.models.lote import ResultadoLote
+from app.models.paginacion import Pagina
 from app.services.cita_service import CitaService
-from app.api.dependencies import get_current_user, get_current_paciente, get_current_medico
+from app.services.disponibilidad_service import DisponibilidadService
+from app.api.dependencies import get_current_user, get_current_identidad, get_cursor, get_fields, respuesta_json
 
 router = APIRouter(prefix="/citas", tags=["Citas"])
 
 cita_service = CitaService()
+disponibilidad_service = DisponibilidadService()
 
 
 @router.post("/", response_model=CitaResponse, status_code=status.HTTP_201_CREATED, summary="Crear cita")
@@ -38,10 +43,31 @@ async def create_cita(
     return await cita_service.create_cita(cita_data)
 
 
-@router.get("/", response_model=List[CitaResponse], summary="Listar citas")
+@router.post("/lote", response_model=ResultadoLote[CitaResponse], status_code=status.HTTP_207_MULTI_STATUS, summary="Crear citas en lote")
+async def create_citas_lote(
+    items: List[Dict[str, Any]] = Body(..., description="Citas a crear, con los mismos campos que POST /citas/"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Crear varias citas en una sola request
+    
+    - **items**: Lista de citas (máximo `BULK_MAX_ITEMS`), cada una con los campos de POST /citas/
+    
+    Cada cita se valida por separado (datos, médico, paciente, estado, consultorio y
+    choques de horario con citas existentes o con otras del mismo lote). Las válidas
+    se insertan juntas; el resultado indica, en el orden enviado, la cita creada o el error.
+    
+    Requiere autenticación
+    """
+    return await cita_service.create_citas_lote(items)
+
+
+@router.get("/", response_model=Union[List[CitaResponse], Pagina[CitaResponse]], summary="Listar citas")
 async def get_citas(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(CitaResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -49,16 +75,23 @@ async def get_citas(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await cita_service.get_citas(skip, limit)
+    result = await cita_service.get_citas(skip, limit, cursor, fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
 
 
-@router.get("/detalles", response_model=List[CitaConDetalles], summary="Listar citas con detalles")
+@router.get("/detalles", response_model=Union[List[CitaConDetalles], Pagina[CitaConDetalles]], summary="Listar citas con detalles")
 async def get_citas_with_details(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -66,22 +99,109 @@ async def get_citas_with_details(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
     
     Requiere autenticación
     """
-    return await cita_service.get_citas_with_details(skip, limit)
+    return await cita_service.get_citas_with_details(skip, limit, cursor)
 
 
 @router.get("/pendientes-pago", response_model=List[CitaResponse], summary="Obtener citas pendientes de pago")
 async def get_citas_pendientes_pago(
+    fields: Optional[List[str]] = Depends(get_fields(CitaResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Obtener citas pendientes de pago
     
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
+    
     Requiere autenticación
     """
-    return await cita_service.get_citas_pendientes_pago()
+    result = await cita_service.get_citas_pendientes_pago(fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
+
+
+@router.get("/disponibilidad", response_model=List[dict], summary="Buscar disponibilidad por especialidad")
+async def buscar_disponibilidad(
+    especialidad_id: UUID,
+    fecha_inicio: date,
+    fecha_fin: date,
+    consultorio_id: Optional[UUID] = None,
+    duracion: Optional[int] = Query(None, ge=5, le=480, description="Duración del horario en minutos"),
+    orden: str = Query("fecha", pattern="^(fecha|calificacion)$", description="Ordenar por fecha o calificacion"),
+    limit: int = Query(20, ge=1, le=100, description="Número máximo de médicos"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Buscar el primer horario libre de cada médico de una especialidad
+    
+    - **especialidad_id**: ID de la especialidad
+    - **fecha_inicio**: Fecha inicial en formato YYYY-MM-DD
+    - **fecha_fin**: Fecha final en formato YYYY-MM-DD (máximo 31 días)
+    - **consultorio_id**: Solo horarios en que el consultorio también esté libre
+    - **duracion**: Duración en minutos (por defecto la de la especialidad)
+    - **orden**: `fecha` (primera disponibilidad) o `calificacion` (calificación promedio)
+    - **limit**: Número máximo de médicos a retornar
+    
+    Retorna por cada médico su primer horario libre:
+    - medico_id, nombre, apellidos, calificacion_promedio
+    - fecha, hora_inicio, hora_fin
+    
+    Requiere autenticación
+    """
+    return await disponibilidad_service.buscar(
+        especialidad_id, fecha_inicio, fecha_fin, consultorio_id, duracion, orden, limit
+    )
+
+
+@router.get("/agenda", response_model=List[CitaAgenda], summary="Agenda de citas del día o de la semana")
+async def get_agenda(
+    fecha: date,
+    vista: str = Query("dia", pattern="^(dia|semana)$", description="dia o semana (lunes a domingo de la fecha)"),
+    medico_id: Optional[UUID] = None,
+    consultorio_id: Optional[UUID] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Obtener la agenda de citas con los nombres de paciente, médico, especialidad,
+    consultorio y estado ya resueltos, ordenada por fecha y hora
+    
+    - **fecha**: Fecha en formato YYYY-MM-DD
+    - **vista**: `dia` (solo la fecha) o `semana` (lunes a domingo de la semana de la fecha)
+    - **medico_id**: Solo las citas de este médico (opcional)
+    - **consultorio_id**: Solo las citas de este consultorio (opcional)
+    
+    La respuesta se transmite por partes a medida que se lee de la base de datos
+    
+    Requiere autenticación
+    """
+    # Se transmite por partes: la respuesta no pasa por response_model
+    return StreamingResponse(
+        await cita_service.get_agenda(fecha, vista, medico_id, consultorio_id),
+        media_type="application/json"
+    )
+
+
+@router.get("/mias", response_model=List[CitaConDetalles], summary="Obtener citas del usuario actual")
+async def get_mis_citas(identidad: dict = Depends(get_current_identidad)):
+    """
+    Obtener las citas del usuario autenticado: las suyas como paciente y,
+    si es médico, las que atiende
+    
+    El paciente y el médico salen de la identidad del request, sin buscarlos por usuario.
+    
+    Requiere autenticación
+    """
+    if not identidad["paciente"] and not identidad["medico"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="El usuario no es paciente ni médico"
+        )
+    return await cita_service.get_citas_by_identidad(identidad)
 
 
 @router.get("/{cita_id}", response_model=CitaResponse, summary="Obtener cita por ID")
@@ -164,22 +284,29 @@ async def get_citas_by_medico(
 @router.get("/fecha/{fecha}", response_model=List[CitaResponse], summary="Obtener citas por fecha")
 async def get_citas_by_fecha(
     fecha: date,
+    fields: Optional[List[str]] = Depends(get_fields(CitaResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Obtener citas de una fecha específica
     
     - **fecha**: Fecha en formato YYYY-MM-DD
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await cita_service.get_citas_by_fecha(fecha)
+    result = await cita_service.get_citas_by_fecha(fecha, fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
 
 
 @router.get("/rango/{fecha_inicio}/{fecha_fin}", response_model=List[CitaResponse], summary="Obtener citas por rango de fechas")
 async def get_citas_by_fecha_range(
     fecha_inicio: date,
     fecha_fin: date,
+    fields: Optional[List[str]] = Depends(get_fields(CitaResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -187,10 +314,15 @@ async def get_citas_by_fecha_range(
     
     - **fecha_inicio**: Fecha de inicio en formato YYYY-MM-DD
     - **fecha_fin**: Fecha de fin en formato YYYY-MM-DD
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await cita_service.get_citas_by_fecha_range(fecha_inicio, fecha_fin)
+    result = await cita_service.get_citas_by_fecha_range(fecha_inicio, fecha_fin, fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
 
 
 @router.post("/{cita_id}/pagar", response_model=CitaResponse, summary="Marcar cita como pagada")
@@ -212,6 +344,7 @@ async def marcar_cita_como_pagada(
 async def get_horarios_disponibles(
     medico_id: UUID,
     fecha: date,
+    duracion: Optional[int] = Query(None, ge=5, le=480, description="Duración del horario en minutos"),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -219,11 +352,16 @@ async def get_horarios_disponibles(
     
     - **medico_id**: ID del médico
     - **fecha**: Fecha en formato YYYY-MM-DD
+    - **duracion**: Duración en minutos (por defecto la del horario de atención o la de la especialidad del médico)
+    
+    Los horarios salen del horario de atención del médico (de 9:00 a 17:00 si no
+    tiene uno registrado), sin feriados, ausencias ni citas ocupadas.
     
     Retorna una lista de horarios disponibles con formato:
     - hora_inicio: Hora de inicio en formato HH:MM:SS
     - hora_fin: Hora de fin en formato HH:MM:SS
+    - consultorio_id: Consultorio del bloque de atención (o null)
     
     Requiere autenticación
     """
-    return await cita_service.get_horarios_disponibles(medico_id, fecha)
+    return await cita_service.get_horarios_disponibles(medico_id, fecha, duracion)
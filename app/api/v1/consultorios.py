@@ -1,13 +1,15 @@
 """
 Endpoints para la gestión de consultorios
 """
-from typing import List
+from datetime import date, time
+from typing import List, Optional, Union
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Request
 
 from app.models.consultorio import Consultorio, ConsultorioCreate, ConsultorioUpdate, ConsultorioResponse
+from app.models.paginacion import Pagina
 from app.services.consultorio_service import ConsultorioService
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_cursor, get_fields, respuesta_cacheada
 
 router = APIRouter(prefix="/consultorios", tags=["Consultorios"])
 
@@ -34,10 +36,13 @@ async def create_consultorio(
     return await consultorio_service.create_consultorio(consultorio_data)
 
 
-@router.get("/", response_model=List[ConsultorioResponse], summary="Listar consultorios")
+@router.get("/", response_model=Union[List[ConsultorioResponse], Pagina[ConsultorioResponse]], summary="Listar consultorios")
 async def get_consultorios(
+    request: Request,
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(ConsultorioResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -45,16 +50,24 @@ async def get_consultorios(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await consultorio_service.get_consultorios(skip, limit)
+    # Datos de referencia: cacheados en memoria y con ETag (la respuesta no pasa por response_model)
+    return await respuesta_cacheada(
+        request, "consultorios", lambda: consultorio_service.get_consultorios(skip, limit, cursor, fields)
+    )
 
 
-@router.get("/activos", response_model=List[ConsultorioResponse], summary="Listar consultorios activos")
+@router.get("/activos", response_model=Union[List[ConsultorioResponse], Pagina[ConsultorioResponse]], summary="Listar consultorios activos")
 async def get_consultorios_activos(
+    request: Request,
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(ConsultorioResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -62,10 +75,37 @@ async def get_consultorios_activos(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await consultorio_service.get_consultorios_activos(skip, limit)
+    # Datos de referencia: cacheados en memoria y con ETag (la respuesta no pasa por response_model)
+    return await respuesta_cacheada(
+        request, "consultorios", lambda: consultorio_service.get_consultorios_activos(skip, limit, cursor, fields)
+    )
+
+
+@router.get("/disponibles", response_model=List[ConsultorioResponse], summary="Consultorios disponibles en un horario")
+async def get_consultorios_disponibles(
+    fecha: date = Query(..., description="Fecha (YYYY-MM-DD)"),
+    hora_inicio: time = Query(..., description="Hora de inicio (HH:MM)"),
+    hora_fin: time = Query(..., description="Hora de fin (HH:MM)"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Obtener los consultorios activos que pueden recibir una cita más en un horario
+    
+    Un consultorio está disponible si sus citas simultáneas dentro del horario
+    no alcanzan su capacidad.
+    
+    - **fecha**: Fecha de la cita
+    - **hora_inicio**: Hora de inicio
+    - **hora_fin**: Hora de fin
+    
+    Requiere autenticación
+    """
+    return await consultorio_service.get_consultorios_disponibles(fecha, hora_inicio, hora_fin)
 
 
 @router.get("/{consultorio_id}", response_model=ConsultorioResponse, summary="Obtener consultorio por ID")
@@ -1,13 +1,14 @@
 """
 Endpoints para la gestión de especialidades médicas
 """
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 
 from app.models.especialidad import Especialidad, EspecialidadCreate, EspecialidadUpdate, EspecialidadResponse
+from app.models.paginacion import Pagina
 from app.services.especialidad_service import EspecialidadService
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_cursor, get_fields, respuesta_cacheada
 
 router = APIRouter(prefix="/especialidades", tags=["Especialidades"])
 
@@ -33,10 +34,13 @@ async def create_especialidad(
     return await especialidad_service.create_especialidad(especialidad_data)
 
 
-@router.get("/", response_model=List[EspecialidadResponse], summary="Listar especialidades")
+@router.get("/", response_model=Union[List[EspecialidadResponse], Pagina[EspecialidadResponse]], summary="Listar especialidades")
 async def get_especialidades(
+    request: Request,
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(EspecialidadResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -44,16 +48,24 @@ async def get_especialidades(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await especialidad_service.get_especialidades(skip, limit)
+    # Datos de referencia: cacheados en memoria y con ETag (la respuesta no pasa por response_model)
+    return await respuesta_cacheada(
+        request, "especialidades", lambda: especialidad_service.get_especialidades(skip, limit, cursor, fields)
+    )
 
 
-@router.get("/activas", response_model=List[EspecialidadResponse], summary="Listar especialidades activas")
+@router.get("/activas", response_model=Union[List[EspecialidadResponse], Pagina[EspecialidadResponse]], summary="Listar especialidades activas")
 async def get_especialidades_activas(
+    request: Request,
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(EspecialidadResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -61,10 +73,15 @@ async def get_especialidades_activas(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await especialidad_service.get_especialidades_activas(skip, limit)
+    # Datos de referencia: cacheados en memoria y con ETag (la respuesta no pasa por response_model)
+    return await respuesta_cacheada(
+        request, "especialidades", lambda: especialidad_service.get_especialidades_activas(skip, limit, cursor, fields)
+    )
 
 
 @router.get("/{especialidad_id}", response_model=EspecialidadResponse, summary="Obtener especialidad por ID")
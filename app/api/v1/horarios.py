@@ -0,0 +1,141 @@
+"""
+Endpoints para la gestión de horarios de atención y excepciones (feriados, ausencias)
+"""
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, status, Query
+
+from app.models.horario_atencion import (
+    HorarioAtencionCreate, HorarioAtencionUpdate, HorarioAtencionResponse,
+    ExcepcionHorarioCreate, ExcepcionHorarioResponse
+)
+from app.services.horario_atencion_service import HorarioAtencionService
+from app.api.dependencies import get_current_user
+
+router = APIRouter(prefix="/horarios", tags=["Horarios de atención"])
+
+horario_service = HorarioAtencionService()
+
+
+@router.post("/", response_model=HorarioAtencionResponse, status_code=status.HTTP_201_CREATED, summary="Crear horario de atención")
+async def create_horario(
+    horario_data: HorarioAtencionCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Crear un bloque de atención semanal de un médico
+    
+    Un médico sin horarios registrados atiende de 9:00 a 17:00 todos los días.
+    
+    - **medico_id**: ID del médico
+    - **dia_semana**: Día de la semana (0 = lunes ... 6 = domingo)
+    - **hora_inicio**: Hora de inicio (múltiplo de 5 minutos)
+    - **hora_fin**: Hora de fin (múltiplo de 5 minutos)
+    - **duracion_turno**: Minutos por turno (opcional, por defecto el de la especialidad)
+    - **consultorio_id**: Consultorio del bloque (opcional)
+    - **activo**: Si el bloque está activo (por defecto True)
+    
+    Requiere autenticación
+    """
+    return await horario_service.create_horario(horario_data)
+
+
+@router.get("/medico/{medico_id}", response_model=List[HorarioAtencionResponse], summary="Horarios de atención de un médico")
+async def get_horarios_by_medico(
+    medico_id: UUID,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Obtener los bloques de atención de un médico ordenados por día y hora
+    
+    - **medico_id**: ID único del médico
+    
+    Requiere autenticación
+    """
+    return await horario_service.get_horarios_by_medico(medico_id)
+
+
+@router.post("/excepciones", response_model=ExcepcionHorarioResponse, status_code=status.HTTP_201_CREATED, summary="Crear excepción de horario")
+async def create_excepcion(
+    excepcion_data: ExcepcionHorarioCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Registrar un feriado o una ausencia
+    
+    - **medico_id**: ID del médico (opcional; sin médico aplica a todos)
+    - **fecha**: Fecha de la excepción
+    - **hora_inicio**: Hora de inicio (opcional; sin horas se bloquea el día completo)
+    - **hora_fin**: Hora de fin (opcional)
+    - **motivo**: Motivo (opcional)
+    
+    Requiere autenticación
+    """
+    return await horario_service.create_excepcion(excepcion_data)
+
+
+@router.get("/excepciones", response_model=List[ExcepcionHorarioResponse], summary="Listar excepciones de horario")
+async def get_excepciones(
+    fecha_inicio: date = Query(..., description="Fecha de inicio (YYYY-MM-DD)"),
+    fecha_fin: date = Query(..., description="Fecha de fin (YYYY-MM-DD)"),
+    medico_id: Optional[UUID] = Query(None, description="Filtrar por médico (incluye los feriados)"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Obtener las excepciones de horario de un rango de fechas
+    
+    - **fecha_inicio**: Fecha de inicio del rango
+    - **fecha_fin**: Fecha de fin del rango
+    - **medico_id**: Las del médico más las generales (opcional; por defecto todas)
+    
+    Requiere autenticación
+    """
+    return await horario_service.get_excepciones(fecha_inicio, fecha_fin, medico_id)
+
+
+@router.delete("/excepciones/{excepcion_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Eliminar excepción de horario")
+async def delete_excepcion(
+    excepcion_id: UUID,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Eliminar una excepción de horario
+    
+    - **excepcion_id**: ID único de la excepción
+    
+    Requiere autenticación
+    """
+    await horario_service.delete_excepcion(excepcion_id)
+
+
+@router.put("/{horario_id}", response_model=HorarioAtencionResponse, summary="Actualizar horario de atención")
+async def update_horario(
+    horario_id: UUID,
+    horario_data: HorarioAtencionUpdate,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Actualizar un bloque de atención
+    
+    - **horario_id**: ID único del horario
+    - **horario_data**: Datos a actualizar (todos los campos son opcionales)
+    
+    Requiere autenticación
+    """
+    return await horario_service.update_horario(horario_id, horario_data)
+
+
+@router.delete("/{horario_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Eliminar horario de atención")
+async def delete_horario(
+    horario_id: UUID,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Eliminar un bloque de atención
+    
+    - **horario_id**: ID único del horario
+    
+    Requiere autenticación
+    """
+    await horario_service.delete_horario(horario_id)
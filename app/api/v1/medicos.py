@@ -1,13 +1,14 @@
 """
 Endpoints para la gestión de médicos
 """
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
 
 from app.models.medico import Medico, MedicoCreate, MedicoUpdate, MedicoResponse, MedicoConEspecialidad
+from app.models.paginacion import Pagina
 from app.services.medico_service import MedicoService
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_current_medico, get_cursor, get_fields, respuesta_json
 
 router = APIRouter(prefix="/medicos", tags=["Médicos"])
 
@@ -36,10 +37,12 @@ async def create_medico(
     return await medico_service.create_medico(medico_data)
 
 
-@router.get("/", response_model=List[MedicoResponse], summary="Listar médicos")
+@router.get("/", response_model=Union[List[MedicoResponse], Pagina[MedicoResponse]], summary="Listar médicos")
 async def get_medicos(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(MedicoResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -47,16 +50,23 @@ async def get_medicos(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await medico_service.get_medicos(skip, limit)
+    result = await medico_service.get_medicos(skip, limit, cursor, fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
 
 
-@router.get("/detalles", response_model=List[MedicoConEspecialidad], summary="Listar médicos con especialidad")
+@router.get("/detalles", response_model=Union[List[MedicoConEspecialidad], Pagina[MedicoConEspecialidad]], summary="Listar médicos con especialidad")
 async def get_medicos_with_especialidad(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -64,16 +74,19 @@ async def get_medicos_with_especialidad(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
     
     Requiere autenticación
     """
-    return await medico_service.get_medicos_with_especialidad(skip, limit)
+    return await medico_service.get_medicos_with_especialidad(skip, limit, cursor)
 
 
-@router.get("/disponibles", response_model=List[MedicoResponse], summary="Obtener médicos disponibles")
+@router.get("/disponibles", response_model=Union[List[MedicoResponse], Pagina[MedicoResponse]], summary="Obtener médicos disponibles")
 async def get_medicos_disponibles(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(MedicoResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -81,10 +94,28 @@ async def get_medicos_disponibles(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await medico_service.get_medicos_disponibles(skip, limit)
+    result = await medico_service.get_medicos_disponibles(skip, limit, cursor, fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
+
+
+@router.get("/me", response_model=MedicoResponse, summary="Obtener médico actual")
+async def get_medico_actual(medico: MedicoResponse = Depends(get_current_medico)):
+    """
+    Obtener el registro de médico del usuario autenticado
+    
+    Se resuelve con la identidad del request (sin consultas adicionales).
+    
+    Requiere autenticación
+    """
+    return medico
 
 
 @router.get("/{medico_id}", response_model=MedicoResponse, summary="Obtener médico por ID")
@@ -191,7 +222,10 @@ async def update_calificacion_promedio(
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Actualizar calificación promedio de un médico basada en sus calificaciones
+    Obtener la calificación promedio vigente de un médico
+    
+    El promedio lo mantiene la base en cada cambio de calificación; se conserva
+    por compatibilidad y no escribe nada.
     
     - **medico_id**: ID del médico
     
@@ -1,13 +1,17 @@
 """
 Endpoints para la gestión de notificaciones
 """
-from typing import List
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 
-from app.models.notificacion import Notificacion, NotificacionCreate, NotificacionUpdate, NotificacionResponse
+from app.models.notificacion import Notificacion, NotificacionCreate, NotificacionUpdate, NotificacionResponse, ContadorNotificaciones
+from app.models.lote import ResultadoLote
+from app.models.paginacion import Pagina
 from app.services.notificacion_service import NotificacionService
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_cursor, get_fields, respuesta_json
 
 router = APIRouter(prefix="/notificaciones", tags=["Notificaciones"])
 
@@ -33,10 +37,47 @@ async def create_notificacion(
     return await notificacion_service.create_notificacion(notificacion_data)
 
 
-@router.get("/", response_model=List[NotificacionResponse], summary="Listar notificaciones")
+@router.post("/lote", response_model=ResultadoLote[NotificacionResponse], status_code=status.HTTP_207_MULTI_STATUS, summary="Crear notificaciones en lote")
+async def create_notificaciones_lote(
+    items: List[Dict[str, Any]] = Body(..., description="Notificaciones a crear, con los mismos campos que POST /notificaciones/"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Crear varias notificaciones en una sola request
+    
+    - **items**: Lista de notificaciones (máximo `BULK_MAX_ITEMS`), cada una con los campos de POST /notificaciones/
+    
+    Las notificaciones válidas se insertan juntas; el resultado indica, en el orden
+    enviado, la notificación creada o el error.
+    
+    Requiere autenticación
+    """
+    return await notificacion_service.create_notificaciones_lote(items)
+
+
+@router.post("/leer", response_model=List[NotificacionResponse], summary="Marcar varias notificaciones como leídas")
+async def marcar_como_leidas(
+    notificacion_ids: List[UUID] = Body(..., description="IDs de las notificaciones"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Marcar varias notificaciones como leídas con una sola actualización
+    
+    - **notificacion_ids**: Lista de IDs (máximo `BULK_MAX_ITEMS`)
+    
+    Retorna las notificaciones actualizadas
+    
+    Requiere autenticación
+    """
+    return await notificacion_service.marcar_como_leidas(notificacion_ids)
+
+
+@router.get("/", response_model=Union[List[NotificacionResponse], Pagina[NotificacionResponse]], summary="Listar notificaciones")
 async def get_notificaciones(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(NotificacionResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -44,10 +85,98 @@ async def get_notificaciones(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
+    
+    Requiere autenticación
+    """
+    result = await notificacion_service.get_notificaciones(skip, limit, cursor, fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
+
+
+@router.get("/bandeja", response_model=Pagina[NotificacionResponse], summary="Bandeja de notificaciones del usuario actual")
+async def get_bandeja(
+    limit: int = Query(20, ge=1, le=100, description="Número máximo de notificaciones por página"),
+    cursor: Optional[str] = Depends(get_cursor),
+    solo_no_leidas: bool = Query(False, description="Solo las notificaciones no leídas"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Obtener la bandeja del usuario actual, más recientes primero
+    
+    - **limit**: Número máximo de notificaciones por página (máximo 100)
+    - **cursor**: `next_cursor` de la página anterior (vacío para la primera)
+    - **solo_no_leidas**: Solo las notificaciones no leídas
+    
+    Requiere autenticación
+    """
+    return await notificacion_service.get_bandeja(current_user["id"], limit, cursor, solo_no_leidas)
+
+
+@router.get("/bandeja/contador", response_model=ContadorNotificaciones, summary="Contador de notificaciones no leídas")
+async def get_contador(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Obtener el total de notificaciones y las no leídas del usuario actual
+    
+    Se lee de un contador mantenido por la base de datos, sin contar filas
+    
+    Requiere autenticación
+    """
+    return await notificacion_service.get_contador(current_user["id"])
+
+
+@router.get("/stream", summary="Stream de notificaciones (Server-Sent Events)")
+async def stream_notificaciones(
+    desde: Optional[datetime] = Query(None, description="Reenviar las notificaciones creadas después de este instante"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Recibir las notificaciones del usuario actual a medida que se crean
+    
+    - **desde**: Reenviar primero las notificaciones creadas después de este instante
+    
+    Respuesta `text/event-stream` con los eventos `contador` (al conectar),
+    `notificacion` y `leidas`; `resincronizar` indica que se perdieron eventos y hay
+    que volver a consultar la bandeja. Al reconectar se usa el encabezado
+    `Last-Event-ID` en lugar de `desde`.
+    
+    Requiere autenticación
+    """
+    if last_event_id:
+        try:
+            desde = datetime.fromisoformat(last_event_id)
+        except ValueError:
+            pass
+    return StreamingResponse(
+        await notificacion_service.stream_notificaciones(current_user["id"], desde),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/espera", response_model=List[NotificacionResponse], summary="Esperar notificaciones nuevas (long-poll)")
+async def esperar_notificaciones(
+    desde: Optional[datetime] = Query(None, description="created_at de la última notificación recibida"),
+    timeout: Optional[int] = Query(None, ge=1, le=60, description="Segundos máximos de espera"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Esperar notificaciones nuevas del usuario actual
+    
+    - **desde**: `created_at` de la última notificación recibida; si ya hay más nuevas se responde de inmediato
+    - **timeout**: Segundos máximos de espera (por defecto `NOTIFICATIONS_LONG_POLL_TIMEOUT`)
+    
+    Retorna lista vacía si no llegó ninguna antes del timeout
     
     Requiere autenticación
     """
-    return await notificacion_service.get_notificaciones(skip, limit)
+    return await notificacion_service.esperar_notificaciones(current_user["id"], desde, timeout)
 
 
 @router.get("/{notificacion_id}", response_model=NotificacionResponse, summary="Obtener notificación por ID")
@@ -1,13 +1,14 @@
 """
 Endpoints para la gestión de pacientes
 """
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 
 from app.models.paciente import Paciente, PacienteCreate, PacienteUpdate, PacienteResponse
+from app.models.paginacion import Pagina
 from app.services.paciente_service import PacienteService
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_current_paciente, get_cursor, get_fields, respuesta_json
 
 router = APIRouter(prefix="/pacientes", tags=["Pacientes"])
 
@@ -37,10 +38,12 @@ async def create_paciente(
     return await paciente_service.create_paciente(paciente_data)
 
 
-@router.get("/", response_model=List[PacienteResponse], summary="Listar pacientes")
+@router.get("/", response_model=Union[List[PacienteResponse], Pagina[PacienteResponse]], summary="Listar pacientes")
 async def get_pacientes(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(PacienteResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -48,10 +51,28 @@ async def get_pacientes(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await paciente_service.get_pacientes(skip, limit)
+    result = await paciente_service.get_pacientes(skip, limit, cursor, fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
+
+
+@router.get("/me", response_model=PacienteResponse, summary="Obtener paciente actual")
+async def get_paciente_actual(paciente: PacienteResponse = Depends(get_current_paciente)):
+    """
+    Obtener el registro de paciente del usuario autenticado
+    
+    Se resuelve con la identidad del request (sin consultas adicionales).
+    
+    Requiere autenticación
+    """
+    return paciente
 
 
 @router.get("/{paciente_id}", response_model=PacienteResponse, summary="Obtener paciente por ID")
@@ -0,0 +1,363 @@
+"""
+Endpoints de reportes (consultas de database_queries/ ejecutadas en la base de datos)
+"""
+from datetime import date
+from typing import Any, Dict, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.services.reporte_service import ReporteService, FORMATOS
+from app.api.dependencies import get_current_user
+
+router = APIRouter(prefix="/reportes", tags=["Reportes"])
+
+reporte_service = ReporteService()
+
+
+async def get_formato(
+    formato: str = Query("json", pattern="^(json|csv|ndjson)$", description="json (cacheado), csv o ndjson (por partes)")
+) -> str:
+    """Formato de salida del reporte"""
+    return formato
+
+
+async def responder(nombre: str, params: Dict[str, Any], formato: str) -> Response:
+    """Responder un reporte en el formato pedido"""
+    if formato == "json":
+        body = await reporte_service.get_reporte(nombre, params)
+        return Response(
+            content=body,
+            media_type=FORMATOS[formato],
+            headers={"Cache-Control": f"private, max-age={settings.report_cache_ttl}"}
+        )
+    return StreamingResponse(
+        await reporte_service.stream_reporte(nombre, params, formato),
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'}
+    )
+
+
+@router.get("/medicos-disponibles", summary="Médicos disponibles por especialidad")
+async def reporte_medicos_disponibles(
+    especialidad_id: Optional[UUID] = None,
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Médicos disponibles con su información completa, ordenados por especialidad y calificación
+    
+    - **especialidad_id**: Solo los médicos de esta especialidad (opcional)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("medicos-disponibles", {"especialidad_id": especialidad_id}, formato)
+
+
+@router.get("/citas-del-dia", summary="Citas del día")
+async def reporte_citas_del_dia(
+    fecha: Optional[date] = Query(None, description="Fecha (por defecto hoy)"),
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Citas de una fecha con paciente, médico, consultorio y estado
+    
+    - **fecha**: Fecha en formato YYYY-MM-DD (por defecto hoy)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("citas-del-dia", {"fecha": fecha or date.today()}, formato)
+
+
+@router.get("/top-medicos", summary="Médicos mejor calificados")
+async def reporte_top_medicos(
+    limite: int = Query(10, ge=1, le=100, description="Número de médicos"),
+    min_consultas: int = Query(5, ge=0, description="Consultas mínimas realizadas"),
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Médicos disponibles con mejor calificación promedio
+    
+    - **limite**: Número de médicos (máximo 100)
+    - **min_consultas**: Consultas mínimas realizadas
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("top-medicos", {"limite": limite, "min_consultas": min_consultas}, formato)
+
+
+@router.get("/ingresos-por-medico", summary="Ingresos por médico")
+async def reporte_ingresos_por_medico(
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Ingresos cobrados y pendientes de las citas completadas de cada médico
+    
+    - **fecha_inicio**: Desde esta fecha (opcional)
+    - **fecha_fin**: Hasta esta fecha (opcional)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("ingresos-por-medico", {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin}, formato)
+
+
+@router.get("/agenda-medico-semanal", summary="Agenda semanal de un médico")
+async def reporte_agenda_medico_semanal(
+    medico_id: UUID,
+    fecha: Optional[date] = Query(None, description="Una fecha de la semana (por defecto hoy)"),
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Citas de un médico de lunes a domingo
+    
+    - **medico_id**: ID del médico
+    - **fecha**: Una fecha de la semana (por defecto hoy)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("agenda-medico-semanal", {"medico_id": medico_id, "fecha": fecha or date.today()}, formato)
+
+
+@router.get("/pacientes-frecuentes", summary="Pacientes más frecuentes")
+async def reporte_pacientes_frecuentes(
+    limite: int = Query(20, ge=1, le=1000, description="Número de pacientes"),
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Pacientes con más citas, con asistencias, cancelaciones y total gastado
+    
+    - **limite**: Número de pacientes (máximo 1000)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("pacientes-frecuentes", {"limite": limite}, formato)
+
+
+@router.get("/disponibilidad-consultorios", summary="Disponibilidad de consultorios")
+async def reporte_disponibilidad_consultorios(
+    fecha: Optional[date] = Query(None, description="Fecha (por defecto hoy)"),
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Citas programadas y espacios disponibles de cada consultorio activo en una fecha
+    
+    - **fecha**: Fecha en formato YYYY-MM-DD (por defecto hoy)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("disponibilidad-consultorios", {"fecha": fecha or date.today()}, formato)
+
+
+@router.get("/citas-pendientes-pago", summary="Citas pendientes de pago")
+async def reporte_citas_pendientes_pago(
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Citas completadas que aún no han sido pagadas, con su antigüedad
+    
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("citas-pendientes-pago", {}, formato)
+
+
+@router.get("/estadisticas-especialidades", summary="Estadísticas por especialidad")
+async def reporte_estadisticas_especialidades(
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Médicos, citas, ingresos y calificaciones de cada especialidad activa
+    
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("estadisticas-especialidades", {}, formato)
+
+
+@router.get("/citas-sin-recordatorio", summary="Citas próximas sin recordatorio")
+async def reporte_citas_sin_recordatorio(
+    dias: int = Query(7, ge=0, le=90, description="Días hacia adelante"),
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Citas programadas de los próximos días que aún no tienen recordatorio enviado
+    
+    - **dias**: Días hacia adelante desde hoy (máximo 90)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("citas-sin-recordatorio", {"dias": dias}, formato)
+
+
+@router.get("/historial-paciente", summary="Historial médico de un paciente")
+async def reporte_historial_paciente(
+    paciente_id: UUID,
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Todas las citas de un paciente con diagnóstico, tratamiento y calificación
+    
+    - **paciente_id**: ID del paciente
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("historial-paciente", {"paciente_id": paciente_id}, formato)
+
+
+@router.get("/mensual-citas", summary="Reporte mensual de citas")
+async def reporte_mensual_citas(
+    fecha: Optional[date] = Query(None, description="Una fecha del mes (por defecto hoy)"),
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Citas por día del mes, por estado, con ingresos y duración promedio
+    
+    - **fecha**: Una fecha del mes (por defecto hoy)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("mensual-citas", {"fecha": fecha or date.today()}, formato)
+
+
+@router.get("/calificaciones-recientes", summary="Calificaciones recientes")
+async def reporte_calificaciones_recientes(
+    limite: int = Query(20, ge=1, le=1000, description="Número de calificaciones"),
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Últimas calificaciones recibidas con médico, paciente y cita
+    
+    - **limite**: Número de calificaciones (máximo 1000)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("calificaciones-recientes", {"limite": limite}, formato)
+
+
+@router.get("/notificaciones-pendientes", summary="Notificaciones pendientes por usuario")
+async def reporte_notificaciones_pendientes(
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Notificaciones no leídas de cada usuario activo, por tipo
+    
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("notificaciones-pendientes", {}, formato)
+
+
+@router.get("/notificaciones-pendientes/detalle", summary="Detalle de notificaciones pendientes")
+async def reporte_notificaciones_pendientes_detalle(
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Cada notificación no leída con su antigüedad en horas
+    
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("notificaciones-pendientes-detalle", {}, formato)
+
+
+@router.get("/ausentismo", summary="Análisis de ausentismo")
+async def reporte_ausentismo(
+    min_citas: int = Query(3, ge=1, description="Citas mínimas del paciente"),
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Pacientes con su porcentaje de inasistencias y cancelaciones y nivel de riesgo
+    
+    - **min_citas**: Citas mínimas del paciente para incluirlo
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder("ausentismo", {"min_citas": min_citas}, formato)
+
+
+@router.get("/estadisticas-medico-dia", summary="Estadísticas de citas por médico y día")
+async def reporte_estadisticas_medico_dia(
+    fecha_inicio: date,
+    fecha_fin: date,
+    medico_id: Optional[UUID] = None,
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Citas por estado, pagos, precio y duración promedio de cada médico en cada día del rango
+    
+    Se lee de los acumulados de citas mantenidos por la base de datos.
+    
+    - **fecha_inicio**: Desde esta fecha
+    - **fecha_fin**: Hasta esta fecha
+    - **medico_id**: Solo este médico (opcional)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder(
+        "estadisticas-medico-dia",
+        {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin, "medico_id": medico_id},
+        formato
+    )
+
+
+@router.get("/estadisticas-especialidad-mes", summary="Estadísticas de citas por especialidad y mes")
+async def reporte_estadisticas_especialidad_mes(
+    mes_inicio: Optional[date] = Query(None, description="Una fecha del primer mes (opcional)"),
+    mes_fin: Optional[date] = Query(None, description="Una fecha del último mes (opcional)"),
+    especialidad_id: Optional[UUID] = None,
+    formato: str = Depends(get_formato),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Citas por estado, pagos, precio y duración promedio de cada especialidad en cada mes
+    
+    Se lee de los acumulados de citas mantenidos por la base de datos.
+    
+    - **mes_inicio**: Una fecha del primer mes (opcional)
+    - **mes_fin**: Una fecha del último mes (opcional)
+    - **especialidad_id**: Solo esta especialidad (opcional)
+    - **formato**: json, csv o ndjson
+    
+    Requiere autenticación
+    """
+    return await responder(
+        "estadisticas-especialidad-mes",
+        {"mes_inicio": mes_inicio, "mes_fin": mes_fin, "especialidad_id": especialidad_id},
+        formato
+    )
@@ -12,6 +12,8 @@ from .especialidades import router as especialidades_router
 from .consultorios import router as consultorios_router
 from .calificaciones import router as calificaciones_router
 from .notificaciones import router as notificaciones_router
+from .reportes import router as reportes_router
+from .horarios import router as horarios_router
 
 # Router principal de la API v1
 api_router = APIRouter(prefix="/api/v1")
@@ -26,3 +28,5 @@ api_router.include_router(especialidades_router)
 api_router.include_router(consultorios_router)
 api_router.include_router(calificaciones_router)
 api_router.include_router(notificaciones_router)
+api_router.include_router(reportes_router)
+api_router.include_router(horarios_router)
@@ -1,13 +1,14 @@
 """
 Endpoints para la gestión de usuarios
 """
-from typing import List
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 
 from app.models.usuario import Usuario, UsuarioCreate, UsuarioUpdate, UsuarioResponse
+from app.models.paginacion import Pagina
 from app.services.usuario_service import UsuarioService
-from app.api.dependencies import get_current_user, require_role
+from app.api.dependencies import get_current_user, require_role, get_cursor, get_fields, respuesta_json
 
 router = APIRouter(prefix="/usuarios", tags=["Usuarios"])
 
@@ -34,10 +35,12 @@ async def create_usuario(usuario_data: UsuarioCreate):
     return await usuario_service.create_usuario(usuario_data)
 
 
-@router.get("/", response_model=List[UsuarioResponse], summary="Listar usuarios")
+@router.get("/", response_model=Union[List[UsuarioResponse], Pagina[UsuarioResponse]], summary="Listar usuarios")
 async def get_usuarios(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(UsuarioResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -45,16 +48,24 @@ async def get_usuarios(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await usuario_service.get_usuarios(skip, limit)
+    result = await usuario_service.get_usuarios(skip, limit, cursor, fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
 
 
-@router.get("/activos", response_model=List[UsuarioResponse], summary="Listar usuarios activos")
+@router.get("/activos", response_model=Union[List[UsuarioResponse], Pagina[UsuarioResponse]], summary="Listar usuarios activos")
 async def get_usuarios_activos(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros a retornar"),
+    cursor: Optional[str] = Depends(get_cursor),
+    fields: Optional[List[str]] = Depends(get_fields(UsuarioResponse)),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -62,10 +73,16 @@ async def get_usuarios_activos(
     
     - **skip**: Número de registros a omitir (para paginación)
     - **limit**: Número máximo de registros a retornar (máximo 1000)
+    - **cursor**: Cursor de paginación por keyset; si se envía, la respuesta es `{items, next_cursor}`
+    - **fields**: Campos a retornar separados por coma (por defecto todos)
     
     Requiere autenticación
     """
-    return await usuario_service.get_usuarios_activos(skip, limit)
+    result = await usuario_service.get_usuarios_activos(skip, limit, cursor, fields)
+    if fields:
+        # La respuesta proyectada no cumple el response_model completo
+        return respuesta_json(result)
+    return result
 
 
 @router.get("/{usuario_id}", response_model=UsuarioResponse, summary="Obtener usuario por ID")
@@ -18,6 +18,77 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Verificación de tokens de Supabase Auth
+    # "remote": valida cada token con Supabase Auth (auth.get_user)
+    # "local": verifica la firma del JWT con el secreto del proyecto o el JWKS
+    auth_mode: str = "remote"
+    supabase_jwt_secret: Optional[str] = None
+    supabase_jwt_audience: str = "authenticated"
+    auth_cache_max_entries: int = 10000
+    auth_cache_ttl: int = 300  # Reutilización de la firma verificada; `activo` y rol no se cachean aquí
+    auth_jwks_refresh_interval: int = 60  # Segundos mínimos entre descargas del JWKS
+    
+    # Segundos que se reutiliza la identidad (rol, paciente, médico) entre requests.
+    # Las escrituras la invalidan solo en la réplica que las hace: es también el plazo
+    # máximo en que otra réplica acepta a un usuario desactivado o con el rol anterior
+    identity_cache_ttl: int = 5
+    
+    # Índice de disponibilidad en memoria por (médico, fecha)
+    # El TTL acota cuánto tarda una réplica en ver reservas hechas por otra
+    availability_cache_ttl: int = 60
+    availability_cache_max_entries: int = 50000
+    
+    # Log de acceso: una línea JSON por request, escrita desde un hilo aparte
+    access_log_enabled: bool = True
+    access_log_sample_rate: float = 1.0  # Fracción de requests registradas (0.0 - 1.0)
+    access_log_slow_ms: float = 1000.0  # Requests más lentas se registran siempre
+    access_log_headers: bool = False  # Incluir encabezados (Authorization y cookies se ocultan)
+    
+    # Cache de datos de referencia (especialidades, consultorios, estados, roles)
+    reference_cache_ttl: int = 300
+    reference_cache_max_entries: int = 1000
+    
+    # Cache de reportes (GET /reportes/*) por reporte y parámetros
+    report_cache_ttl: int = 60  # Segundos que el resultado se considera vigente
+    report_cache_stale: int = 300  # Segundos adicionales que se sirve mientras se recalcula
+    report_cache_max_entries: int = 500
+    
+    # Operaciones en lote (POST /citas/lote, POST /notificaciones/lote)
+    bulk_max_items: int = 1000  # Elementos máximos por request
+    
+    # Notificaciones en tiempo real (GET /notificaciones/stream y GET /notificaciones/espera)
+    notifications_stream_heartbeat: int = 15  # Segundos entre keep-alives del stream SSE
+    notifications_stream_queue_size: int = 100  # Eventos pendientes por conexión antes de pedir resincronizar
+    notifications_long_poll_timeout: int = 25  # Espera máxima por defecto del long-poll, en segundos
+    
+    # Métricas en /metrics (formato Prometheus)
+    metrics_enabled: bool = True
+    # Token que debe enviar el scraper (Authorization: Bearer); sin token /metrics responde 404
+    metrics_token: Optional[str] = None
+    metrics_max_series: int = 500  # Series por métrica; el exceso se agrupa con etiqueta "other"
+    
+    # Configuración de acceso a datos
+    # "async": repositorios sobre AsyncPostgrestClient (no bloquea el event loop)
+    # "sync": cliente síncrono de supabase-py ejecutado en un threadpool
+    database_backend: str = "async"
+    
+    # Pool HTTP compartido por los clientes de PostgREST (anon y service role)
+    db_pool_max_connections: int = 50
+    db_pool_max_keepalive: int = 20
+    db_pool_keepalive_expiry: float = 30.0
+    db_http2: bool = False  # Requiere el extra httpx[http2]
+    db_connect_timeout: float = 5.0
+    db_request_timeout: float = 15.0
+    # Filas por página en las lecturas que necesitan el resultado completo
+    # No debe superar max-rows de PostgREST (1000 por defecto en Supabase)
+    db_page_size: int = 1000
+    # IDs por consulta en los filtros in.(...) (mantiene la URL bajo el límite del gateway)
+    db_in_chunk_size: int = 150
+    
+    # Datos iniciales: cargarlos al iniciar si la versión registrada no está al día
+    # Con False solo se avisa; se cargan con `python -m app.database.seed_data`
+    seed_on_startup: bool = True
+    
     # Configuración de la aplicación
     debug: bool = False
     environment: str = "development"
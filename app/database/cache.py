@@ -0,0 +1,145 @@
+"""
+Caches en memoria: datos de referencia (especialidades, consultorios, estados, roles)
+y resultados de reportes
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Awaitable, Dict, Hashable, Tuple
+
+from app.config import settings
+from app.middleware.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Marca de ausencia: un valor cacheado puede ser None
+MISSING = object()
+
+
+class ReferenceCache:
+    """
+    Cache con TTL agrupado por tabla.
+    
+    Las escrituras invalidan la tabla completa; el TTL acota cuánto tarda
+    una réplica en ver los cambios hechos por otra.
+    """
+    
+    def __init__(self):
+        # tabla -> clave -> (expira_en, valor)
+        self._tables: Dict[str, Dict[Hashable, Tuple[float, Any]]] = {}
+        # tabla -> número de invalidaciones (descarta cargas iniciadas antes de una escritura)
+        self._generations: Dict[str, int] = {}
+    
+    def get(self, table: str, key: Hashable) -> Any:
+        """Obtener un valor vigente, o MISSING"""
+        entry = self._tables.get(table, {}).get(key)
+        if entry is not None and entry[0] > time.time():
+            metrics.cache_requests.inc(table, "hit")
+            return entry[1]
+        metrics.cache_requests.inc(table, "miss")
+        return MISSING
+    
+    def set(self, table: str, key: Hashable, value: Any) -> None:
+        """Guardar un valor con el TTL configurado"""
+        if settings.reference_cache_ttl <= 0:
+            return
+        entries = self._tables.setdefault(table, {})
+        if key not in entries and len(entries) >= settings.reference_cache_max_entries:
+            now = time.time()
+            for stale in [k for k, (expires_at, _) in entries.items() if expires_at <= now]:
+                del entries[stale]
+            if len(entries) >= settings.reference_cache_max_entries:
+                return
+        entries[key] = (time.time() + settings.reference_cache_ttl, value)
+    
+    async def get_or_load(self, table: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Obtener un valor del cache o cargarlo con `loader`"""
+        value = self.get(table, key)
+        if value is MISSING:
+            generation = self._generations.get(table, 0)
+            value = await loader()
+            if self._generations.get(table, 0) == generation:
+                self.set(table, key, value)
+        return value
+    
+    def invalidate(self, table: str) -> None:
+        """Descartar todas las entradas de una tabla"""
+        self._tables.pop(table, None)
+        self._generations[table] = self._generations.get(table, 0) + 1
+
+
+reference_cache = ReferenceCache()
+
+
+class ReportCache:
+    """
+    Cache con TTL y stale-while-revalidate para resultados de reportes.
+    
+    Durante `ttl` segundos el valor se sirve tal cual. Durante los `stale` segundos
+    siguientes se sigue sirviendo mientras se recalcula en segundo plano, así que
+    solo la primera request (o la que llega con el valor ya vencido) espera la consulta.
+    Las cargas concurrentes de una misma clave comparten una sola consulta.
+    """
+    
+    def __init__(self):
+        # clave -> (fresco_hasta, servible_hasta, valor)
+        self._entries: Dict[Hashable, Tuple[float, float, Any]] = {}
+        # clave -> carga en curso
+        self._loading: Dict[Hashable, "asyncio.Task[Any]"] = {}
+    
+    async def get_or_load(self, name: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Obtener el valor de `key` (del reporte `name`) o cargarlo con `loader`"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            fresh_until, stale_until, value = entry
+            if now < fresh_until:
+                metrics.report_cache_requests.inc(name, "hit")
+                return value
+            if now < stale_until:
+                metrics.report_cache_requests.inc(name, "stale")
+                if key not in self._loading:
+                    self._start(key, loader)
+                return value
+        
+        metrics.report_cache_requests.inc(name, "miss")
+        task = self._loading.get(key) or self._start(key, loader)
+        return await asyncio.shield(task)
+    
+    def _start(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> "asyncio.Task[Any]":
+        async def load():
+            try:
+                value = await loader()
+                self._set(key, value)
+                return value
+            finally:
+                self._loading.pop(key, None)
+        
+        task = asyncio.ensure_future(load())
+        task.add_done_callback(self._log_failure)
+        self._loading[key] = task
+        return task
+    
+    def _set(self, key: Hashable, value: Any) -> None:
+        if settings.report_cache_ttl <= 0:
+            return
+        if key not in self._entries and len(self._entries) >= settings.report_cache_max_entries:
+            now = time.time()
+            for expired in [k for k, (_, stale_until, _) in self._entries.items() if stale_until <= now]:
+                del self._entries[expired]
+            if len(self._entries) >= settings.report_cache_max_entries:
+                # Descartar la entrada más antigua (orden de inserción)
+                del self._entries[next(iter(self._entries))]
+        now = time.time()
+        fresh_until = now + settings.report_cache_ttl
+        self._entries.pop(key, None)
+        self._entries[key] = (fresh_until, fresh_until + settings.report_cache_stale, value)
+    
+    @staticmethod
+    def _log_failure(task: "asyncio.Task[Any]") -> None:
+        # Si era una revalidación en segundo plano se sigue sirviendo el valor anterior
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Error al cargar un reporte: {task.exception()}")
+
+
+report_cache = ReportCache()
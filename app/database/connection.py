@@ -2,8 +2,12 @@
 Configuración de conexión a Supabase
 """
 from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from supabase_auth import AsyncGoTrueClient
 from app.config import settings
-from typing import Optional
+from app.database.transport import PooledTransport
+from typing import Optional, Union, Dict, Any
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +18,10 @@ class DatabaseConnection:
     
     _instance: Optional['DatabaseConnection'] = None
     _client: Optional[Client] = None
+    _transport: Optional[PooledTransport] = None
+    _async_client: Optional[AsyncPostgrestClient] = None
+    _async_service_client: Optional[AsyncPostgrestClient] = None
+    _auth_client: Optional[AsyncGoTrueClient] = None
     
     def __new__(cls) -> 'DatabaseConnection':
         if cls._instance is None:
@@ -36,6 +44,54 @@ class DatabaseConnection:
             logger.error(f"Error al conectar con Supabase: {e}")
             raise
     
+    @property
+    def transport(self) -> PooledTransport:
+        """Retorna el transporte HTTP compartido por los clientes asíncronos"""
+        if self._transport is None:
+            self._transport = PooledTransport(
+                max_connections=settings.db_pool_max_connections,
+                max_keepalive_connections=settings.db_pool_max_keepalive,
+                keepalive_expiry=settings.db_pool_keepalive_expiry,
+                http2=settings.db_http2
+            )
+            logger.info(
+                "Pool HTTP creado (max_connections=%s, keepalive=%s, http2=%s)",
+                settings.db_pool_max_connections,
+                settings.db_pool_max_keepalive,
+                settings.db_http2
+            )
+        return self._transport
+    
+    def _create_session(self, base_url: Any = "", headers: Optional[Dict[str, str]] = None) -> httpx.AsyncClient:
+        """Crea una sesión HTTP sobre el pool compartido"""
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(
+                settings.db_request_timeout,
+                connect=settings.db_connect_timeout
+            ),
+            transport=self.transport
+        )
+    
+    def _create_async_client(self, key: str) -> AsyncPostgrestClient:
+        """Crea un cliente asíncrono de PostgREST sobre el pool compartido"""
+        try:
+            # Los encabezados propios sustituyen a los de PostgREST: conservar Accept/Content-Type
+            headers = {
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+                "apikey": key,
+                "Authorization": f"Bearer {key}"
+            }
+            client = AsyncPostgrestClient(f"{settings.supabase_url}/rest/v1", headers=headers)
+            # Reemplazar la sesión por defecto para reutilizar el pool compartido
+            client.session = self._create_session(client.session.base_url, headers)
+            return client
+        except Exception as e:
+            logger.error(f"Error al crear cliente asíncrono de PostgREST: {e}")
+            raise
+    
     @property
     def client(self) -> Client:
         """Retorna el cliente de Supabase"""
@@ -43,16 +99,86 @@ class DatabaseConnection:
             self._connect()
         return self._client
     
-    def get_service_client(self) -> Client:
-        """Retorna el cliente de Supabase con service role key"""
-        try:
-            return create_client(
-                settings.supabase_url,
-                settings.supabase_service_role_key
+    @property
+    def async_client(self) -> AsyncPostgrestClient:
+        """Retorna el cliente asíncrono de PostgREST"""
+        if self._async_client is None:
+            self._async_client = self._create_async_client(settings.supabase_key)
+        return self._async_client
+    
+    @property
+    def async_service_client(self) -> AsyncPostgrestClient:
+        """Retorna el cliente asíncrono de PostgREST con service role key"""
+        if self._async_service_client is None:
+            self._async_service_client = self._create_async_client(settings.supabase_service_role_key)
+        return self._async_service_client
+    
+    @property
+    def auth_client(self) -> AsyncGoTrueClient:
+        """Retorna el cliente asíncrono de Supabase Auth sobre el pool compartido"""
+        if self._auth_client is None:
+            self._auth_client = AsyncGoTrueClient(
+                url=f"{settings.supabase_url}/auth/v1",
+                headers={
+                    "apikey": settings.supabase_key,
+                    "Authorization": f"Bearer {settings.supabase_key}"
+                },
+                http_client=self._create_session(),
+                # Cliente compartido entre requests: no guardar ni refrescar sesiones
+                auto_refresh_token=False,
+                persist_session=False
             )
-        except Exception as e:
-            logger.error(f"Error al crear cliente de servicio: {e}")
-            raise
+        return self._auth_client
+    
+    @property
+    def data_client(self) -> Union[Client, AsyncPostgrestClient]:
+        """Retorna el cliente usado por los repositorios según `database_backend`"""
+        if settings.database_backend == "async":
+            return self.async_client
+        return self.client
+    
+    @property
+    def service_data_client(self) -> AsyncPostgrestClient:
+        """
+        Retorna el cliente de los repositorios que necesitan la service role key
+        (escrituras que no dependen del usuario: datos iniciales, perfiles al registrar).
+        
+        Siempre es el cliente asíncrono: comparte el pool con `data_client` y
+        BaseRepository lo ejecuta igual con cualquiera de los dos backends.
+        """
+        return self.async_service_client
+    
+    async def open(self) -> None:
+        """Inicializa el pool y los clientes asíncronos"""
+        # Los repositorios y servicios conservan la referencia al cliente: tras un close() se renueva solo la sesión
+        for async_client in (self._async_client, self._async_service_client):
+            if async_client is not None and async_client.session.is_closed:
+                async_client.session = self._create_session(async_client.session.base_url, async_client.headers)
+        if self._auth_client is not None and self._auth_client._http_client.is_closed:
+            session = self._create_session()
+            self._auth_client._http_client = session
+            self._auth_client.admin._http_client = session
+        self.async_client
+        self.async_service_client
+        self.auth_client
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Retorna las estadísticas del pool HTTP compartido"""
+        if self._transport is None:
+            return {}
+        return self._transport.stats()
+    
+    async def close(self) -> None:
+        """Cierra las sesiones HTTP abiertas"""
+        for async_client in (self._async_client, self._async_service_client):
+            if async_client is not None:
+                await async_client.session.aclose()
+        if self._auth_client is not None:
+            await self._auth_client._http_client.aclose()
+        if self._transport is not None:
+            await self._transport.aclose()
+            self._transport = None
+            logger.info("Pool HTTP cerrado")
 
 
 # Instancia global de la conexión
@@ -1,169 +1,187 @@
 """
 Datos iniciales para la base de datos
+
+Se cargan con un upsert por tabla (on_conflict=nombre), por lo que pueden
+ejecutarse varias veces sin duplicar ni modificar filas existentes. Al iniciar,
+la API solo compara la versión registrada en metadatos_app con SEED_VERSION.
+
+Uso como comando independiente:
+    python -m app.database.seed_data
 """
-from app.database import db_connection
+import asyncio
 import logging
+import sys
+
+from app.config import settings
+from app.database import db_connection
+from app.repositories.especialidad_repository import EspecialidadRepository
+from app.repositories.estado_cita_repository import EstadoCitaRepository
+from app.repositories.metadato_repository import MetadatoRepository
+from app.repositories.rol_repository import RolRepository
 
 logger = logging.getLogger(__name__)
 
+# Incrementar al cambiar los datos iniciales para que se vuelvan a cargar
+SEED_VERSION = "1"
+SEED_VERSION_KEY = "seed_version"
+
+ROLES = [
+    {
+        "nombre": "Administrador",
+        "descripcion": "Administrador del sistema con acceso completo"
+    },
+    {
+        "nombre": "Medico",
+        "descripcion": "Médico que puede atender pacientes"
+    },
+    {
+        "nombre": "Paciente",
+        "descripcion": "Paciente que puede agendar citas"
+    }
+]
+
+ESTADOS_CITA = [
+    {
+        "nombre": "Programada",
+        "descripcion": "Cita programada y confirmada",
+        "color": "#3B82F6"
+    },
+    {
+        "nombre": "En Progreso",
+        "descripcion": "Cita en curso",
+        "color": "#F59E0B"
+    },
+    {
+        "nombre": "Completada",
+        "descripcion": "Cita completada exitosamente",
+        "color": "#10B981"
+    },
+    {
+        "nombre": "Cancelada",
+        "descripcion": "Cita cancelada",
+        "color": "#EF4444"
+    },
+    {
+        "nombre": "No Asistió",
+        "descripcion": "Paciente no asistió a la cita",
+        "color": "#6B7280"
+    }
+]
+
+ESPECIALIDADES = [
+    {
+        "nombre": "Medicina General",
+        "descripcion": "Atención médica general y preventiva",
+        "duracion_cita_default": 30,
+        "precio_base": 50000
+    },
+    {
+        "nombre": "Cardiología",
+        "descripcion": "Especialidad en enfermedades del corazón",
+        "duracion_cita_default": 45,
+        "precio_base": 80000
+    },
+    {
+        "nombre": "Dermatología",
+        "descripcion": "Especialidad en enfermedades de la piel",
+        "duracion_cita_default": 30,
+        "precio_base": 70000
+    },
+    {
+        "nombre": "Pediatría",
+        "descripcion": "Especialidad en medicina infantil",
+        "duracion_cita_default": 30,
+        "precio_base": 60000
+    },
+    {
+        "nombre": "Ginecología",
+        "descripcion": "Especialidad en salud reproductiva femenina",
+        "duracion_cita_default": 45,
+        "precio_base": 75000
+    }
+]
+
 
 async def create_default_roles():
-    """Crear roles por defecto"""
-    try:
-        client = db_connection.client
-        
-        # Verificar si ya existen roles
-        result = client.table("roles").select("id").execute()
-        if result.data:
-            logger.info("Los roles ya existen, omitiendo creación")
-            return
-        
-        # Crear roles por defecto
-        roles = [
-            {
-                "nombre": "Administrador",
-                "descripcion": "Administrador del sistema con acceso completo"
-            },
-            {
-                "nombre": "Medico",
-                "descripcion": "Médico que puede atender pacientes"
-            },
-            {
-                "nombre": "Paciente",
-                "descripcion": "Paciente que puede agendar citas"
-            }
-        ]
-        
-        for role in roles:
-            client.table("roles").insert(role).execute()
-        
-        logger.info("Roles por defecto creados exitosamente")
-        
-    except Exception as e:
-        logger.error(f"Error al crear roles por defecto: {e}")
-        # No lanzar excepción, solo loggear el error
-        logger.warning("Continuando sin crear roles por defecto")
+    """Crear los roles por defecto que falten"""
+    await RolRepository(db_connection.service_data_client).upsert_many(ROLES, on_conflict="nombre", ignore_duplicates=True)
+    logger.info("Roles por defecto verificados")
 
 
 async def create_default_estados_cita():
-    """Crear estados de cita por defecto"""
-    try:
-        client = db_connection.client
-        
-        # Verificar si ya existen estados
-        result = client.table("estados_cita").select("id").execute()
-        if result.data:
-            logger.info("Los estados de cita ya existen, omitiendo creación")
-            return
-        
-        # Crear estados por defecto
-        estados = [
-            {
-                "nombre": "Programada",
-                "descripcion": "Cita programada y confirmada",
-                "color": "#3B82F6"
-            },
-            {
-                "nombre": "En Progreso",
-                "descripcion": "Cita en curso",
-                "color": "#F59E0B"
-            },
-            {
-                "nombre": "Completada",
-                "descripcion": "Cita completada exitosamente",
-                "color": "#10B981"
-            },
-            {
-                "nombre": "Cancelada",
-                "descripcion": "Cita cancelada",
-                "color": "#EF4444"
-            },
-            {
-                "nombre": "No Asistió",
-                "descripcion": "Paciente no asistió a la cita",
-                "color": "#6B7280"
-            }
-        ]
-        
-        for estado in estados:
-            client.table("estados_cita").insert(estado).execute()
-        
-        logger.info("Estados de cita por defecto creados exitosamente")
-        
-    except Exception as e:
-        logger.error(f"Error al crear estados de cita por defecto: {e}")
-        # No lanzar excepción, solo loggear el error
-        logger.warning("Continuando sin crear estados de cita por defecto")
+    """Crear los estados de cita por defecto que falten"""
+    await EstadoCitaRepository(db_connection.service_data_client).upsert_many(ESTADOS_CITA, on_conflict="nombre", ignore_duplicates=True)
+    logger.info("Estados de cita por defecto verificados")
 
 
 async def create_default_especialidades():
-    """Crear especialidades médicas por defecto"""
-    try:
-        client = db_connection.client
-        
-        # Verificar si ya existen especialidades
-        result = client.table("especialidades").select("id").execute()
-        if result.data:
-            logger.info("Las especialidades ya existen, omitiendo creación")
-            return
-        
-        # Crear especialidades por defecto
-        especialidades = [
-            {
-                "nombre": "Medicina General",
-                "descripcion": "Atención médica general y preventiva",
-                "duracion_cita_default": 30,
-                "precio_base": 50000
-            },
-            {
-                "nombre": "Cardiología",
-                "descripcion": "Especialidad en enfermedades del corazón",
-                "duracion_cita_default": 45,
-                "precio_base": 80000
-            },
-            {
-                "nombre": "Dermatología",
-                "descripcion": "Especialidad en enfermedades de la piel",
-                "duracion_cita_default": 30,
-                "precio_base": 70000
-            },
-            {
-                "nombre": "Pediatría",
-                "descripcion": "Especialidad en medicina infantil",
-                "duracion_cita_default": 30,
-                "precio_base": 60000
-            },
-            {
-                "nombre": "Ginecología",
-                "descripcion": "Especialidad en salud reproductiva femenina",
-                "duracion_cita_default": 45,
-                "precio_base": 75000
-            }
-        ]
-        
-        for especialidad in especialidades:
-            client.table("especialidades").insert(especialidad).execute()
-        
-        logger.info("Especialidades por defecto creadas exitosamente")
-        
-    except Exception as e:
-        logger.error(f"Error al crear especialidades por defecto: {e}")
-        # No lanzar excepción, solo loggear el error
-        logger.warning("Continuando sin crear especialidades por defecto")
+    """Crear las especialidades médicas por defecto que falten"""
+    await EspecialidadRepository(db_connection.service_data_client).upsert_many(ESPECIALIDADES, on_conflict="nombre", ignore_duplicates=True)
+    logger.info("Especialidades por defecto verificadas")
+
+
+async def cargar_datos_iniciales():
+    """Cargar todos los datos iniciales y registrar su versión; lanza la excepción si algo falla"""
+    await create_default_roles()
+    await create_default_estados_cita()
+    await create_default_especialidades()
+    # La versión se registra al final: si algo falla, la próxima ejecución reintenta todo
+    await MetadatoRepository(db_connection.service_data_client).set_valor(SEED_VERSION_KEY, SEED_VERSION)
 
 
 async def seed_database():
     """Ejecutar todos los datos iniciales"""
     try:
         logger.info("Iniciando carga de datos iniciales...")
-        
-        await create_default_roles()
-        await create_default_estados_cita()
-        await create_default_especialidades()
-        
+        await cargar_datos_iniciales()
         logger.info("Datos iniciales cargados exitosamente")
-        
+    
     except Exception as e:
         logger.error(f"Error al cargar datos iniciales: {e}")
         # No lanzar excepción, solo loggear el error
         logger.warning("Continuando sin cargar datos iniciales")
+
+
+async def seed_if_needed():
+    """Verificar con una sola consulta si los datos iniciales están al día y cargarlos si no"""
+    try:
+        version = await MetadatoRepository(db_connection.service_data_client).get_valor(SEED_VERSION_KEY)
+    except Exception as e:
+        # Sin la tabla de database_queries/metadatos_app.sql no hay marca de versión
+        logger.warning(f"No se pudo leer la versión de los datos iniciales: {e}")
+        version = None
+    
+    if version == SEED_VERSION:
+        logger.info(f"Datos iniciales al día (versión {SEED_VERSION})")
+        return
+    
+    if not settings.seed_on_startup:
+        logger.warning(
+            f"Datos iniciales desactualizados (versión {version}, esperada {SEED_VERSION}); "
+            "ejecutar: python -m app.database.seed_data"
+        )
+        return
+    
+    await seed_database()
+
+
+async def main() -> int:
+    """Punto de entrada del comando: carga los datos iniciales y retorna el código de salida"""
+    await db_connection.open()
+    try:
+        await cargar_datos_iniciales()
+    except Exception as e:
+        logger.error(f"Error al cargar datos iniciales: {e}")
+        return 1
+    finally:
+        await db_connection.close()
+    logger.info(f"Datos iniciales cargados (versión {SEED_VERSION})")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    sys.exit(asyncio.run(main()))
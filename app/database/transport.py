@@ -0,0 +1,55 @@
+"""
+Transporte HTTP compartido con pool de conexiones keep-alive
+"""
+from typing import Dict, Any
+import httpx
+
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """Transporte asíncrono con pool de conexiones y estadísticas de uso"""
+    
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        http2: bool = False
+    ):
+        super().__init__(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            http2=http2
+        )
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.requests = 0
+        self.waits = 0
+    
+    def _connections(self) -> list:
+        """Conexiones abiertas actualmente en el pool"""
+        return list(getattr(self._pool, "connections", []))
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        connections = self._connections()
+        in_use = sum(1 for conn in connections if not conn.is_idle())
+        # El pool está saturado: esta petición tendrá que esperar una conexión libre
+        if in_use >= self.max_connections:
+            self.waits += 1
+        return await super().handle_async_request(request)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas del pool para dimensionar las réplicas"""
+        connections = self._connections()
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "max_connections": self.max_connections,
+            "http2": self.http2,
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "waits": self.waits,
+            "requests": self.requests
+        }
@@ -8,6 +8,8 @@ from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from pydantic import ValidationError
 
+from app.models.paginacion import CursorInvalido
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,6 +42,20 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+async def cursor_exception_handler(request: Request, exc: CursorInvalido):
+    """Manejador para cursores de paginación que no corresponden a la consulta"""
+    logger.warning(f"Cursor inválido: {request.url}")
+    return JSONResponse(
+        status_code=400,
+        content={
+            "error": True,
+            "message": str(exc),
+            "status_code": 400,
+            "path": str(request.url)
+        }
+    )
+
+
 async def general_exception_handler(request: Request, exc: Exception):
     """Manejador para excepciones generales"""
     logger.error(f"Unexpected error: {str(exc)}", exc_info=True)
@@ -1,29 +1,135 @@
 """
 Middleware para logging
 """
-import time
+import atexit
+import json
 import logging
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config import settings
 
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("app.access")
+
+# Encabezados que nunca se escriben en el log
+REDACTED_HEADERS = {"authorization", "cookie", "apikey", "x-api-key"}
+
+_listener: Optional[QueueListener] = None
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware para logging de requests"""
+def route_template(scope) -> Optional[str]:
+    """
+    Plantilla de la ruta atendida (p. ej. `/api/v1/citas/{cita_id}`), o None si no hubo coincidencia.
     
-    async def dispatch(self, request: Request, call_next):
-        # Log del request
-        start_time = time.time()
-        
-        logger.info(f"Request: {request.method} {request.url}")
-        logger.info(f"Headers: {dict(request.headers)}")
+    Es el `path_format` de la ruta que el router dejó en el scope, así la
+    cardinalidad queda acotada aunque los valores de los parámetros coincidan
+    con segmentos fijos de la ruta.
+    """
+    path_format = getattr(scope.get("route"), "path_format", None)
+    if path_format is None:
+        return None
+    # Con routers anidados la ruta solo conoce su parte del path: el prefijo
+    # (estático) se completa con los primeros segmentos del path atendido
+    prefix_segments = scope["path"].count("/") - path_format.count("/")
+    if prefix_segments > 0:
+        return "/".join(scope["path"].split("/")[:prefix_segments + 1]) + path_format
+    return path_format
+
+
+class AccessLogFormatter(logging.Formatter):
+    """Formatea el registro de acceso como una línea JSON"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            **getattr(record, "access", {})
+        }
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler que deja el formateo al hilo del listener"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Los datos del acceso no se modifican tras emitirlos: no hace falta copiarlos
+        return record
+
+
+def setup_access_log() -> None:
+    """Enviar el log de acceso a stdout a través de una cola y un hilo dedicado"""
+    global _listener
+    if _listener is not None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(AccessLogFormatter())
+    _listener = QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+    
+    access_logger.addHandler(_DeferredQueueHandler(log_queue))
+    access_logger.setLevel(logging.INFO)
+    access_logger.propagate = False
+
+
+class LoggingMiddleware:
+    """Middleware ASGI que registra una línea JSON por request"""
+    
+    def __init__(self, app):
+        self.app = app
+        if settings.access_log_enabled:
+            setup_access_log()
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.access_log_enabled:
+            await self.app(scope, receive, send)
+            return
         
-        # Procesar request
-        response = await call_next(request)
+        start_time = time.perf_counter()
+        response = {"status": 500, "bytes": 0}
         
-        # Log del response
-        process_time = time.time() - start_time
-        logger.info(f"Response: {response.status_code} - {process_time:.4f}s")
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
         
-        return response
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - start_time) * 1000
+            status_code = response["status"]
+            # Errores y peticiones lentas se registran siempre; el resto según el muestreo
+            if (
+                status_code >= 500
+                or duration_ms >= settings.access_log_slow_ms
+                or random.random() < settings.access_log_sample_rate
+            ):
+                self._log(scope, status_code, duration_ms, response["bytes"])
+    
+    @staticmethod
+    def _log(scope, status_code: int, duration_ms: float, size: int) -> None:
+        if not access_logger.isEnabledFor(logging.INFO):
+            return
+        access = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route_template(scope),
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "bytes": size,
+            "client": scope["client"][0] if scope.get("client") else None
+        }
+        if settings.access_log_headers:
+            access["headers"] = {
+                name.decode("latin-1"): "[REDACTED]" if name.decode("latin-1") in REDACTED_HEADERS else value.decode("latin-1")
+                for name, value in scope.get("headers", [])
+            }
+        access_logger.info("access", extra={"access": access})
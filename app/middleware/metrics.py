@@ -0,0 +1,212 @@
+"""
+Métricas en proceso con formato de exposición de Prometheus
+"""
+import secrets
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.middleware.logging import route_template
+
+# Valor de etiqueta para las series que superan el límite de cardinalidad
+OVERFLOW_LABEL = "other"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+HTTP_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Métrica con etiquetas y número de series acotado"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], object] = {}
+    
+    def _key(self, labels: Tuple[str, ...]) -> Tuple[str, ...]:
+        if labels in self._series or len(self._series) < settings.metrics_max_series:
+            return labels
+        # Límite alcanzado: agrupar las series nuevas en una sola
+        return (OVERFLOW_LABEL,) * len(self.labelnames)
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self._series.items():
+            lines.extend(self._render_series(labels, value))
+        return lines
+    
+    def _render_series(self, labels: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        self._series[key] = self._series.get(key, 0) + amount
+    
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+    
+    def set(self, *labels: str, value: float) -> None:
+        self._series[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+    
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # [conteo por bucket (+Inf al final), suma, total]
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+    
+    def _render_series(self, labels: Tuple[str, ...], value) -> List[str]:
+        counts, total_sum, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            le_label = f'le="{le}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le_label)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total_sum}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {total}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de las métricas de la aplicación"""
+    
+    def __init__(self):
+        self.http_requests = Counter(
+            "http_requests_total", "Requests HTTP atendidas", ("method", "route", "status")
+        )
+        self.http_latency = Histogram(
+            "http_request_duration_seconds", "Latencia de las requests HTTP", ("method", "route")
+        )
+        self.http_in_progress = Gauge(
+            "http_requests_in_progress", "Requests HTTP en curso", ("method",)
+        )
+        self.db_latency = Histogram(
+            "db_query_duration_seconds", "Latencia de las consultas a PostgREST", ("table", "operation")
+        )
+        self.db_rows = Histogram(
+            "db_query_rows", "Filas retornadas por consulta a PostgREST", ("table", "operation"), ROW_BUCKETS
+        )
+        self.db_errors = Counter(
+            "db_query_errors_total", "Consultas a PostgREST fallidas", ("table", "operation")
+        )
+        self.db_pool = Gauge(
+            "db_pool_connections", "Conexiones del pool HTTP compartido", ("state",)
+        )
+        self.cache_requests = Counter(
+            "reference_cache_requests_total", "Consultas al cache de datos de referencia", ("table", "result")
+        )
+        self.report_cache_requests = Counter(
+            "report_cache_requests_total", "Consultas al cache de reportes", ("report", "result")
+        )
+    
+    def observe_query(self, table: str, operation: str, duration: float, rows: Optional[int]) -> None:
+        """Registrar una consulta de repositorio"""
+        if not settings.metrics_enabled:
+            return
+        self.db_latency.observe(duration, table, operation)
+        if rows is None:
+            self.db_errors.inc(table, operation)
+        else:
+            self.db_rows.observe(rows, table, operation)
+    
+    def render(self) -> str:
+        """Exportar las métricas en formato de texto de Prometheus"""
+        from app.database import db_connection
+        stats = db_connection.pool_stats()
+        for state in ("in_use", "idle"):
+            if state in stats:
+                self.db_pool.set(state, value=stats[state])
+        
+        lines: List[str] = []
+        for metric in (
+            self.http_requests, self.http_latency, self.http_in_progress,
+            self.db_latency, self.db_rows, self.db_errors, self.db_pool, self.cache_requests,
+            self.report_cache_requests
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def metrics_authorized(authorization: Optional[str]) -> bool:
+    """Verificar el `Authorization: Bearer <METRICS_TOKEN>` de quien lee /metrics"""
+    if not settings.metrics_token or not authorization:
+        return False
+    scheme, _, token = authorization.partition(" ")
+    # En bytes: compare_digest con str rechaza caracteres no ASCII (TypeError -> 500)
+    return scheme.lower() == "bearer" and secrets.compare_digest(token.strip().encode(), settings.metrics_token.encode())
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide latencia, estado y concurrencia por ruta"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+        response = {"status": 500}
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            await send(message)
+        
+        metrics.http_in_progress.inc(method)
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            metrics.http_in_progress.dec(method)
+            # Las rutas sin coincidencia (404) comparten una sola etiqueta
+            route = route_template(scope) or "unmatched"
+            metrics.http_latency.observe(duration, method, route)
+            metrics.http_requests.inc(method, route, str(response["status"]))
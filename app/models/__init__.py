@@ -2,24 +2,30 @@ from .base import BaseModel
 from .usuario import Usuario, UsuarioCreate, UsuarioUpdate, UsuarioResponse, UsuarioLogin, Token
 from .paciente import Paciente, PacienteCreate, PacienteUpdate, PacienteResponse
 from .medico import Medico, MedicoCreate, MedicoUpdate, MedicoResponse
-from .cita import Cita, CitaCreate, CitaUpdate, CitaResponse, CitaConDetalles
+from .cita import Cita, CitaCreate, CitaUpdate, CitaResponse, CitaConDetalles, CitaAgenda
 from .especialidad import Especialidad, EspecialidadCreate, EspecialidadUpdate, EspecialidadResponse
 from .consultorio import Consultorio, ConsultorioCreate, ConsultorioUpdate, ConsultorioResponse
 from .calificacion import Calificacion, CalificacionCreate, CalificacionUpdate, CalificacionResponse
-from .notificacion import Notificacion, NotificacionCreate, NotificacionUpdate, NotificacionResponse
+from .notificacion import Notificacion, NotificacionCreate, NotificacionUpdate, NotificacionResponse, ContadorNotificaciones
 from .rol import Rol, RolCreate, RolUpdate, RolResponse
 from .estado_cita import EstadoCita, EstadoCitaCreate, EstadoCitaUpdate, EstadoCitaResponse
+from .horario_atencion import (
+    HorarioAtencion, HorarioAtencionCreate, HorarioAtencionUpdate, HorarioAtencionResponse,
+    ExcepcionHorario, ExcepcionHorarioCreate, ExcepcionHorarioResponse
+)
 
 __all__ = [
     "BaseModel",
     "Usuario", "UsuarioCreate", "UsuarioUpdate", "UsuarioResponse", "UsuarioLogin", "Token",
     "Paciente", "PacienteCreate", "PacienteUpdate", "PacienteResponse",
     "Medico", "MedicoCreate", "MedicoUpdate", "MedicoResponse",
-    "Cita", "CitaCreate", "CitaUpdate", "CitaResponse", "CitaConDetalles",
+    "Cita", "CitaCreate", "CitaUpdate", "CitaResponse", "CitaConDetalles", "CitaAgenda",
     "Especialidad", "EspecialidadCreate", "EspecialidadUpdate", "EspecialidadResponse",
     "Consultorio", "ConsultorioCreate", "ConsultorioUpdate", "ConsultorioResponse",
     "Calificacion", "CalificacionCreate", "CalificacionUpdate", "CalificacionResponse",
-    "Notificacion", "NotificacionCreate", "NotificacionUpdate", "NotificacionResponse",
+    "Notificacion", "NotificacionCreate", "NotificacionUpdate", "NotificacionResponse", "ContadorNotificaciones",
     "Rol", "RolCreate", "RolUpdate", "RolResponse",
-    "EstadoCita", "EstadoCitaCreate", "EstadoCitaUpdate", "EstadoCitaResponse"
+    "EstadoCita", "EstadoCitaCreate", "EstadoCitaUpdate", "EstadoCitaResponse",
+    "HorarioAtencion", "HorarioAtencionCreate", "HorarioAtencionUpdate", "HorarioAtencionResponse",
+    "ExcepcionHorario", "ExcepcionHorarioCreate", "ExcepcionHorarioResponse"
 ]
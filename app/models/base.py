@@ -1,21 +1,40 @@
 """
 Modelo base para todos los modelos Pydantic
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, create_model
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import Any, ClassVar, Dict, Optional, Tuple, Type
 from uuid import UUID
 
 
 class BaseModel(BaseModel):
     """Modelo base con configuración común"""
     
+    # Campo plano -> ruta dentro de los recursos embebidos de PostgREST (ver desde_fila)
+    rutas_embebidas: ClassVar[Tuple[Tuple[str, Tuple[str, ...]], ...]] = ()
+    
     class Config:
         from_attributes = True
         json_encoders = {
             datetime: lambda v: v.isoformat(),
             UUID: lambda v: str(v)
         }
+    
+    @classmethod
+    def desde_fila(cls, fila: Dict[str, Any]) -> "BaseModel":
+        """
+        Crear una instancia de respuesta a partir de una fila de la base de datos.
+        
+        Camino de lectura: la fila se valida una sola vez, en pydantic-core (las
+        conversiones de texto a fecha, UUID o decimal se hacen ahí); FastAPI no la
+        vuelve a validar al recibir la instancia como `response_model`. Los
+        validadores de reglas de negocio (p. ej. fechas futuras) viven en los
+        modelos de entrada (Create/Update) y no se aplican a los datos guardados.
+        """
+        if cls.rutas_embebidas:
+            fila = aplanar(fila, cls.rutas_embebidas)
+        return cls.model_validate(fila)
 
 
 class TimestampMixin(BaseModel):
@@ -27,3 +46,33 @@ class TimestampMixin(BaseModel):
 class IDMixin(BaseModel):
     """Mixin para campo ID"""
     id: UUID
+
+
+@lru_cache(maxsize=256)
+def modelo_parcial(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Crear (y cachear) un modelo de respuesta con solo los campos indicados.
+    
+    Se usa para las respuestas proyectadas con `fields=`; copia las definiciones
+    de los campos pero no los validadores del modelo original.
+    """
+    definitions = {
+        name: (model.model_fields[name].annotation, model.model_fields[name])
+        for name in fields
+    }
+    return create_model(f"{model.__name__}Parcial", __base__=BaseModel, **definitions)
+
+
+def aplanar(fila: Dict[str, Any], rutas: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> Dict[str, Any]:
+    """Copiar los valores embebidos (p. ej. `pacientes.usuarios.nombre`) a campos planos"""
+    embebidos = {ruta[0] for _, ruta in rutas}
+    plana = {clave: valor for clave, valor in fila.items() if clave not in embebidos}
+    for campo, ruta in rutas:
+        valor = fila
+        for clave in ruta:
+            valor = valor.get(clave)
+            if valor is None:
+                break
+        plana[campo] = valor
+    return plana
+
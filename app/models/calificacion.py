@@ -13,7 +13,7 @@ class CalificacionBase(BasePydanticModel):
     """Modelo base para Calificación"""
     calificacion: int = Field(..., ge=1, le=5)
     comentario: Optional[str] = Field(None, max_length=1000)
-
+    
     @validator('calificacion')
     def validate_calificacion(cls, v):
         if not 1 <= v <= 5:
@@ -53,3 +53,12 @@ class CalificacionConDetalles(CalificacionResponse):
     medico_nombre: Optional[str] = None
     medico_apellidos: Optional[str] = None
     cita_fecha: Optional[datetime] = None
+    
+    # Recursos embebidos por CalificacionRepository.get_with_details
+    rutas_embebidas = (
+        ("paciente_nombre", ("pacientes", "usuarios", "nombre")),
+        ("paciente_apellidos", ("pacientes", "usuarios", "apellidos")),
+        ("medico_nombre", ("medicos", "usuarios", "nombre")),
+        ("medico_apellidos", ("medicos", "usuarios", "apellidos")),
+        ("cita_fecha", ("citas", "fecha")),
+    )
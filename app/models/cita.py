@@ -25,12 +25,21 @@ class CitaBase(BasePydanticModel):
     pagado: bool = False
     recordatorio_enviado: bool = False
 
+
+class CitaCreate(CitaBase):
+    """Modelo para crear una cita"""
+    paciente_id: UUID
+    medico_id: UUID
+    consultorio_id: Optional[UUID] = None
+    estado_id: UUID
+    
+    # Solo al crear: las citas ya guardadas pueden tener fechas pasadas
     @validator('fecha')
     def validate_fecha(cls, v):
         if v < date.today():
             raise ValueError('La fecha no puede ser anterior a hoy')
         return v
-
+    
     @validator('hora_fin')
     def validate_hora_fin(cls, v, values):
         if 'hora_inicio' in values and v <= values['hora_inicio']:
@@ -38,14 +47,6 @@ class CitaBase(BasePydanticModel):
         return v
 
 
-class CitaCreate(CitaBase):
-    """Modelo para crear una cita"""
-    paciente_id: UUID
-    medico_id: UUID
-    consultorio_id: Optional[UUID] = None
-    estado_id: UUID
-
-
 class CitaUpdate(BasePydanticModel):
     """Modelo para actualizar una cita"""
     fecha: Optional[date] = None
@@ -85,4 +86,45 @@ class CitaConDetalles(CitaResponse):
     medico_apellidos: Optional[str] = None
     especialidad_nombre: Optional[str] = None
     consultorio_nombre: Optional[str] = None
+    consultorio_ubicacion: Optional[str] = None
     estado_nombre: Optional[str] = None
+    estado_color: Optional[str] = None
+    
+    # Recursos embebidos por CitaRepository.*_with_details
+    rutas_embebidas = (
+        ("paciente_nombre", ("pacientes", "usuarios", "nombre")),
+        ("paciente_apellidos", ("pacientes", "usuarios", "apellidos")),
+        ("medico_nombre", ("medicos", "usuarios", "nombre")),
+        ("medico_apellidos", ("medicos", "usuarios", "apellidos")),
+        ("especialidad_nombre", ("medicos", "especialidades", "nombre")),
+        ("consultorio_nombre", ("consultorios", "nombre")),
+        ("consultorio_ubicacion", ("consultorios", "ubicacion")),
+        ("estado_nombre", ("estados_cita", "nombre")),
+        ("estado_color", ("estados_cita", "color")),
+    )
+
+
+class CitaAgenda(BasePydanticModel):
+    """Fila de la agenda de citas (función agenda_citas) con los nombres ya resueltos"""
+    id: UUID
+    fecha: date
+    hora_inicio: time
+    hora_fin: time
+    duracion: Optional[int] = None
+    paciente_id: UUID
+    paciente_nombre: Optional[str] = None
+    paciente_apellidos: Optional[str] = None
+    paciente_telefono: Optional[str] = None
+    medico_id: UUID
+    medico_nombre: Optional[str] = None
+    medico_apellidos: Optional[str] = None
+    especialidad_nombre: Optional[str] = None
+    consultorio_id: Optional[UUID] = None
+    consultorio_nombre: Optional[str] = None
+    consultorio_ubicacion: Optional[str] = None
+    estado_id: UUID
+    estado_nombre: Optional[str] = None
+    estado_color: Optional[str] = None
+    motivo_consulta: Optional[str] = None
+    precio: Optional[Decimal] = None
+    pagado: bool = False
@@ -8,6 +8,9 @@ from uuid import UUID
 
 from .base import BaseModel as BasePydanticModel, TimestampMixin, IDMixin
 
+# Estados cuyas citas no ocupan horario (mismo criterio que trigger_ocupa_horario en reservar_cita.sql)
+ESTADOS_SIN_HORARIO = frozenset({"Cancelada", "No Asistió"})
+
 
 class EstadoCitaBase(BasePydanticModel):
     """Modelo base para EstadoCita"""
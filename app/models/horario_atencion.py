@@ -0,0 +1,93 @@
+"""
+Modelos para las entidades HorarioAtencion y ExcepcionHorario
+"""
+from pydantic import BaseModel, Field, validator
+from typing import Optional
+from datetime import date, time, datetime
+from uuid import UUID
+
+from .base import BaseModel as BasePydanticModel, TimestampMixin, IDMixin
+
+
+def validar_multiplo_5(v: Optional[time]) -> Optional[time]:
+    """Las horas de los horarios van en bloques de 5 minutos"""
+    if v is not None and (v.minute % 5 or v.second or v.microsecond):
+        raise ValueError('La hora debe ser múltiplo de 5 minutos')
+    return v
+
+
+class HorarioAtencionBase(BasePydanticModel):
+    """Modelo base para HorarioAtencion"""
+    dia_semana: int = Field(..., ge=0, le=6, description="0 = lunes ... 6 = domingo")
+    hora_inicio: time
+    hora_fin: time
+    duracion_turno: Optional[int] = Field(None, ge=5, le=480, multiple_of=5, description="Minutos por turno (por defecto el de la especialidad)")
+    consultorio_id: Optional[UUID] = None
+    activo: bool = True
+
+
+class HorarioAtencionCreate(HorarioAtencionBase):
+    """Modelo para crear un horario de atención"""
+    medico_id: UUID
+    
+    _multiplo_5 = validator('hora_inicio', 'hora_fin', allow_reuse=True)(validar_multiplo_5)
+    
+    @validator('hora_fin')
+    def validate_hora_fin(cls, v, values):
+        if 'hora_inicio' in values and v <= values['hora_inicio']:
+            raise ValueError('La hora de fin debe ser posterior a la hora de inicio')
+        return v
+
+
+class HorarioAtencionUpdate(BasePydanticModel):
+    """Modelo para actualizar un horario de atención"""
+    dia_semana: Optional[int] = Field(None, ge=0, le=6)
+    hora_inicio: Optional[time] = None
+    hora_fin: Optional[time] = None
+    duracion_turno: Optional[int] = Field(None, ge=5, le=480, multiple_of=5)
+    consultorio_id: Optional[UUID] = None
+    activo: Optional[bool] = None
+    
+    _multiplo_5 = validator('hora_inicio', 'hora_fin', allow_reuse=True)(validar_multiplo_5)
+
+
+class HorarioAtencion(HorarioAtencionBase, IDMixin, TimestampMixin):
+    """Modelo completo de HorarioAtencion"""
+    medico_id: UUID
+
+
+class HorarioAtencionResponse(HorarioAtencion):
+    """Modelo de respuesta para HorarioAtencion"""
+    pass
+
+
+class ExcepcionHorarioBase(BasePydanticModel):
+    """Modelo base para ExcepcionHorario"""
+    fecha: date
+    hora_inicio: Optional[time] = Field(None, description="Sin horas se bloquea el día completo")
+    hora_fin: Optional[time] = None
+    motivo: Optional[str] = Field(None, max_length=200)
+
+
+class ExcepcionHorarioCreate(ExcepcionHorarioBase):
+    """Modelo para crear una excepción de horario"""
+    medico_id: Optional[UUID] = Field(None, description="Sin médico aplica a todos (feriado)")
+    
+    @validator('hora_fin', always=True)
+    def validate_hora_fin(cls, v, values):
+        inicio = values.get('hora_inicio')
+        if (inicio is None) != (v is None):
+            raise ValueError('Indique hora de inicio y de fin, o ninguna para el día completo')
+        if v is not None and v <= inicio:
+            raise ValueError('La hora de fin debe ser posterior a la hora de inicio')
+        return v
+
+
+class ExcepcionHorario(ExcepcionHorarioBase, IDMixin, TimestampMixin):
+    """Modelo completo de ExcepcionHorario"""
+    medico_id: Optional[UUID] = None
+
+
+class ExcepcionHorarioResponse(ExcepcionHorario):
+    """Modelo de respuesta para ExcepcionHorario"""
+    pass
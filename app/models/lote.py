@@ -0,0 +1,34 @@
+"""
+Modelos para operaciones en lote
+"""
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import ValidationError
+
+from .base import BaseModel as BasePydanticModel
+
+T = TypeVar('T')
+
+
+def describir_error(error: ValidationError) -> str:
+    """Resumir los errores de validación de un elemento en una sola línea"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detalle['loc'])}: {detalle['msg']}" if detalle['loc'] else detalle['msg']
+        for detalle in error.errors()
+    )
+
+
+class ResultadoItem(BasePydanticModel, Generic[T]):
+    """Resultado de un elemento del lote, en la posición en que fue enviado"""
+    indice: int
+    ok: bool
+    item: Optional[T] = None
+    error: Optional[str] = None
+
+
+class ResultadoLote(BasePydanticModel, Generic[T]):
+    """Resultado de una operación en lote"""
+    total: int
+    creados: int
+    errores: int
+    resultados: List[ResultadoItem[T]]
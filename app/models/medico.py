@@ -53,3 +53,9 @@ class MedicoConEspecialidad(MedicoResponse):
     """Modelo de médico con información de especialidad"""
     especialidad_nombre: Optional[str] = None
     especialidad_descripcion: Optional[str] = None
+    
+    # Recursos embebidos por MedicoRepository.get_with_especialidad
+    rutas_embebidas = (
+        ("especialidad_nombre", ("especialidades", "nombre")),
+        ("especialidad_descripcion", ("especialidades", "descripcion")),
+    )
@@ -47,3 +47,9 @@ class Notificacion(NotificacionBase, IDMixin, TimestampMixin):
 class NotificacionResponse(Notificacion):
     """Modelo de respuesta para Notificación"""
     pass
+
+
+class ContadorNotificaciones(BasePydanticModel):
+    """Contador de la bandeja de un usuario"""
+    total: int = 0
+    no_leidas: int = 0
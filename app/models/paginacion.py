@@ -0,0 +1,38 @@
+"""
+Modelos para paginación por cursor (keyset)
+"""
+import base64
+import json
+from typing import Generic, List, Optional, TypeVar, Any
+
+from .base import BaseModel as BasePydanticModel
+
+T = TypeVar('T')
+
+
+class CursorInvalido(ValueError):
+    """Cursor mal formado o de otra consulta (se responde 400)"""
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Codificar los valores de la clave de orden en un cursor opaco"""
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decodificar un cursor opaco; lanza CursorInvalido si no es válido"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise CursorInvalido("Cursor inválido")
+    if not isinstance(values, list) or not values:
+        raise CursorInvalido("Cursor inválido")
+    return values
+
+
+class Pagina(BasePydanticModel, Generic[T]):
+    """Página de resultados con cursor a la siguiente página"""
+    items: List[T]
+    next_cursor: Optional[str] = None
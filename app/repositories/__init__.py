@@ -9,6 +9,9 @@ from .calificacion_repository import CalificacionRepository
 from .notificacion_repository import NotificacionRepository
 from .rol_repository import RolRepository
 from .estado_cita_repository import EstadoCitaRepository
+from .metadato_repository import MetadatoRepository
+from .reporte_repository import ReporteRepository
+from .horario_atencion_repository import HorarioAtencionRepository, ExcepcionHorarioRepository
 
 __all__ = [
     "BaseRepository",
@@ -21,5 +24,9 @@ __all__ = [
     "CalificacionRepository",
     "NotificacionRepository",
     "RolRepository",
-    "EstadoCitaRepository"
+    "EstadoCitaRepository",
+    "MetadatoRepository",
+    "ReporteRepository",
+    "HorarioAtencionRepository",
+    "ExcepcionHorarioRepository"
 ]
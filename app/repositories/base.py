@@ -2,27 +2,185 @@
 Repositorio base con operaciones CRUD genéricas
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional, TypeVar, Generic, Dict, Any
+from contextvars import ContextVar
+from typing import List, Optional, TypeVar, Generic, Dict, Any, Union, Tuple, Callable
 from uuid import UUID
 from supabase import Client
+from postgrest import AsyncPostgrestClient
+import asyncio
+import functools
+import inspect
 import logging
+import time
+
+from app.config import settings
+from app.models.paginacion import encode_cursor, decode_cursor, CursorInvalido
+from app.middleware.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Método público del repositorio en curso (etiqueta `operation` de las métricas)
+_operation: ContextVar[Optional[str]] = ContextVar("repository_operation", default=None)
+
+
+def _label_operation(method: Callable) -> Callable:
+    """Etiquetar las consultas de un método con su nombre; si otro método ya etiquetó, se conserva"""
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        if _operation.get() is not None:
+            return await method(*args, **kwargs)
+        token = _operation.set(method.__name__)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            _operation.reset(token)
+    return wrapper
+
+
+def _label_operations(cls: type) -> None:
+    for name, value in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.iscoroutinefunction(value):
+            setattr(cls, name, _label_operation(value))
+
 
 class BaseRepository(ABC, Generic[T]):
-    """Repositorio base con operaciones CRUD genéricas"""
+    """
+    Repositorio base con operaciones CRUD genéricas
+    
+    Los métodos públicos asíncronos (también los de las subclases) etiquetan sus
+    consultas con su nombre: `get_by_paciente` se mide como tal aunque consulte
+    a través de `get_by_field`.
+    """
+    
+    # Clave de orden única para la paginación por cursor: (columna, descendente)
+    cursor_columns: Tuple[Tuple[str, bool], ...] = (("created_at", False), ("id", False))
     
-    def __init__(self, client: Client, table_name: str):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _label_operations(cls)
+    
+    def __init__(self, client: Union[Client, AsyncPostgrestClient], table_name: str):
         self.client = client
         self.table_name = table_name
     
+    async def _execute(self, query):
+        """Ejecutar una consulta sin bloquear el event loop"""
+        # Método del repositorio que originó la consulta (etiqueta de métricas)
+        operation = _operation.get() or "unknown"
+        start_time = time.perf_counter()
+        rows = None
+        try:
+            if inspect.iscoroutinefunction(query.execute):
+                result = await query.execute()
+            else:
+                # Cliente síncrono: delegar el round trip HTTP a un hilo
+                result = await asyncio.to_thread(query.execute)
+            data = result.data
+            rows = len(data) if isinstance(data, list) else int(data is not None)
+            return result
+        finally:
+            metrics.observe_query(self.table_name, operation, time.perf_counter() - start_time, rows)
+    
+    async def _execute_all(self, build_query: Callable[[], Any]) -> List[Dict[str, Any]]:
+        """
+        Leer todas las filas de una consulta por páginas de `db_page_size`.
+        
+        PostgREST corta en silencio los resultados en max-rows, así que las lecturas
+        que necesitan el conjunto completo avanzan por keyset sobre `id` hasta recibir
+        una página incompleta. `build_query` arma la consulta (los builders de
+        PostgREST se modifican al filtrar, por eso se arma una por página) y su
+        proyección debe incluir `id`.
+        """
+        page_size = settings.db_page_size
+        rows: List[Dict[str, Any]] = []
+        while True:
+            query = build_query().order("id").limit(page_size)
+            if rows:
+                query = query.gt("id", rows[-1]["id"])
+            page = (await self._execute(query)).data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+    
+    @staticmethod
+    def _chunks(ids: List[Any]) -> List[List[str]]:
+        """Partir una lista de IDs (sin repetidos) en lotes de `db_in_chunk_size` para filtros in.(...)"""
+        ids = list(dict.fromkeys(str(id) for id in ids))
+        size = settings.db_in_chunk_size
+        return [ids[i:i + size] for i in range(0, len(ids), size)]
+    
+    @staticmethod
+    def _quote(value: Any) -> str:
+        """Citar un valor para usarlo dentro de un filtro or=(...) de PostgREST"""
+        return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+    
+    def _keyset_filter(self, values: List[Any]) -> str:
+        """Construir la condición (a, b, c) > (x, y, z) como filtro or=(...)"""
+        clauses = []
+        for i, (column, desc) in enumerate(self.cursor_columns):
+            equals = [
+                f"{prev_column}.eq.{self._quote(value)}"
+                for (prev_column, _), value in zip(self.cursor_columns[:i], values[:i])
+            ]
+            condition = f"{column}.{'lt' if desc else 'gt'}.{self._quote(values[i])}"
+            if equals:
+                clauses.append(f"and({','.join(equals + [condition])})")
+            else:
+                clauses.append(condition)
+        return ",".join(clauses)
+    
+    def _paginate(self, query, skip: int, limit: int, cursor: Optional[str] = None):
+        """
+        Aplicar paginación a una consulta.
+        
+        Sin cursor se usa OFFSET (`skip`/`limit`). Con cursor (cadena vacía para la
+        primera página) se ordena por `cursor_columns` y se filtra por la última clave
+        vista, de modo que cada página es un rango del índice sin importar su profundidad.
+        """
+        if cursor is None:
+            return query.range(skip, skip + limit - 1)
+        
+        for column, desc in self.cursor_columns:
+            query = query.order(column, desc=desc)
+        
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(self.cursor_columns):
+                # Cursor manipulado o de otro endpoint
+                raise CursorInvalido("Cursor inválido")
+            # Acotar por la primera columna para que el rango use el índice
+            first_column, first_desc = self.cursor_columns[0]
+            if first_desc:
+                query = query.lte(first_column, values[0])
+            else:
+                query = query.gte(first_column, values[0])
+            query = query.or_(self._keyset_filter(values))
+        
+        return query.limit(limit)
+    
+    def _columns(self, fields: Optional[List[str]] = None) -> str:
+        """Proyección para select(); siempre incluye las columnas del cursor"""
+        if not fields:
+            return "*"
+        columns = list(fields)
+        for column, _ in self.cursor_columns:
+            if column not in columns:
+                columns.append(column)
+        return ",".join(columns)
+    
+    def next_cursor(self, rows: List[Dict[str, Any]], limit: int) -> Optional[str]:
+        """Cursor de la página siguiente, o None si no hay más resultados"""
+        if not rows or len(rows) < limit:
+            return None
+        last = rows[-1]
+        return encode_cursor([last.get(column) for column, _ in self.cursor_columns])
+    
     async def create(self, data: Dict[str, Any]) -> Optional[T]:
         """Crear un nuevo registro"""
         try:
-            result = self.client.table(self.table_name).insert(data).execute()
+            result = await self._execute(self.client.table(self.table_name).insert(data))
             if result.data:
                 return result.data[0]
             return None
@@ -30,10 +188,38 @@ class BaseRepository(ABC, Generic[T]):
             logger.error(f"Error al crear registro en {self.table_name}: {e}")
             raise
     
+    async def create_many(self, rows: List[Dict[str, Any]]) -> List[T]:
+        """Crear varios registros con un solo INSERT multi-fila"""
+        if not rows:
+            return []
+        try:
+            result = await self._execute(self.client.table(self.table_name).insert(rows))
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error al crear {len(rows)} registros en {self.table_name}: {e}")
+            raise
+    
+    async def upsert_many(self, rows: List[Dict[str, Any]], on_conflict: str, ignore_duplicates: bool = False) -> List[T]:
+        """
+        Insertar o actualizar varios registros con un solo upsert.
+        
+        Con `ignore_duplicates` las filas que ya existen no se modifican.
+        """
+        if not rows:
+            return []
+        try:
+            result = await self._execute(self.client.table(self.table_name).upsert(
+                rows, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates
+            ))
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error al hacer upsert de {len(rows)} registros en {self.table_name}: {e}")
+            raise
+    
     async def get_by_id(self, id: UUID) -> Optional[T]:
         """Obtener un registro por ID"""
         try:
-            result = self.client.table(self.table_name).select("*").eq("id", str(id)).execute()
+            result = await self._execute(self.client.table(self.table_name).select("*").eq("id", str(id)))
             if result.data:
                 return result.data[0]
             return None
@@ -41,10 +227,26 @@ class BaseRepository(ABC, Generic[T]):
             logger.error(f"Error al obtener registro {id} de {self.table_name}: {e}")
             raise
     
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[T]:
+    async def get_by_ids(self, ids: List[Any], fields: Optional[List[str]] = None) -> List[T]:
+        """Obtener varios registros por ID (una consulta concurrente por lote de IDs)"""
+        if not ids:
+            return []
+        try:
+            columns = ",".join(["id"] + [f for f in fields if f != "id"]) if fields else "*"
+            # Lotes acotados: miles de UUID en un solo in.(...) superan el largo de URL del gateway
+            results = await asyncio.gather(*(
+                self._execute(self.client.table(self.table_name).select(columns).in_("id", chunk))
+                for chunk in self._chunks(ids)
+            ))
+            return [row for result in results for row in result.data or []]
+        except Exception as e:
+            logger.error(f"Error al obtener registros por ID de {self.table_name}: {e}")
+            raise
+    
+    async def get_all(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> List[T]:
         """Obtener todos los registros con paginación"""
         try:
-            result = self.client.table(self.table_name).select("*").range(skip, skip + limit - 1).execute()
+            result = await self._execute(self._paginate(self.client.table(self.table_name).select(self._columns(fields)), skip, limit, cursor))
             return result.data or []
         except Exception as e:
             logger.error(f"Error al obtener registros de {self.table_name}: {e}")
@@ -53,7 +255,7 @@ class BaseRepository(ABC, Generic[T]):
     async def update(self, id: UUID, data: Dict[str, Any]) -> Optional[T]:
         """Actualizar un registro"""
         try:
-            result = self.client.table(self.table_name).update(data).eq("id", str(id)).execute()
+            result = await self._execute(self.client.table(self.table_name).update(data).eq("id", str(id)))
             if result.data:
                 return result.data[0]
             return None
@@ -64,16 +266,16 @@ class BaseRepository(ABC, Generic[T]):
     async def delete(self, id: UUID) -> bool:
         """Eliminar un registro"""
         try:
-            result = self.client.table(self.table_name).delete().eq("id", str(id)).execute()
+            result = await self._execute(self.client.table(self.table_name).delete().eq("id", str(id)))
             return len(result.data) > 0
         except Exception as e:
             logger.error(f"Error al eliminar registro {id} de {self.table_name}: {e}")
             raise
     
-    async def get_by_field(self, field: str, value: Any) -> List[T]:
+    async def get_by_field(self, field: str, value: Any, fields: Optional[List[str]] = None) -> List[T]:
         """Obtener registros por un campo específico"""
         try:
-            result = self.client.table(self.table_name).select("*").eq(field, value).execute()
+            result = await self._execute(self.client.table(self.table_name).select(self._columns(fields)).eq(field, value))
             return result.data or []
         except Exception as e:
             logger.error(f"Error al obtener registros por {field} de {self.table_name}: {e}")
@@ -82,7 +284,7 @@ class BaseRepository(ABC, Generic[T]):
     async def get_by_field_single(self, field: str, value: Any) -> Optional[T]:
         """Obtener un registro por un campo específico"""
         try:
-            result = self.client.table(self.table_name).select("*").eq(field, value).execute()
+            result = await self._execute(self.client.table(self.table_name).select("*").eq(field, value))
             if result.data:
                 return result.data[0]
             return None
@@ -93,8 +295,11 @@ class BaseRepository(ABC, Generic[T]):
     async def count(self) -> int:
         """Contar el número total de registros"""
         try:
-            result = self.client.table(self.table_name).select("id", count="exact").execute()
+            result = await self._execute(self.client.table(self.table_name).select("id", count="exact"))
             return result.count or 0
         except Exception as e:
             logger.error(f"Error al contar registros de {self.table_name}: {e}")
             raise
+
+
+_label_operations(BaseRepository)
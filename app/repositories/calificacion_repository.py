@@ -27,26 +27,32 @@ class CalificacionRepository(BaseRepository[Calificacion]):
         """Obtener calificaciones por médico"""
         return await self.get_by_field("medico_id", str(medico_id))
     
-    async def get_promedio_medico(self, medico_id: UUID) -> float:
-        """Obtener calificación promedio de un médico"""
+    async def get_agregado_medico(self, medico_id: UUID) -> Optional[dict]:
+        """Obtener suma, total e histograma de calificaciones de un médico"""
         try:
-            result = self.client.table(self.table_name).select("calificacion").eq("medico_id", str(medico_id)).execute()
+            result = await self._execute(self.client.table("medicos_calificaciones_agregado").select("*").eq("medico_id", str(medico_id)))
             if result.data:
-                calificaciones = [c["calificacion"] for c in result.data]
-                return sum(calificaciones) / len(calificaciones)
-            return 0.0
+                return result.data[0]
+            return None
         except Exception as e:
             raise e
     
-    async def get_with_details(self, skip: int = 0, limit: int = 100) -> List[dict]:
+    async def get_promedio_medico(self, medico_id: UUID) -> float:
+        """Obtener calificación promedio de un médico"""
+        agregado = await self.get_agregado_medico(medico_id)
+        if agregado and agregado["total"] > 0:
+            return agregado["suma"] / agregado["total"]
+        return 0.0
+    
+    async def get_with_details(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[dict]:
         """Obtener calificaciones con información detallada"""
         try:
-            result = self.client.table(self.table_name).select("""
+            result = await self._execute(self._paginate(self.client.table(self.table_name).select("""
                 *,
                 pacientes!inner(usuarios(nombre, apellidos)),
                 medicos!inner(usuarios(nombre, apellidos)),
                 citas(fecha, hora_inicio)
-            """).range(skip, skip + limit - 1).execute()
+            """), skip, limit, cursor))
             return result.data or []
         except Exception as e:
             raise e
@@ -1,7 +1,8 @@
 """
 Repositorio para la entidad Cita
 """
-from typing import List, Optional
+import asyncio
+from typing import List, Optional, Dict, Any
 from uuid import UUID
 from datetime import date, datetime
 from supabase import Client
@@ -13,6 +14,9 @@ from app.models.cita import Cita
 class CitaRepository(BaseRepository[Cita]):
     """Repositorio para operaciones de Cita"""
     
+    # Coincide con idx_citas_fecha_hora
+    cursor_columns = (("fecha", False), ("hora_inicio", False), ("id", False))
+    
     def __init__(self, client: Client):
         super().__init__(client, "citas")
     
@@ -24,9 +28,9 @@ class CitaRepository(BaseRepository[Cita]):
         """Obtener citas por médico"""
         return await self.get_by_field("medico_id", str(medico_id))
     
-    async def get_by_fecha(self, fecha: date) -> List[Cita]:
+    async def get_by_fecha(self, fecha: date, fields: Optional[List[str]] = None) -> List[Cita]:
         """Obtener citas por fecha"""
-        return await self.get_by_field("fecha", fecha.isoformat())
+        return await self.get_by_field("fecha", fecha.isoformat(), fields)
     
     async def get_by_estado(self, estado_id: UUID) -> List[Cita]:
         """Obtener citas por estado"""
@@ -36,10 +40,10 @@ class CitaRepository(BaseRepository[Cita]):
         """Obtener citas por consultorio"""
         return await self.get_by_field("consultorio_id", str(consultorio_id))
     
-    async def get_by_fecha_range(self, fecha_inicio: date, fecha_fin: date) -> List[Cita]:
+    async def get_by_fecha_range(self, fecha_inicio: date, fecha_fin: date, fields: Optional[List[str]] = None) -> List[Cita]:
         """Obtener citas en un rango de fechas"""
         try:
-            result = self.client.table(self.table_name).select("*").gte("fecha", fecha_inicio.isoformat()).lte("fecha", fecha_fin.isoformat()).execute()
+            result = await self._execute(self.client.table(self.table_name).select(self._columns(fields)).gte("fecha", fecha_inicio.isoformat()).lte("fecha", fecha_fin.isoformat()))
             return result.data or []
         except Exception as e:
             raise e
@@ -47,25 +51,90 @@ class CitaRepository(BaseRepository[Cita]):
     async def get_by_medico_fecha(self, medico_id: UUID, fecha: date) -> List[Cita]:
         """Obtener citas de un médico en una fecha específica"""
         try:
-            result = self.client.table(self.table_name).select("*").eq("medico_id", str(medico_id)).eq("fecha", fecha.isoformat()).execute()
+            result = await self._execute(self.client.table(self.table_name).select("*").eq("medico_id", str(medico_id)).eq("fecha", fecha.isoformat()))
+            return result.data or []
+        except Exception as e:
+            raise e
+    
+    async def get_ocupacion(self, medico_ids: List[UUID], fecha_inicio: date, fecha_fin: date, consultorio_id: Optional[UUID] = None) -> List[dict]:
+        """
+        Obtener los intervalos ocupados de varios médicos (y opcionalmente un consultorio) en un rango de fechas.
+        
+        Las citas canceladas o sin asistencia (`ocupa_horario` falso) no ocupan horario.
+        Se lee por páginas: un rango largo con muchos médicos supera max-rows. Los médicos
+        se consultan por lotes de IDs y las filas repetidas entre lotes (citas del
+        consultorio) se unifican por `id`.
+        """
+        try:
+            def consulta(ids: List[str]):
+                def construir():
+                    query = self.client.table(self.table_name).select("id, medico_id, consultorio_id, fecha, hora_inicio, hora_fin").eq("ocupa_horario", True).gte("fecha", fecha_inicio.isoformat()).lte("fecha", fecha_fin.isoformat())
+                    if consultorio_id:
+                        return query.or_(f"medico_id.in.({','.join(ids)}),consultorio_id.eq.{consultorio_id}")
+                    return query.in_("medico_id", ids)
+                return construir
+            
+            lotes = await asyncio.gather(*(
+                self._execute_all(consulta(ids))
+                for ids in self._chunks(medico_ids) or [[]]
+            ))
+            return list({fila["id"]: fila for filas in lotes for fila in filas}.values())
+        except Exception as e:
+            raise e
+    
+    async def get_ocupacion_consultorios(self, fecha_inicio: date, fecha_fin: date, consultorio_ids: Optional[List[UUID]] = None) -> List[dict]:
+        """
+        Obtener los intervalos ocupados de los consultorios (todos o los indicados) en un rango de fechas
+        
+        Se lee por páginas: sin filtro de consultorios el rango supera max-rows con facilidad.
+        Los consultorios indicados se consultan por lotes de IDs.
+        """
+        if consultorio_ids is not None and not consultorio_ids:
+            return []
+        try:
+            def consulta(ids: Optional[List[str]]):
+                def construir():
+                    query = self.client.table(self.table_name).select("id, consultorio_id, fecha, hora_inicio, hora_fin").eq("ocupa_horario", True).not_.is_("consultorio_id", "null").gte("fecha", fecha_inicio.isoformat()).lte("fecha", fecha_fin.isoformat())
+                    if ids is not None:
+                        return query.in_("consultorio_id", ids)
+                    return query
+                return construir
+            
+            lotes = await asyncio.gather(*(
+                self._execute_all(consulta(ids))
+                for ids in (self._chunks(consultorio_ids) if consultorio_ids is not None else [None])
+            ))
+            return [fila for filas in lotes for fila in filas]
+        except Exception as e:
+            raise e
+    
+    async def get_agenda(self, fecha_inicio: date, fecha_fin: date, medico_id: Optional[UUID] = None, consultorio_id: Optional[UUID] = None, offset: int = 0, limit: int = 500) -> List[dict]:
+        """Obtener una página de la agenda (función agenda_citas) con los nombres resueltos"""
+        try:
+            result = await self._execute(self.client.rpc("agenda_citas", {
+                "p_fecha_inicio": fecha_inicio.isoformat(),
+                "p_fecha_fin": fecha_fin.isoformat(),
+                "p_medico_id": str(medico_id) if medico_id else None,
+                "p_consultorio_id": str(consultorio_id) if consultorio_id else None
+            }).range(offset, offset + limit - 1))
             return result.data or []
         except Exception as e:
             raise e
     
-    async def get_pendientes_pago(self) -> List[Cita]:
+    async def get_pendientes_pago(self, fields: Optional[List[str]] = None) -> List[Cita]:
         """Obtener citas pendientes de pago"""
-        return await self.get_by_field("pagado", False)
+        return await self.get_by_field("pagado", False, fields)
     
-    async def get_with_details(self, skip: int = 0, limit: int = 100) -> List[dict]:
+    async def get_with_details(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[dict]:
         """Obtener citas con información detallada"""
         try:
-            result = self.client.table(self.table_name).select("""
+            result = await self._execute(self._paginate(self.client.table(self.table_name).select("""
                 *,
                 pacientes!inner(usuarios(nombre, apellidos)),
                 medicos!inner(usuarios(nombre, apellidos), especialidades(nombre)),
                 consultorios(nombre, ubicacion),
                 estados_cita(nombre, color)
-            """).range(skip, skip + limit - 1).execute()
+            """), skip, limit, cursor))
             return result.data or []
         except Exception as e:
             raise e
@@ -73,12 +142,12 @@ class CitaRepository(BaseRepository[Cita]):
     async def get_by_paciente_with_details(self, paciente_id: UUID) -> List[dict]:
         """Obtener citas de un paciente con información detallada"""
         try:
-            result = self.client.table(self.table_name).select("""
+            result = await self._execute(self.client.table(self.table_name).select("""
                 *,
                 medicos!inner(usuarios(nombre, apellidos), especialidades(nombre)),
                 consultorios(nombre, ubicacion),
                 estados_cita(nombre, color)
-            """).eq("paciente_id", str(paciente_id)).execute()
+            """).eq("paciente_id", str(paciente_id)))
             return result.data or []
         except Exception as e:
             raise e
@@ -86,20 +155,41 @@ class CitaRepository(BaseRepository[Cita]):
     async def get_by_medico_with_details(self, medico_id: UUID) -> List[dict]:
         """Obtener citas de un médico con información detallada"""
         try:
-            result = self.client.table(self.table_name).select("""
+            result = await self._execute(self.client.table(self.table_name).select("""
                 *,
                 pacientes!inner(usuarios(nombre, apellidos)),
                 consultorios(nombre, ubicacion),
                 estados_cita(nombre, color)
-            """).eq("medico_id", str(medico_id)).execute()
+            """).eq("medico_id", str(medico_id)))
             return result.data or []
         except Exception as e:
             raise e
     
-    async def check_horario_disponible(self, medico_id: UUID, fecha: date, hora_inicio: str, hora_fin: str) -> bool:
-        """Verificar si un horario está disponible para un médico"""
+    async def check_horario_disponible(self, medico_id: UUID, fecha: date, hora_inicio: str, hora_fin: str, excluir_id: Optional[UUID] = None) -> bool:
+        """
+        Verificar si un horario está disponible para un médico.
+        
+        Hay choque con una cita que empieza antes del fin pedido y termina después
+        del inicio pedido; los extremos pueden coincidir. No cuentan las citas
+        canceladas o sin asistencia ni `excluir_id` (la cita que se está modificando).
+        Usa idx_citas_medico_fecha_hora.
+        """
         try:
-            result = self.client.table(self.table_name).select("id").eq("medico_id", str(medico_id)).eq("fecha", fecha.isoformat()).or_(f"hora_inicio.lte.{hora_inicio},hora_fin.gte.{hora_fin}").execute()
+            query = self.client.table(self.table_name).select("id").eq("medico_id", str(medico_id)).eq("fecha", str(fecha)).eq("ocupa_horario", True).lt("hora_inicio", hora_fin).gt("hora_fin", hora_inicio)
+            if excluir_id:
+                query = query.neq("id", str(excluir_id))
+            result = await self._execute(query.limit(1))
             return len(result.data) == 0
         except Exception as e:
             raise e
+    
+    async def reservar(self, data: Dict[str, Any]) -> Optional[Cita]:
+        """Reservar una cita de forma atómica mediante la función reservar_cita"""
+        try:
+            params = {f"p_{key}": value for key, value in data.items()}
+            result = await self._execute(self.client.rpc("reservar_cita", params))
+            if result.data:
+                return result.data[0]
+            return None
+        except Exception as e:
+            raise e
@@ -19,10 +19,10 @@ class ConsultorioRepository(BaseRepository[Consultorio]):
         """Obtener consultorio por nombre"""
         return await self.get_by_field_single("nombre", nombre)
     
-    async def get_activos(self, skip: int = 0, limit: int = 100) -> List[Consultorio]:
+    async def get_activos(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> List[Consultorio]:
         """Obtener consultorios activos"""
         try:
-            result = self.client.table(self.table_name).select("*").eq("activo", True).range(skip, skip + limit - 1).execute()
+            result = await self._execute(self._paginate(self.client.table(self.table_name).select(self._columns(fields)).eq("activo", True), skip, limit, cursor))
             return result.data or []
         except Exception as e:
             raise e
@@ -30,7 +30,7 @@ class ConsultorioRepository(BaseRepository[Consultorio]):
     async def get_by_ubicacion(self, ubicacion: str) -> List[Consultorio]:
         """Obtener consultorios por ubicación"""
         try:
-            result = self.client.table(self.table_name).select("*").ilike("ubicacion", f"%{ubicacion}%").execute()
+            result = await self._execute(self.client.table(self.table_name).select("*").ilike("ubicacion", f"%{ubicacion}%"))
             return result.data or []
         except Exception as e:
             raise e
@@ -38,7 +38,7 @@ class ConsultorioRepository(BaseRepository[Consultorio]):
     async def get_by_capacidad_minima(self, capacidad_min: int) -> List[Consultorio]:
         """Obtener consultorios con capacidad mínima"""
         try:
-            result = self.client.table(self.table_name).select("*").gte("capacidad", capacidad_min).execute()
+            result = await self._execute(self.client.table(self.table_name).select("*").gte("capacidad", capacidad_min))
             return result.data or []
         except Exception as e:
             raise e
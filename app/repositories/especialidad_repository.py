@@ -19,10 +19,10 @@ class EspecialidadRepository(BaseRepository[Especialidad]):
         """Obtener especialidad por nombre"""
         return await self.get_by_field_single("nombre", nombre)
     
-    async def get_activas(self, skip: int = 0, limit: int = 100) -> List[Especialidad]:
+    async def get_activas(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> List[Especialidad]:
         """Obtener especialidades activas"""
         try:
-            result = self.client.table(self.table_name).select("*").eq("activo", True).range(skip, skip + limit - 1).execute()
+            result = await self._execute(self._paginate(self.client.table(self.table_name).select(self._columns(fields)).eq("activo", True), skip, limit, cursor))
             return result.data or []
         except Exception as e:
             raise e
@@ -30,7 +30,7 @@ class EspecialidadRepository(BaseRepository[Especialidad]):
     async def search_by_nombre(self, nombre: str) -> List[Especialidad]:
         """Buscar especialidades por nombre"""
         try:
-            result = self.client.table(self.table_name).select("*").ilike("nombre", f"%{nombre}%").execute()
+            result = await self._execute(self.client.table(self.table_name).select("*").ilike("nombre", f"%{nombre}%"))
             return result.data or []
         except Exception as e:
             raise e
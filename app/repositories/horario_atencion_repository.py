@@ -0,0 +1,69 @@
+"""
+Repositorios para las entidades HorarioAtencion y ExcepcionHorario
+"""
+from typing import List, Optional
+from uuid import UUID
+from datetime import date
+from supabase import Client
+
+from .base import BaseRepository
+from app.models.horario_atencion import HorarioAtencion, ExcepcionHorario
+
+
+class HorarioAtencionRepository(BaseRepository[HorarioAtencion]):
+    """Repositorio para operaciones de HorarioAtencion"""
+    
+    def __init__(self, client: Client):
+        super().__init__(client, "horarios_atencion")
+    
+    async def get_by_medico(self, medico_id: UUID) -> List[HorarioAtencion]:
+        """Obtener los horarios de un médico ordenados por día y hora"""
+        try:
+            result = await self._execute(self.client.table(self.table_name).select("*").eq("medico_id", str(medico_id)).order("dia_semana").order("hora_inicio"))
+            return result.data or []
+        except Exception as e:
+            raise e
+    
+    async def get_by_medicos(self, medico_ids: List[UUID]) -> List[HorarioAtencion]:
+        """
+        Obtener los horarios de varios médicos en una sola consulta.
+        
+        Incluye los inactivos: un médico con todos sus horarios inactivos no atiende,
+        en vez de caer en el horario por defecto.
+        """
+        if not medico_ids:
+            return []
+        try:
+            result = await self._execute(self.client.table(self.table_name).select("medico_id, dia_semana, hora_inicio, hora_fin, duracion_turno, consultorio_id, activo").in_("medico_id", [str(medico_id) for medico_id in medico_ids]))
+            return result.data or []
+        except Exception as e:
+            raise e
+
+
+class ExcepcionHorarioRepository(BaseRepository[ExcepcionHorario]):
+    """Repositorio para operaciones de ExcepcionHorario"""
+    
+    def __init__(self, client: Client):
+        super().__init__(client, "excepciones_horario")
+    
+    async def get_by_rango(self, fecha_inicio: date, fecha_fin: date, medico_id: Optional[UUID] = None) -> List[ExcepcionHorario]:
+        """Obtener las excepciones de un rango de fechas (de un médico y las generales, o todas)"""
+        try:
+            query = self.client.table(self.table_name).select("*").gte("fecha", fecha_inicio.isoformat()).lte("fecha", fecha_fin.isoformat())
+            if medico_id:
+                query = query.or_(f"medico_id.eq.{medico_id},medico_id.is.null")
+            result = await self._execute(query.order("fecha"))
+            return result.data or []
+        except Exception as e:
+            raise e
+    
+    async def get_desde_by_medicos(self, medico_ids: List[UUID], desde: date) -> List[ExcepcionHorario]:
+        """Obtener las excepciones desde una fecha de varios médicos, más las generales"""
+        try:
+            ids = ",".join(str(medico_id) for medico_id in medico_ids)
+            query = self.client.table(self.table_name).select("medico_id, fecha, hora_inicio, hora_fin").gte("fecha", desde.isoformat())
+            query = query.or_(f"medico_id.in.({ids}),medico_id.is.null") if ids else query.is_("medico_id", "null")
+            result = await self._execute(query)
+            return result.data or []
+        except Exception as e:
+            raise e
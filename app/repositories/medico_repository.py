@@ -23,14 +23,27 @@ class MedicoRepository(BaseRepository[Medico]):
         """Obtener médicos por especialidad"""
         return await self.get_by_field("especialidad_id", str(especialidad_id))
     
+    async def get_disponibles_by_especialidad(self, especialidad_id: UUID) -> List[dict]:
+        """Obtener médicos disponibles de una especialidad con la duración de sus citas"""
+        try:
+            result = await self._execute(self.client.table(self.table_name).select("""
+                id,
+                calificacion_promedio,
+                especialidades(duracion_cita_default),
+                usuarios(nombre, apellidos)
+            """).eq("especialidad_id", str(especialidad_id)).eq("disponible", True))
+            return result.data or []
+        except Exception as e:
+            raise e
+    
     async def get_by_licencia(self, numero_licencia: str) -> Optional[Medico]:
         """Obtener médico por número de licencia"""
         return await self.get_by_field_single("numero_licencia", numero_licencia)
     
-    async def get_disponibles(self, skip: int = 0, limit: int = 100) -> List[Medico]:
+    async def get_disponibles(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> List[Medico]:
         """Obtener médicos disponibles"""
         try:
-            result = self.client.table(self.table_name).select("*").eq("disponible", True).range(skip, skip + limit - 1).execute()
+            result = await self._execute(self._paginate(self.client.table(self.table_name).select(self._columns(fields)).eq("disponible", True), skip, limit, cursor))
             return result.data or []
         except Exception as e:
             raise e
@@ -38,37 +51,52 @@ class MedicoRepository(BaseRepository[Medico]):
     async def get_by_calificacion_minima(self, calificacion_min: float) -> List[Medico]:
         """Obtener médicos con calificación mínima"""
         try:
-            result = self.client.table(self.table_name).select("*").gte("calificacion_promedio", calificacion_min).execute()
+            result = await self._execute(self.client.table(self.table_name).select("*").gte("calificacion_promedio", calificacion_min))
             return result.data or []
         except Exception as e:
             raise e
     
-    async def get_with_especialidad(self, skip: int = 0, limit: int = 100) -> List[dict]:
+    async def get_with_especialidad(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[dict]:
         """Obtener médicos con información de especialidad"""
         try:
-            result = self.client.table(self.table_name).select("""
+            result = await self._execute(self._paginate(self.client.table(self.table_name).select("""
                 *,
                 especialidades(nombre, descripcion),
                 usuarios(nombre, apellidos, telefono)
-            """).range(skip, skip + limit - 1).execute()
+            """), skip, limit, cursor))
             return result.data or []
         except Exception as e:
             raise e
     
+    async def get_duracion_cita(self, id: UUID) -> Optional[int]:
+        """Obtener la duración por defecto de las citas según la especialidad del médico"""
+        try:
+            result = await self._execute(self.client.table(self.table_name).select("id, especialidades(duracion_cita_default)").eq("id", str(id)))
+            if not result.data:
+                return None
+            especialidad = result.data[0].get("especialidades") or {}
+            return especialidad.get("duracion_cita_default")
+        except Exception as e:
+            raise e
+    
     async def update_calificacion_promedio(self, id: UUID, nueva_calificacion: float) -> Optional[Medico]:
         """Actualizar calificación promedio del médico"""
         data = {"calificacion_promedio": nueva_calificacion}
         return await self.update(id, data)
     
-    async def incrementar_consultas(self, id: UUID) -> Optional[Medico]:
-        """Incrementar contador de consultas del médico"""
+    async def incrementar_consultas_lote(self, ids: List[UUID], cantidad: int = 1) -> List[Medico]:
+        """
+        Ajustar de forma atómica el contador de consultas de varios médicos
+        
+        Solo para correcciones y cargas masivas: las citas completadas ya las cuenta
+        trigger_increment_medico_consultas en la base, llamarlo al completar una cita
+        las contaría dos veces.
+        """
         try:
-            # Primero obtenemos el médico actual
-            medico = await self.get_by_id(id)
-            if medico:
-                total_consultas = medico.get("total_consultas", 0) + 1
-                data = {"total_consultas": total_consultas}
-                return await self.update(id, data)
-            return None
+            result = await self._execute(self.client.rpc("incrementar_consultas", {
+                "p_medico_ids": [str(id) for id in ids],
+                "p_cantidad": cantidad
+            }))
+            return result.data or []
         except Exception as e:
             raise e
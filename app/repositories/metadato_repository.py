@@ -0,0 +1,30 @@
+"""
+Repositorio para los metadatos de la aplicación
+"""
+from typing import Optional
+from supabase import Client
+
+from .base import BaseRepository
+
+
+class MetadatoRepository(BaseRepository[dict]):
+    """Repositorio para la tabla clave/valor metadatos_app"""
+    
+    cursor_columns = (("clave", False),)
+    
+    def __init__(self, client: Client):
+        super().__init__(client, "metadatos_app")
+    
+    async def get_valor(self, clave: str) -> Optional[str]:
+        """Obtener el valor de una clave, o None si no existe"""
+        try:
+            result = await self._execute(self.client.table(self.table_name).select("valor").eq("clave", clave))
+            if result.data:
+                return result.data[0]["valor"]
+            return None
+        except Exception as e:
+            raise e
+    
+    async def set_valor(self, clave: str, valor: str) -> None:
+        """Guardar el valor de una clave"""
+        await self.upsert_many([{"clave": clave, "valor": valor}], on_conflict="clave")
@@ -1,7 +1,8 @@
 """
 Repositorio para la entidad Notificación
 """
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 from supabase import Client
 
@@ -12,12 +13,63 @@ from app.models.notificacion import Notificacion
 class NotificacionRepository(BaseRepository[Notificacion]):
     """Repositorio para operaciones de Notificación"""
     
+    # Más recientes primero, sobre idx_notificaciones_created_at
+    cursor_columns = (("created_at", True), ("id", True))
+    
+    # Total y no leídas por usuario (database_queries/bandeja_notificaciones.sql)
+    contadores_table = "notificaciones_contadores"
+    
     def __init__(self, client: Client):
         super().__init__(client, "notificaciones")
     
     async def get_by_usuario(self, usuario_id: UUID) -> List[Notificacion]:
-        """Obtener notificaciones por usuario"""
-        return await self.get_by_field("usuario_id", str(usuario_id))
+        """Obtener notificaciones por usuario, más recientes primero"""
+        try:
+            result = await self._execute(self.client.table(self.table_name).select("*").eq("usuario_id", str(usuario_id)).order("created_at", desc=True))
+            return result.data or []
+        except Exception as e:
+            raise e
+    
+    async def get_bandeja(self, usuario_id: UUID, limit: int = 20, cursor: Optional[str] = None, solo_no_leidas: bool = False) -> List[Notificacion]:
+        """
+        Obtener una página de la bandeja de un usuario, más recientes primero.
+        
+        Usa la paginación por cursor sobre (created_at, id) DESC, que recorre
+        idx_notificaciones_usuario_created_at (o el índice parcial de no leídas).
+        """
+        try:
+            query = self.client.table(self.table_name).select("*").eq("usuario_id", str(usuario_id))
+            if solo_no_leidas:
+                query = query.eq("leida", False)
+            result = await self._execute(self._paginate(query, 0, limit, cursor or ""))
+            return result.data or []
+        except Exception as e:
+            raise e
+    
+    async def get_desde(self, usuario_id: UUID, desde: datetime, limit: int = 100) -> List[Notificacion]:
+        """Obtener las notificaciones de un usuario creadas después de `desde`, en orden de creación"""
+        try:
+            result = await self._execute(
+                self.client.table(self.table_name).select("*")
+                .eq("usuario_id", str(usuario_id))
+                .gt("created_at", desde.isoformat())
+                .order("created_at")
+                .order("id")
+                .limit(limit)
+            )
+            return result.data or []
+        except Exception as e:
+            raise e
+    
+    async def get_contador(self, usuario_id: UUID) -> Dict[str, Any]:
+        """Obtener el total y las no leídas de un usuario desde la tabla de contadores"""
+        try:
+            result = await self._execute(self.client.table(self.contadores_table).select("total,no_leidas").eq("usuario_id", str(usuario_id)))
+            if result.data:
+                return result.data[0]
+            return {"total": 0, "no_leidas": 0}
+        except Exception as e:
+            raise e
     
     async def get_by_cita(self, cita_id: UUID) -> List[Notificacion]:
         """Obtener notificaciones por cita"""
@@ -26,7 +78,7 @@ class NotificacionRepository(BaseRepository[Notificacion]):
     async def get_no_leidas(self, usuario_id: UUID) -> List[Notificacion]:
         """Obtener notificaciones no leídas de un usuario"""
         try:
-            result = self.client.table(self.table_name).select("*").eq("usuario_id", str(usuario_id)).eq("leida", False).execute()
+            result = await self._execute(self.client.table(self.table_name).select("*").eq("usuario_id", str(usuario_id)).eq("leida", False).order("created_at", desc=True))
             return result.data or []
         except Exception as e:
             raise e
@@ -34,7 +86,7 @@ class NotificacionRepository(BaseRepository[Notificacion]):
     async def get_by_tipo(self, usuario_id: UUID, tipo: str) -> List[Notificacion]:
         """Obtener notificaciones por tipo"""
         try:
-            result = self.client.table(self.table_name).select("*").eq("usuario_id", str(usuario_id)).eq("tipo", tipo).execute()
+            result = await self._execute(self.client.table(self.table_name).select("*").eq("usuario_id", str(usuario_id)).eq("tipo", tipo))
             return result.data or []
         except Exception as e:
             raise e
@@ -44,10 +96,21 @@ class NotificacionRepository(BaseRepository[Notificacion]):
         data = {"leida": True}
         return await self.update(id, data)
     
+    async def marcar_como_leidas(self, ids: List[UUID]) -> List[Notificacion]:
+        """Marcar varias notificaciones como leídas"""
+        if not ids:
+            return []
+        try:
+            result = await self._execute(self.client.table(self.table_name).update({"leida": True}).in_("id", [str(id) for id in ids]))
+            return result.data or []
+        except Exception as e:
+            raise e
+    
     async def marcar_todas_como_leidas(self, usuario_id: UUID) -> bool:
         """Marcar todas las notificaciones de un usuario como leídas"""
         try:
-            result = self.client.table(self.table_name).update({"leida": True}).eq("usuario_id", str(usuario_id)).execute()
+            # Solo las no leídas: las demás no cambian y no tiene sentido reescribirlas
+            result = await self._execute(self.client.table(self.table_name).update({"leida": True}).eq("usuario_id", str(usuario_id)).eq("leida", False))
             return True
         except Exception as e:
             raise e
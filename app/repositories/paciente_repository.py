@@ -26,10 +26,10 @@ class PacienteRepository(BaseRepository[Paciente]):
     async def search_by_name(self, nombre: str) -> List[Paciente]:
         """Buscar pacientes por nombre (usando join con usuarios)"""
         try:
-            result = self.client.table(self.table_name).select("""
+            result = await self._execute(self.client.table(self.table_name).select("""
                 *,
                 usuarios!inner(nombre, apellidos)
-            """).ilike("usuarios.nombre", f"%{nombre}%").execute()
+            """).ilike("usuarios.nombre", f"%{nombre}%"))
             return result.data or []
         except Exception as e:
             raise e
@@ -0,0 +1,23 @@
+"""
+Repositorio para los reportes (funciones reporte_* de database_queries/reportes.sql)
+"""
+from typing import Any, Dict, List
+from supabase import Client
+
+from .base import BaseRepository
+
+
+class ReporteRepository(BaseRepository[dict]):
+    """Repositorio que ejecuta las funciones de reporte mediante RPC"""
+    
+    def __init__(self, client: Client):
+        # No es una tabla: el nombre solo etiqueta las métricas de las consultas
+        super().__init__(client, "reportes")
+    
+    async def ejecutar(self, funcion: str, params: Dict[str, Any], offset: int = 0, limit: int = 1000) -> List[dict]:
+        """Obtener una página del resultado de una función de reporte"""
+        try:
+            result = await self._execute(self.client.rpc(funcion, params).range(offset, offset + limit - 1))
+            return result.data or []
+        except Exception as e:
+            raise e
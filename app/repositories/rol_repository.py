@@ -3,33 +3,45 @@ Repositorio para la entidad Rol
 """
 from typing import List, Optional
 from uuid import UUID
+from supabase import Client
 
 from .base import BaseRepository
+from app.database.cache import reference_cache
 from app.models.rol import Rol, RolCreate, RolUpdate
 
 
-class RolRepository(BaseRepository):
+class RolRepository(BaseRepository[Rol]):
     """Repositorio para manejo de roles"""
     
-    def __init__(self):
-        super().__init__("roles", Rol)
+    def __init__(self, client: Client):
+        super().__init__(client, "roles")
     
     async def get_by_nombre(self, nombre: str) -> Optional[Rol]:
         """Obtener rol por nombre"""
-        return await self.get_by_field_single("nombre", nombre)
+        return await reference_cache.get_or_load(
+            self.table_name, ("nombre", nombre), lambda: self.get_by_field_single("nombre", nombre)
+        )
     
     async def get_activos(self) -> List[Rol]:
         """Obtener todos los roles activos"""
-        return await self.get_by_field("activo", True)
+        return await reference_cache.get_or_load(
+            self.table_name, ("activos",), lambda: self.get_by_field("activo", True)
+        )
     
     async def create_rol(self, rol_data: RolCreate) -> Rol:
         """Crear nuevo rol"""
-        return await self.create(rol_data.dict())
+        created = await self.create(rol_data.dict())
+        reference_cache.invalidate(self.table_name)
+        return created
     
     async def update_rol(self, rol_id: UUID, rol_data: RolUpdate) -> Optional[Rol]:
         """Actualizar rol"""
-        return await self.update(rol_id, rol_data.dict(exclude_unset=True))
+        updated = await self.update(rol_id, rol_data.dict(exclude_unset=True))
+        reference_cache.invalidate(self.table_name)
+        return updated
     
     async def delete_rol(self, rol_id: UUID) -> bool:
         """Eliminar rol (soft delete)"""
-        return await self.update(rol_id, {"activo": False})
+        deleted = await self.update(rol_id, {"activo": False})
+        reference_cache.invalidate(self.table_name)
+        return deleted
@@ -27,14 +27,29 @@ class UsuarioRepository(BaseRepository[Usuario]):
         """Obtener usuarios por rol"""
         return await self.get_by_field("rol_id", str(rol_id))
     
-    async def get_activos(self, skip: int = 0, limit: int = 100) -> List[Usuario]:
+    async def get_activos(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> List[Usuario]:
         """Obtener usuarios activos"""
         try:
-            result = self.client.table(self.table_name).select("*").eq("activo", True).range(skip, skip + limit - 1).execute()
+            result = await self._execute(self._paginate(self.client.table(self.table_name).select(self._columns(fields)).eq("activo", True), skip, limit, cursor))
             return result.data or []
         except Exception as e:
             raise e
     
+    async def get_identidad(self, usuario_id: UUID) -> Optional[dict]:
+        """Obtener usuario con su rol y sus filas de paciente y médico"""
+        try:
+            result = await self._execute(self.client.table(self.table_name).select("""
+                *,
+                roles(nombre),
+                pacientes(*),
+                medicos(*)
+            """).eq("id", str(usuario_id)))
+            if result.data:
+                return result.data[0]
+            return None
+        except Exception as e:
+            raise e
+    
     async def update_ultimo_login(self, id: UUID) -> Optional[Usuario]:
         """Actualizar último login del usuario"""
         from datetime import datetime
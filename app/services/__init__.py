@@ -7,6 +7,10 @@ from .especialidad_service import EspecialidadService
 from .consultorio_service import ConsultorioService
 from .calificacion_service import CalificacionService
 from .notificacion_service import NotificacionService
+from .identidad_service import IdentidadService
+from .disponibilidad_service import DisponibilidadService
+from .reporte_service import ReporteService
+from .horario_atencion_service import HorarioAtencionService
 
 __all__ = [
     "AuthService",
@@ -17,5 +21,9 @@ __all__ = [
     "EspecialidadService",
     "ConsultorioService",
     "CalificacionService",
-    "NotificacionService"
+    "NotificacionService",
+    "IdentidadService",
+    "DisponibilidadService",
+    "ReporteService",
+    "HorarioAtencionService"
 ]
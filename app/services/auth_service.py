@@ -1,27 +1,110 @@
 """
 Servicio de autenticación integrado con Supabase Auth
 """
-from typing import Optional, Dict, Any
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Set, Tuple
 from fastapi import HTTPException, status
 from supabase import Client
+from jose import jwt, JWTError, JOSEError
+import httpx
 
 from app.config import settings
 from app.models.usuario import UsuarioLogin, Token
+from app.repositories.usuario_repository import UsuarioRepository
+from app.services.identidad_service import IdentidadService
 from app.database import db_connection
 
 
+class TokenCache:
+    """
+    Cache TTL + LRU de tokens validados localmente.
+    
+    Evita repetir la verificación de la firma; el perfil guardado solo identifica
+    al usuario (estado y rol se leen de IdentidadService en cada request).
+    """
+    
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+    
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Obtener el perfil asociado a un token si sigue vigente"""
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, profile = entry
+        if expires_at <= time.time():
+            self._discard(token)
+            return None
+        self._entries.move_to_end(token)
+        return profile
+    
+    def set(self, token: str, profile: Dict[str, Any], exp: Optional[int] = None) -> None:
+        """Guardar un token validado; nunca sobrevive a su claim `exp`"""
+        if self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        self._discard(token)
+        self._entries[token] = (expires_at, profile)
+        self._tokens_by_user.setdefault(str(profile["id"]), set()).add(token)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+    
+    def invalidate_token(self, token: str) -> None:
+        """Eliminar un token del cache"""
+        self._discard(token)
+    
+    def invalidate_user(self, usuario_id: Any) -> None:
+        """Eliminar todos los tokens cacheados de un usuario"""
+        for token in self._tokens_by_user.pop(str(usuario_id), set()):
+            self._entries.pop(token, None)
+    
+    def _discard(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        usuario_id = str(entry[1]["id"])
+        tokens = self._tokens_by_user.get(usuario_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[usuario_id]
+
+
+# Cache global de tokens validados (usado con auth_mode = "local")
+token_cache = TokenCache(settings.auth_cache_max_entries, settings.auth_cache_ttl)
+
+
+# Algoritmo por tipo de clave cuando el JWK no declara `alg`
+ALGORITMOS_JWK = {"RSA": "RS256", "EC": "ES256", "OKP": "EdDSA"}
+
+
 class AuthService:
     """Servicio para manejo de autenticación con Supabase Auth"""
     
+    _jwks: Dict[str, Dict[str, Any]] = {}
+    # Momento de la última descarga del JWKS (limita las descargas por `kid` desconocido)
+    _jwks_descargado_en: float = 0.0
+    
     def __init__(self):
-        # Usar cliente normal para autenticación
-        self.client = db_connection.client
+        # Cliente asíncrono de Supabase Auth (anon key) sobre el pool compartido
+        self.auth = db_connection.auth_client
+        self.usuario_repo = UsuarioRepository(db_connection.data_client)
+        # Los perfiles se crean con la service role key
+        self.perfil_repo = UsuarioRepository(db_connection.service_data_client)
+        self.identidad_service = IdentidadService()
     
     async def login(self, login_data: UsuarioLogin) -> Token:
         """Iniciar sesión usando Supabase Auth"""
         try:
             # Autenticar con Supabase Auth
-            response = self.client.auth.sign_in_with_password({
+            response = await self.auth.sign_in_with_password({
                 "email": login_data.email,
                 "password": login_data.password
             })
@@ -47,7 +130,7 @@ class AuthService:
                 token_type="bearer",
                 expires_in=response.session.expires_in
             )
-            
+        
         except Exception as e:
             if "Invalid login credentials" in str(e):
                 raise HTTPException(
@@ -64,18 +147,93 @@ class AuthService:
     async def _get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Obtener perfil del usuario desde la tabla usuarios"""
         try:
-            result = self.client.table("usuarios").select("*").eq("id", user_id).execute()
-            if result.data:
-                return result.data[0]
-            return None
+            return await self.usuario_repo.get_by_id(user_id)
         except Exception:
             return None
     
+    async def _get_jwk(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Obtener la clave pública del JWKS de Supabase Auth"""
+        # Clave desconocida: refrescar el JWKS (rotación de claves), como mucho una vez
+        # por intervalo para que tokens con `kid` inventados no disparen descargas
+        if kid not in self._jwks and time.time() - self._jwks_descargado_en >= settings.auth_jwks_refresh_interval:
+            AuthService._jwks_descargado_en = time.time()
+            async with httpx.AsyncClient(timeout=settings.db_request_timeout) as http:
+                response = await http.get(f"{settings.supabase_url}/auth/v1/.well-known/jwks.json")
+                response.raise_for_status()
+            AuthService._jwks = {key.get("kid"): key for key in response.json().get("keys", [])}
+        return self._jwks.get(kid)
+    
+    async def _decode_token(self, token: str) -> Dict[str, Any]:
+        """Verificar la firma y los claims de un JWT de Supabase sin llamar a Auth"""
+        if settings.supabase_jwt_secret:
+            return jwt.decode(
+                token,
+                settings.supabase_jwt_secret,
+                algorithms=["HS256"],
+                audience=settings.supabase_jwt_audience
+            )
+        
+        header = jwt.get_unverified_header(token)
+        key = await self._get_jwk(header.get("kid"))
+        if key is None:
+            raise JWTError("Clave de firma desconocida")
+        # El algoritmo lo fija la clave, nunca el encabezado del token
+        algorithm = key.get("alg") or ALGORITMOS_JWK.get(key.get("kty"))
+        if algorithm is None:
+            raise JWTError("Clave de firma sin algoritmo")
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=settings.supabase_jwt_audience
+        )
+    
+    async def _get_current_user_local(self, token: str) -> Dict[str, Any]:
+        """
+        Obtener usuario actual verificando el JWT localmente
+        
+        La verificación del token se cachea `auth_cache_ttl` segundos, pero el perfil
+        (`activo`, rol) sale de la identidad, cacheada solo `identity_cache_ttl`: así
+        una desactivación o un cambio de rol hecho en otra réplica se respeta aquí
+        en ese plazo, sin depender de invalidaciones entre procesos.
+        """
+        cached = token_cache.get(token)
+        claims = None
+        if cached is None:
+            try:
+                claims = await self._decode_token(token)
+            except (JOSEError, httpx.HTTPError):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="No se pudo validar las credenciales",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+        usuario_id = cached["id"] if cached is not None else claims.get("sub")
+        
+        try:
+            identidad = await self.identidad_service.get_identidad(usuario_id)
+        except Exception:
+            identidad = None
+        if not identidad:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Perfil de usuario no encontrado",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        user_profile = identidad["usuario"]
+        if claims is not None:
+            token_cache.set(token, user_profile, claims.get("exp"))
+        return user_profile
+    
     async def get_current_user(self, token: str) -> Dict[str, Any]:
         """Obtener usuario actual desde token de Supabase"""
+        if settings.auth_mode == "local":
+            return await self._get_current_user_local(token)
+        
         try:
             # Verificar token con Supabase
-            response = self.client.auth.get_user(token)
+            response = await self.auth.get_user(token)
             
             if not response.user:
                 raise HTTPException(
@@ -94,7 +252,7 @@ class AuthService:
                 )
             
             return user_profile
-            
+        
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -106,7 +264,7 @@ class AuthService:
         """Registrar nuevo usuario"""
         try:
             # Crear usuario en Supabase Auth
-            response = self.client.auth.sign_up({
+            response = await self.auth.sign_up({
                 "email": email,
                 "password": password,
                 "options": {
@@ -140,14 +298,14 @@ class AuthService:
                 "email_verificado": False
             }
             
-            self.client.table("usuarios").insert(profile_data).execute()
+            await self.perfil_repo.create(profile_data)
             
             return Token(
                 access_token=response.session.access_token if response.session else "",
                 token_type="bearer",
                 expires_in=response.session.expires_in if response.session else 3600
             )
-            
+        
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -157,7 +315,9 @@ class AuthService:
     async def logout(self, token: str) -> bool:
         """Cerrar sesión"""
         try:
-            self.client.auth.sign_out()
+            token_cache.invalidate_token(token)
+            # Cerrar la sesión del token recibido (el cliente compartido no guarda sesiones)
+            await self.auth.admin.sign_out(token, "local")
             return True
         except Exception:
             return False
@@ -165,7 +325,7 @@ class AuthService:
     async def verify_token(self, token: str) -> bool:
         """Verificar si un token es válido"""
         try:
-            response = self.client.auth.get_user(token)
+            response = await self.auth.get_user(token)
             return response.user is not None
         except Exception:
             return False
@@ -1,11 +1,13 @@
 """
 Servicio para la entidad Calificación
 """
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import HTTPException, status
 
 from app.models.calificacion import Calificacion, CalificacionCreate, CalificacionUpdate, CalificacionResponse, CalificacionConDetalles
+from app.models.base import modelo_parcial
+from app.models.paginacion import Pagina
 from app.repositories.calificacion_repository import CalificacionRepository
 from app.repositories.cita_repository import CitaRepository
 from app.repositories.medico_repository import MedicoRepository
@@ -17,10 +19,10 @@ class CalificacionService:
     """Servicio para operaciones de Calificación"""
     
     def __init__(self):
-        self.calificacion_repo = CalificacionRepository(db_connection.client)
-        self.cita_repo = CitaRepository(db_connection.client)
-        self.medico_repo = MedicoRepository(db_connection.client)
-        self.paciente_repo = PacienteRepository(db_connection.client)
+        self.calificacion_repo = CalificacionRepository(db_connection.data_client)
+        self.cita_repo = CitaRepository(db_connection.data_client)
+        self.medico_repo = MedicoRepository(db_connection.data_client)
+        self.paciente_repo = PacienteRepository(db_connection.data_client)
     
     async def create_calificacion(self, calificacion_data: CalificacionCreate) -> CalificacionResponse:
         """Crear una nueva calificación"""
@@ -79,12 +81,8 @@ class CalificacionService:
                 detail="Error al crear la calificación"
             )
         
-        # Actualizar calificación promedio del médico
-        from app.services.medico_service import MedicoService
-        medico_service = MedicoService()
-        await medico_service.update_calificacion_promedio(calificacion_data.medico_id)
-        
-        return CalificacionResponse(**created_calificacion)
+        # El promedio del médico lo mantiene el trigger de agregados
+        return CalificacionResponse.desde_fila(created_calificacion)
     
     async def get_calificacion(self, calificacion_id: UUID) -> CalificacionResponse:
         """Obtener una calificación por ID"""
@@ -94,17 +92,24 @@ class CalificacionService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Calificación no encontrada"
             )
-        return CalificacionResponse(**calificacion)
+        return CalificacionResponse.desde_fila(calificacion)
     
-    async def get_calificaciones(self, skip: int = 0, limit: int = 100) -> List[CalificacionResponse]:
+    async def get_calificaciones(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[CalificacionResponse], Pagina[CalificacionResponse]]:
         """Obtener lista de calificaciones"""
-        calificaciones = await self.calificacion_repo.get_all(skip, limit)
-        return [CalificacionResponse(**calificacion) for calificacion in calificaciones]
+        calificaciones = await self.calificacion_repo.get_all(skip, limit, cursor, fields)
+        modelo = modelo_parcial(CalificacionResponse, tuple(fields)) if fields else CalificacionResponse
+        items = [modelo.desde_fila(calificacion) for calificacion in calificaciones]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.calificacion_repo.next_cursor(calificaciones, limit))
     
-    async def get_calificaciones_with_details(self, skip: int = 0, limit: int = 100) -> List[CalificacionConDetalles]:
+    async def get_calificaciones_with_details(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Union[List[CalificacionConDetalles], Pagina[CalificacionConDetalles]]:
         """Obtener calificaciones con información detallada"""
-        calificaciones = await self.calificacion_repo.get_with_details(skip, limit)
-        return [CalificacionConDetalles(**calificacion) for calificacion in calificaciones]
+        calificaciones = await self.calificacion_repo.get_with_details(skip, limit, cursor)
+        items = [CalificacionConDetalles.desde_fila(calificacion) for calificacion in calificaciones]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.calificacion_repo.next_cursor(calificaciones, limit))
     
     async def update_calificacion(self, calificacion_id: UUID, calificacion_data: CalificacionUpdate) -> CalificacionResponse:
         """Actualizar una calificación"""
@@ -123,12 +128,8 @@ class CalificacionService:
                 detail="Error al actualizar la calificación"
             )
         
-        # Actualizar calificación promedio del médico
-        from app.services.medico_service import MedicoService
-        medico_service = MedicoService()
-        await medico_service.update_calificacion_promedio(existing_calificacion["medico_id"])
-        
-        return CalificacionResponse(**updated_calificacion)
+        # El promedio del médico lo mantiene el trigger de agregados
+        return CalificacionResponse.desde_fila(updated_calificacion)
     
     async def delete_calificacion(self, calificacion_id: UUID) -> bool:
         """Eliminar una calificación"""
@@ -139,34 +140,36 @@ class CalificacionService:
                 detail="Calificación no encontrada"
             )
         
-        medico_id = existing_calificacion["medico_id"]
-        deleted = await self.calificacion_repo.delete(calificacion_id)
-        
-        if deleted:
-            # Actualizar calificación promedio del médico
-            from app.services.medico_service import MedicoService
-            medico_service = MedicoService()
-            await medico_service.update_calificacion_promedio(medico_id)
-        
-        return deleted
+        # El promedio del médico lo mantiene el trigger de agregados
+        return await self.calificacion_repo.delete(calificacion_id)
     
     async def get_calificaciones_by_paciente(self, paciente_id: UUID) -> List[CalificacionResponse]:
         """Obtener calificaciones por paciente"""
         calificaciones = await self.calificacion_repo.get_by_paciente(paciente_id)
-        return [CalificacionResponse(**calificacion) for calificacion in calificaciones]
+        return [CalificacionResponse.desde_fila(calificacion) for calificacion in calificaciones]
     
     async def get_calificaciones_by_medico(self, medico_id: UUID) -> List[CalificacionResponse]:
         """Obtener calificaciones por médico"""
         calificaciones = await self.calificacion_repo.get_by_medico(medico_id)
-        return [CalificacionResponse(**calificacion) for calificacion in calificaciones]
+        return [CalificacionResponse.desde_fila(calificacion) for calificacion in calificaciones]
     
     async def get_calificacion_by_cita(self, cita_id: UUID) -> Optional[CalificacionResponse]:
         """Obtener calificación por cita"""
         calificacion = await self.calificacion_repo.get_by_cita(cita_id)
         if calificacion:
-            return CalificacionResponse(**calificacion)
+            return CalificacionResponse.desde_fila(calificacion)
         return None
     
     async def get_promedio_medico(self, medico_id: UUID) -> float:
         """Obtener calificación promedio de un médico"""
         return await self.calificacion_repo.get_promedio_medico(medico_id)
+    
+    async def get_resumen_medico(self, medico_id: UUID) -> dict:
+        """Obtener promedio, total y distribución de estrellas de un médico"""
+        agregado = await self.calificacion_repo.get_agregado_medico(medico_id) or {}
+        total = agregado.get("total", 0)
+        return {
+            "calificacion_promedio": agregado["suma"] / total if total > 0 else 0.0,
+            "total_calificaciones": total,
+            "distribucion": {str(estrellas): agregado.get(f"estrellas_{estrellas}", 0) for estrellas in range(1, 6)}
+        }
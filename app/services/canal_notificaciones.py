@@ -0,0 +1,59 @@
+"""
+Canal en proceso para publicar eventos de notificaciones a los clientes conectados
+"""
+import asyncio
+from typing import Any, Dict, Set, Tuple
+from uuid import UUID
+
+from app.config import settings
+
+# Eventos enviados a los suscriptores
+EVENTO_NOTIFICACION = "notificacion"
+EVENTO_LEIDAS = "leidas"
+# La cola del suscriptor se llenó y se descartaron eventos: volver a consultar la bandeja
+EVENTO_RESINCRONIZAR = "resincronizar"
+
+Evento = Tuple[str, Any]
+
+
+class CanalNotificaciones:
+    """
+    Pub/sub por usuario sobre colas de asyncio.
+    
+    Cada conexión abierta (stream SSE o long-poll) tiene su propia cola acotada.
+    Los eventos solo llegan a las conexiones de esta réplica; con varias réplicas
+    los clientes se recuperan consultando la bandeja desde la última notificación vista.
+    """
+    
+    def __init__(self):
+        # usuario_id -> colas de sus conexiones abiertas
+        self._suscriptores: Dict[str, Set["asyncio.Queue[Evento]"]] = {}
+    
+    def suscribir(self, usuario_id: UUID) -> "asyncio.Queue[Evento]":
+        """Abrir una cola que recibe los eventos del usuario"""
+        cola: "asyncio.Queue[Evento]" = asyncio.Queue(maxsize=settings.notifications_stream_queue_size)
+        self._suscriptores.setdefault(str(usuario_id), set()).add(cola)
+        return cola
+    
+    def cancelar(self, usuario_id: UUID, cola: "asyncio.Queue[Evento]") -> None:
+        """Cerrar la cola de una conexión"""
+        colas = self._suscriptores.get(str(usuario_id))
+        if colas is None:
+            return
+        colas.discard(cola)
+        if not colas:
+            del self._suscriptores[str(usuario_id)]
+    
+    def publicar(self, usuario_id: UUID, evento: str, datos: Any) -> None:
+        """Entregar un evento a todas las conexiones del usuario sin esperar a ninguna"""
+        for cola in self._suscriptores.get(str(usuario_id), ()):
+            try:
+                cola.put_nowait((evento, datos))
+            except asyncio.QueueFull:
+                # Cliente lento: descartar lo pendiente y pedirle que se resincronice
+                while not cola.empty():
+                    cola.get_nowait()
+                cola.put_nowait((EVENTO_RESINCRONIZAR, None))
+
+
+canal_notificaciones = CanalNotificaciones()
@@ -1,74 +1,190 @@
 """
 Servicio para la entidad Cita
 """
-from typing import List, Optional
+import asyncio
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 from datetime import date, time, datetime, timedelta
 from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from postgrest.exceptions import APIError
+from pydantic import ValidationError
+from pydantic_core import to_json
 
 from app.models.cita import Cita, CitaCreate, CitaUpdate, CitaResponse, CitaConDetalles
+from app.models.estado_cita import ESTADOS_SIN_HORARIO
+from app.models.base import modelo_parcial
+from app.models.lote import ResultadoItem, ResultadoLote, describir_error
+from app.models.paginacion import Pagina
 from app.repositories.cita_repository import CitaRepository
+from app.repositories.consultorio_repository import ConsultorioRepository
+from app.repositories.estado_cita_repository import EstadoCitaRepository
 from app.repositories.medico_repository import MedicoRepository
 from app.repositories.paciente_repository import PacienteRepository
+from app.services.disponibilidad_service import AgendaDia, DisponibilidadService, OcupacionConsultorio, a_minutos
+from app.config import settings
 from app.database import db_connection
 
+# Filas por llamada a agenda_citas (por debajo del max-rows de PostgREST)
+AGENDA_PAGINA = 500
+
 
 class CitaService:
     """Servicio para operaciones de Cita"""
     
     def __init__(self):
-        self.cita_repo = CitaRepository(db_connection.client)
-        self.medico_repo = MedicoRepository(db_connection.client)
-        self.paciente_repo = PacienteRepository(db_connection.client)
+        self.cita_repo = CitaRepository(db_connection.data_client)
+        self.medico_repo = MedicoRepository(db_connection.data_client)
+        self.paciente_repo = PacienteRepository(db_connection.data_client)
+        self.consultorio_repo = ConsultorioRepository(db_connection.data_client)
+        self.estado_repo = EstadoCitaRepository(db_connection.data_client)
+        self.disponibilidad_service = DisponibilidadService()
     
     async def create_cita(self, cita_data: CitaCreate) -> CitaResponse:
         """Crear una nueva cita"""
-        # Verificar que el médico existe y está disponible
-        medico = await self.medico_repo.get_by_id(cita_data.medico_id)
-        if not medico:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Médico no encontrado"
-            )
+        # Validación, bloqueo e inserción en una sola transacción (función reservar_cita)
+        try:
+            created_cita = await self.cita_repo.reservar(jsonable_encoder(cita_data))
+        except APIError as e:
+            if e.code == "P0002":
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=e.message
+                )
+            if e.code in ("P0001", "23P01"):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El horario seleccionado no está disponible" if e.code == "23P01" else e.message
+                )
+            raise
         
-        if not medico["disponible"]:
+        if not created_cita:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El médico no está disponible"
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error al crear la cita"
             )
         
-        # Verificar que el paciente existe
-        paciente = await self.paciente_repo.get_by_id(cita_data.paciente_id)
-        if not paciente:
+        DisponibilidadService.registrar(created_cita)
+        return CitaResponse.desde_fila(created_cita)
+    
+    async def create_citas_lote(self, items: List[Dict[str, Any]]) -> ResultadoLote[CitaResponse]:
+        """
+        Crear varias citas con un solo INSERT multi-fila.
+        
+        Cada elemento se valida por separado: los datos inválidos, las referencias
+        inexistentes y los choques de horario (con citas existentes o con otro
+        elemento del lote) se reportan en su posición y el resto se inserta. La capacidad
+        de los consultorios se valida igual, contando también las citas del lote. Las
+        citas en un estado que no ocupa horario (canceladas, sin asistencia) no se
+        comparan con la agenda ni con los consultorios.
+        """
+        if len(items) > settings.bulk_max_items:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Paciente no encontrado"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El lote no puede tener más de {settings.bulk_max_items} elementos"
             )
         
-        # Verificar disponibilidad del horario
-        horario_disponible = await self.cita_repo.check_horario_disponible(
-            cita_data.medico_id,
-            cita_data.fecha,
-            cita_data.hora_inicio.isoformat(),
-            cita_data.hora_fin.isoformat()
-        )
+        resultados: Dict[int, ResultadoItem[CitaResponse]] = {}
+        validas: List[Tuple[int, CitaCreate]] = []
+        for indice, item in enumerate(items):
+            try:
+                validas.append((indice, CitaCreate(**item)))
+            except ValidationError as e:
+                resultados[indice] = ResultadoItem(indice=indice, ok=False, error=describir_error(e))
         
-        if not horario_disponible:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El horario seleccionado no está disponible"
+        por_insertar: List[Tuple[int, CitaCreate]] = []
+        if validas:
+            citas = [cita for _, cita in validas]
+            medico_ids = {cita.medico_id for cita in citas}
+            consultorio_ids = list({cita.consultorio_id for cita in citas if cita.consultorio_id})
+            fecha_inicio, fecha_fin = min(cita.fecha for cita in citas), max(cita.fecha for cita in citas)
+            # Una consulta por tabla referenciada y una para la ocupación de médicos y de consultorios
+            medicos, pacientes, estados, consultorios, ocupacion, ocupacion_consultorios = await asyncio.gather(
+                self.medico_repo.get_by_ids(list(medico_ids), ["disponible"]),
+                self.paciente_repo.get_by_ids(list({cita.paciente_id for cita in citas}), ["id"]),
+                self.estado_repo.get_by_ids(list({cita.estado_id for cita in citas}), ["nombre"]),
+                self.consultorio_repo.get_by_ids(consultorio_ids, ["activo", "capacidad"]),
+                self.cita_repo.get_ocupacion(list(medico_ids), fecha_inicio, fecha_fin),
+                self.cita_repo.get_ocupacion_consultorios(fecha_inicio, fecha_fin, consultorio_ids)
             )
+            disponibles = {medico["id"]: medico["disponible"] for medico in medicos}
+            pacientes = {paciente["id"] for paciente in pacientes}
+            ocupa_horario = {estado["id"]: estado["nombre"] not in ESTADOS_SIN_HORARIO for estado in estados}
+            consultorios = {consultorio["id"]: consultorio for consultorio in consultorios}
+            
+            agendas: Dict[Tuple[str, str], AgendaDia] = defaultdict(lambda: AgendaDia(0))
+            for ocupada in ocupacion:
+                agendas[(ocupada["medico_id"], ocupada["fecha"])].agregar(
+                    str(ocupada["id"]), a_minutos(ocupada["hora_inicio"]), a_minutos(ocupada["hora_fin"])
+                )
+            salas: Dict[Tuple[str, str], OcupacionConsultorio] = defaultdict(OcupacionConsultorio)
+            for ocupada in ocupacion_consultorios:
+                salas[(ocupada["consultorio_id"], ocupada["fecha"])].agregar(
+                    str(ocupada["id"]), a_minutos(ocupada["hora_inicio"]), a_minutos(ocupada["hora_fin"])
+                )
+            
+            for indice, cita in validas:
+                medico_id = str(cita.medico_id)
+                if medico_id not in disponibles:
+                    error = "Médico no encontrado"
+                elif not disponibles[medico_id]:
+                    error = "El médico no está disponible"
+                elif str(cita.paciente_id) not in pacientes:
+                    error = "Paciente no encontrado"
+                elif str(cita.estado_id) not in ocupa_horario:
+                    error = "Estado de cita no encontrado"
+                elif cita.consultorio_id and str(cita.consultorio_id) not in consultorios:
+                    error = "Consultorio no encontrado"
+                elif cita.consultorio_id and not consultorios[str(cita.consultorio_id)]["activo"]:
+                    error = "El consultorio no está activo"
+                elif not ocupa_horario[str(cita.estado_id)]:
+                    por_insertar.append((indice, cita))
+                    continue
+                else:
+                    agenda = agendas[(medico_id, cita.fecha.isoformat())]
+                    sala = salas[(str(cita.consultorio_id), cita.fecha.isoformat())] if cita.consultorio_id else None
+                    inicio, fin = a_minutos(cita.hora_inicio), a_minutos(cita.hora_fin)
+                    if not agenda.libre(inicio, fin):
+                        error = "El horario seleccionado no está disponible"
+                    elif sala is not None and not sala.libre(inicio, fin, consultorios[str(cita.consultorio_id)]["capacidad"]):
+                        error = "El consultorio no tiene capacidad en el horario seleccionado"
+                    else:
+                        # Ocupar el horario para los elementos siguientes del lote
+                        agenda.agregar(f"lote-{indice}", inicio, fin)
+                        if sala is not None:
+                            sala.agregar(f"lote-{indice}", inicio, fin)
+                        por_insertar.append((indice, cita))
+                        continue
+                resultados[indice] = ResultadoItem(indice=indice, ok=False, error=error)
         
-        # Crear la cita
-        cita_dict = cita_data.dict()
-        created_cita = await self.cita_repo.create(cita_dict)
-        if not created_cita:
+        try:
+            creadas = await self.cita_repo.create_many([jsonable_encoder(cita) for _, cita in por_insertar])
+        except APIError as e:
+            # citas_medico_horario_excl o trigger_validar_capacidad_consultorio rechazan el INSERT completo
+            if e.code in ("23P01", "P0001"):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Otra reserva ocupó uno de los horarios del lote; no se creó ninguna cita"
+                )
+            raise
+        
+        if len(creadas) != len(por_insertar):
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Error al crear la cita"
+                detail="Error al crear las citas"
             )
         
-        return CitaResponse(**created_cita)
+        for (indice, _), creada in zip(por_insertar, creadas):
+            DisponibilidadService.registrar(creada)
+            resultados[indice] = ResultadoItem(indice=indice, ok=True, item=CitaResponse.desde_fila(creada))
+        
+        return ResultadoLote(
+            total=len(items),
+            creados=len(creadas),
+            errores=len(items) - len(creadas),
+            resultados=[resultados[indice] for indice in range(len(items))]
+        )
     
     async def get_cita(self, cita_id: UUID) -> CitaResponse:
         """Obtener una cita por ID"""
@@ -78,17 +194,24 @@ class CitaService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Cita no encontrada"
             )
-        return CitaResponse(**cita)
+        return CitaResponse.desde_fila(cita)
     
-    async def get_citas(self, skip: int = 0, limit: int = 100) -> List[CitaResponse]:
+    async def get_citas(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[CitaResponse], Pagina[CitaResponse]]:
         """Obtener lista de citas"""
-        citas = await self.cita_repo.get_all(skip, limit)
-        return [CitaResponse(**cita) for cita in citas]
+        citas = await self.cita_repo.get_all(skip, limit, cursor, fields)
+        modelo = modelo_parcial(CitaResponse, tuple(fields)) if fields else CitaResponse
+        items = [modelo.desde_fila(cita) for cita in citas]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.cita_repo.next_cursor(citas, limit))
     
-    async def get_citas_with_details(self, skip: int = 0, limit: int = 100) -> List[CitaConDetalles]:
+    async def get_citas_with_details(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Union[List[CitaConDetalles], Pagina[CitaConDetalles]]:
         """Obtener citas con información detallada"""
-        citas = await self.cita_repo.get_with_details(skip, limit)
-        return [CitaConDetalles(**cita) for cita in citas]
+        citas = await self.cita_repo.get_with_details(skip, limit, cursor)
+        items = [CitaConDetalles.desde_fila(cita) for cita in citas]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.cita_repo.next_cursor(citas, limit))
     
     async def update_cita(self, cita_id: UUID, cita_data: CitaUpdate) -> CitaResponse:
         """Actualizar una cita"""
@@ -100,15 +223,18 @@ class CitaService:
             )
         
         # Si se está cambiando el horario, verificar disponibilidad
-        if (cita_data.fecha or cita_data.hora_inicio or cita_data.hora_fin or cita_data.medico_id):
-            medico_id = cita_data.medico_id or existing_cita["medico_id"]
-            fecha = cita_data.fecha or existing_cita["fecha"]
-            hora_inicio = cita_data.hora_inicio or existing_cita["hora_inicio"]
-            hora_fin = cita_data.hora_fin or existing_cita["hora_fin"]
+        if (cita_data.fecha or cita_data.hora_inicio or cita_data.hora_fin):
+            # Los valores que no cambian llegan de la base de datos como texto
+            horario = jsonable_encoder({
+                "medico_id": existing_cita["medico_id"],
+                "fecha": cita_data.fecha or existing_cita["fecha"],
+                "hora_inicio": cita_data.hora_inicio or existing_cita["hora_inicio"],
+                "hora_fin": cita_data.hora_fin or existing_cita["hora_fin"]
+            })
             
             # Verificar disponibilidad excluyendo la cita actual
             horario_disponible = await self.cita_repo.check_horario_disponible(
-                medico_id, fecha, hora_inicio.isoformat(), hora_fin.isoformat()
+                horario["medico_id"], horario["fecha"], horario["hora_inicio"], horario["hora_fin"], cita_id
             )
             
             if not horario_disponible:
@@ -117,15 +243,31 @@ class CitaService:
                     detail="El horario seleccionado no está disponible"
                 )
         
-        update_data = cita_data.dict(exclude_unset=True)
-        updated_cita = await self.cita_repo.update(cita_id, update_data)
+        update_data = jsonable_encoder(cita_data.dict(exclude_unset=True))
+        try:
+            updated_cita = await self.cita_repo.update(cita_id, update_data)
+        except APIError as e:
+            # Otra cita ocupó el horario, o la cita pasa a un estado que ocupa un horario tomado
+            if e.code == "23P01":
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El horario seleccionado no está disponible"
+                )
+            # Consultorio inexistente, inactivo o sin capacidad (trigger_validar_capacidad_consultorio)
+            if e.code in ("P0001", "P0002"):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND if e.code == "P0002" else status.HTTP_400_BAD_REQUEST,
+                    detail=e.message
+                )
+            raise
         if not updated_cita:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error al actualizar la cita"
             )
         
-        return CitaResponse(**updated_cita)
+        DisponibilidadService.registrar(updated_cita)
+        return CitaResponse.desde_fila(updated_cita)
     
     async def delete_cita(self, cita_id: UUID) -> bool:
         """Eliminar una cita"""
@@ -136,32 +278,51 @@ class CitaService:
                 detail="Cita no encontrada"
             )
         
-        return await self.cita_repo.delete(cita_id)
+        deleted = await self.cita_repo.delete(cita_id)
+        if deleted:
+            DisponibilidadService.liberar(cita_id)
+        return deleted
     
     async def get_citas_by_paciente(self, paciente_id: UUID) -> List[CitaConDetalles]:
         """Obtener citas de un paciente"""
         citas = await self.cita_repo.get_by_paciente_with_details(paciente_id)
-        return [CitaConDetalles(**cita) for cita in citas]
+        return [CitaConDetalles.desde_fila(cita) for cita in citas]
     
     async def get_citas_by_medico(self, medico_id: UUID) -> List[CitaConDetalles]:
         """Obtener citas de un médico"""
         citas = await self.cita_repo.get_by_medico_with_details(medico_id)
-        return [CitaConDetalles(**cita) for cita in citas]
+        return [CitaConDetalles.desde_fila(cita) for cita in citas]
     
-    async def get_citas_by_fecha(self, fecha: date) -> List[CitaResponse]:
+    async def get_citas_by_identidad(self, identidad: Dict[str, Any]) -> List[CitaConDetalles]:
+        """Obtener las citas de un usuario como paciente y como médico (identidad de IdentidadService)"""
+        consultas = []
+        if identidad.get("paciente"):
+            consultas.append(self.cita_repo.get_by_paciente_with_details(identidad["paciente"]["id"]))
+        if identidad.get("medico"):
+            consultas.append(self.cita_repo.get_by_medico_with_details(identidad["medico"]["id"]))
+        citas = {}
+        for filas in await asyncio.gather(*consultas):
+            for cita in filas:
+                citas.setdefault(cita["id"], cita)
+        return [CitaConDetalles.desde_fila(cita) for cita in citas.values()]
+    
+    async def get_citas_by_fecha(self, fecha: date, fields: Optional[List[str]] = None) -> List[CitaResponse]:
         """Obtener citas por fecha"""
-        citas = await self.cita_repo.get_by_fecha(fecha)
-        return [CitaResponse(**cita) for cita in citas]
+        citas = await self.cita_repo.get_by_fecha(fecha, fields)
+        modelo = modelo_parcial(CitaResponse, tuple(fields)) if fields else CitaResponse
+        return [modelo.desde_fila(cita) for cita in citas]
     
-    async def get_citas_by_fecha_range(self, fecha_inicio: date, fecha_fin: date) -> List[CitaResponse]:
+    async def get_citas_by_fecha_range(self, fecha_inicio: date, fecha_fin: date, fields: Optional[List[str]] = None) -> List[CitaResponse]:
         """Obtener citas en un rango de fechas"""
-        citas = await self.cita_repo.get_by_fecha_range(fecha_inicio, fecha_fin)
-        return [CitaResponse(**cita) for cita in citas]
+        citas = await self.cita_repo.get_by_fecha_range(fecha_inicio, fecha_fin, fields)
+        modelo = modelo_parcial(CitaResponse, tuple(fields)) if fields else CitaResponse
+        return [modelo.desde_fila(cita) for cita in citas]
     
-    async def get_citas_pendientes_pago(self) -> List[CitaResponse]:
+    async def get_citas_pendientes_pago(self, fields: Optional[List[str]] = None) -> List[CitaResponse]:
         """Obtener citas pendientes de pago"""
-        citas = await self.cita_repo.get_pendientes_pago()
-        return [CitaResponse(**cita) for cita in citas]
+        citas = await self.cita_repo.get_pendientes_pago(fields)
+        modelo = modelo_parcial(CitaResponse, tuple(fields)) if fields else CitaResponse
+        return [modelo.desde_fila(cita) for cita in citas]
     
     async def marcar_como_pagada(self, cita_id: UUID) -> CitaResponse:
         """Marcar cita como pagada"""
@@ -172,48 +333,40 @@ class CitaService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Cita no encontrada"
             )
-        return CitaResponse(**updated_cita)
+        return CitaResponse.desde_fila(updated_cita)
     
-    async def get_horarios_disponibles(self, medico_id: UUID, fecha: date) -> List[dict]:
-        """Obtener horarios disponibles para un médico en una fecha"""
-        # Obtener citas existentes del médico en esa fecha
-        citas_existentes = await self.cita_repo.get_by_medico_fecha(medico_id, fecha)
-        
-        # Obtener horarios de atención del médico
-        # Aquí podrías implementar lógica para obtener horarios de atención
-        # Por simplicidad, asumimos horarios de 9:00 a 17:00 con intervalos de 30 min
-        
-        horarios_ocupados = []
-        for cita in citas_existentes:
-            horarios_ocupados.append({
-                "inicio": cita["hora_inicio"],
-                "fin": cita["hora_fin"]
-            })
+    async def get_agenda(self, fecha: date, vista: str = "dia", medico_id: Optional[UUID] = None, consultorio_id: Optional[UUID] = None) -> AsyncIterator[bytes]:
+        """
+        Agenda de un día o de su semana (lunes a domingo) como un arreglo JSON generado por partes.
         
-        # Generar horarios disponibles (simplificado)
-        horarios_disponibles = []
-        hora_inicio = time(9, 0)
-        hora_fin = time(17, 0)
+        Las filas se piden a agenda_citas en páginas de AGENDA_PAGINA y cada página se
+        envía en cuanto llega. La primera se obtiene antes de responder para que un
+        error se informe con su código de estado.
+        """
+        if vista == "semana":
+            fecha_inicio = fecha - timedelta(days=fecha.weekday())
+            fecha_fin = fecha_inicio + timedelta(days=6)
+        else:
+            fecha_inicio = fecha_fin = fecha
         
-        current_time = datetime.combine(fecha, hora_inicio)
-        end_time = datetime.combine(fecha, hora_fin)
+        pagina = await self.cita_repo.get_agenda(fecha_inicio, fecha_fin, medico_id, consultorio_id, 0, AGENDA_PAGINA)
         
-        while current_time < end_time:
-            slot_inicio = current_time.time()
-            slot_fin = (current_time + timedelta(minutes=30)).time()
-            
-            # Verificar si el slot está ocupado
-            ocupado = any(
-                slot_inicio < ocupado["fin"] and slot_fin > ocupado["inicio"]
-                for ocupado in horarios_ocupados
-            )
-            
-            if not ocupado:
-                horarios_disponibles.append({
-                    "hora_inicio": slot_inicio.isoformat(),
-                    "hora_fin": slot_fin.isoformat()
-                })
-            
-            current_time += timedelta(minutes=30)
+        async def generar() -> AsyncIterator[bytes]:
+            nonlocal pagina
+            offset = 0
+            separador = b"["
+            while pagina:
+                # Las filas de PostgREST ya son JSON: se reenvían sin pasar por modelos
+                yield separador + to_json(pagina)[1:-1]
+                separador = b","
+                if len(pagina) < AGENDA_PAGINA:
+                    break
+                offset += AGENDA_PAGINA
+                pagina = await self.cita_repo.get_agenda(fecha_inicio, fecha_fin, medico_id, consultorio_id, offset, AGENDA_PAGINA)
+            yield b"[]" if separador == b"[" else b"]"
         
-        return horarios_disponibles
+        return generar()
+    
+    async def get_horarios_disponibles(self, medico_id: UUID, fecha: date, duracion: Optional[int] = None) -> List[dict]:
+        """Obtener horarios disponibles para un médico en una fecha"""
+        return await self.disponibilidad_service.get_horarios_disponibles(medico_id, fecha, duracion)
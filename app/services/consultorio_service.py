@@ -1,20 +1,27 @@
 """
 Servicio para la entidad Consultorio
 """
-from typing import List, Optional
+import asyncio
+from datetime import date, time
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import HTTPException, status
 
 from app.models.consultorio import Consultorio, ConsultorioCreate, ConsultorioUpdate, ConsultorioResponse
+from app.models.base import modelo_parcial
+from app.models.paginacion import Pagina
 from app.repositories.consultorio_repository import ConsultorioRepository
+from app.services.disponibilidad_service import DisponibilidadService, a_minutos
 from app.database import db_connection
+from app.database.cache import reference_cache
 
 
 class ConsultorioService:
     """Servicio para operaciones de Consultorio"""
     
     def __init__(self):
-        self.consultorio_repo = ConsultorioRepository(db_connection.client)
+        self.consultorio_repo = ConsultorioRepository(db_connection.data_client)
+        self.disponibilidad_service = DisponibilidadService()
     
     async def create_consultorio(self, consultorio_data: ConsultorioCreate) -> ConsultorioResponse:
         """Crear un nuevo consultorio"""
@@ -35,7 +42,8 @@ class ConsultorioService:
                 detail="Error al crear el consultorio"
             )
         
-        return ConsultorioResponse(**created_consultorio)
+        reference_cache.invalidate(self.consultorio_repo.table_name)
+        return ConsultorioResponse.desde_fila(created_consultorio)
     
     async def get_consultorio(self, consultorio_id: UUID) -> ConsultorioResponse:
         """Obtener un consultorio por ID"""
@@ -45,12 +53,16 @@ class ConsultorioService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Consultorio no encontrado"
             )
-        return ConsultorioResponse(**consultorio)
+        return ConsultorioResponse.desde_fila(consultorio)
     
-    async def get_consultorios(self, skip: int = 0, limit: int = 100) -> List[ConsultorioResponse]:
+    async def get_consultorios(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[ConsultorioResponse], Pagina[ConsultorioResponse]]:
         """Obtener lista de consultorios"""
-        consultorios = await self.consultorio_repo.get_all(skip, limit)
-        return [ConsultorioResponse(**consultorio) for consultorio in consultorios]
+        consultorios = await self.consultorio_repo.get_all(skip, limit, cursor, fields)
+        modelo = modelo_parcial(ConsultorioResponse, tuple(fields)) if fields else ConsultorioResponse
+        items = [modelo.desde_fila(consultorio) for consultorio in consultorios]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.consultorio_repo.next_cursor(consultorios, limit))
     
     async def update_consultorio(self, consultorio_id: UUID, consultorio_data: ConsultorioUpdate) -> ConsultorioResponse:
         """Actualizar un consultorio"""
@@ -79,7 +91,8 @@ class ConsultorioService:
                 detail="Error al actualizar el consultorio"
             )
         
-        return ConsultorioResponse(**updated_consultorio)
+        reference_cache.invalidate(self.consultorio_repo.table_name)
+        return ConsultorioResponse.desde_fila(updated_consultorio)
     
     async def delete_consultorio(self, consultorio_id: UUID) -> bool:
         """Eliminar un consultorio (soft delete)"""
@@ -93,19 +106,51 @@ class ConsultorioService:
         # Soft delete - marcar como inactivo
         update_data = {"activo": False}
         updated_consultorio = await self.consultorio_repo.update(consultorio_id, update_data)
+        reference_cache.invalidate(self.consultorio_repo.table_name)
         return updated_consultorio is not None
     
-    async def get_consultorios_activos(self, skip: int = 0, limit: int = 100) -> List[ConsultorioResponse]:
+    async def get_consultorios_activos(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[ConsultorioResponse], Pagina[ConsultorioResponse]]:
         """Obtener consultorios activos"""
-        consultorios = await self.consultorio_repo.get_activos(skip, limit)
-        return [ConsultorioResponse(**consultorio) for consultorio in consultorios]
+        consultorios = await self.consultorio_repo.get_activos(skip, limit, cursor, fields)
+        modelo = modelo_parcial(ConsultorioResponse, tuple(fields)) if fields else ConsultorioResponse
+        items = [modelo.desde_fila(consultorio) for consultorio in consultorios]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.consultorio_repo.next_cursor(consultorios, limit))
     
     async def get_consultorios_by_ubicacion(self, ubicacion: str) -> List[ConsultorioResponse]:
         """Obtener consultorios por ubicación"""
         consultorios = await self.consultorio_repo.get_by_ubicacion(ubicacion)
-        return [ConsultorioResponse(**consultorio) for consultorio in consultorios]
+        return [ConsultorioResponse.desde_fila(consultorio) for consultorio in consultorios]
     
     async def get_consultorios_by_capacidad(self, capacidad_min: int) -> List[ConsultorioResponse]:
         """Obtener consultorios con capacidad mínima"""
         consultorios = await self.consultorio_repo.get_by_capacidad_minima(capacidad_min)
-        return [ConsultorioResponse(**consultorio) for consultorio in consultorios]
+        return [ConsultorioResponse.desde_fila(consultorio) for consultorio in consultorios]
+    
+    async def get_consultorios_disponibles(self, fecha: date, hora_inicio: time, hora_fin: time) -> List[ConsultorioResponse]:
+        """
+        Obtener los consultorios activos con capacidad libre en un horario.
+        
+        La ocupación se lee del índice por día de DisponibilidadService (una consulta
+        de citas por día mientras está vigente) y los consultorios del cache de referencia.
+        """
+        if hora_fin <= hora_inicio:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La hora de fin debe ser posterior a la hora de inicio"
+            )
+        
+        consultorios, ocupacion = await asyncio.gather(
+            reference_cache.get_or_load(
+                self.consultorio_repo.table_name, ("activos",), lambda: self.consultorio_repo.get_activos(0, 1000)
+            ),
+            self.disponibilidad_service.get_ocupacion_consultorios(fecha)
+        )
+        inicio, fin = a_minutos(hora_inicio), a_minutos(hora_fin)
+        disponibles = []
+        for consultorio in consultorios:
+            sala = ocupacion.get(str(consultorio["id"]))
+            if sala is None or sala.libre(inicio, fin, consultorio["capacidad"]):
+                disponibles.append(ConsultorioResponse.desde_fila(consultorio))
+        return disponibles
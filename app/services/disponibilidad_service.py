@@ -0,0 +1,535 @@
+"""
+Servicio de disponibilidad de médicos y consultorios con índices de intervalos en memoria
+"""
+import asyncio
+import time as clock
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, defaultdict
+from datetime import date, time, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+from uuid import UUID
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.repositories.cita_repository import CitaRepository
+from app.repositories.consultorio_repository import ConsultorioRepository
+from app.repositories.horario_atencion_repository import HorarioAtencionRepository, ExcepcionHorarioRepository
+from app.repositories.medico_repository import MedicoRepository
+from app.database import db_connection
+
+# Horario de los médicos sin horarios_atencion, todos los días (minutos desde medianoche)
+HORA_APERTURA = 9 * 60
+HORA_CIERRE = 17 * 60
+DURACION_DEFAULT = 30
+# Plantillas semanales: bloques de 5 minutos, un bit por bloque
+BLOQUE_MINUTOS = 5
+BLOQUES_DIA = 24 * 60 // BLOQUE_MINUTOS
+DIA_COMPLETO = (1 << BLOQUES_DIA) - 1
+# Días máximos por búsqueda de disponibilidad
+MAX_DIAS_BUSQUEDA = 31
+
+
+def a_minutos(value: Any) -> int:
+    """Convertir una hora (time o 'HH:MM[:SS]' de PostgREST) a minutos desde medianoche"""
+    if isinstance(value, str):
+        value = time.fromisoformat(value)
+    return value.hour * 60 + value.minute
+
+
+def a_hora(minutos: int) -> str:
+    """Convertir minutos desde medianoche a 'HH:MM:SS'"""
+    return time(minutos // 60, minutos % 60).isoformat()
+
+
+def mascara(inicio: int, fin: int) -> int:
+    """Bits de los bloques de 5 minutos que toca [inicio, fin) (minutos desde medianoche)"""
+    primero = inicio // BLOQUE_MINUTOS
+    ultimo = -(-fin // BLOQUE_MINUTOS)
+    if ultimo <= primero:
+        return 0
+    return ((1 << (ultimo - primero)) - 1) << primero
+
+
+class AgendaDia:
+    """
+    Intervalos ocupados de un médico en un día, ordenados por hora de inicio.
+    
+    Las citas de un médico no se solapan (restricción citas_medico_horario_excl),
+    por lo que las horas de fin quedan en el mismo orden que las de inicio y basta
+    una búsqueda binaria para saber si un intervalo está libre. El bitset de
+    bloques ocupados se mantiene junto a los intervalos para no recorrer el día
+    en cada consulta de turnos.
+    """
+    
+    __slots__ = ("inicios", "fines", "citas", "expira_en", "_ocupado")
+    
+    def __init__(self, expira_en: float):
+        self.inicios: List[int] = []
+        self.fines: List[int] = []
+        self.citas: Dict[str, Tuple[int, int]] = {}
+        self.expira_en = expira_en
+        self._ocupado: Optional[int] = 0
+    
+    def agregar(self, cita_id: str, inicio: int, fin: int) -> None:
+        """Registrar una cita ocupando [inicio, fin)"""
+        if cita_id in self.citas:
+            self.quitar(cita_id)
+        i = bisect_right(self.inicios, inicio)
+        self.inicios.insert(i, inicio)
+        self.fines.insert(i, fin)
+        self.citas[cita_id] = (inicio, fin)
+        if self._ocupado is not None:
+            self._ocupado |= mascara(inicio, fin)
+    
+    def quitar(self, cita_id: str) -> None:
+        """Liberar el intervalo de una cita"""
+        intervalo = self.citas.pop(cita_id, None)
+        if intervalo is None:
+            return
+        # Un bloque de 5 minutos puede compartirse con una cita vecina: se recalcula al consultarlo
+        self._ocupado = None
+        inicio, fin = intervalo
+        i = bisect_left(self.inicios, inicio)
+        while i < len(self.inicios) and self.inicios[i] == inicio:
+            if self.fines[i] == fin:
+                del self.inicios[i]
+                del self.fines[i]
+                return
+            i += 1
+    
+    def libre(self, inicio: int, fin: int) -> bool:
+        """Indicar si [inicio, fin) no se solapa con ninguna cita, en O(log n)"""
+        # Primera cita que empieza en o después del fin: ninguna posterior se solapa
+        i = bisect_left(self.inicios, fin)
+        return i == 0 or self.fines[i - 1] <= inicio
+    
+    def ocupado(self) -> int:
+        """Bits de los bloques de 5 minutos ocupados por alguna cita"""
+        if self._ocupado is None:
+            bits = 0
+            for inicio, fin in zip(self.inicios, self.fines):
+                bits |= mascara(inicio, fin)
+            self._ocupado = bits
+        return self._ocupado
+
+
+class PlantillaSemanal:
+    """
+    Horario de atención semanal de un médico como bitset de bloques de 5 minutos.
+    
+    `bits` guarda los 7 días seguidos (lunes primero), BLOQUES_DIA bits por día;
+    `bloques` guarda por día los bloques de atención con su duración de turno y
+    consultorio, que definen dónde empieza cada turno; `excepciones` guarda por
+    fecha los bits del tiempo sin atención. Los turnos libres de un día salen de
+    `atención AND NOT (excepciones OR citas)`.
+    """
+    
+    __slots__ = ("bits", "bloques", "excepciones", "expira_en")
+    
+    def __init__(self, expira_en: float):
+        self.bits = 0
+        self.bloques: List[List[Tuple[int, int, Optional[int], Optional[str]]]] = [[] for _ in range(7)]
+        self.excepciones: Dict[str, int] = {}
+        self.expira_en = expira_en
+    
+    def agregar_bloque(self, dia: int, inicio: int, fin: int, duracion: Optional[int] = None, consultorio_id: Optional[str] = None) -> None:
+        """Agregar un bloque de atención semanal (dia: 0 = lunes)"""
+        self.bloques[dia].append((inicio, fin, duracion, consultorio_id))
+        self.bloques[dia].sort(key=lambda bloque: bloque[0])
+        self.bits |= mascara(inicio, fin) << (dia * BLOQUES_DIA)
+    
+    def agregar_excepcion(self, fecha: str, inicio: Optional[int] = None, fin: Optional[int] = None) -> None:
+        """Bloquear un horario de una fecha (sin horas, el día completo)"""
+        bits = DIA_COMPLETO if inicio is None else mascara(inicio, fin)
+        self.excepciones[fecha] = self.excepciones.get(fecha, 0) | bits
+    
+    def libres(self, fecha: date, ocupado: int = 0) -> int:
+        """Bits de atención de una fecha sin excepciones ni los bloques `ocupado`"""
+        atencion = (self.bits >> (fecha.weekday() * BLOQUES_DIA)) & DIA_COMPLETO
+        return atencion & ~(self.excepciones.get(fecha.isoformat(), 0) | ocupado)
+    
+    def turnos(self, fecha: date, ocupado: int, duracion_default: int, duracion: Optional[int] = None) -> Iterator[Tuple[int, int, Optional[str]]]:
+        """
+        Turnos libres de una fecha en orden, como (inicio, fin, consultorio_id).
+        
+        Los turnos de cada bloque empiezan en su hora de inicio y duran `duracion`,
+        o la duración del bloque, o `duracion_default`.
+        """
+        libres = self.libres(fecha, ocupado)
+        if not libres:
+            return
+        for inicio, fin, duracion_turno, consultorio_id in self.bloques[fecha.weekday()]:
+            paso = duracion or duracion_turno or duracion_default
+            while inicio + paso <= fin:
+                turno = mascara(inicio, inicio + paso)
+                if libres & turno == turno:
+                    yield inicio, inicio + paso, consultorio_id
+                inicio += paso
+
+
+class OcupacionConsultorio:
+    """
+    Intervalos ocupados de un consultorio en un día, ordenados por hora de inicio.
+    
+    A diferencia de AgendaDia, las citas pueden solaparse hasta la capacidad del
+    consultorio, así que la ocupación de un horario se calcula con un barrido de
+    los inicios y fines de las citas que lo tocan.
+    """
+    
+    __slots__ = ("intervalos", "citas")
+    
+    def __init__(self):
+        self.intervalos: List[Tuple[int, int, str]] = []
+        self.citas: Dict[str, Tuple[int, int]] = {}
+    
+    def agregar(self, cita_id: str, inicio: int, fin: int) -> None:
+        """Registrar una cita ocupando [inicio, fin)"""
+        if cita_id in self.citas:
+            self.quitar(cita_id)
+        insort(self.intervalos, (inicio, fin, cita_id))
+        self.citas[cita_id] = (inicio, fin)
+    
+    def quitar(self, cita_id: str) -> None:
+        """Liberar el intervalo de una cita"""
+        intervalo = self.citas.pop(cita_id, None)
+        if intervalo is not None:
+            del self.intervalos[bisect_left(self.intervalos, (*intervalo, cita_id))]
+    
+    def simultaneas(self, inicio: int, fin: int) -> int:
+        """Máximo de citas simultáneas dentro de [inicio, fin)"""
+        eventos = []
+        # Solo las citas que empiezan antes del fin pueden solaparse
+        for i in range(bisect_left(self.intervalos, (fin,))):
+            cita_inicio, cita_fin, _ = self.intervalos[i]
+            if cita_fin > inicio:
+                eventos.append((max(cita_inicio, inicio), 1))
+                eventos.append((cita_fin, -1))
+        # En un mismo minuto los fines (-1) van antes que los inicios
+        eventos.sort()
+        actuales = maximo = 0
+        for _, delta in eventos:
+            actuales += delta
+            maximo = max(maximo, actuales)
+        return maximo
+    
+    def libre(self, inicio: int, fin: int, capacidad: int) -> bool:
+        """Indicar si en [inicio, fin) cabe una cita más sin superar la capacidad"""
+        return self.simultaneas(inicio, fin) < capacidad
+
+
+class DisponibilidadService:
+    """Servicio que mantiene y consulta las agendas de los médicos y la ocupación de los consultorios"""
+    
+    # Agendas compartidas entre instancias, en orden LRU: (medico_id, fecha) -> AgendaDia
+    _agendas: "OrderedDict[Tuple[str, str], AgendaDia]" = OrderedDict()
+    # Ubicación de cada cita indexada: cita_id -> (medico_id, fecha)
+    _ubicacion: Dict[str, Tuple[str, str]] = {}
+    # Ocupación de todos los consultorios por día: fecha -> (expira_en, consultorio_id -> OcupacionConsultorio)
+    _consultorios: Dict[str, Tuple[float, Dict[str, OcupacionConsultorio]]] = {}
+    # Ubicación de cada cita en el índice de consultorios: cita_id -> (fecha, consultorio_id)
+    _ubicacion_consultorio: Dict[str, Tuple[str, str]] = {}
+    # Duración de cita por médico: medico_id -> (expira_en, duracion)
+    _duraciones: Dict[str, Tuple[float, int]] = {}
+    # Horario de atención por médico, en orden LRU: medico_id -> PlantillaSemanal
+    _plantillas: "OrderedDict[str, PlantillaSemanal]" = OrderedDict()
+    
+    def __init__(self):
+        self.cita_repo = CitaRepository(db_connection.data_client)
+        self.medico_repo = MedicoRepository(db_connection.data_client)
+        self.consultorio_repo = ConsultorioRepository(db_connection.data_client)
+        self.horario_repo = HorarioAtencionRepository(db_connection.data_client)
+        self.excepcion_repo = ExcepcionHorarioRepository(db_connection.data_client)
+    
+    @staticmethod
+    def _key(medico_id: Any, fecha: Any) -> Tuple[str, str]:
+        return str(medico_id), fecha.isoformat() if isinstance(fecha, date) else str(fecha)
+    
+    @classmethod
+    def _nueva_agenda(cls, key: Tuple[str, str]) -> AgendaDia:
+        """Crear una agenda vacía respetando el límite de entradas (descarta la menos usada, en O(1))"""
+        while cls._agendas and len(cls._agendas) >= settings.availability_cache_max_entries:
+            cls._olvidar(cls._agendas.popitem(last=False)[1])
+        agenda = AgendaDia(clock.time() + settings.availability_cache_ttl)
+        cls._agendas[key] = agenda
+        return agenda
+    
+    @classmethod
+    def _descartar(cls, key: Tuple[str, str]) -> None:
+        agenda = cls._agendas.pop(key, None)
+        if agenda is not None:
+            cls._olvidar(agenda)
+    
+    @classmethod
+    def _olvidar(cls, agenda: AgendaDia) -> None:
+        """Quitar del índice de ubicación las citas de una agenda descartada"""
+        for cita_id in agenda.citas:
+            cls._ubicacion.pop(cita_id, None)
+    
+    @classmethod
+    def cargar(cls, medico_id: Any, fecha: Any, citas: List[Dict[str, Any]]) -> AgendaDia:
+        """Reemplazar la agenda de un médico y día con las citas indicadas"""
+        key = cls._key(medico_id, fecha)
+        cls._descartar(key)
+        agenda = cls._nueva_agenda(key)
+        for cita in citas:
+            cita_id = str(cita["id"])
+            agenda.agregar(cita_id, a_minutos(cita["hora_inicio"]), a_minutos(cita["hora_fin"]))
+            cls._ubicacion[cita_id] = key
+        return agenda
+    
+    @classmethod
+    def cargar_consultorios(cls, fecha: Any, citas: List[Dict[str, Any]]) -> Dict[str, OcupacionConsultorio]:
+        """Reemplazar la ocupación de los consultorios de un día con las citas indicadas"""
+        fecha = fecha.isoformat() if isinstance(fecha, date) else str(fecha)
+        now = clock.time()
+        for vencida in [f for f, (expira_en, _) in cls._consultorios.items() if expira_en <= now or f == fecha]:
+            for ocupacion in cls._consultorios.pop(vencida)[1].values():
+                for cita_id in ocupacion.citas:
+                    cls._ubicacion_consultorio.pop(cita_id, None)
+        ocupaciones: Dict[str, OcupacionConsultorio] = defaultdict(OcupacionConsultorio)
+        for cita in citas:
+            cita_id, consultorio_id = str(cita["id"]), str(cita["consultorio_id"])
+            ocupaciones[consultorio_id].agregar(cita_id, a_minutos(cita["hora_inicio"]), a_minutos(cita["hora_fin"]))
+            cls._ubicacion_consultorio[cita_id] = (fecha, consultorio_id)
+        cls._consultorios[fecha] = (now + settings.availability_cache_ttl, ocupaciones)
+        return ocupaciones
+    
+    @classmethod
+    def registrar(cls, cita: Dict[str, Any]) -> None:
+        """Actualizar los índices tras crear o modificar una cita"""
+        cls.liberar(cita["id"])
+        # Una cita cancelada o sin asistencia solo se quita
+        if not cita.get("ocupa_horario", True):
+            return
+        cita_id = str(cita["id"])
+        inicio, fin = a_minutos(cita["hora_inicio"]), a_minutos(cita["hora_fin"])
+        key = cls._key(cita["medico_id"], cita["fecha"])
+        agenda = cls._agendas.get(key)
+        # Solo se actualizan índices ya cargados; el resto se carga bajo demanda
+        if agenda is not None:
+            agenda.agregar(cita_id, inicio, fin)
+            cls._ubicacion[cita_id] = key
+        entry = cls._consultorios.get(key[1])
+        if entry is not None and cita.get("consultorio_id"):
+            consultorio_id = str(cita["consultorio_id"])
+            entry[1][consultorio_id].agregar(cita_id, inicio, fin)
+            cls._ubicacion_consultorio[cita_id] = (key[1], consultorio_id)
+    
+    @classmethod
+    def liberar(cls, cita_id: Any) -> None:
+        """Quitar una cita de los índices tras eliminarla o moverla"""
+        key = cls._ubicacion.pop(str(cita_id), None)
+        if key is not None and key in cls._agendas:
+            cls._agendas[key].quitar(str(cita_id))
+        ubicacion = cls._ubicacion_consultorio.pop(str(cita_id), None)
+        if ubicacion is not None and ubicacion[0] in cls._consultorios:
+            cls._consultorios[ubicacion[0]][1][ubicacion[1]].quitar(str(cita_id))
+    
+    async def get_agenda(self, medico_id: UUID, fecha: date) -> AgendaDia:
+        """Obtener la agenda de un médico y día, cargándola si no está vigente"""
+        key = self._key(medico_id, fecha)
+        agenda = self._agendas.get(key)
+        if agenda is not None and agenda.expira_en > clock.time():
+            self._agendas.move_to_end(key)
+            return agenda
+        citas = await self.cita_repo.get_ocupacion([medico_id], fecha, fecha)
+        return self.cargar(medico_id, fecha, citas)
+    
+    async def get_ocupacion_consultorios(self, fecha: date) -> Dict[str, OcupacionConsultorio]:
+        """Obtener la ocupación de todos los consultorios en un día, cargándola si no está vigente"""
+        entry = self._consultorios.get(fecha.isoformat())
+        if entry is not None and entry[0] > clock.time():
+            return entry[1]
+        citas = await self.cita_repo.get_ocupacion_consultorios(fecha, fecha)
+        return self.cargar_consultorios(fecha, citas)
+    
+    @classmethod
+    def cargar_plantillas(cls, medico_ids: List[Any], horarios: List[Dict[str, Any]], excepciones: List[Dict[str, Any]]) -> Dict[str, PlantillaSemanal]:
+        """Reemplazar las plantillas de los médicos indicados con sus horarios y excepciones"""
+        now = clock.time()
+        plantillas = {str(medico_id): PlantillaSemanal(now + settings.availability_cache_ttl) for medico_id in medico_ids}
+        con_horarios = set()
+        for horario in horarios:
+            medico_id = str(horario["medico_id"])
+            if medico_id not in plantillas:
+                continue
+            con_horarios.add(medico_id)
+            if horario.get("activo", True):
+                plantillas[medico_id].agregar_bloque(
+                    horario["dia_semana"], a_minutos(horario["hora_inicio"]), a_minutos(horario["hora_fin"]),
+                    horario.get("duracion_turno"), horario.get("consultorio_id")
+                )
+        for medico_id, plantilla in plantillas.items():
+            if medico_id not in con_horarios:
+                for dia in range(7):
+                    plantilla.agregar_bloque(dia, HORA_APERTURA, HORA_CIERRE)
+        for excepcion in excepciones:
+            # Sin médico: feriado para todos
+            destinos = plantillas.values() if excepcion.get("medico_id") is None else [plantillas.get(str(excepcion["medico_id"]))]
+            horas = (
+                (a_minutos(excepcion["hora_inicio"]), a_minutos(excepcion["hora_fin"]))
+                if excepcion.get("hora_inicio") else (None, None)
+            )
+            for plantilla in destinos:
+                if plantilla is not None:
+                    plantilla.agregar_excepcion(str(excepcion["fecha"]), *horas)
+        for medico_id, plantilla in plantillas.items():
+            cls._plantillas.pop(medico_id, None)
+            cls._plantillas[medico_id] = plantilla
+        # Acotar el cache descartando las menos usadas
+        while len(cls._plantillas) > settings.availability_cache_max_entries:
+            cls._plantillas.popitem(last=False)
+        return plantillas
+    
+    @classmethod
+    def invalidar_plantillas(cls, medico_id: Optional[Any] = None) -> None:
+        """Descartar la plantilla de un médico (o todas) tras cambiar horarios o excepciones"""
+        if medico_id is None:
+            cls._plantillas.clear()
+        else:
+            cls._plantillas.pop(str(medico_id), None)
+    
+    async def get_plantillas(self, medico_ids: List[Any]) -> Dict[str, PlantillaSemanal]:
+        """Obtener las plantillas de varios médicos; las que no están vigentes se cargan con dos consultas"""
+        now = clock.time()
+        plantillas: Dict[str, PlantillaSemanal] = {}
+        faltantes = []
+        for medico_id in map(str, medico_ids):
+            plantilla = self._plantillas.get(medico_id)
+            if plantilla is not None and plantilla.expira_en > now:
+                self._plantillas.move_to_end(medico_id)
+                plantillas[medico_id] = plantilla
+            else:
+                faltantes.append(medico_id)
+        if faltantes:
+            horarios, excepciones = await asyncio.gather(
+                self.horario_repo.get_by_medicos(faltantes),
+                self.excepcion_repo.get_desde_by_medicos(faltantes, date.today())
+            )
+            plantillas.update(self.cargar_plantillas(faltantes, horarios, excepciones))
+        return plantillas
+    
+    async def get_duracion(self, medico_id: UUID) -> int:
+        """Duración de cita del médico según `especialidades.duracion_cita_default`"""
+        key = str(medico_id)
+        entry = self._duraciones.get(key)
+        if entry is not None and entry[0] > clock.time():
+            return entry[1]
+        duracion = await self.medico_repo.get_duracion_cita(medico_id) or DURACION_DEFAULT
+        self._duraciones[key] = (clock.time() + settings.availability_cache_ttl, duracion)
+        return duracion
+    
+    async def get_horarios_disponibles(self, medico_id: UUID, fecha: date, duracion: Optional[int] = None) -> List[dict]:
+        """Obtener los turnos libres de un médico en una fecha según su horario de atención"""
+        plantillas, agenda, duracion_default = await asyncio.gather(
+            self.get_plantillas([medico_id]),
+            self.get_agenda(medico_id, fecha),
+            self.get_duracion(medico_id)
+        )
+        return [
+            {"hora_inicio": a_hora(inicio), "hora_fin": a_hora(fin), "consultorio_id": consultorio_id}
+            for inicio, fin, consultorio_id in plantillas[str(medico_id)].turnos(fecha, agenda.ocupado(), duracion_default, duracion)
+        ]
+    
+    @staticmethod
+    def _primer_hueco(
+        plantilla: PlantillaSemanal,
+        fecha: date,
+        agenda: AgendaDia,
+        duracion_default: int,
+        duracion: Optional[int] = None,
+        consultorio: Optional[OcupacionConsultorio] = None,
+        capacidad: int = 1
+    ) -> Optional[Tuple[int, int]]:
+        """Primer turno libre del día para el médico y, si se indica, con capacidad en el consultorio"""
+        for inicio, fin, _ in plantilla.turnos(fecha, agenda.ocupado(), duracion_default, duracion):
+            if consultorio is None or consultorio.libre(inicio, fin, capacidad):
+                return inicio, fin
+        return None
+    
+    async def buscar(
+        self,
+        especialidad_id: UUID,
+        fecha_inicio: date,
+        fecha_fin: date,
+        consultorio_id: Optional[UUID] = None,
+        duracion: Optional[int] = None,
+        orden: str = "fecha",
+        limit: int = 20
+    ) -> List[dict]:
+        """
+        Buscar el primer horario libre de cada médico de una especialidad en un rango de fechas.
+        
+        Usa una consulta para los médicos, otra para todas las citas del rango y, si no
+        están vigentes, dos para sus horarios de atención; las agendas se calculan en
+        memoria y quedan cargadas en el índice.
+        """
+        if fecha_fin < fecha_inicio:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La fecha de fin debe ser posterior a la fecha de inicio"
+            )
+        dias = (fecha_fin - fecha_inicio).days + 1
+        if dias > MAX_DIAS_BUSQUEDA:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El rango de búsqueda no puede superar {MAX_DIAS_BUSQUEDA} días"
+            )
+        
+        medicos, consultorios = await asyncio.gather(
+            self.medico_repo.get_disponibles_by_especialidad(especialidad_id),
+            self.consultorio_repo.get_by_ids([consultorio_id] if consultorio_id else [], ["capacidad"])
+        )
+        if not medicos:
+            return []
+        if consultorio_id and not consultorios:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Consultorio no encontrado"
+            )
+        capacidad = consultorios[0]["capacidad"] if consultorios else 1
+        citas, plantillas = await asyncio.gather(
+            self.cita_repo.get_ocupacion([medico["id"] for medico in medicos], fecha_inicio, fecha_fin, consultorio_id),
+            self.get_plantillas([medico["id"] for medico in medicos])
+        )
+        
+        # Una sola pasada sobre las citas: agrupar por (médico, fecha) y por fecha del consultorio
+        por_medico: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        por_consultorio: Dict[str, OcupacionConsultorio] = defaultdict(OcupacionConsultorio)
+        for cita in citas:
+            por_medico[(str(cita["medico_id"]), cita["fecha"])].append(cita)
+            if consultorio_id and cita.get("consultorio_id") == str(consultorio_id):
+                por_consultorio[cita["fecha"]].agregar(
+                    str(cita["id"]), a_minutos(cita["hora_inicio"]), a_minutos(cita["hora_fin"])
+                )
+        
+        fechas = [fecha_inicio + timedelta(days=i) for i in range(dias)]
+        resultados = []
+        for medico in medicos:
+            medico_id = str(medico["id"])
+            especialidad = medico.get("especialidades") or {}
+            usuario = medico.get("usuarios") or {}
+            duracion_default = especialidad.get("duracion_cita_default") or DURACION_DEFAULT
+            for fecha in fechas:
+                dia = fecha.isoformat()
+                agenda = self.cargar(medico_id, dia, por_medico.get((medico_id, dia), []))
+                turno = self._primer_hueco(
+                    plantillas[medico_id], fecha, agenda, duracion_default, duracion, por_consultorio.get(dia), capacidad
+                )
+                if turno is not None:
+                    resultados.append({
+                        "medico_id": medico_id,
+                        "nombre": usuario.get("nombre"),
+                        "apellidos": usuario.get("apellidos"),
+                        "calificacion_promedio": medico.get("calificacion_promedio"),
+                        "fecha": dia,
+                        "hora_inicio": a_hora(turno[0]),
+                        "hora_fin": a_hora(turno[1])
+                    })
+                    break
+        
+        if orden == "calificacion":
+            resultados.sort(key=lambda r: (-(r["calificacion_promedio"] or 0), r["fecha"], r["hora_inicio"]))
+        else:
+            resultados.sort(key=lambda r: (r["fecha"], r["hora_inicio"], -(r["calificacion_promedio"] or 0)))
+        return resultados[:limit]
@@ -1,20 +1,23 @@
 """
 Servicio para la entidad Especialidad
 """
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import HTTPException, status
 
 from app.models.especialidad import Especialidad, EspecialidadCreate, EspecialidadUpdate, EspecialidadResponse
+from app.models.base import modelo_parcial
+from app.models.paginacion import Pagina
 from app.repositories.especialidad_repository import EspecialidadRepository
 from app.database import db_connection
+from app.database.cache import reference_cache
 
 
 class EspecialidadService:
     """Servicio para operaciones de Especialidad"""
     
     def __init__(self):
-        self.especialidad_repo = EspecialidadRepository(db_connection.client)
+        self.especialidad_repo = EspecialidadRepository(db_connection.data_client)
     
     async def create_especialidad(self, especialidad_data: EspecialidadCreate) -> EspecialidadResponse:
         """Crear una nueva especialidad"""
@@ -35,7 +38,8 @@ class EspecialidadService:
                 detail="Error al crear la especialidad"
             )
         
-        return EspecialidadResponse(**created_especialidad)
+        reference_cache.invalidate(self.especialidad_repo.table_name)
+        return EspecialidadResponse.desde_fila(created_especialidad)
     
     async def get_especialidad(self, especialidad_id: UUID) -> EspecialidadResponse:
         """Obtener una especialidad por ID"""
@@ -45,12 +49,16 @@ class EspecialidadService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Especialidad no encontrada"
             )
-        return EspecialidadResponse(**especialidad)
+        return EspecialidadResponse.desde_fila(especialidad)
     
-    async def get_especialidades(self, skip: int = 0, limit: int = 100) -> List[EspecialidadResponse]:
+    async def get_especialidades(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[EspecialidadResponse], Pagina[EspecialidadResponse]]:
         """Obtener lista de especialidades"""
-        especialidades = await self.especialidad_repo.get_all(skip, limit)
-        return [EspecialidadResponse(**especialidad) for especialidad in especialidades]
+        especialidades = await self.especialidad_repo.get_all(skip, limit, cursor, fields)
+        modelo = modelo_parcial(EspecialidadResponse, tuple(fields)) if fields else EspecialidadResponse
+        items = [modelo.desde_fila(especialidad) for especialidad in especialidades]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.especialidad_repo.next_cursor(especialidades, limit))
     
     async def update_especialidad(self, especialidad_id: UUID, especialidad_data: EspecialidadUpdate) -> EspecialidadResponse:
         """Actualizar una especialidad"""
@@ -79,7 +87,8 @@ class EspecialidadService:
                 detail="Error al actualizar la especialidad"
             )
         
-        return EspecialidadResponse(**updated_especialidad)
+        reference_cache.invalidate(self.especialidad_repo.table_name)
+        return EspecialidadResponse.desde_fila(updated_especialidad)
     
     async def delete_especialidad(self, especialidad_id: UUID) -> bool:
         """Eliminar una especialidad (soft delete)"""
@@ -93,14 +102,19 @@ class EspecialidadService:
         # Soft delete - marcar como inactiva
         update_data = {"activo": False}
         updated_especialidad = await self.especialidad_repo.update(especialidad_id, update_data)
+        reference_cache.invalidate(self.especialidad_repo.table_name)
         return updated_especialidad is not None
     
-    async def get_especialidades_activas(self, skip: int = 0, limit: int = 100) -> List[EspecialidadResponse]:
+    async def get_especialidades_activas(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[EspecialidadResponse], Pagina[EspecialidadResponse]]:
         """Obtener especialidades activas"""
-        especialidades = await self.especialidad_repo.get_activas(skip, limit)
-        return [EspecialidadResponse(**especialidad) for especialidad in especialidades]
+        especialidades = await self.especialidad_repo.get_activas(skip, limit, cursor, fields)
+        modelo = modelo_parcial(EspecialidadResponse, tuple(fields)) if fields else EspecialidadResponse
+        items = [modelo.desde_fila(especialidad) for especialidad in especialidades]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.especialidad_repo.next_cursor(especialidades, limit))
     
     async def search_especialidades(self, nombre: str) -> List[EspecialidadResponse]:
         """Buscar especialidades por nombre"""
         especialidades = await self.especialidad_repo.search_by_nombre(nombre)
-        return [EspecialidadResponse(**especialidad) for especialidad in especialidades]
+        return [EspecialidadResponse.desde_fila(especialidad) for especialidad in especialidades]
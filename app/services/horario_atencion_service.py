@@ -0,0 +1,168 @@
+"""
+Servicio para las entidades HorarioAtencion y ExcepcionHorario
+"""
+from datetime import date
+from typing import List, Optional, Dict, Any
+from uuid import UUID
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+
+from app.models.horario_atencion import (
+    HorarioAtencionCreate, HorarioAtencionUpdate, HorarioAtencionResponse,
+    ExcepcionHorarioCreate, ExcepcionHorarioResponse
+)
+from app.repositories.horario_atencion_repository import HorarioAtencionRepository, ExcepcionHorarioRepository
+from app.repositories.medico_repository import MedicoRepository
+from app.repositories.consultorio_repository import ConsultorioRepository
+from app.services.disponibilidad_service import DisponibilidadService, a_minutos
+from app.database import db_connection
+
+
+class HorarioAtencionService:
+    """Servicio para operaciones de HorarioAtencion y ExcepcionHorario"""
+    
+    def __init__(self):
+        self.horario_repo = HorarioAtencionRepository(db_connection.data_client)
+        self.excepcion_repo = ExcepcionHorarioRepository(db_connection.data_client)
+        self.medico_repo = MedicoRepository(db_connection.data_client)
+        self.consultorio_repo = ConsultorioRepository(db_connection.data_client)
+    
+    async def _verificar_medico(self, medico_id: UUID) -> None:
+        medico = await self.medico_repo.get_by_id(medico_id)
+        if not medico:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Médico no encontrado"
+            )
+    
+    async def _verificar_consultorio(self, consultorio_id: Optional[UUID]) -> None:
+        if consultorio_id is None:
+            return
+        consultorio = await self.consultorio_repo.get_by_id(consultorio_id)
+        if not consultorio:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Consultorio no encontrado"
+            )
+    
+    async def _verificar_solapamiento(self, horario: Dict[str, Any], excluir_id: Optional[UUID] = None) -> None:
+        """Los bloques activos de un médico en un mismo día no pueden solaparse"""
+        if not horario.get("activo", True):
+            return
+        inicio, fin = a_minutos(horario["hora_inicio"]), a_minutos(horario["hora_fin"])
+        for otro in await self.horario_repo.get_by_medico(horario["medico_id"]):
+            if (
+                str(otro["id"]) != str(excluir_id)
+                and otro.get("activo", True)
+                and otro["dia_semana"] == horario["dia_semana"]
+                and a_minutos(otro["hora_inicio"]) < fin
+                and a_minutos(otro["hora_fin"]) > inicio
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El horario se solapa con otro horario del médico"
+                )
+    
+    async def create_horario(self, horario_data: HorarioAtencionCreate) -> HorarioAtencionResponse:
+        """Crear un bloque de atención semanal"""
+        await self._verificar_medico(horario_data.medico_id)
+        await self._verificar_consultorio(horario_data.consultorio_id)
+        
+        horario_dict = jsonable_encoder(horario_data)
+        await self._verificar_solapamiento(horario_dict)
+        
+        created_horario = await self.horario_repo.create(horario_dict)
+        if not created_horario:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error al crear el horario"
+            )
+        
+        DisponibilidadService.invalidar_plantillas(horario_data.medico_id)
+        return HorarioAtencionResponse.desde_fila(created_horario)
+    
+    async def get_horarios_by_medico(self, medico_id: UUID) -> List[HorarioAtencionResponse]:
+        """Obtener los horarios de atención de un médico"""
+        horarios = await self.horario_repo.get_by_medico(medico_id)
+        return [HorarioAtencionResponse.desde_fila(horario) for horario in horarios]
+    
+    async def update_horario(self, horario_id: UUID, horario_data: HorarioAtencionUpdate) -> HorarioAtencionResponse:
+        """Actualizar un bloque de atención"""
+        existing_horario = await self.horario_repo.get_by_id(horario_id)
+        if not existing_horario:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Horario no encontrado"
+            )
+        
+        update_data = jsonable_encoder(horario_data.dict(exclude_unset=True))
+        horario = {**existing_horario, **update_data}
+        if a_minutos(horario["hora_fin"]) <= a_minutos(horario["hora_inicio"]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La hora de fin debe ser posterior a la hora de inicio"
+            )
+        if update_data.get("consultorio_id"):
+            await self._verificar_consultorio(update_data["consultorio_id"])
+        await self._verificar_solapamiento(horario, horario_id)
+        
+        updated_horario = await self.horario_repo.update(horario_id, update_data)
+        if not updated_horario:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error al actualizar el horario"
+            )
+        
+        DisponibilidadService.invalidar_plantillas(existing_horario["medico_id"])
+        return HorarioAtencionResponse.desde_fila(updated_horario)
+    
+    async def delete_horario(self, horario_id: UUID) -> bool:
+        """Eliminar un bloque de atención"""
+        existing_horario = await self.horario_repo.get_by_id(horario_id)
+        if not existing_horario:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Horario no encontrado"
+            )
+        
+        deleted = await self.horario_repo.delete(horario_id)
+        DisponibilidadService.invalidar_plantillas(existing_horario["medico_id"])
+        return deleted
+    
+    async def create_excepcion(self, excepcion_data: ExcepcionHorarioCreate) -> ExcepcionHorarioResponse:
+        """Registrar un feriado (sin médico) o una ausencia de un médico"""
+        if excepcion_data.medico_id:
+            await self._verificar_medico(excepcion_data.medico_id)
+        
+        created_excepcion = await self.excepcion_repo.create(jsonable_encoder(excepcion_data))
+        if not created_excepcion:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error al crear la excepción de horario"
+            )
+        
+        DisponibilidadService.invalidar_plantillas(excepcion_data.medico_id)
+        return ExcepcionHorarioResponse.desde_fila(created_excepcion)
+    
+    async def get_excepciones(self, fecha_inicio: date, fecha_fin: date, medico_id: Optional[UUID] = None) -> List[ExcepcionHorarioResponse]:
+        """Obtener las excepciones de un rango de fechas"""
+        if fecha_fin < fecha_inicio:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La fecha de fin debe ser posterior a la fecha de inicio"
+            )
+        excepciones = await self.excepcion_repo.get_by_rango(fecha_inicio, fecha_fin, medico_id)
+        return [ExcepcionHorarioResponse.desde_fila(excepcion) for excepcion in excepciones]
+    
+    async def delete_excepcion(self, excepcion_id: UUID) -> bool:
+        """Eliminar una excepción de horario"""
+        existing_excepcion = await self.excepcion_repo.get_by_id(excepcion_id)
+        if not existing_excepcion:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Excepción de horario no encontrada"
+            )
+        
+        deleted = await self.excepcion_repo.delete(excepcion_id)
+        DisponibilidadService.invalidar_plantillas(existing_excepcion.get("medico_id"))
+        return deleted
@@ -0,0 +1,62 @@
+"""
+Servicio para resolver la identidad del usuario autenticado
+"""
+import time
+from typing import Dict, Any, Optional, Tuple
+from uuid import UUID
+
+from app.config import settings
+from app.repositories.usuario_repository import UsuarioRepository
+from app.database import db_connection
+
+
+class IdentidadService:
+    """Servicio que resuelve usuario, rol, paciente y médico en una sola consulta"""
+    
+    # Cache compartido entre instancias: usuario_id -> (expira_en, identidad)
+    _cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+    
+    def __init__(self):
+        self.usuario_repo = UsuarioRepository(db_connection.data_client)
+    
+    @staticmethod
+    def _embedded(value: Any) -> Optional[Dict[str, Any]]:
+        """PostgREST devuelve los embeds uno a uno como objeto o como lista"""
+        if isinstance(value, list):
+            return value[0] if value else None
+        return value or None
+    
+    async def get_identidad(self, usuario_id: UUID) -> Optional[Dict[str, Any]]:
+        """Obtener la identidad completa de un usuario"""
+        key = str(usuario_id)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.time():
+            return entry[1]
+        
+        usuario = await self.usuario_repo.get_identidad(usuario_id)
+        if not usuario:
+            self._cache.pop(key, None)
+            return None
+        
+        rol = self._embedded(usuario.pop("roles", None))
+        identidad = {
+            "usuario": usuario,
+            "rol": rol["nombre"] if rol else None,
+            "paciente": self._embedded(usuario.pop("pacientes", None)),
+            "medico": self._embedded(usuario.pop("medicos", None))
+        }
+        
+        if settings.identity_cache_ttl > 0:
+            now = time.time()
+            if len(self._cache) >= settings.auth_cache_max_entries:
+                # Purgar entradas vencidas para mantener el cache acotado
+                for stale in [k for k, (expires_at, _) in self._cache.items() if expires_at <= now]:
+                    del self._cache[stale]
+            if len(self._cache) < settings.auth_cache_max_entries:
+                self._cache[key] = (now + settings.identity_cache_ttl, identidad)
+        return identidad
+    
+    @classmethod
+    def invalidate(cls, usuario_id: Any) -> None:
+        """Descartar la identidad cacheada de un usuario"""
+        cls._cache.pop(str(usuario_id), None)
@@ -1,14 +1,17 @@
 """
 Servicio para la entidad Médico
 """
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import HTTPException, status
 
 from app.models.medico import Medico, MedicoCreate, MedicoUpdate, MedicoResponse, MedicoConEspecialidad
+from app.models.base import modelo_parcial
+from app.models.paginacion import Pagina
 from app.repositories.medico_repository import MedicoRepository
 from app.repositories.usuario_repository import UsuarioRepository
 from app.repositories.especialidad_repository import EspecialidadRepository
+from app.services.identidad_service import IdentidadService
 from app.database import db_connection
 
 
@@ -16,9 +19,9 @@ class MedicoService:
     """Servicio para operaciones de Médico"""
     
     def __init__(self):
-        self.medico_repo = MedicoRepository(db_connection.client)
-        self.usuario_repo = UsuarioRepository(db_connection.client)
-        self.especialidad_repo = EspecialidadRepository(db_connection.client)
+        self.medico_repo = MedicoRepository(db_connection.data_client)
+        self.usuario_repo = UsuarioRepository(db_connection.data_client)
+        self.especialidad_repo = EspecialidadRepository(db_connection.data_client)
     
     async def create_medico(self, medico_data: MedicoCreate) -> MedicoResponse:
         """Crear un nuevo médico"""
@@ -55,7 +58,8 @@ class MedicoService:
                 detail="Error al crear el médico"
             )
         
-        return MedicoResponse(**created_medico)
+        IdentidadService.invalidate(medico_data.usuario_id)
+        return MedicoResponse.desde_fila(created_medico)
     
     async def get_medico(self, medico_id: UUID) -> MedicoResponse:
         """Obtener un médico por ID"""
@@ -65,17 +69,24 @@ class MedicoService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Médico no encontrado"
             )
-        return MedicoResponse(**medico)
+        return MedicoResponse.desde_fila(medico)
     
-    async def get_medicos(self, skip: int = 0, limit: int = 100) -> List[MedicoResponse]:
+    async def get_medicos(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[MedicoResponse], Pagina[MedicoResponse]]:
         """Obtener lista de médicos"""
-        medicos = await self.medico_repo.get_all(skip, limit)
-        return [MedicoResponse(**medico) for medico in medicos]
+        medicos = await self.medico_repo.get_all(skip, limit, cursor, fields)
+        modelo = modelo_parcial(MedicoResponse, tuple(fields)) if fields else MedicoResponse
+        items = [modelo.desde_fila(medico) for medico in medicos]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.medico_repo.next_cursor(medicos, limit))
     
-    async def get_medicos_with_especialidad(self, skip: int = 0, limit: int = 100) -> List[MedicoConEspecialidad]:
+    async def get_medicos_with_especialidad(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Union[List[MedicoConEspecialidad], Pagina[MedicoConEspecialidad]]:
         """Obtener médicos con información de especialidad"""
-        medicos = await self.medico_repo.get_with_especialidad(skip, limit)
-        return [MedicoConEspecialidad(**medico) for medico in medicos]
+        medicos = await self.medico_repo.get_with_especialidad(skip, limit, cursor)
+        items = [MedicoConEspecialidad.desde_fila(medico) for medico in medicos]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.medico_repo.next_cursor(medicos, limit))
     
     async def update_medico(self, medico_id: UUID, medico_data: MedicoUpdate) -> MedicoResponse:
         """Actualizar un médico"""
@@ -104,7 +115,8 @@ class MedicoService:
                 detail="Error al actualizar el médico"
             )
         
-        return MedicoResponse(**updated_medico)
+        IdentidadService.invalidate(existing_medico["usuario_id"])
+        return MedicoResponse.desde_fila(updated_medico)
     
     async def delete_medico(self, medico_id: UUID) -> bool:
         """Eliminar un médico (soft delete)"""
@@ -118,61 +130,41 @@ class MedicoService:
         # Soft delete - marcar como no disponible
         update_data = {"disponible": False}
         updated_medico = await self.medico_repo.update(medico_id, update_data)
+        IdentidadService.invalidate(existing_medico["usuario_id"])
         return updated_medico is not None
     
     async def get_medico_by_usuario(self, usuario_id: UUID) -> Optional[MedicoResponse]:
         """Obtener médico por usuario_id"""
         medico = await self.medico_repo.get_by_usuario_id(usuario_id)
         if medico:
-            return MedicoResponse(**medico)
+            return MedicoResponse.desde_fila(medico)
         return None
     
     async def get_medicos_by_especialidad(self, especialidad_id: UUID) -> List[MedicoResponse]:
         """Obtener médicos por especialidad"""
         medicos = await self.medico_repo.get_by_especialidad(especialidad_id)
-        return [MedicoResponse(**medico) for medico in medicos]
+        return [MedicoResponse.desde_fila(medico) for medico in medicos]
     
-    async def get_medicos_disponibles(self, skip: int = 0, limit: int = 100) -> List[MedicoResponse]:
+    async def get_medicos_disponibles(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[MedicoResponse], Pagina[MedicoResponse]]:
         """Obtener médicos disponibles"""
-        medicos = await self.medico_repo.get_disponibles(skip, limit)
-        return [MedicoResponse(**medico) for medico in medicos]
+        medicos = await self.medico_repo.get_disponibles(skip, limit, cursor, fields)
+        modelo = modelo_parcial(MedicoResponse, tuple(fields)) if fields else MedicoResponse
+        items = [modelo.desde_fila(medico) for medico in medicos]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.medico_repo.next_cursor(medicos, limit))
     
     async def get_medicos_by_calificacion(self, calificacion_min: float) -> List[MedicoResponse]:
         """Obtener médicos con calificación mínima"""
         medicos = await self.medico_repo.get_by_calificacion_minima(calificacion_min)
-        return [MedicoResponse(**medico) for medico in medicos]
+        return [MedicoResponse.desde_fila(medico) for medico in medicos]
     
     async def update_calificacion_promedio(self, medico_id: UUID) -> MedicoResponse:
-        """Actualizar calificación promedio del médico"""
-        # Obtener todas las calificaciones del médico
-        from app.repositories.calificacion_repository import CalificacionRepository
-        calificacion_repo = CalificacionRepository(db_connection.client)
+        """
+        Obtener el médico con su calificación promedio vigente
         
-        calificaciones = await calificacion_repo.get_by_medico(medico_id)
-        if not calificaciones:
-            # Si no hay calificaciones, mantener en 0
-            nueva_calificacion = 0.0
-        else:
-            # Calcular promedio
-            suma_calificaciones = sum(cal["calificacion"] for cal in calificaciones)
-            nueva_calificacion = suma_calificaciones / len(calificaciones)
-        
-        updated_medico = await self.medico_repo.update_calificacion_promedio(medico_id, nueva_calificacion)
-        if not updated_medico:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Médico no encontrado"
-            )
-        
-        return MedicoResponse(**updated_medico)
-    
-    async def incrementar_consultas(self, medico_id: UUID) -> MedicoResponse:
-        """Incrementar contador de consultas del médico"""
-        updated_medico = await self.medico_repo.incrementar_consultas(medico_id)
-        if not updated_medico:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Médico no encontrado"
-            )
-        
-        return MedicoResponse(**updated_medico)
+        El trigger de database_queries/agregados_calificaciones.sql ya mantiene
+        calificacion_promedio en cada cambio; no hay nada que recalcular ni escribir.
+        """
+        return await self.get_medico(medico_id)
+
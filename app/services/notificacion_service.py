@@ -1,22 +1,46 @@
 """
 Servicio para la entidad Notificación
 """
-from typing import List, Optional
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from pydantic_core import to_json
 
-from app.models.notificacion import Notificacion, NotificacionCreate, NotificacionUpdate, NotificacionResponse
+from app.models.notificacion import Notificacion, NotificacionCreate, NotificacionUpdate, NotificacionResponse, ContadorNotificaciones
+from app.models.base import modelo_parcial
+from app.models.lote import ResultadoItem, ResultadoLote, describir_error
+from app.models.paginacion import Pagina
 from app.repositories.notificacion_repository import NotificacionRepository
 from app.repositories.usuario_repository import UsuarioRepository
+from app.services.canal_notificaciones import (
+    canal_notificaciones, EVENTO_NOTIFICACION, EVENTO_LEIDAS, EVENTO_RESINCRONIZAR
+)
+from app.config import settings
 from app.database import db_connection
 
+# Notificaciones máximas por respuesta de long-poll o reenvío al reconectar
+MAX_PENDIENTES = 100
+
+
+def evento_sse(evento: str, datos: Any, id: Optional[str] = None) -> str:
+    """Formatear un evento de Server-Sent Events"""
+    lineas = f"event: {evento}\n"
+    if id:
+        lineas += f"id: {id}\n"
+    return lineas + f"data: {to_json(datos).decode()}\n\n"
+
 
 class NotificacionService:
     """Servicio para operaciones de Notificación"""
     
     def __init__(self):
-        self.notificacion_repo = NotificacionRepository(db_connection.client)
-        self.usuario_repo = UsuarioRepository(db_connection.client)
+        self.notificacion_repo = NotificacionRepository(db_connection.data_client)
+        self.usuario_repo = UsuarioRepository(db_connection.data_client)
     
     async def create_notificacion(self, notificacion_data: NotificacionCreate) -> NotificacionResponse:
         """Crear una nueva notificación"""
@@ -29,7 +53,7 @@ class NotificacionService:
             )
         
         # Crear la notificación
-        notificacion_dict = notificacion_data.dict()
+        notificacion_dict = jsonable_encoder(notificacion_data)
         created_notificacion = await self.notificacion_repo.create(notificacion_dict)
         if not created_notificacion:
             raise HTTPException(
@@ -37,7 +61,59 @@ class NotificacionService:
                 detail="Error al crear la notificación"
             )
         
-        return NotificacionResponse(**created_notificacion)
+        notificacion = NotificacionResponse.desde_fila(created_notificacion)
+        canal_notificaciones.publicar(notificacion.usuario_id, EVENTO_NOTIFICACION, notificacion)
+        return notificacion
+    
+    async def create_notificaciones_lote(self, items: List[Dict[str, Any]]) -> ResultadoLote[NotificacionResponse]:
+        """
+        Crear varias notificaciones con un solo INSERT multi-fila.
+        
+        Los elementos inválidos o con usuario inexistente se reportan en su
+        posición y el resto se inserta.
+        """
+        if len(items) > settings.bulk_max_items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El lote no puede tener más de {settings.bulk_max_items} elementos"
+            )
+        
+        resultados: Dict[int, ResultadoItem[NotificacionResponse]] = {}
+        validas: List[Tuple[int, NotificacionCreate]] = []
+        for indice, item in enumerate(items):
+            try:
+                validas.append((indice, NotificacionCreate(**item)))
+            except ValidationError as e:
+                resultados[indice] = ResultadoItem(indice=indice, ok=False, error=describir_error(e))
+        
+        # Verificar todos los destinatarios en una sola consulta
+        usuarios = await self.usuario_repo.get_by_ids(list({notificacion.usuario_id for _, notificacion in validas}), ["id"])
+        usuarios = {usuario["id"] for usuario in usuarios}
+        por_insertar: List[Tuple[int, NotificacionCreate]] = []
+        for indice, notificacion in validas:
+            if str(notificacion.usuario_id) in usuarios:
+                por_insertar.append((indice, notificacion))
+            else:
+                resultados[indice] = ResultadoItem(indice=indice, ok=False, error="Usuario no encontrado")
+        
+        creadas = await self.notificacion_repo.create_many([jsonable_encoder(notificacion) for _, notificacion in por_insertar])
+        if len(creadas) != len(por_insertar):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error al crear las notificaciones"
+            )
+        
+        for (indice, _), creada in zip(por_insertar, creadas):
+            notificacion = NotificacionResponse.desde_fila(creada)
+            canal_notificaciones.publicar(notificacion.usuario_id, EVENTO_NOTIFICACION, notificacion)
+            resultados[indice] = ResultadoItem(indice=indice, ok=True, item=notificacion)
+        
+        return ResultadoLote(
+            total=len(items),
+            creados=len(creadas),
+            errores=len(items) - len(creadas),
+            resultados=[resultados[indice] for indice in range(len(items))]
+        )
     
     async def get_notificacion(self, notificacion_id: UUID) -> NotificacionResponse:
         """Obtener una notificación por ID"""
@@ -47,12 +123,16 @@ class NotificacionService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Notificación no encontrada"
             )
-        return NotificacionResponse(**notificacion)
+        return NotificacionResponse.desde_fila(notificacion)
     
-    async def get_notificaciones(self, skip: int = 0, limit: int = 100) -> List[NotificacionResponse]:
+    async def get_notificaciones(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[NotificacionResponse], Pagina[NotificacionResponse]]:
         """Obtener lista de notificaciones"""
-        notificaciones = await self.notificacion_repo.get_all(skip, limit)
-        return [NotificacionResponse(**notificacion) for notificacion in notificaciones]
+        notificaciones = await self.notificacion_repo.get_all(skip, limit, cursor, fields)
+        modelo = modelo_parcial(NotificacionResponse, tuple(fields)) if fields else NotificacionResponse
+        items = [modelo.desde_fila(notificacion) for notificacion in notificaciones]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.notificacion_repo.next_cursor(notificaciones, limit))
     
     async def update_notificacion(self, notificacion_id: UUID, notificacion_data: NotificacionUpdate) -> NotificacionResponse:
         """Actualizar una notificación"""
@@ -71,7 +151,7 @@ class NotificacionService:
                 detail="Error al actualizar la notificación"
             )
         
-        return NotificacionResponse(**updated_notificacion)
+        return NotificacionResponse.desde_fila(updated_notificacion)
     
     async def delete_notificacion(self, notificacion_id: UUID) -> bool:
         """Eliminar una notificación"""
@@ -87,17 +167,17 @@ class NotificacionService:
     async def get_notificaciones_by_usuario(self, usuario_id: UUID) -> List[NotificacionResponse]:
         """Obtener notificaciones por usuario"""
         notificaciones = await self.notificacion_repo.get_by_usuario(usuario_id)
-        return [NotificacionResponse(**notificacion) for notificacion in notificaciones]
+        return [NotificacionResponse.desde_fila(notificacion) for notificacion in notificaciones]
     
     async def get_notificaciones_no_leidas(self, usuario_id: UUID) -> List[NotificacionResponse]:
         """Obtener notificaciones no leídas de un usuario"""
         notificaciones = await self.notificacion_repo.get_no_leidas(usuario_id)
-        return [NotificacionResponse(**notificacion) for notificacion in notificaciones]
+        return [NotificacionResponse.desde_fila(notificacion) for notificacion in notificaciones]
     
     async def get_notificaciones_by_tipo(self, usuario_id: UUID, tipo: str) -> List[NotificacionResponse]:
         """Obtener notificaciones por tipo"""
         notificaciones = await self.notificacion_repo.get_by_tipo(usuario_id, tipo)
-        return [NotificacionResponse(**notificacion) for notificacion in notificaciones]
+        return [NotificacionResponse.desde_fila(notificacion) for notificacion in notificaciones]
     
     async def marcar_como_leida(self, notificacion_id: UUID) -> NotificacionResponse:
         """Marcar notificación como leída"""
@@ -107,11 +187,126 @@ class NotificacionService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Notificación no encontrada"
             )
-        return NotificacionResponse(**notificacion)
+        notificacion = NotificacionResponse.desde_fila(notificacion)
+        canal_notificaciones.publicar(notificacion.usuario_id, EVENTO_LEIDAS, {"ids": [notificacion.id]})
+        return notificacion
+    
+    async def marcar_como_leidas(self, notificacion_ids: List[UUID]) -> List[NotificacionResponse]:
+        """Marcar varias notificaciones como leídas con un solo UPDATE"""
+        if len(notificacion_ids) > settings.bulk_max_items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El lote no puede tener más de {settings.bulk_max_items} elementos"
+            )
+        notificaciones = await self.notificacion_repo.marcar_como_leidas(notificacion_ids)
+        notificaciones = [NotificacionResponse.desde_fila(notificacion) for notificacion in notificaciones]
+        
+        por_usuario: Dict[UUID, List[UUID]] = {}
+        for notificacion in notificaciones:
+            por_usuario.setdefault(notificacion.usuario_id, []).append(notificacion.id)
+        for usuario_id, ids in por_usuario.items():
+            canal_notificaciones.publicar(usuario_id, EVENTO_LEIDAS, {"ids": ids})
+        return notificaciones
     
     async def marcar_todas_como_leidas(self, usuario_id: UUID) -> bool:
         """Marcar todas las notificaciones de un usuario como leídas"""
-        return await self.notificacion_repo.marcar_todas_como_leidas(usuario_id)
+        result = await self.notificacion_repo.marcar_todas_como_leidas(usuario_id)
+        canal_notificaciones.publicar(usuario_id, EVENTO_LEIDAS, {"todas": True})
+        return result
+    
+    async def get_bandeja(self, usuario_id: UUID, limit: int = 20, cursor: Optional[str] = None, solo_no_leidas: bool = False) -> Pagina[NotificacionResponse]:
+        """Obtener una página de la bandeja de un usuario, más recientes primero"""
+        notificaciones = await self.notificacion_repo.get_bandeja(usuario_id, limit, cursor, solo_no_leidas)
+        return Pagina(
+            items=[NotificacionResponse.desde_fila(notificacion) for notificacion in notificaciones],
+            next_cursor=self.notificacion_repo.next_cursor(notificaciones, limit)
+        )
+    
+    async def get_contador(self, usuario_id: UUID) -> ContadorNotificaciones:
+        """Obtener el total y las no leídas de un usuario (una fila de la tabla de contadores)"""
+        return ContadorNotificaciones.desde_fila(await self.notificacion_repo.get_contador(usuario_id))
+    
+    async def stream_notificaciones(self, usuario_id: UUID, desde: Optional[datetime] = None) -> AsyncIterator[str]:
+        """
+        Stream de Server-Sent Events con las notificaciones del usuario.
+        
+        Empieza con el evento `contador` y, si se indica `desde` (el `id` del último
+        evento recibido), reenvía las notificaciones creadas después. Luego entrega
+        `notificacion` y `leidas` a medida que se publican, con un comentario de
+        keep-alive cada `NOTIFICATIONS_STREAM_HEARTBEAT` segundos.
+        """
+        # Suscribirse antes de consultar para no perder lo que se cree entretanto
+        cola = canal_notificaciones.suscribir(usuario_id)
+        try:
+            contador = await self.get_contador(usuario_id)
+            pendientes = await self.notificacion_repo.get_desde(usuario_id, desde, MAX_PENDIENTES) if desde else []
+        except Exception:
+            canal_notificaciones.cancelar(usuario_id, cola)
+            raise
+        
+        async def eventos():
+            try:
+                yield evento_sse("contador", contador)
+                enviadas = set()
+                for fila in pendientes:
+                    notificacion = NotificacionResponse.desde_fila(fila)
+                    enviadas.add(notificacion.id)
+                    yield evento_sse(EVENTO_NOTIFICACION, notificacion, notificacion.created_at.isoformat())
+                
+                while True:
+                    try:
+                        evento, datos = await asyncio.wait_for(cola.get(), settings.notifications_stream_heartbeat)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    if evento == EVENTO_NOTIFICACION:
+                        if datos.id in enviadas:
+                            continue
+                        yield evento_sse(evento, datos, datos.created_at.isoformat())
+                    else:
+                        yield evento_sse(evento, datos)
+            finally:
+                canal_notificaciones.cancelar(usuario_id, cola)
+        
+        return eventos()
+    
+    async def esperar_notificaciones(self, usuario_id: UUID, desde: Optional[datetime] = None, timeout: Optional[float] = None) -> List[NotificacionResponse]:
+        """
+        Long-poll: retornar las notificaciones creadas después de `desde`.
+        
+        Si ya hay alguna se responde de inmediato; si no, se espera hasta `timeout`
+        segundos a que se publique una y se retorna lista vacía al vencer.
+        """
+        timeout = settings.notifications_long_poll_timeout if timeout is None else timeout
+        cola = canal_notificaciones.suscribir(usuario_id)
+        try:
+            if desde:
+                pendientes = await self.notificacion_repo.get_desde(usuario_id, desde, MAX_PENDIENTES)
+                if pendientes:
+                    return [NotificacionResponse.desde_fila(fila) for fila in pendientes]
+            
+            limite = time.monotonic() + timeout
+            while True:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return []
+                try:
+                    evento, datos = await asyncio.wait_for(cola.get(), restante)
+                except asyncio.TimeoutError:
+                    return []
+                if evento == EVENTO_RESINCRONIZAR and desde:
+                    pendientes = await self.notificacion_repo.get_desde(usuario_id, desde, MAX_PENDIENTES)
+                    return [NotificacionResponse.desde_fila(fila) for fila in pendientes]
+                if evento == EVENTO_NOTIFICACION:
+                    # Llegó una: entregar también las que ya estén en cola
+                    nuevas = [datos]
+                    while not cola.empty():
+                        evento, datos = cola.get_nowait()
+                        if evento == EVENTO_NOTIFICACION:
+                            nuevas.append(datos)
+                    return nuevas
+        finally:
+            canal_notificaciones.cancelar(usuario_id, cola)
     
     async def create_notificacion_cita(self, usuario_id: UUID, cita_id: UUID, titulo: str, mensaje: str, tipo: str = "info") -> NotificacionResponse:
         """Crear notificación relacionada con una cita"""
@@ -1,13 +1,16 @@
 """
 Servicio para la entidad Paciente
 """
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import HTTPException, status
 
 from app.models.paciente import Paciente, PacienteCreate, PacienteUpdate, PacienteResponse
+from app.models.base import modelo_parcial
+from app.models.paginacion import Pagina
 from app.repositories.paciente_repository import PacienteRepository
 from app.repositories.usuario_repository import UsuarioRepository
+from app.services.identidad_service import IdentidadService
 from app.database import db_connection
 
 
@@ -15,8 +18,8 @@ class PacienteService:
     """Servicio para operaciones de Paciente"""
     
     def __init__(self):
-        self.paciente_repo = PacienteRepository(db_connection.client)
-        self.usuario_repo = UsuarioRepository(db_connection.client)
+        self.paciente_repo = PacienteRepository(db_connection.data_client)
+        self.usuario_repo = UsuarioRepository(db_connection.data_client)
     
     async def create_paciente(self, paciente_data: PacienteCreate) -> PacienteResponse:
         """Crear un nuevo paciente"""
@@ -45,7 +48,8 @@ class PacienteService:
                 detail="Error al crear el paciente"
             )
         
-        return PacienteResponse(**created_paciente)
+        IdentidadService.invalidate(paciente_data.usuario_id)
+        return PacienteResponse.desde_fila(created_paciente)
     
     async def get_paciente(self, paciente_id: UUID) -> PacienteResponse:
         """Obtener un paciente por ID"""
@@ -55,12 +59,16 @@ class PacienteService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Paciente no encontrado"
             )
-        return PacienteResponse(**paciente)
+        return PacienteResponse.desde_fila(paciente)
     
-    async def get_pacientes(self, skip: int = 0, limit: int = 100) -> List[PacienteResponse]:
+    async def get_pacientes(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[PacienteResponse], Pagina[PacienteResponse]]:
         """Obtener lista de pacientes"""
-        pacientes = await self.paciente_repo.get_all(skip, limit)
-        return [PacienteResponse(**paciente) for paciente in pacientes]
+        pacientes = await self.paciente_repo.get_all(skip, limit, cursor, fields)
+        modelo = modelo_parcial(PacienteResponse, tuple(fields)) if fields else PacienteResponse
+        items = [modelo.desde_fila(paciente) for paciente in pacientes]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.paciente_repo.next_cursor(pacientes, limit))
     
     async def update_paciente(self, paciente_id: UUID, paciente_data: PacienteUpdate) -> PacienteResponse:
         """Actualizar un paciente"""
@@ -79,7 +87,8 @@ class PacienteService:
                 detail="Error al actualizar el paciente"
             )
         
-        return PacienteResponse(**updated_paciente)
+        IdentidadService.invalidate(existing_paciente["usuario_id"])
+        return PacienteResponse.desde_fila(updated_paciente)
     
     async def delete_paciente(self, paciente_id: UUID) -> bool:
         """Eliminar un paciente"""
@@ -90,21 +99,22 @@ class PacienteService:
                 detail="Paciente no encontrado"
             )
         
+        IdentidadService.invalidate(existing_paciente["usuario_id"])
         return await self.paciente_repo.delete(paciente_id)
     
     async def get_paciente_by_usuario(self, usuario_id: UUID) -> Optional[PacienteResponse]:
         """Obtener paciente por usuario_id"""
         paciente = await self.paciente_repo.get_by_usuario_id(usuario_id)
         if paciente:
-            return PacienteResponse(**paciente)
+            return PacienteResponse.desde_fila(paciente)
         return None
     
     async def get_pacientes_by_seguro(self, seguro: str) -> List[PacienteResponse]:
         """Obtener pacientes por seguro médico"""
         pacientes = await self.paciente_repo.get_by_seguro_medico(seguro)
-        return [PacienteResponse(**paciente) for paciente in pacientes]
+        return [PacienteResponse.desde_fila(paciente) for paciente in pacientes]
     
     async def search_pacientes_by_name(self, nombre: str) -> List[PacienteResponse]:
         """Buscar pacientes por nombre"""
         pacientes = await self.paciente_repo.search_by_name(nombre)
-        return [PacienteResponse(**paciente) for paciente in pacientes]
+        return [PacienteResponse.desde_fila(paciente) for paciente in pacientes]
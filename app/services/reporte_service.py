@@ -0,0 +1,134 @@
+"""
+Servicio de reportes (funciones reporte_* de database_queries/reportes.sql)
+"""
+import csv
+import io
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic_core import to_json
+
+from app.repositories.reporte_repository import ReporteRepository
+from app.database import db_connection
+from app.database.cache import report_cache
+
+# Filas por consulta al leer un reporte
+REPORTE_PAGINA = 1000
+
+# Nombre del reporte en la URL -> función que lo calcula
+REPORTES = {
+    "medicos-disponibles": "reporte_medicos_disponibles",
+    "citas-del-dia": "reporte_citas_del_dia",
+    "top-medicos": "reporte_top_medicos",
+    "ingresos-por-medico": "reporte_ingresos_por_medico",
+    "agenda-medico-semanal": "reporte_agenda_medico_semanal",
+    "pacientes-frecuentes": "reporte_pacientes_frecuentes",
+    "disponibilidad-consultorios": "reporte_disponibilidad_consultorios",
+    "citas-pendientes-pago": "reporte_citas_pendientes_pago",
+    "estadisticas-especialidades": "reporte_estadisticas_especialidades",
+    "citas-sin-recordatorio": "reporte_citas_sin_recordatorio",
+    "historial-paciente": "reporte_historial_paciente",
+    "mensual-citas": "reporte_mensual_citas",
+    "calificaciones-recientes": "reporte_calificaciones_recientes",
+    "notificaciones-pendientes": "reporte_notificaciones_pendientes",
+    "notificaciones-pendientes-detalle": "reporte_notificaciones_pendientes_detalle",
+    "ausentismo": "reporte_ausentismo",
+    "estadisticas-medico-dia": "reporte_estadisticas_medico_dia",
+    "estadisticas-especialidad-mes": "reporte_estadisticas_especialidad_mes",
+}
+
+# Formatos de exportación -> media type
+FORMATOS = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _celda(value: Any) -> Any:
+    """Valor de una columna para CSV"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return to_json(value).decode()
+    return value
+
+
+def a_csv(filas: List[dict], encabezado: bool) -> bytes:
+    """Codificar filas como CSV, con la fila de encabezado si se indica"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if encabezado and filas:
+        writer.writerow(filas[0].keys())
+    for fila in filas:
+        writer.writerow([_celda(value) for value in fila.values()])
+    return buffer.getvalue().encode()
+
+
+def a_ndjson(filas: List[dict]) -> bytes:
+    """Codificar filas como JSON delimitado por saltos de línea"""
+    return b"".join(to_json(fila) + b"\n" for fila in filas)
+
+
+class ReporteService:
+    """Servicio para ejecutar reportes"""
+    
+    def __init__(self):
+        self.reporte_repo = ReporteRepository(db_connection.data_client)
+    
+    @staticmethod
+    def _params(params: Dict[str, Any]) -> Dict[str, Any]:
+        """Parámetros de la función; los omitidos toman el valor por defecto de la función"""
+        return {f"p_{key}": value for key, value in jsonable_encoder(params).items() if value is not None}
+    
+    async def _leer(self, funcion: str, params: Dict[str, Any]) -> List[dict]:
+        """Leer el resultado completo de una función de reporte, por páginas"""
+        filas: List[dict] = []
+        while True:
+            pagina = await self.reporte_repo.ejecutar(funcion, params, len(filas), REPORTE_PAGINA)
+            filas.extend(pagina)
+            if len(pagina) < REPORTE_PAGINA:
+                return filas
+    
+    async def get_reporte(self, nombre: str, params: Dict[str, Any]) -> bytes:
+        """
+        Obtener un reporte serializado como arreglo JSON.
+        
+        El resultado se cachea por (reporte, parámetros) con TTL y stale-while-revalidate
+        (REPORT_CACHE_TTL y REPORT_CACHE_STALE).
+        """
+        funcion = REPORTES[nombre]
+        params = self._params(params)
+        
+        async def cargar():
+            return to_json(await self._leer(funcion, params))
+        
+        return await report_cache.get_or_load(nombre, (nombre, tuple(sorted(params.items()))), cargar)
+    
+    async def stream_reporte(self, nombre: str, params: Dict[str, Any], formato: str) -> AsyncIterator[bytes]:
+        """
+        Obtener un reporte como CSV o NDJSON, por partes.
+        
+        Cada página se lee de la base de datos y se codifica a medida que se envía,
+        sin armar el resultado completo en memoria ni pasar por el cache.
+        La primera página se consulta antes de empezar a responder, así un error
+        de la consulta se reporta con su código de estado.
+        """
+        funcion = REPORTES[nombre]
+        params = self._params(params)
+        primera = await self.reporte_repo.ejecutar(funcion, params, 0, REPORTE_PAGINA)
+        
+        def codificar(filas: List[dict], encabezado: bool) -> bytes:
+            return a_csv(filas, encabezado) if formato == "csv" else a_ndjson(filas)
+        
+        async def partes():
+            pagina, offset = primera, 0
+            yield codificar(pagina, True)
+            while len(pagina) == REPORTE_PAGINA:
+                offset += REPORTE_PAGINA
+                pagina = await self.reporte_repo.ejecutar(funcion, params, offset, REPORTE_PAGINA)
+                yield codificar(pagina, False)
+        
+        return partes()
@@ -1,13 +1,16 @@
 """
 Servicio para la entidad Usuario
 """
-from typing import List, Optional
+from typing import List, Optional, Union
 from uuid import UUID
 from fastapi import HTTPException, status
 
 from app.models.usuario import Usuario, UsuarioCreate, UsuarioUpdate, UsuarioResponse
+from app.models.base import modelo_parcial
+from app.models.paginacion import Pagina
 from app.repositories.usuario_repository import UsuarioRepository
 from app.services.auth_service import AuthService
+from app.services.identidad_service import IdentidadService
 from app.database import db_connection
 
 
@@ -15,7 +18,7 @@ class UsuarioService:
     """Servicio para operaciones de Usuario"""
     
     def __init__(self):
-        self.usuario_repo = UsuarioRepository(db_connection.client)
+        self.usuario_repo = UsuarioRepository(db_connection.data_client)
         self.auth_service = AuthService()
     
     async def create_usuario(self, usuario_data: UsuarioCreate) -> UsuarioResponse:
@@ -61,8 +64,8 @@ class UsuarioService:
                     detail="Error al obtener el usuario creado"
                 )
             
-            return UsuarioResponse(**created_user)
-            
+            return UsuarioResponse.desde_fila(created_user)
+        
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -77,12 +80,16 @@ class UsuarioService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Usuario no encontrado"
             )
-        return UsuarioResponse(**usuario)
+        return UsuarioResponse.desde_fila(usuario)
     
-    async def get_usuarios(self, skip: int = 0, limit: int = 100) -> List[UsuarioResponse]:
+    async def get_usuarios(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[UsuarioResponse], Pagina[UsuarioResponse]]:
         """Obtener lista de usuarios"""
-        usuarios = await self.usuario_repo.get_all(skip, limit)
-        return [UsuarioResponse(**usuario) for usuario in usuarios]
+        usuarios = await self.usuario_repo.get_all(skip, limit, cursor, fields)
+        modelo = modelo_parcial(UsuarioResponse, tuple(fields)) if fields else UsuarioResponse
+        items = [modelo.desde_fila(usuario) for usuario in usuarios]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.usuario_repo.next_cursor(usuarios, limit))
     
     async def update_usuario(self, usuario_id: UUID, usuario_data: UsuarioUpdate) -> UsuarioResponse:
         """Actualizar un usuario"""
@@ -122,7 +129,10 @@ class UsuarioService:
                 detail="Error al actualizar el usuario"
             )
         
-        return UsuarioResponse(**updated_user)
+        # La identidad cacheada ya no es válida (las demás réplicas la renuevan en identity_cache_ttl)
+        IdentidadService.invalidate(usuario_id)
+        
+        return UsuarioResponse.desde_fila(updated_user)
     
     async def delete_usuario(self, usuario_id: UUID) -> bool:
         """Eliminar un usuario (soft delete)"""
@@ -136,13 +146,14 @@ class UsuarioService:
         # Soft delete - marcar como inactivo
         update_data = {"activo": False}
         updated_user = await self.usuario_repo.update(usuario_id, update_data)
+        IdentidadService.invalidate(usuario_id)
         return updated_user is not None
     
     async def get_usuario_by_email(self, email: str) -> Optional[UsuarioResponse]:
         """Obtener usuario por email"""
         usuario = await self.usuario_repo.get_by_email(email)
         if usuario:
-            return UsuarioResponse(**usuario)
+            return UsuarioResponse.desde_fila(usuario)
         return None
     
     async def verify_email(self, usuario_id: UUID) -> UsuarioResponse:
@@ -153,14 +164,19 @@ class UsuarioService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Usuario no encontrado"
             )
-        return UsuarioResponse(**usuario)
+        IdentidadService.invalidate(usuario_id)
+        return UsuarioResponse.desde_fila(usuario)
     
     async def get_usuarios_by_rol(self, rol_id: UUID) -> List[UsuarioResponse]:
         """Obtener usuarios por rol"""
         usuarios = await self.usuario_repo.get_by_rol(rol_id)
-        return [UsuarioResponse(**usuario) for usuario in usuarios]
+        return [UsuarioResponse.desde_fila(usuario) for usuario in usuarios]
     
-    async def get_usuarios_activos(self, skip: int = 0, limit: int = 100) -> List[UsuarioResponse]:
+    async def get_usuarios_activos(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Union[List[UsuarioResponse], Pagina[UsuarioResponse]]:
         """Obtener usuarios activos"""
-        usuarios = await self.usuario_repo.get_activos(skip, limit)
-        return [UsuarioResponse(**usuario) for usuario in usuarios]
+        usuarios = await self.usuario_repo.get_activos(skip, limit, cursor, fields)
+        modelo = modelo_parcial(UsuarioResponse, tuple(fields)) if fields else UsuarioResponse
+        items = [modelo.desde_fila(usuario) for usuario in usuarios]
+        if cursor is None:
+            return items
+        return Pagina(items=items, next_cursor=self.usuario_repo.next_cursor(usuarios, limit))
@@ -0,0 +1,81 @@
+-- ============================================
+-- SISTEMA DE RESERVAS MÉDICAS - VIDA SALUD
+-- Agenda de citas con nombres resueltos (GET /api/v1/citas/agenda)
+-- Ejecutar después de create_database_schema.sql
+-- ============================================
+
+-- ============================================
+-- FUNCIÓN: AGENDA DE CITAS
+-- ============================================
+-- Citas de un rango de fechas, opcionalmente de un médico o consultorio, con los
+-- datos de paciente, médico, especialidad, consultorio y estado en la misma fila
+-- (las consultas 02_citas_del_dia.sql y 05_agenda_medico_semanal.sql en una sola).
+-- El orden (fecha, hora_inicio, id) es estable para paginar con offset/limit.
+CREATE OR REPLACE FUNCTION public.agenda_citas(
+    p_fecha_inicio date,
+    p_fecha_fin date,
+    p_medico_id uuid DEFAULT NULL,
+    p_consultorio_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+    id uuid,
+    fecha date,
+    hora_inicio time,
+    hora_fin time,
+    duracion integer,
+    paciente_id uuid,
+    paciente_nombre character varying,
+    paciente_apellidos character varying,
+    paciente_telefono character varying,
+    medico_id uuid,
+    medico_nombre character varying,
+    medico_apellidos character varying,
+    especialidad_nombre character varying,
+    consultorio_id uuid,
+    consultorio_nombre character varying,
+    consultorio_ubicacion text,
+    estado_id uuid,
+    estado_nombre character varying,
+    estado_color character varying,
+    motivo_consulta text,
+    precio numeric,
+    pagado boolean
+) AS $$
+    SELECT
+        c.id,
+        c.fecha,
+        c.hora_inicio,
+        c.hora_fin,
+        c.duracion,
+        c.paciente_id,
+        up.nombre,
+        up.apellidos,
+        up.telefono,
+        c.medico_id,
+        um.nombre,
+        um.apellidos,
+        e.nombre,
+        c.consultorio_id,
+        con.nombre,
+        con.ubicacion,
+        c.estado_id,
+        ec.nombre,
+        ec.color,
+        c.motivo_consulta,
+        c.precio,
+        c.pagado
+    FROM public.citas c
+    INNER JOIN public.pacientes p ON c.paciente_id = p.id
+    INNER JOIN public.usuarios up ON p.usuario_id = up.id
+    INNER JOIN public.medicos m ON c.medico_id = m.id
+    INNER JOIN public.usuarios um ON m.usuario_id = um.id
+    LEFT JOIN public.especialidades e ON m.especialidad_id = e.id
+    LEFT JOIN public.consultorios con ON c.consultorio_id = con.id
+    INNER JOIN public.estados_cita ec ON c.estado_id = ec.id
+    WHERE c.fecha BETWEEN p_fecha_inicio AND p_fecha_fin
+      AND (p_medico_id IS NULL OR c.medico_id = p_medico_id)
+      AND (p_consultorio_id IS NULL OR c.consultorio_id = p_consultorio_id)
+    ORDER BY c.fecha, c.hora_inicio, c.id;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION public.agenda_citas IS 'Agenda de citas de un rango de fechas con nombres de paciente, médico, especialidad, consultorio y estado';
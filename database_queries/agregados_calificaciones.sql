@@ -0,0 +1,130 @@
+-- ============================================
+-- SISTEMA DE RESERVAS MÉDICAS - VIDA SALUD
+-- Agregados incrementales de calificaciones por médico
+-- Ejecutar después de create_database_schema.sql
+-- ============================================
+
+-- ============================================
+-- TABLA: MEDICOS_CALIFICACIONES_AGREGADO
+-- ============================================
+-- Suma, total e histograma de estrellas por médico; se actualiza en O(1) por cada cambio
+CREATE TABLE IF NOT EXISTS public.medicos_calificaciones_agregado (
+  medico_id uuid NOT NULL,
+  suma bigint NOT NULL DEFAULT 0,
+  total integer NOT NULL DEFAULT 0,
+  estrellas_1 integer NOT NULL DEFAULT 0,
+  estrellas_2 integer NOT NULL DEFAULT 0,
+  estrellas_3 integer NOT NULL DEFAULT 0,
+  estrellas_4 integer NOT NULL DEFAULT 0,
+  estrellas_5 integer NOT NULL DEFAULT 0,
+  updated_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT medicos_calificaciones_agregado_pkey PRIMARY KEY (medico_id),
+  CONSTRAINT medicos_calificaciones_agregado_medico_id_fkey FOREIGN KEY (medico_id) REFERENCES public.medicos(id) ON DELETE CASCADE
+);
+
+-- ============================================
+-- FUNCIÓN: APLICAR UNA CALIFICACIÓN AL AGREGADO
+-- ============================================
+-- p_signo = 1 suma la calificación, p_signo = -1 la descuenta
+CREATE OR REPLACE FUNCTION public.aplicar_calificacion_agregado(
+    p_medico_id uuid,
+    p_calificacion integer,
+    p_signo integer
+)
+RETURNS void AS $$
+DECLARE
+    v_suma bigint;
+    v_total integer;
+BEGIN
+    -- El médico se está eliminando (borrado en cascada de sus calificaciones)
+    IF NOT EXISTS (SELECT 1 FROM public.medicos WHERE id = p_medico_id) THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public.medicos_calificaciones_agregado AS a (
+        medico_id, suma, total, estrellas_1, estrellas_2, estrellas_3, estrellas_4, estrellas_5
+    ) VALUES (
+        p_medico_id,
+        p_signo * p_calificacion,
+        p_signo,
+        CASE WHEN p_calificacion = 1 THEN p_signo ELSE 0 END,
+        CASE WHEN p_calificacion = 2 THEN p_signo ELSE 0 END,
+        CASE WHEN p_calificacion = 3 THEN p_signo ELSE 0 END,
+        CASE WHEN p_calificacion = 4 THEN p_signo ELSE 0 END,
+        CASE WHEN p_calificacion = 5 THEN p_signo ELSE 0 END
+    )
+    ON CONFLICT (medico_id) DO UPDATE SET
+        suma = a.suma + EXCLUDED.suma,
+        total = a.total + EXCLUDED.total,
+        estrellas_1 = a.estrellas_1 + EXCLUDED.estrellas_1,
+        estrellas_2 = a.estrellas_2 + EXCLUDED.estrellas_2,
+        estrellas_3 = a.estrellas_3 + EXCLUDED.estrellas_3,
+        estrellas_4 = a.estrellas_4 + EXCLUDED.estrellas_4,
+        estrellas_5 = a.estrellas_5 + EXCLUDED.estrellas_5,
+        updated_at = now()
+    RETURNING suma, total INTO v_suma, v_total;
+
+    UPDATE public.medicos
+    SET calificacion_promedio = CASE WHEN v_total > 0 THEN ROUND(v_suma::numeric / v_total, 2) ELSE 0 END
+    WHERE id = p_medico_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- TRIGGER: MANTENER EL AGREGADO
+-- ============================================
+CREATE OR REPLACE FUNCTION public.actualizar_agregado_calificaciones()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.aplicar_calificacion_agregado(OLD.medico_id, OLD.calificacion, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.aplicar_calificacion_agregado(NEW.medico_id, NEW.calificacion, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reemplaza al trigger que recalculaba el promedio con AVG sobre todas las calificaciones
+DROP TRIGGER IF EXISTS trigger_update_medico_calificacion ON public.calificaciones;
+DROP FUNCTION IF EXISTS update_medico_calificacion();
+DROP TRIGGER IF EXISTS trigger_actualizar_agregado_calificaciones ON public.calificaciones;
+CREATE TRIGGER trigger_actualizar_agregado_calificaciones
+  AFTER INSERT OR UPDATE OF medico_id, calificacion OR DELETE ON public.calificaciones
+  FOR EACH ROW
+  EXECUTE FUNCTION public.actualizar_agregado_calificaciones();
+
+-- ============================================
+-- CARGA INICIAL DEL AGREGADO
+-- ============================================
+INSERT INTO public.medicos_calificaciones_agregado (
+    medico_id, suma, total, estrellas_1, estrellas_2, estrellas_3, estrellas_4, estrellas_5
+)
+SELECT
+    medico_id,
+    SUM(calificacion),
+    COUNT(*),
+    COUNT(*) FILTER (WHERE calificacion = 1),
+    COUNT(*) FILTER (WHERE calificacion = 2),
+    COUNT(*) FILTER (WHERE calificacion = 3),
+    COUNT(*) FILTER (WHERE calificacion = 4),
+    COUNT(*) FILTER (WHERE calificacion = 5)
+FROM public.calificaciones
+GROUP BY medico_id
+ON CONFLICT (medico_id) DO UPDATE SET
+    suma = EXCLUDED.suma,
+    total = EXCLUDED.total,
+    estrellas_1 = EXCLUDED.estrellas_1,
+    estrellas_2 = EXCLUDED.estrellas_2,
+    estrellas_3 = EXCLUDED.estrellas_3,
+    estrellas_4 = EXCLUDED.estrellas_4,
+    estrellas_5 = EXCLUDED.estrellas_5,
+    updated_at = now();
+
+UPDATE public.medicos m
+SET calificacion_promedio = ROUND(a.suma::numeric / a.total, 2)
+FROM public.medicos_calificaciones_agregado a
+WHERE a.medico_id = m.id AND a.total > 0;
+
+COMMENT ON TABLE public.medicos_calificaciones_agregado IS 'Suma, total e histograma de calificaciones por médico, mantenidos por trigger';
@@ -0,0 +1,117 @@
+-- ============================================
+-- SISTEMA DE RESERVAS MÉDICAS - VIDA SALUD
+-- Bandeja de notificaciones y contador de no leídas
+-- Ejecutar después de create_database_schema.sql
+-- ============================================
+
+-- ============================================
+-- ÍNDICES DE LA BANDEJA
+-- ============================================
+-- Página de la bandeja de un usuario: rango del índice en orden (created_at, id) DESC
+CREATE INDEX IF NOT EXISTS idx_notificaciones_usuario_created_at
+  ON public.notificaciones(usuario_id, created_at DESC, id DESC);
+
+-- Solo las no leídas (suelen ser una fracción pequeña de la bandeja)
+CREATE INDEX IF NOT EXISTS idx_notificaciones_usuario_no_leidas
+  ON public.notificaciones(usuario_id, created_at DESC, id DESC)
+  WHERE leida = false;
+
+-- ============================================
+-- TABLA: NOTIFICACIONES_CONTADORES
+-- ============================================
+-- Total y no leídas por usuario; el contador se lee en O(1) sin contar filas
+CREATE TABLE IF NOT EXISTS public.notificaciones_contadores (
+  usuario_id uuid NOT NULL,
+  total integer NOT NULL DEFAULT 0,
+  no_leidas integer NOT NULL DEFAULT 0,
+  updated_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT notificaciones_contadores_pkey PRIMARY KEY (usuario_id),
+  CONSTRAINT notificaciones_contadores_usuario_id_fkey FOREIGN KEY (usuario_id) REFERENCES public.usuarios(id) ON DELETE CASCADE
+);
+
+-- ============================================
+-- TRIGGER: MANTENER LOS CONTADORES
+-- ============================================
+-- Por sentencia y con tablas de transición: un INSERT en lote o "marcar todas
+-- como leídas" actualiza una vez la fila de cada usuario, no una vez por notificación.
+CREATE OR REPLACE FUNCTION public.actualizar_contadores_notificaciones()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO public.notificaciones_contadores AS c (usuario_id, total, no_leidas)
+        SELECT usuario_id, COUNT(*), COUNT(*) FILTER (WHERE NOT COALESCE(leida, false))
+        FROM nuevas
+        GROUP BY usuario_id
+        ON CONFLICT (usuario_id) DO UPDATE SET
+            total = c.total + EXCLUDED.total,
+            no_leidas = c.no_leidas + EXCLUDED.no_leidas,
+            updated_at = now();
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO public.notificaciones_contadores AS c (usuario_id, total, no_leidas)
+        SELECT
+            usuario_id,
+            SUM(signo),
+            COALESCE(SUM(signo) FILTER (WHERE NOT COALESCE(leida, false)), 0)
+        FROM (
+            SELECT usuario_id, leida, 1 AS signo FROM nuevas
+            UNION ALL
+            SELECT usuario_id, leida, -1 AS signo FROM anteriores
+        ) d
+        GROUP BY usuario_id
+        HAVING SUM(signo) <> 0 OR COALESCE(SUM(signo) FILTER (WHERE NOT COALESCE(leida, false)), 0) <> 0
+        ON CONFLICT (usuario_id) DO UPDATE SET
+            total = c.total + EXCLUDED.total,
+            no_leidas = c.no_leidas + EXCLUDED.no_leidas,
+            updated_at = now();
+    ELSE
+        -- Sin INSERT: si el usuario se está eliminando su contador ya no existe
+        UPDATE public.notificaciones_contadores c
+        SET total = c.total - d.total,
+            no_leidas = c.no_leidas - d.no_leidas,
+            updated_at = now()
+        FROM (
+            SELECT usuario_id, COUNT(*) AS total, COUNT(*) FILTER (WHERE NOT COALESCE(leida, false)) AS no_leidas
+            FROM anteriores
+            GROUP BY usuario_id
+        ) d
+        WHERE c.usuario_id = d.usuario_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Postgres no admite tablas de transición en triggers de varios eventos
+DROP TRIGGER IF EXISTS trigger_contadores_notificaciones_insert ON public.notificaciones;
+CREATE TRIGGER trigger_contadores_notificaciones_insert
+  AFTER INSERT ON public.notificaciones
+  REFERENCING NEW TABLE AS nuevas
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.actualizar_contadores_notificaciones();
+
+DROP TRIGGER IF EXISTS trigger_contadores_notificaciones_update ON public.notificaciones;
+CREATE TRIGGER trigger_contadores_notificaciones_update
+  AFTER UPDATE ON public.notificaciones
+  REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.actualizar_contadores_notificaciones();
+
+DROP TRIGGER IF EXISTS trigger_contadores_notificaciones_delete ON public.notificaciones;
+CREATE TRIGGER trigger_contadores_notificaciones_delete
+  AFTER DELETE ON public.notificaciones
+  REFERENCING OLD TABLE AS anteriores
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.actualizar_contadores_notificaciones();
+
+-- ============================================
+-- CARGA INICIAL DE LOS CONTADORES
+-- ============================================
+INSERT INTO public.notificaciones_contadores (usuario_id, total, no_leidas)
+SELECT usuario_id, COUNT(*), COUNT(*) FILTER (WHERE NOT COALESCE(leida, false))
+FROM public.notificaciones
+GROUP BY usuario_id
+ON CONFLICT (usuario_id) DO UPDATE SET
+    total = EXCLUDED.total,
+    no_leidas = EXCLUDED.no_leidas,
+    updated_at = now();
+
+COMMENT ON TABLE public.notificaciones_contadores IS 'Total y no leídas de notificaciones por usuario, mantenidos por trigger';
@@ -0,0 +1,46 @@
+-- ============================================
+-- SISTEMA DE RESERVAS MÉDICAS - VIDA SALUD
+-- Contadores atómicos de médicos
+-- Ejecutar después de create_database_schema.sql
+-- ============================================
+
+-- ============================================
+-- FUNCIÓN: INCREMENTAR TOTAL DE CONSULTAS
+-- ============================================
+-- Incrementa total_consultas de uno o varios médicos en una sola sentencia.
+-- Un médico repetido en p_medico_ids se incrementa una vez por aparición.
+CREATE OR REPLACE FUNCTION public.incrementar_consultas(
+    p_medico_ids uuid[],
+    p_cantidad integer DEFAULT 1
+)
+RETURNS SETOF public.medicos AS $$
+    UPDATE public.medicos m
+    SET total_consultas = COALESCE(m.total_consultas, 0) + c.veces * p_cantidad
+    FROM (
+        SELECT medico_id, COUNT(*) AS veces
+        FROM unnest(p_medico_ids) AS medico_id
+        GROUP BY medico_id
+    ) c
+    WHERE m.id = c.medico_id
+    RETURNING m.*;
+$$ LANGUAGE sql;
+
+COMMENT ON FUNCTION public.incrementar_consultas IS 'Incremento atómico de total_consultas para uno o varios médicos';
+
+-- ============================================
+-- TRIGGER: CONTAR CONSULTAS COMPLETADAS
+-- ============================================
+-- Única vía que cuenta las consultas: la API no incrementa al completar una cita.
+-- Reemplaza la función de create_database_schema.sql para usar el mismo incremento atómico.
+CREATE OR REPLACE FUNCTION increment_medico_consultas()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Contar solo la transición a "Completada"
+    IF NEW.estado_id IN (SELECT id FROM public.estados_cita WHERE nombre = 'Completada')
+       AND (TG_OP = 'INSERT' OR OLD.estado_id IS DISTINCT FROM NEW.estado_id) THEN
+        PERFORM public.incrementar_consultas(ARRAY[NEW.medico_id]);
+    END IF;
+    
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
@@ -4,6 +4,13 @@
 -- Versión: 1.0.0
 -- Fecha: 30 de octubre de 2025
 -- ============================================
+-- Orden de ejecución en una instalación nueva:
+--   1. create_database_schema.sql (este script)
+--   2. agregados_calificaciones.sql, estadisticas_citas.sql, contadores_medicos.sql,
+--      reservar_cita.sql, horarios_atencion.sql, agenda_citas.sql,
+--      bandeja_notificaciones.sql y metadatos_app.sql (en cualquier orden)
+--   3. reportes.sql (después de agregados_calificaciones.sql y estadisticas_citas.sql)
+-- ============================================
 
 -- Extensión para UUID
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
@@ -206,6 +213,10 @@ CREATE INDEX IF NOT EXISTS idx_citas_consultorio_id ON public.citas(consultorio_
 CREATE INDEX IF NOT EXISTS idx_citas_estado_id ON public.citas(estado_id);
 CREATE INDEX IF NOT EXISTS idx_citas_fecha ON public.citas(fecha);
 CREATE INDEX IF NOT EXISTS idx_citas_fecha_hora ON public.citas(fecha, hora_inicio);
+-- Verificación de horario: citas de un médico y día que empiezan antes de un fin dado
+CREATE INDEX IF NOT EXISTS idx_citas_medico_fecha_hora ON public.citas(medico_id, fecha, hora_inicio);
+-- Capacidad de consultorios: citas de un consultorio y día
+CREATE INDEX IF NOT EXISTS idx_citas_consultorio_fecha_hora ON public.citas(consultorio_id, fecha, hora_inicio);
 CREATE INDEX IF NOT EXISTS idx_citas_pagado ON public.citas(pagado);
 
 -- ============================================
@@ -334,6 +345,9 @@ CREATE TRIGGER update_notificaciones_updated_at
 -- ============================================
 -- FUNCIÓN PARA ACTUALIZAR CALIFICACIÓN PROMEDIO DEL MÉDICO
 -- ============================================
+-- Recalcula AVG sobre todas las calificaciones del médico. agregados_calificaciones.sql
+-- lo reemplaza por un trigger incremental; si ese ya está instalado, volver a
+-- ejecutar este script no crea el trigger anterior.
 CREATE OR REPLACE FUNCTION update_medico_calificacion()
 RETURNS TRIGGER AS $$
 BEGIN
@@ -349,11 +363,20 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
-DROP TRIGGER IF EXISTS trigger_update_medico_calificacion ON public.calificaciones;
-CREATE TRIGGER trigger_update_medico_calificacion
-  AFTER INSERT OR UPDATE ON public.calificaciones
-  FOR EACH ROW
-  EXECUTE FUNCTION update_medico_calificacion();
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgname = 'trigger_actualizar_agregado_calificaciones'
+          AND tgrelid = 'public.calificaciones'::regclass
+    ) THEN
+        DROP TRIGGER IF EXISTS trigger_update_medico_calificacion ON public.calificaciones;
+        CREATE TRIGGER trigger_update_medico_calificacion
+          AFTER INSERT OR UPDATE ON public.calificaciones
+          FOR EACH ROW
+          EXECUTE FUNCTION update_medico_calificacion();
+    END IF;
+END $$;
 
 -- ============================================
 -- FUNCIÓN PARA INCREMENTAR TOTAL DE CONSULTAS DEL MÉDICO
@@ -0,0 +1,299 @@
+-- ============================================
+-- SISTEMA DE RESERVAS MÉDICAS - VIDA SALUD
+-- Estadísticas incrementales de citas por (médico, día) y (especialidad, mes)
+-- Ejecutar después de create_database_schema.sql y antes de reportes.sql
+-- ============================================
+-- Los reportes de ingresos, por especialidad y mensual (scripts 04, 09 y 12) suman
+-- estas tablas en lugar de recorrer todas las citas. Cada cambio en citas ajusta
+-- solo las filas de su médico/día y su especialidad/mes.
+--
+-- Las citas se atribuyen a la especialidad que tenía el médico al registrarse el
+-- cambio. Al eliminar un médico sus citas se borran antes que él (trigger
+-- trigger_estadisticas_eliminar_medico), así sus meses se descuentan de la
+-- especialidad. recalcular_estadisticas_citas() reconstruye ambas tablas desde
+-- citas si hace falta.
+
+-- ============================================
+-- TABLAS DE ESTADÍSTICAS
+-- ============================================
+-- Ambas tablas tienen las mismas métricas:
+--   total, programadas, completadas, canceladas, no_asistencias: conteo de citas por estado
+--   pagadas, ingresos_pagados: citas pagadas (cualquier estado) y su precio
+--   suma_precios, con_precio, suma_duracion, con_duracion: para precio y duración promedio
+--   completadas_pagadas, ingresos_completadas, pendientes_completadas: citas completadas
+--     pagadas, su precio y el precio de las completadas sin pagar
+--   suma_precios_completadas, con_precio_completadas: precio promedio de las completadas
+CREATE TABLE IF NOT EXISTS public.citas_medico_dia (
+  medico_id uuid NOT NULL,
+  fecha date NOT NULL,
+  total integer NOT NULL DEFAULT 0,
+  programadas integer NOT NULL DEFAULT 0,
+  completadas integer NOT NULL DEFAULT 0,
+  canceladas integer NOT NULL DEFAULT 0,
+  no_asistencias integer NOT NULL DEFAULT 0,
+  pagadas integer NOT NULL DEFAULT 0,
+  ingresos_pagados numeric(14,2) NOT NULL DEFAULT 0,
+  suma_precios numeric(14,2) NOT NULL DEFAULT 0,
+  con_precio integer NOT NULL DEFAULT 0,
+  suma_duracion bigint NOT NULL DEFAULT 0,
+  con_duracion integer NOT NULL DEFAULT 0,
+  completadas_pagadas integer NOT NULL DEFAULT 0,
+  ingresos_completadas numeric(14,2) NOT NULL DEFAULT 0,
+  pendientes_completadas numeric(14,2) NOT NULL DEFAULT 0,
+  suma_precios_completadas numeric(14,2) NOT NULL DEFAULT 0,
+  con_precio_completadas integer NOT NULL DEFAULT 0,
+  updated_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT citas_medico_dia_pkey PRIMARY KEY (medico_id, fecha),
+  CONSTRAINT citas_medico_dia_medico_id_fkey FOREIGN KEY (medico_id) REFERENCES public.medicos(id) ON DELETE CASCADE
+);
+
+-- Reporte mensual: todas las filas de un rango de días
+CREATE INDEX IF NOT EXISTS idx_citas_medico_dia_fecha ON public.citas_medico_dia(fecha);
+
+CREATE TABLE IF NOT EXISTS public.citas_especialidad_mes (
+  especialidad_id uuid NOT NULL,
+  mes date NOT NULL,
+  total integer NOT NULL DEFAULT 0,
+  programadas integer NOT NULL DEFAULT 0,
+  completadas integer NOT NULL DEFAULT 0,
+  canceladas integer NOT NULL DEFAULT 0,
+  no_asistencias integer NOT NULL DEFAULT 0,
+  pagadas integer NOT NULL DEFAULT 0,
+  ingresos_pagados numeric(14,2) NOT NULL DEFAULT 0,
+  suma_precios numeric(14,2) NOT NULL DEFAULT 0,
+  con_precio integer NOT NULL DEFAULT 0,
+  suma_duracion bigint NOT NULL DEFAULT 0,
+  con_duracion integer NOT NULL DEFAULT 0,
+  completadas_pagadas integer NOT NULL DEFAULT 0,
+  ingresos_completadas numeric(14,2) NOT NULL DEFAULT 0,
+  pendientes_completadas numeric(14,2) NOT NULL DEFAULT 0,
+  suma_precios_completadas numeric(14,2) NOT NULL DEFAULT 0,
+  con_precio_completadas integer NOT NULL DEFAULT 0,
+  updated_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT citas_especialidad_mes_pkey PRIMARY KEY (especialidad_id, mes),
+  CONSTRAINT citas_especialidad_mes_especialidad_id_fkey FOREIGN KEY (especialidad_id) REFERENCES public.especialidades(id) ON DELETE CASCADE
+);
+
+-- ============================================
+-- FUNCIÓN: APLICAR CAMBIOS DE CITAS
+-- ============================================
+-- p_cambios: arreglo de citas (columnas de public.citas) con "signo": 1 para sumar
+-- la cita y -1 para descontarla. Agrupa los cambios y hace un upsert por fila afectada.
+CREATE OR REPLACE FUNCTION public.aplicar_estadisticas_citas(p_cambios jsonb)
+RETURNS void AS $$
+BEGIN
+    IF p_cambios IS NULL THEN
+        RETURN;
+    END IF;
+
+    WITH cambios AS (
+        SELECT
+            c.signo,
+            c.medico_id,
+            m.especialidad_id,
+            c.fecha,
+            ec.nombre AS estado,
+            COALESCE(c.pagado, false) AS pagado,
+            c.precio,
+            c.duracion
+        FROM jsonb_to_recordset(p_cambios) AS c(
+            signo integer, medico_id uuid, fecha date, estado_id uuid, pagado boolean, precio numeric, duracion integer
+        )
+        -- El médico siempre existe: sus citas se eliminan antes que él (ver más abajo)
+        INNER JOIN public.medicos m ON m.id = c.medico_id
+        LEFT JOIN public.estados_cita ec ON ec.id = c.estado_id
+    ),
+    deltas AS (
+        SELECT
+            medico_id,
+            especialidad_id,
+            fecha,
+            signo AS total,
+            CASE WHEN estado = 'Programada' THEN signo ELSE 0 END AS programadas,
+            CASE WHEN estado = 'Completada' THEN signo ELSE 0 END AS completadas,
+            CASE WHEN estado = 'Cancelada' THEN signo ELSE 0 END AS canceladas,
+            CASE WHEN estado = 'No Asistió' THEN signo ELSE 0 END AS no_asistencias,
+            CASE WHEN pagado THEN signo ELSE 0 END AS pagadas,
+            CASE WHEN pagado THEN signo * COALESCE(precio, 0) ELSE 0 END AS ingresos_pagados,
+            signo * COALESCE(precio, 0) AS suma_precios,
+            CASE WHEN precio IS NOT NULL THEN signo ELSE 0 END AS con_precio,
+            signo * COALESCE(duracion, 0) AS suma_duracion,
+            CASE WHEN duracion IS NOT NULL THEN signo ELSE 0 END AS con_duracion,
+            CASE WHEN estado = 'Completada' AND pagado THEN signo ELSE 0 END AS completadas_pagadas,
+            CASE WHEN estado = 'Completada' AND pagado THEN signo * COALESCE(precio, 0) ELSE 0 END AS ingresos_completadas,
+            CASE WHEN estado = 'Completada' AND NOT pagado THEN signo * COALESCE(precio, 0) ELSE 0 END AS pendientes_completadas,
+            CASE WHEN estado = 'Completada' THEN signo * COALESCE(precio, 0) ELSE 0 END AS suma_precios_completadas,
+            CASE WHEN estado = 'Completada' AND precio IS NOT NULL THEN signo ELSE 0 END AS con_precio_completadas
+        FROM cambios
+    ),
+    por_dia AS (
+        INSERT INTO public.citas_medico_dia AS r (
+            medico_id, fecha, total, programadas, completadas, canceladas, no_asistencias,
+            pagadas, ingresos_pagados, suma_precios, con_precio, suma_duracion, con_duracion,
+            completadas_pagadas, ingresos_completadas, pendientes_completadas,
+            suma_precios_completadas, con_precio_completadas
+        )
+        SELECT
+            medico_id, fecha, SUM(total), SUM(programadas), SUM(completadas), SUM(canceladas), SUM(no_asistencias),
+            SUM(pagadas), SUM(ingresos_pagados), SUM(suma_precios), SUM(con_precio), SUM(suma_duracion), SUM(con_duracion),
+            SUM(completadas_pagadas), SUM(ingresos_completadas), SUM(pendientes_completadas),
+            SUM(suma_precios_completadas), SUM(con_precio_completadas)
+        FROM deltas
+        GROUP BY medico_id, fecha
+        -- Filas en el orden de la clave: dos lotes concurrentes las bloquean en el mismo orden
+        ORDER BY medico_id, fecha
+        ON CONFLICT (medico_id, fecha) DO UPDATE SET
+            total = r.total + EXCLUDED.total,
+            programadas = r.programadas + EXCLUDED.programadas,
+            completadas = r.completadas + EXCLUDED.completadas,
+            canceladas = r.canceladas + EXCLUDED.canceladas,
+            no_asistencias = r.no_asistencias + EXCLUDED.no_asistencias,
+            pagadas = r.pagadas + EXCLUDED.pagadas,
+            ingresos_pagados = r.ingresos_pagados + EXCLUDED.ingresos_pagados,
+            suma_precios = r.suma_precios + EXCLUDED.suma_precios,
+            con_precio = r.con_precio + EXCLUDED.con_precio,
+            suma_duracion = r.suma_duracion + EXCLUDED.suma_duracion,
+            con_duracion = r.con_duracion + EXCLUDED.con_duracion,
+            completadas_pagadas = r.completadas_pagadas + EXCLUDED.completadas_pagadas,
+            ingresos_completadas = r.ingresos_completadas + EXCLUDED.ingresos_completadas,
+            pendientes_completadas = r.pendientes_completadas + EXCLUDED.pendientes_completadas,
+            suma_precios_completadas = r.suma_precios_completadas + EXCLUDED.suma_precios_completadas,
+            con_precio_completadas = r.con_precio_completadas + EXCLUDED.con_precio_completadas,
+            updated_at = now()
+    )
+    INSERT INTO public.citas_especialidad_mes AS r (
+        especialidad_id, mes, total, programadas, completadas, canceladas, no_asistencias,
+        pagadas, ingresos_pagados, suma_precios, con_precio, suma_duracion, con_duracion,
+        completadas_pagadas, ingresos_completadas, pendientes_completadas,
+        suma_precios_completadas, con_precio_completadas
+    )
+    SELECT
+        especialidad_id, date_trunc('month', fecha)::date,
+        SUM(total), SUM(programadas), SUM(completadas), SUM(canceladas), SUM(no_asistencias),
+        SUM(pagadas), SUM(ingresos_pagados), SUM(suma_precios), SUM(con_precio), SUM(suma_duracion), SUM(con_duracion),
+        SUM(completadas_pagadas), SUM(ingresos_completadas), SUM(pendientes_completadas),
+        SUM(suma_precios_completadas), SUM(con_precio_completadas)
+    FROM deltas
+    GROUP BY especialidad_id, date_trunc('month', fecha)
+    ORDER BY especialidad_id, date_trunc('month', fecha)
+    ON CONFLICT (especialidad_id, mes) DO UPDATE SET
+        total = r.total + EXCLUDED.total,
+        programadas = r.programadas + EXCLUDED.programadas,
+        completadas = r.completadas + EXCLUDED.completadas,
+        canceladas = r.canceladas + EXCLUDED.canceladas,
+        no_asistencias = r.no_asistencias + EXCLUDED.no_asistencias,
+        pagadas = r.pagadas + EXCLUDED.pagadas,
+        ingresos_pagados = r.ingresos_pagados + EXCLUDED.ingresos_pagados,
+        suma_precios = r.suma_precios + EXCLUDED.suma_precios,
+        con_precio = r.con_precio + EXCLUDED.con_precio,
+        suma_duracion = r.suma_duracion + EXCLUDED.suma_duracion,
+        con_duracion = r.con_duracion + EXCLUDED.con_duracion,
+        completadas_pagadas = r.completadas_pagadas + EXCLUDED.completadas_pagadas,
+        ingresos_completadas = r.ingresos_completadas + EXCLUDED.ingresos_completadas,
+        pendientes_completadas = r.pendientes_completadas + EXCLUDED.pendientes_completadas,
+        suma_precios_completadas = r.suma_precios_completadas + EXCLUDED.suma_precios_completadas,
+        con_precio_completadas = r.con_precio_completadas + EXCLUDED.con_precio_completadas,
+        updated_at = now();
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- TRIGGER: MANTENER LAS ESTADÍSTICAS
+-- ============================================
+-- Por sentencia con tablas de transición: un INSERT en lote (POST /citas/lote)
+-- ajusta cada médico/día una sola vez. En un UPDATE solo cuentan las citas que
+-- cambiaron de médico, fecha, estado, pago, precio o duración; la versión anterior
+-- se descuenta y la nueva se suma.
+CREATE OR REPLACE FUNCTION public.actualizar_estadisticas_citas()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM public.aplicar_estadisticas_citas(jsonb_agg(to_jsonb(n) || '{"signo": 1}'::jsonb))
+        FROM nuevas n;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM public.aplicar_estadisticas_citas(jsonb_agg(to_jsonb(a) || '{"signo": -1}'::jsonb))
+        FROM anteriores a;
+    ELSE
+        PERFORM public.aplicar_estadisticas_citas(jsonb_agg(d.cambio))
+        FROM (
+            SELECT x.cambio
+            FROM nuevas n
+            INNER JOIN anteriores a ON a.id = n.id
+            CROSS JOIN LATERAL (VALUES
+                (to_jsonb(n) || '{"signo": 1}'::jsonb),
+                (to_jsonb(a) || '{"signo": -1}'::jsonb)
+            ) AS x(cambio)
+            WHERE (n.medico_id, n.fecha, n.estado_id, n.pagado, n.precio, n.duracion)
+                IS DISTINCT FROM (a.medico_id, a.fecha, a.estado_id, a.pagado, a.precio, a.duracion)
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Postgres no admite tablas de transición en triggers de varios eventos
+DROP TRIGGER IF EXISTS trigger_estadisticas_citas_insert ON public.citas;
+CREATE TRIGGER trigger_estadisticas_citas_insert
+  AFTER INSERT ON public.citas
+  REFERENCING NEW TABLE AS nuevas
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.actualizar_estadisticas_citas();
+
+DROP TRIGGER IF EXISTS trigger_estadisticas_citas_update ON public.citas;
+CREATE TRIGGER trigger_estadisticas_citas_update
+  AFTER UPDATE ON public.citas
+  REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.actualizar_estadisticas_citas();
+
+DROP TRIGGER IF EXISTS trigger_estadisticas_citas_delete ON public.citas;
+CREATE TRIGGER trigger_estadisticas_citas_delete
+  AFTER DELETE ON public.citas
+  REFERENCING OLD TABLE AS anteriores
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.actualizar_estadisticas_citas();
+
+-- ============================================
+-- TRIGGER: ELIMINAR LAS CITAS ANTES QUE EL MÉDICO
+-- ============================================
+-- El borrado en cascada de citas ocurre cuando el médico ya no existe y su
+-- especialidad no se puede resolver. Borrarlas antes, con el médico todavía
+-- presente, descuenta sus filas por día y sus meses por especialidad.
+CREATE OR REPLACE FUNCTION public.eliminar_citas_medico()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM public.citas WHERE medico_id = OLD.id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_estadisticas_eliminar_medico ON public.medicos;
+CREATE TRIGGER trigger_estadisticas_eliminar_medico
+  BEFORE DELETE ON public.medicos
+  FOR EACH ROW
+  EXECUTE FUNCTION public.eliminar_citas_medico();
+
+-- ============================================
+-- FUNCIÓN: RECONSTRUIR LAS ESTADÍSTICAS
+-- ============================================
+-- Carga inicial, o corrección después de cambiar médicos de especialidad.
+-- Procesa las citas mes a mes para acotar el tamaño de cada lote.
+CREATE OR REPLACE FUNCTION public.recalcular_estadisticas_citas()
+RETURNS void AS $$
+BEGIN
+    LOCK TABLE public.citas IN SHARE MODE;
+    DELETE FROM public.citas_medico_dia;
+    DELETE FROM public.citas_especialidad_mes;
+    PERFORM public.aplicar_estadisticas_citas(jsonb_agg(to_jsonb(c) || '{"signo": 1}'::jsonb))
+    FROM public.citas c
+    GROUP BY date_trunc('month', c.fecha);
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- CARGA INICIAL
+-- ============================================
+SELECT public.recalcular_estadisticas_citas();
+
+COMMENT ON TABLE public.citas_medico_dia IS 'Conteos e ingresos de citas por médico y día, mantenidos por trigger';
+COMMENT ON TABLE public.citas_especialidad_mes IS 'Conteos e ingresos de citas por especialidad y mes, mantenidos por trigger';
@@ -0,0 +1,77 @@
+-- ============================================
+-- SISTEMA DE RESERVAS MÉDICAS - VIDA SALUD
+-- Horarios de atención de los médicos y excepciones (feriados, ausencias)
+-- Ejecutar después de create_database_schema.sql
+-- ============================================
+-- La API arma con estas tablas una plantilla semanal por médico (bloques de 5
+-- minutos) para generar los horarios disponibles. Un médico sin horarios
+-- registrados atiende de 9:00 a 17:00 todos los días.
+
+-- ============================================
+-- TABLA: HORARIOS_ATENCION
+-- ============================================
+-- Un bloque de atención semanal. dia_semana: 0 = lunes ... 6 = domingo.
+-- duracion_turno NULL usa la duración de cita de la especialidad del médico.
+-- Las horas y la duración van en múltiplos de 5 minutos (tamaño del bloque de la plantilla).
+CREATE TABLE IF NOT EXISTS public.horarios_atencion (
+  id uuid NOT NULL DEFAULT uuid_generate_v4(),
+  medico_id uuid NOT NULL,
+  dia_semana smallint NOT NULL CHECK (dia_semana BETWEEN 0 AND 6),
+  hora_inicio time without time zone NOT NULL CHECK (EXTRACT(MINUTE FROM hora_inicio)::integer % 5 = 0),
+  hora_fin time without time zone NOT NULL CHECK (EXTRACT(MINUTE FROM hora_fin)::integer % 5 = 0),
+  duracion_turno integer CHECK (duracion_turno > 0 AND duracion_turno % 5 = 0),
+  consultorio_id uuid,
+  activo boolean DEFAULT true,
+  created_at timestamp with time zone DEFAULT now(),
+  updated_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT horarios_atencion_pkey PRIMARY KEY (id),
+  CONSTRAINT horarios_atencion_medico_id_fkey FOREIGN KEY (medico_id) REFERENCES public.medicos(id) ON DELETE CASCADE,
+  CONSTRAINT horarios_atencion_consultorio_id_fkey FOREIGN KEY (consultorio_id) REFERENCES public.consultorios(id) ON DELETE SET NULL,
+  CONSTRAINT check_horario_hora_fin CHECK (hora_fin > hora_inicio)
+);
+
+-- Plantilla de un médico: todos sus bloques activos
+CREATE INDEX IF NOT EXISTS idx_horarios_atencion_medico_dia ON public.horarios_atencion(medico_id, dia_semana);
+
+-- ============================================
+-- TABLA: EXCEPCIONES_HORARIO
+-- ============================================
+-- Tiempo sin atención en una fecha. medico_id NULL aplica a todos los médicos
+-- (feriados); hora_inicio y hora_fin NULL bloquean el día completo.
+CREATE TABLE IF NOT EXISTS public.excepciones_horario (
+  id uuid NOT NULL DEFAULT uuid_generate_v4(),
+  medico_id uuid,
+  fecha date NOT NULL,
+  hora_inicio time without time zone,
+  hora_fin time without time zone,
+  motivo character varying(200),
+  created_at timestamp with time zone DEFAULT now(),
+  updated_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT excepciones_horario_pkey PRIMARY KEY (id),
+  CONSTRAINT excepciones_horario_medico_id_fkey FOREIGN KEY (medico_id) REFERENCES public.medicos(id) ON DELETE CASCADE,
+  CONSTRAINT check_excepcion_horas CHECK (
+    (hora_inicio IS NULL AND hora_fin IS NULL)
+    OR (hora_inicio IS NOT NULL AND hora_fin IS NOT NULL AND hora_fin > hora_inicio)
+  )
+);
+
+CREATE INDEX IF NOT EXISTS idx_excepciones_horario_medico_fecha ON public.excepciones_horario(medico_id, fecha);
+CREATE INDEX IF NOT EXISTS idx_excepciones_horario_fecha ON public.excepciones_horario(fecha);
+
+-- ============================================
+-- TRIGGERS PARA ACTUALIZAR updated_at
+-- ============================================
+DROP TRIGGER IF EXISTS update_horarios_atencion_updated_at ON public.horarios_atencion;
+CREATE TRIGGER update_horarios_atencion_updated_at
+  BEFORE UPDATE ON public.horarios_atencion
+  FOR EACH ROW
+  EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_excepciones_horario_updated_at ON public.excepciones_horario;
+CREATE TRIGGER update_excepciones_horario_updated_at
+  BEFORE UPDATE ON public.excepciones_horario
+  FOR EACH ROW
+  EXECUTE FUNCTION update_updated_at_column();
+
+COMMENT ON TABLE public.horarios_atencion IS 'Bloques semanales de atención de cada médico';
+COMMENT ON TABLE public.excepciones_horario IS 'Feriados y ausencias: tiempo sin atención en una fecha';
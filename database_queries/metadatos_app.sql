@@ -0,0 +1,19 @@
+-- ============================================
+-- SISTEMA DE RESERVAS MÉDICAS - VIDA SALUD
+-- Metadatos de la aplicación (versión de los datos iniciales)
+-- Ejecutar después de create_database_schema.sql
+-- ============================================
+
+-- ============================================
+-- TABLA: METADATOS_APP
+-- ============================================
+-- Pares clave/valor que la API lee al iniciar; `seed_version` indica qué
+-- versión de los datos iniciales ya se cargó (ver app/database/seed_data.py)
+CREATE TABLE IF NOT EXISTS public.metadatos_app (
+  clave character varying(100) NOT NULL,
+  valor text NOT NULL,
+  updated_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT metadatos_app_pkey PRIMARY KEY (clave)
+);
+
+COMMENT ON TABLE public.metadatos_app IS 'Metadatos de la aplicación, p. ej. la versión de los datos iniciales cargados';
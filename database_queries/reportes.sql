@@ -0,0 +1,832 @@
+-- ============================================
+-- SISTEMA DE RESERVAS MÉDICAS - VIDA SALUD
+-- Reportes como funciones para la API (GET /api/v1/reportes/*)
+-- Ejecutar después de agregados_calificaciones.sql y estadisticas_citas.sql
+-- ============================================
+-- Cada función corresponde a uno de los scripts 01-15 de esta carpeta, con los
+-- valores fijos (UUIDs a reemplazar, CURRENT_DATE, LIMIT) convertidos en parámetros.
+-- Los reportes 04, 09 y 12 leen las tablas de estadisticas_citas.sql en lugar de citas.
+-- El orden de cada resultado es total (termina en un id) para paginar con offset/limit.
+
+-- ============================================
+-- 01: MÉDICOS DISPONIBLES POR ESPECIALIDAD
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_medicos_disponibles(
+    p_especialidad_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+    id uuid,
+    nombre_completo text,
+    email character varying,
+    telefono character varying,
+    especialidad character varying,
+    numero_licencia character varying,
+    universidad character varying,
+    anos_experiencia integer,
+    precio_consulta numeric,
+    calificacion_promedio numeric,
+    total_consultas integer,
+    biografia text
+) AS $$
+    SELECT
+        m.id,
+        u.nombre || ' ' || u.apellidos,
+        u.email,
+        u.telefono,
+        e.nombre,
+        m.numero_licencia,
+        m.universidad,
+        m.anos_experiencia,
+        m.precio_consulta,
+        m.calificacion_promedio,
+        m.total_consultas,
+        m.biografia
+    FROM public.medicos m
+    INNER JOIN public.usuarios u ON m.usuario_id = u.id
+    INNER JOIN public.especialidades e ON m.especialidad_id = e.id
+    WHERE m.disponible = true
+      AND u.activo = true
+      AND (p_especialidad_id IS NULL OR m.especialidad_id = p_especialidad_id)
+    ORDER BY e.nombre, m.calificacion_promedio DESC, m.total_consultas DESC, m.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 02: CITAS DEL DÍA
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_citas_del_dia(
+    p_fecha date DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+    id uuid,
+    fecha date,
+    hora_inicio time,
+    hora_fin time,
+    paciente text,
+    telefono_paciente character varying,
+    medico text,
+    especialidad character varying,
+    consultorio character varying,
+    ubicacion text,
+    estado character varying,
+    color_estado character varying,
+    motivo_consulta text,
+    precio numeric,
+    pagado boolean
+) AS $$
+    SELECT
+        c.id,
+        c.fecha,
+        c.hora_inicio,
+        c.hora_fin,
+        up.nombre || ' ' || up.apellidos,
+        up.telefono,
+        um.nombre || ' ' || um.apellidos,
+        e.nombre,
+        con.nombre,
+        con.ubicacion,
+        ec.nombre,
+        ec.color,
+        c.motivo_consulta,
+        c.precio,
+        c.pagado
+    FROM public.citas c
+    INNER JOIN public.pacientes p ON c.paciente_id = p.id
+    INNER JOIN public.usuarios up ON p.usuario_id = up.id
+    INNER JOIN public.medicos m ON c.medico_id = m.id
+    INNER JOIN public.usuarios um ON m.usuario_id = um.id
+    INNER JOIN public.especialidades e ON m.especialidad_id = e.id
+    LEFT JOIN public.consultorios con ON c.consultorio_id = con.id
+    INNER JOIN public.estados_cita ec ON c.estado_id = ec.id
+    WHERE c.fecha = p_fecha
+    ORDER BY c.hora_inicio, c.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 03: MÉDICOS MEJOR CALIFICADOS
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_top_medicos(
+    p_limite integer DEFAULT 10,
+    p_min_consultas integer DEFAULT 5
+)
+RETURNS TABLE (
+    id uuid,
+    nombre_completo text,
+    especialidad character varying,
+    calificacion_promedio numeric,
+    total_consultas integer,
+    precio_consulta numeric,
+    anos_experiencia integer,
+    total_calificaciones bigint,
+    promedio_real numeric
+) AS $$
+    SELECT
+        m.id,
+        u.nombre || ' ' || u.apellidos,
+        e.nombre,
+        m.calificacion_promedio,
+        m.total_consultas,
+        m.precio_consulta,
+        m.anos_experiencia,
+        COUNT(cal.id),
+        ROUND(AVG(cal.calificacion), 2)
+    FROM public.medicos m
+    INNER JOIN public.usuarios u ON m.usuario_id = u.id
+    INNER JOIN public.especialidades e ON m.especialidad_id = e.id
+    LEFT JOIN public.calificaciones cal ON m.id = cal.medico_id
+    WHERE m.disponible = true
+      AND m.total_consultas >= p_min_consultas
+    GROUP BY m.id, u.nombre, u.apellidos, e.nombre
+    ORDER BY m.calificacion_promedio DESC, m.total_consultas DESC, m.id
+    LIMIT p_limite;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 04: INGRESOS POR MÉDICO
+-- ============================================
+-- Citas completadas, opcionalmente de un rango de fechas; suma citas_medico_dia
+CREATE OR REPLACE FUNCTION public.reporte_ingresos_por_medico(
+    p_fecha_inicio date DEFAULT NULL,
+    p_fecha_fin date DEFAULT NULL
+)
+RETURNS TABLE (
+    id uuid,
+    medico text,
+    especialidad character varying,
+    total_citas bigint,
+    citas_pagadas bigint,
+    citas_pendientes bigint,
+    ingresos_totales numeric,
+    ingresos_pendientes numeric,
+    precio_promedio numeric
+) AS $$
+    SELECT
+        m.id,
+        u.nombre || ' ' || u.apellidos,
+        e.nombre,
+        COALESCE(s.completadas, 0),
+        COALESCE(s.completadas_pagadas, 0),
+        COALESCE(s.completadas - s.completadas_pagadas, 0),
+        COALESCE(s.ingresos_completadas, 0),
+        COALESCE(s.pendientes_completadas, 0),
+        ROUND(s.suma_precios_completadas / NULLIF(s.con_precio_completadas, 0), 2)
+    FROM public.medicos m
+    INNER JOIN public.usuarios u ON m.usuario_id = u.id
+    INNER JOIN public.especialidades e ON m.especialidad_id = e.id
+    LEFT JOIN (
+        SELECT
+            d.medico_id,
+            SUM(d.completadas) AS completadas,
+            SUM(d.completadas_pagadas) AS completadas_pagadas,
+            SUM(d.ingresos_completadas) AS ingresos_completadas,
+            SUM(d.pendientes_completadas) AS pendientes_completadas,
+            SUM(d.suma_precios_completadas) AS suma_precios_completadas,
+            SUM(d.con_precio_completadas) AS con_precio_completadas
+        FROM public.citas_medico_dia d
+        WHERE (p_fecha_inicio IS NULL OR d.fecha >= p_fecha_inicio)
+          AND (p_fecha_fin IS NULL OR d.fecha <= p_fecha_fin)
+        GROUP BY d.medico_id
+    ) s ON s.medico_id = m.id
+    ORDER BY 7 DESC, m.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 05: AGENDA SEMANAL DE UN MÉDICO
+-- ============================================
+-- Semana (lunes a domingo) que contiene p_fecha
+CREATE OR REPLACE FUNCTION public.reporte_agenda_medico_semanal(
+    p_medico_id uuid,
+    p_fecha date DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+    id uuid,
+    fecha date,
+    dia_semana text,
+    hora_inicio time,
+    hora_fin time,
+    duracion integer,
+    paciente text,
+    telefono_paciente character varying,
+    estado character varying,
+    color character varying,
+    motivo_consulta text,
+    consultorio character varying,
+    pagado boolean
+) AS $$
+    SELECT
+        c.id,
+        c.fecha,
+        TRIM(TO_CHAR(c.fecha, 'Day')),
+        c.hora_inicio,
+        c.hora_fin,
+        c.duracion,
+        up.nombre || ' ' || up.apellidos,
+        up.telefono,
+        ec.nombre,
+        ec.color,
+        c.motivo_consulta,
+        con.nombre,
+        c.pagado
+    FROM public.citas c
+    INNER JOIN public.pacientes p ON c.paciente_id = p.id
+    INNER JOIN public.usuarios up ON p.usuario_id = up.id
+    INNER JOIN public.estados_cita ec ON c.estado_id = ec.id
+    LEFT JOIN public.consultorios con ON c.consultorio_id = con.id
+    WHERE c.medico_id = p_medico_id
+      AND c.fecha >= date_trunc('week', p_fecha)::date
+      AND c.fecha < date_trunc('week', p_fecha)::date + 7
+    ORDER BY c.fecha, c.hora_inicio, c.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 06: PACIENTES MÁS FRECUENTES
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_pacientes_frecuentes(
+    p_limite integer DEFAULT 20
+)
+RETURNS TABLE (
+    id uuid,
+    paciente text,
+    email character varying,
+    telefono character varying,
+    fecha_nacimiento date,
+    edad numeric,
+    total_citas bigint,
+    citas_completadas bigint,
+    citas_canceladas bigint,
+    no_asistencias bigint,
+    ultima_cita date,
+    total_gastado numeric,
+    seguro_medico character varying
+) AS $$
+    SELECT
+        p.id,
+        u.nombre || ' ' || u.apellidos,
+        u.email,
+        u.telefono,
+        u.fecha_nacimiento,
+        EXTRACT(YEAR FROM AGE(u.fecha_nacimiento)),
+        COUNT(c.id),
+        COUNT(c.id) FILTER (WHERE ec.nombre = 'Completada'),
+        COUNT(c.id) FILTER (WHERE ec.nombre = 'Cancelada'),
+        COUNT(c.id) FILTER (WHERE ec.nombre = 'No Asistió'),
+        MAX(c.fecha),
+        COALESCE(SUM(c.precio), 0),
+        p.seguro_medico
+    FROM public.pacientes p
+    INNER JOIN public.usuarios u ON p.usuario_id = u.id
+    INNER JOIN public.citas c ON p.id = c.paciente_id
+    INNER JOIN public.estados_cita ec ON c.estado_id = ec.id
+    GROUP BY p.id, u.nombre, u.apellidos, u.email, u.telefono, u.fecha_nacimiento
+    ORDER BY 7 DESC, p.id
+    LIMIT p_limite;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 07: DISPONIBILIDAD DE CONSULTORIOS
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_disponibilidad_consultorios(
+    p_fecha date DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+    id uuid,
+    nombre character varying,
+    ubicacion text,
+    capacidad integer,
+    citas_programadas bigint,
+    espacios_disponibles bigint,
+    estado_disponibilidad text,
+    equipamiento text
+) AS $$
+    SELECT
+        con.id,
+        con.nombre,
+        con.ubicacion,
+        con.capacidad,
+        COUNT(c.id),
+        con.capacidad - COUNT(c.id),
+        CASE
+            WHEN COUNT(c.id) = 0 THEN 'Libre'
+            WHEN COUNT(c.id) < con.capacidad THEN 'Parcialmente Ocupado'
+            ELSE 'Ocupado'
+        END,
+        con.equipamiento
+    FROM public.consultorios con
+    LEFT JOIN public.citas c ON con.id = c.consultorio_id
+        AND c.fecha = p_fecha
+        AND c.estado_id NOT IN (SELECT ec.id FROM public.estados_cita ec WHERE ec.nombre IN ('Cancelada', 'No Asistió'))
+    WHERE con.activo = true
+    GROUP BY con.id
+    ORDER BY 6 DESC, con.nombre, con.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 08: CITAS PENDIENTES DE PAGO
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_citas_pendientes_pago()
+RETURNS TABLE (
+    id uuid,
+    fecha date,
+    paciente text,
+    email_paciente character varying,
+    telefono_paciente character varying,
+    medico text,
+    especialidad character varying,
+    precio numeric,
+    fecha_creacion timestamp with time zone,
+    dias_desde_cita integer,
+    estado_pago text
+) AS $$
+    SELECT
+        c.id,
+        c.fecha,
+        up.nombre || ' ' || up.apellidos,
+        up.email,
+        up.telefono,
+        um.nombre || ' ' || um.apellidos,
+        e.nombre,
+        c.precio,
+        c.created_at,
+        CURRENT_DATE - c.fecha,
+        CASE
+            WHEN CURRENT_DATE - c.fecha <= 7 THEN 'Reciente'
+            WHEN CURRENT_DATE - c.fecha <= 30 THEN 'Pendiente'
+            ELSE 'Vencido'
+        END
+    FROM public.citas c
+    INNER JOIN public.pacientes p ON c.paciente_id = p.id
+    INNER JOIN public.usuarios up ON p.usuario_id = up.id
+    INNER JOIN public.medicos m ON c.medico_id = m.id
+    INNER JOIN public.usuarios um ON m.usuario_id = um.id
+    INNER JOIN public.especialidades e ON m.especialidad_id = e.id
+    WHERE c.pagado = false
+      AND c.estado_id IN (SELECT ec.id FROM public.estados_cita ec WHERE ec.nombre = 'Completada')
+      AND c.precio > 0
+    ORDER BY c.fecha DESC, c.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 09: ESTADÍSTICAS POR ESPECIALIDAD
+-- ============================================
+-- Citas desde citas_especialidad_mes y calificaciones desde medicos_calificaciones_agregado
+CREATE OR REPLACE FUNCTION public.reporte_estadisticas_especialidades()
+RETURNS TABLE (
+    id uuid,
+    especialidad character varying,
+    precio_base numeric,
+    duracion_cita_default integer,
+    total_medicos bigint,
+    medicos_disponibles bigint,
+    total_citas bigint,
+    citas_completadas bigint,
+    citas_canceladas bigint,
+    calificacion_promedio_especialidad numeric,
+    ingresos_totales numeric,
+    precio_promedio_cita numeric,
+    total_calificaciones bigint
+) AS $$
+    SELECT
+        e.id,
+        e.nombre,
+        e.precio_base,
+        e.duracion_cita_default,
+        COALESCE(md.total_medicos, 0),
+        COALESCE(md.medicos_disponibles, 0),
+        COALESCE(s.total, 0),
+        COALESCE(s.completadas, 0),
+        COALESCE(s.canceladas, 0),
+        md.calificacion_promedio,
+        COALESCE(s.ingresos_pagados, 0),
+        ROUND(s.suma_precios / NULLIF(s.con_precio, 0), 2),
+        COALESCE(md.total_calificaciones, 0)
+    FROM public.especialidades e
+    LEFT JOIN (
+        SELECT
+            m.especialidad_id,
+            COUNT(*) AS total_medicos,
+            COUNT(*) FILTER (WHERE m.disponible = true) AS medicos_disponibles,
+            ROUND(AVG(m.calificacion_promedio), 2) AS calificacion_promedio,
+            COALESCE(SUM(a.total), 0)::bigint AS total_calificaciones
+        FROM public.medicos m
+        LEFT JOIN public.medicos_calificaciones_agregado a ON a.medico_id = m.id
+        GROUP BY m.especialidad_id
+    ) md ON md.especialidad_id = e.id
+    LEFT JOIN (
+        SELECT
+            r.especialidad_id,
+            SUM(r.total) AS total,
+            SUM(r.completadas) AS completadas,
+            SUM(r.canceladas) AS canceladas,
+            SUM(r.ingresos_pagados) AS ingresos_pagados,
+            SUM(r.suma_precios) AS suma_precios,
+            SUM(r.con_precio) AS con_precio
+        FROM public.citas_especialidad_mes r
+        GROUP BY r.especialidad_id
+    ) s ON s.especialidad_id = e.id
+    WHERE e.activo = true
+    ORDER BY 7 DESC, 11 DESC, e.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 10: CITAS PRÓXIMAS SIN RECORDATORIO
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_citas_sin_recordatorio(
+    p_dias integer DEFAULT 7
+)
+RETURNS TABLE (
+    cita_id uuid,
+    fecha date,
+    hora_inicio time,
+    dias_hasta_cita integer,
+    paciente text,
+    email_paciente character varying,
+    telefono_paciente character varying,
+    medico text,
+    especialidad character varying,
+    consultorio character varying,
+    motivo_consulta text
+) AS $$
+    SELECT
+        c.id,
+        c.fecha,
+        c.hora_inicio,
+        c.fecha - CURRENT_DATE,
+        up.nombre || ' ' || up.apellidos,
+        up.email,
+        up.telefono,
+        um.nombre || ' ' || um.apellidos,
+        e.nombre,
+        con.nombre,
+        c.motivo_consulta
+    FROM public.citas c
+    INNER JOIN public.pacientes p ON c.paciente_id = p.id
+    INNER JOIN public.usuarios up ON p.usuario_id = up.id
+    INNER JOIN public.medicos m ON c.medico_id = m.id
+    INNER JOIN public.usuarios um ON m.usuario_id = um.id
+    INNER JOIN public.especialidades e ON m.especialidad_id = e.id
+    LEFT JOIN public.consultorios con ON c.consultorio_id = con.id
+    WHERE c.recordatorio_enviado = false
+      AND c.fecha BETWEEN CURRENT_DATE AND CURRENT_DATE + p_dias
+      AND c.estado_id IN (SELECT ec.id FROM public.estados_cita ec WHERE ec.nombre = 'Programada')
+    ORDER BY c.fecha, c.hora_inicio, c.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 11: HISTORIAL MÉDICO DE UN PACIENTE
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_historial_paciente(
+    p_paciente_id uuid
+)
+RETURNS TABLE (
+    id uuid,
+    fecha date,
+    hora_inicio time,
+    medico text,
+    especialidad character varying,
+    estado character varying,
+    motivo_consulta text,
+    diagnostico text,
+    tratamiento text,
+    medicamentos_recetados text,
+    observaciones_medico text,
+    precio numeric,
+    pagado boolean,
+    consultorio character varying,
+    calificacion integer,
+    comentario_calificacion text
+) AS $$
+    SELECT
+        c.id,
+        c.fecha,
+        c.hora_inicio,
+        um.nombre || ' ' || um.apellidos,
+        e.nombre,
+        ec.nombre,
+        c.motivo_consulta,
+        c.diagnostico,
+        c.tratamiento,
+        c.medicamentos_recetados,
+        c.observaciones_medico,
+        c.precio,
+        c.pagado,
+        con.nombre,
+        cal.calificacion,
+        cal.comentario
+    FROM public.citas c
+    INNER JOIN public.medicos m ON c.medico_id = m.id
+    INNER JOIN public.usuarios um ON m.usuario_id = um.id
+    INNER JOIN public.especialidades e ON m.especialidad_id = e.id
+    INNER JOIN public.estados_cita ec ON c.estado_id = ec.id
+    LEFT JOIN public.consultorios con ON c.consultorio_id = con.id
+    LEFT JOIN public.calificaciones cal ON c.id = cal.cita_id
+    WHERE c.paciente_id = p_paciente_id
+    ORDER BY c.fecha DESC, c.hora_inicio DESC, c.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 12: REPORTE MENSUAL DE CITAS
+-- ============================================
+-- Un registro por día del mes que contiene p_fecha; suma citas_medico_dia
+CREATE OR REPLACE FUNCTION public.reporte_mensual_citas(
+    p_fecha date DEFAULT CURRENT_DATE
+)
+RETURNS TABLE (
+    fecha date,
+    dia_semana text,
+    total_citas bigint,
+    programadas bigint,
+    completadas bigint,
+    canceladas bigint,
+    no_asistencias bigint,
+    pagadas bigint,
+    ingresos_dia numeric,
+    duracion_promedio_minutos numeric
+) AS $$
+    SELECT
+        d.fecha,
+        TRIM(TO_CHAR(d.fecha, 'Day')),
+        SUM(d.total),
+        SUM(d.programadas),
+        SUM(d.completadas),
+        SUM(d.canceladas),
+        SUM(d.no_asistencias),
+        SUM(d.pagadas),
+        SUM(d.ingresos_pagados),
+        ROUND(SUM(d.suma_duracion) / NULLIF(SUM(d.con_duracion), 0), 0)
+    FROM public.citas_medico_dia d
+    WHERE d.fecha >= date_trunc('month', p_fecha)::date
+      AND d.fecha < (date_trunc('month', p_fecha) + interval '1 month')::date
+    GROUP BY d.fecha
+    HAVING SUM(d.total) > 0
+    ORDER BY d.fecha;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 13: CALIFICACIONES RECIENTES
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_calificaciones_recientes(
+    p_limite integer DEFAULT 20
+)
+RETURNS TABLE (
+    id uuid,
+    fecha_calificacion timestamp with time zone,
+    calificacion integer,
+    comentario text,
+    medico text,
+    especialidad character varying,
+    paciente text,
+    fecha_cita date,
+    motivo_consulta text,
+    calificacion_actual_medico numeric,
+    clasificacion text
+) AS $$
+    SELECT
+        cal.id,
+        cal.created_at,
+        cal.calificacion,
+        cal.comentario,
+        um.nombre || ' ' || um.apellidos,
+        e.nombre,
+        up.nombre || ' ' || up.apellidos,
+        c.fecha,
+        c.motivo_consulta,
+        m.calificacion_promedio,
+        CASE
+            WHEN cal.calificacion >= 4 THEN 'Excelente'
+            WHEN cal.calificacion = 3 THEN 'Buena'
+            WHEN cal.calificacion = 2 THEN 'Regular'
+            ELSE 'Mala'
+        END
+    FROM public.calificaciones cal
+    INNER JOIN public.medicos m ON cal.medico_id = m.id
+    INNER JOIN public.usuarios um ON m.usuario_id = um.id
+    INNER JOIN public.especialidades e ON m.especialidad_id = e.id
+    INNER JOIN public.pacientes p ON cal.paciente_id = p.id
+    INNER JOIN public.usuarios up ON p.usuario_id = up.id
+    INNER JOIN public.citas c ON cal.cita_id = c.id
+    ORDER BY cal.created_at DESC, cal.id
+    LIMIT p_limite;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 14: NOTIFICACIONES PENDIENTES POR USUARIO
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_notificaciones_pendientes()
+RETURNS TABLE (
+    usuario_id uuid,
+    usuario text,
+    email character varying,
+    rol character varying,
+    notificaciones_pendientes bigint,
+    info bigint,
+    warning bigint,
+    error bigint,
+    success bigint,
+    notificacion_mas_antigua timestamp with time zone,
+    notificacion_mas_reciente timestamp with time zone
+) AS $$
+    SELECT
+        u.id,
+        u.nombre || ' ' || u.apellidos,
+        u.email,
+        r.nombre,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE n.tipo = 'info'),
+        COUNT(*) FILTER (WHERE n.tipo = 'warning'),
+        COUNT(*) FILTER (WHERE n.tipo = 'error'),
+        COUNT(*) FILTER (WHERE n.tipo = 'success'),
+        MIN(n.created_at),
+        MAX(n.created_at)
+    FROM public.usuarios u
+    INNER JOIN public.roles r ON u.rol_id = r.id
+    INNER JOIN public.notificaciones n ON u.id = n.usuario_id
+    WHERE n.leida = false
+      AND u.activo = true
+    GROUP BY u.id, r.nombre
+    ORDER BY 5 DESC, u.id;
+$$ LANGUAGE sql STABLE;
+
+-- Detalle de las notificaciones pendientes (segunda consulta del script 14)
+CREATE OR REPLACE FUNCTION public.reporte_notificaciones_pendientes_detalle()
+RETURNS TABLE (
+    id uuid,
+    usuario text,
+    titulo character varying,
+    mensaje text,
+    tipo character varying,
+    created_at timestamp with time zone,
+    horas_desde_creacion numeric,
+    categoria text
+) AS $$
+    SELECT
+        n.id,
+        u.nombre || ' ' || u.apellidos,
+        n.titulo,
+        n.mensaje,
+        n.tipo,
+        n.created_at,
+        ROUND(EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - n.created_at)) / 3600, 2),
+        CASE
+            WHEN n.cita_id IS NOT NULL THEN 'Relacionada con cita'
+            ELSE 'General'
+        END
+    FROM public.notificaciones n
+    INNER JOIN public.usuarios u ON n.usuario_id = u.id
+    WHERE n.leida = false
+    ORDER BY n.created_at DESC, n.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 15: ANÁLISIS DE AUSENTISMO
+-- ============================================
+CREATE OR REPLACE FUNCTION public.reporte_ausentismo(
+    p_min_citas integer DEFAULT 3
+)
+RETURNS TABLE (
+    id uuid,
+    paciente text,
+    email character varying,
+    telefono character varying,
+    total_citas_agendadas bigint,
+    asistencias bigint,
+    inasistencias bigint,
+    cancelaciones bigint,
+    porcentaje_inasistencia numeric,
+    porcentaje_cancelacion numeric,
+    nivel_riesgo text,
+    ultima_cita date,
+    perdida_economica numeric
+) AS $$
+    SELECT
+        a.id,
+        a.paciente,
+        a.email,
+        a.telefono,
+        a.total,
+        a.asistencias,
+        a.inasistencias,
+        a.cancelaciones,
+        ROUND(a.inasistencias * 100.0 / a.total, 2),
+        ROUND(a.cancelaciones * 100.0 / a.total, 2),
+        CASE
+            WHEN a.inasistencias * 100.0 / a.total >= 50 THEN 'Crítico'
+            WHEN a.inasistencias * 100.0 / a.total >= 30 THEN 'Alto'
+            WHEN a.inasistencias * 100.0 / a.total >= 10 THEN 'Moderado'
+            ELSE 'Bajo'
+        END,
+        a.ultima_cita,
+        a.perdida_economica
+    FROM (
+        SELECT
+            p.id,
+            u.nombre || ' ' || u.apellidos AS paciente,
+            u.email,
+            u.telefono,
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE ec.nombre = 'Completada') AS asistencias,
+            COUNT(*) FILTER (WHERE ec.nombre = 'No Asistió') AS inasistencias,
+            COUNT(*) FILTER (WHERE ec.nombre = 'Cancelada') AS cancelaciones,
+            MAX(c.fecha) AS ultima_cita,
+            COALESCE(SUM(c.precio) FILTER (WHERE c.pagado = false AND ec.nombre = 'No Asistió'), 0) AS perdida_economica
+        FROM public.pacientes p
+        INNER JOIN public.usuarios u ON p.usuario_id = u.id
+        INNER JOIN public.citas c ON p.id = c.paciente_id
+        INNER JOIN public.estados_cita ec ON c.estado_id = ec.id
+        GROUP BY p.id, u.nombre, u.apellidos, u.email, u.telefono
+        HAVING COUNT(*) >= p_min_citas
+    ) a
+    ORDER BY 9 DESC, 5 DESC, a.id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- ESTADÍSTICAS POR MÉDICO Y DÍA
+-- ============================================
+-- Filas de citas_medico_dia de un rango de fechas, para tableros
+CREATE OR REPLACE FUNCTION public.reporte_estadisticas_medico_dia(
+    p_fecha_inicio date,
+    p_fecha_fin date,
+    p_medico_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+    medico_id uuid,
+    medico text,
+    fecha date,
+    total integer,
+    programadas integer,
+    completadas integer,
+    canceladas integer,
+    no_asistencias integer,
+    pagadas integer,
+    ingresos_pagados numeric,
+    pendientes_completadas numeric,
+    precio_promedio numeric,
+    duracion_promedio numeric
+) AS $$
+    SELECT
+        d.medico_id,
+        u.nombre || ' ' || u.apellidos,
+        d.fecha,
+        d.total,
+        d.programadas,
+        d.completadas,
+        d.canceladas,
+        d.no_asistencias,
+        d.pagadas,
+        d.ingresos_pagados,
+        d.pendientes_completadas,
+        ROUND(d.suma_precios / NULLIF(d.con_precio, 0), 2),
+        ROUND(d.suma_duracion::numeric / NULLIF(d.con_duracion, 0), 0)
+    FROM public.citas_medico_dia d
+    INNER JOIN public.medicos m ON d.medico_id = m.id
+    INNER JOIN public.usuarios u ON m.usuario_id = u.id
+    WHERE d.fecha BETWEEN p_fecha_inicio AND p_fecha_fin
+      AND (p_medico_id IS NULL OR d.medico_id = p_medico_id)
+      AND d.total > 0
+    ORDER BY d.fecha, d.medico_id;
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- ESTADÍSTICAS POR ESPECIALIDAD Y MES
+-- ============================================
+-- Filas de citas_especialidad_mes de un rango de meses, para tableros
+CREATE OR REPLACE FUNCTION public.reporte_estadisticas_especialidad_mes(
+    p_mes_inicio date DEFAULT NULL,
+    p_mes_fin date DEFAULT NULL,
+    p_especialidad_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+    especialidad_id uuid,
+    especialidad character varying,
+    mes date,
+    total integer,
+    programadas integer,
+    completadas integer,
+    canceladas integer,
+    no_asistencias integer,
+    pagadas integer,
+    ingresos_pagados numeric,
+    pendientes_completadas numeric,
+    precio_promedio numeric,
+    duracion_promedio numeric
+) AS $$
+    SELECT
+        r.especialidad_id,
+        e.nombre,
+        r.mes,
+        r.total,
+        r.programadas,
+        r.completadas,
+        r.canceladas,
+        r.no_asistencias,
+        r.pagadas,
+        r.ingresos_pagados,
+        r.pendientes_completadas,
+        ROUND(r.suma_precios / NULLIF(r.con_precio, 0), 2),
+        ROUND(r.suma_duracion::numeric / NULLIF(r.con_duracion, 0), 0)
+    FROM public.citas_especialidad_mes r
+    INNER JOIN public.especialidades e ON r.especialidad_id = e.id
+    WHERE (p_mes_inicio IS NULL OR r.mes >= date_trunc('month', p_mes_inicio)::date)
+      AND (p_mes_fin IS NULL OR r.mes <= date_trunc('month', p_mes_fin)::date)
+      AND (p_especialidad_id IS NULL OR r.especialidad_id = p_especialidad_id)
+      AND r.total > 0
+    ORDER BY r.mes, e.nombre, r.especialidad_id;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,229 @@
+-- ============================================
+-- SISTEMA DE RESERVAS MÉDICAS - VIDA SALUD
+-- Reserva atómica de citas
+-- Ejecutar después de create_database_schema.sql
+-- ============================================
+
+-- Extensión necesaria para combinar igualdad (uuid, date) y solapamiento de rangos en un índice GiST
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- ============================================
+-- COLUMNA: CITAS QUE OCUPAN HORARIO
+-- ============================================
+-- Las citas canceladas o sin asistencia liberan su horario. El estado se resuelve
+-- a esta columna al insertar o cambiar estado_id, para que la restricción y las
+-- consultas de disponibilidad no necesiten unir estados_cita.
+-- NOTA: Renombrar un estado no recalcula las citas existentes
+ALTER TABLE public.citas ADD COLUMN IF NOT EXISTS ocupa_horario boolean NOT NULL DEFAULT true;
+
+CREATE OR REPLACE FUNCTION public.actualizar_ocupa_horario()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.ocupa_horario := NOT EXISTS (
+        SELECT 1
+        FROM public.estados_cita
+        WHERE id = NEW.estado_id
+          AND nombre IN ('Cancelada', 'No Asistió')
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_ocupa_horario ON public.citas;
+CREATE TRIGGER trigger_ocupa_horario
+  BEFORE INSERT OR UPDATE OF estado_id ON public.citas
+  FOR EACH ROW
+  EXECUTE FUNCTION public.actualizar_ocupa_horario();
+
+-- Carga inicial de las citas existentes. CHECK (fecha >= CURRENT_DATE) se evalúa en
+-- cada UPDATE y rechazaría las citas pasadas canceladas o sin asistencia: se retira
+-- durante la carga y se vuelve a crear NOT VALID, que como antes solo valida las filas
+-- nuevas o modificadas. La transacción evita que otra escritura vea la tabla sin ella.
+BEGIN;
+
+ALTER TABLE public.citas DROP CONSTRAINT IF EXISTS citas_fecha_check;
+
+UPDATE public.citas c
+SET ocupa_horario = false
+FROM public.estados_cita ec
+WHERE ec.id = c.estado_id
+  AND ec.nombre IN ('Cancelada', 'No Asistió')
+  AND c.ocupa_horario;
+
+ALTER TABLE public.citas
+  ADD CONSTRAINT citas_fecha_check CHECK (fecha >= CURRENT_DATE) NOT VALID;
+
+COMMIT;
+
+-- ============================================
+-- RESTRICCIÓN: UN MÉDICO NO PUEDE TENER CITAS SOLAPADAS
+-- ============================================
+-- NOTA: Si existen citas solapadas previas, deben corregirse antes de crear la restricción
+ALTER TABLE public.citas DROP CONSTRAINT IF EXISTS citas_medico_horario_excl;
+ALTER TABLE public.citas
+  ADD CONSTRAINT citas_medico_horario_excl
+  EXCLUDE USING gist (
+    medico_id WITH =,
+    fecha WITH =,
+    tsrange(fecha + hora_inicio, fecha + hora_fin) WITH &&
+  ) WHERE (ocupa_horario);
+
+-- ============================================
+-- TRIGGER: CAPACIDAD DE LOS CONSULTORIOS
+-- ============================================
+-- Un consultorio admite hasta `capacidad` citas simultáneas. Se valida en cada
+-- INSERT o UPDATE de citas (reservar_cita, lotes y cambios de horario), con las
+-- reservas del mismo consultorio y día serializadas por un advisory lock.
+-- El máximo de citas simultáneas dentro del horario pedido se alcanza al inicio
+-- del horario o al inicio de alguna cita que empieza dentro de él.
+-- Los triggers BEFORE se ejecutan por orden de nombre: este va después de
+-- trigger_ocupa_horario, que calcula NEW.ocupa_horario.
+-- Errores:
+--   P0002 (no_data_found)   -> consultorio no encontrado
+--   P0001 (raise_exception) -> consultorio inactivo o sin capacidad
+CREATE OR REPLACE FUNCTION public.validar_capacidad_consultorio()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_capacidad integer;
+    v_activo boolean;
+    v_simultaneas bigint;
+BEGIN
+    IF NEW.consultorio_id IS NULL OR NOT NEW.ocupa_horario THEN
+        RETURN NEW;
+    END IF;
+
+    SELECT capacidad, activo INTO v_capacidad, v_activo
+    FROM public.consultorios
+    WHERE id = NEW.consultorio_id
+    FOR SHARE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Consultorio no encontrado' USING ERRCODE = 'no_data_found';
+    END IF;
+
+    IF NOT v_activo THEN
+        RAISE EXCEPTION 'El consultorio no está activo' USING ERRCODE = 'raise_exception';
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext(NEW.consultorio_id::text), hashtext(NEW.fecha::text));
+
+    SELECT COALESCE(MAX(ocupadas.total), 0) INTO v_simultaneas
+    FROM (
+        SELECT NEW.hora_inicio AS punto
+        UNION
+        SELECT c.hora_inicio
+        FROM public.citas c
+        WHERE c.consultorio_id = NEW.consultorio_id
+          AND c.fecha = NEW.fecha
+          AND c.ocupa_horario
+          AND c.id <> NEW.id
+          AND c.hora_inicio > NEW.hora_inicio
+          AND c.hora_inicio < NEW.hora_fin
+    ) puntos
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS total
+        FROM public.citas c
+        WHERE c.consultorio_id = NEW.consultorio_id
+          AND c.fecha = NEW.fecha
+          AND c.ocupa_horario
+          AND c.id <> NEW.id
+          AND c.hora_inicio <= puntos.punto
+          AND c.hora_fin > puntos.punto
+    ) ocupadas;
+
+    IF v_simultaneas >= v_capacidad THEN
+        RAISE EXCEPTION 'El consultorio no tiene capacidad en el horario seleccionado' USING ERRCODE = 'raise_exception';
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_validar_capacidad_consultorio ON public.citas;
+CREATE TRIGGER trigger_validar_capacidad_consultorio
+  BEFORE INSERT OR UPDATE OF consultorio_id, fecha, hora_inicio, hora_fin, estado_id ON public.citas
+  FOR EACH ROW
+  EXECUTE FUNCTION public.validar_capacidad_consultorio();
+
+-- ============================================
+-- FUNCIÓN: RESERVAR CITA
+-- ============================================
+-- Valida médico y paciente, serializa las reservas del mismo médico y día
+-- e inserta la cita en una sola transacción.
+-- La capacidad del consultorio la valida trigger_validar_capacidad_consultorio.
+-- Errores:
+--   P0002 (no_data_found)       -> médico, paciente o consultorio no encontrado
+--   P0001 (raise_exception)     -> médico no disponible, consultorio inactivo o sin capacidad
+--   23P01 (exclusion_violation) -> horario ocupado
+CREATE OR REPLACE FUNCTION public.reservar_cita(
+    p_paciente_id uuid,
+    p_medico_id uuid,
+    p_estado_id uuid,
+    p_fecha date,
+    p_hora_inicio time,
+    p_hora_fin time,
+    p_consultorio_id uuid DEFAULT NULL,
+    p_duracion integer DEFAULT 30,
+    p_motivo_consulta text DEFAULT NULL,
+    p_observaciones_medico text DEFAULT NULL,
+    p_diagnostico text DEFAULT NULL,
+    p_tratamiento text DEFAULT NULL,
+    p_medicamentos_recetados text DEFAULT NULL,
+    p_precio numeric DEFAULT NULL,
+    p_pagado boolean DEFAULT false,
+    p_recordatorio_enviado boolean DEFAULT false
+)
+RETURNS SETOF public.citas AS $$
+DECLARE
+    v_disponible boolean;
+BEGIN
+    -- Bloquear el médico para que no cambie de disponibilidad durante la reserva
+    SELECT disponible INTO v_disponible
+    FROM public.medicos
+    WHERE id = p_medico_id
+    FOR SHARE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Médico no encontrado' USING ERRCODE = 'no_data_found';
+    END IF;
+
+    IF NOT v_disponible THEN
+        RAISE EXCEPTION 'El médico no está disponible' USING ERRCODE = 'raise_exception';
+    END IF;
+
+    PERFORM 1 FROM public.pacientes WHERE id = p_paciente_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Paciente no encontrado' USING ERRCODE = 'no_data_found';
+    END IF;
+
+    -- Serializar las reservas del mismo médico y día; se libera al terminar la transacción
+    PERFORM pg_advisory_xact_lock(hashtext(p_medico_id::text), hashtext(p_fecha::text));
+
+    IF EXISTS (
+        SELECT 1
+        FROM public.citas
+        WHERE medico_id = p_medico_id
+          AND fecha = p_fecha
+          AND ocupa_horario
+          AND hora_inicio < p_hora_fin
+          AND hora_fin > p_hora_inicio
+    ) THEN
+        RAISE EXCEPTION 'El horario seleccionado no está disponible' USING ERRCODE = 'exclusion_violation';
+    END IF;
+
+    -- La restricción citas_medico_horario_excl cubre cualquier inserción fuera de esta función
+    RETURN QUERY
+    INSERT INTO public.citas (
+        paciente_id, medico_id, consultorio_id, estado_id, fecha, hora_inicio, hora_fin,
+        duracion, motivo_consulta, observaciones_medico, diagnostico, tratamiento,
+        medicamentos_recetados, precio, pagado, recordatorio_enviado
+    ) VALUES (
+        p_paciente_id, p_medico_id, p_consultorio_id, p_estado_id, p_fecha, p_hora_inicio, p_hora_fin,
+        p_duracion, p_motivo_consulta, p_observaciones_medico, p_diagnostico, p_tratamiento,
+        p_medicamentos_recetados, p_precio, p_pagado, p_recordatorio_enviado
+    )
+    RETURNING *;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION public.reservar_cita IS 'Reserva atómica de una cita: valida, bloquea e inserta en una sola transacción';
@@ -1,7 +1,7 @@
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
@@ -10,9 +10,12 @@ from app.api.v1.router import api_router
 from app.middleware.cors import setup_cors
 from app.middleware.security import setup_security
 from app.middleware.logging import LoggingMiddleware
+from app.models.paginacion import CursorInvalido
+from app.middleware.metrics import MetricsMiddleware, metrics, metrics_authorized
 from app.middleware.error_handler import (
     http_exception_handler,
     validation_exception_handler,
+    cursor_exception_handler,
     general_exception_handler
 )
 
@@ -37,12 +40,13 @@ async def lifespan(app: FastAPI):
         from app.database import db_connection
         # Test de conexión
         client = db_connection.client
+        await db_connection.open()
         logger.info("Conexión a Supabase establecida correctamente")
         
-        # Cargar datos iniciales
-        from app.database.seed_data import seed_database
-        await seed_database()
-        
+        # Datos iniciales: una consulta a la marca de versión; se cargan solo si faltan
+        from app.database.seed_data import seed_if_needed
+        await seed_if_needed()
+    
     except Exception as e:
         logger.error(f"Error al conectar con Supabase: {e}")
         raise
@@ -51,6 +55,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Cerrando Sistema de Reservas Médicas...")
+    from app.database import db_connection
+    await db_connection.close()
 
 
 # Crear aplicación FastAPI
@@ -89,11 +95,13 @@ app = FastAPI(
 setup_cors(app)
 setup_security(app)
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Configurar manejadores de errores
 app.add_exception_handler(HTTPException, http_exception_handler)
 app.add_exception_handler(StarletteHTTPException, http_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
+app.add_exception_handler(CursorInvalido, cursor_exception_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
 # Incluir routers
@@ -129,6 +137,7 @@ async def health_check():
         return {
             "status": "healthy",
             "database": "connected",
+            "pool": db_connection.pool_stats(),
             "version": settings.version,
             "environment": settings.environment
         }
@@ -144,6 +153,25 @@ async def health_check():
         )
 
 
+@app.get("/metrics", tags=["Health"], summary="Métricas de la aplicación", include_in_schema=False)
+async def metrics_endpoint(request: Request):
+    """
+    Métricas en formato de texto de Prometheus: latencia por ruta, requests en curso,
+    códigos de estado y latencia/filas por método de repositorio
+    
+    Requiere `Authorization: Bearer <METRICS_TOKEN>`
+    """
+    if not settings.metrics_enabled or not settings.metrics_token:
+        raise HTTPException(status_code=404, detail="Métricas deshabilitadas")
+    if not metrics_authorized(request.headers.get("authorization")):
+        raise HTTPException(
+            status_code=401,
+            detail="Token de métricas inválido",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     import os
@@ -0,0 +1,13 @@
+"""
+Configuración común de las pruebas
+
+Las pruebas cubren la lógica en memoria (paginación, caches, índices de
+disponibilidad) y no se conectan a Supabase: basta con variables de entorno
+de relleno para poder importar la configuración.
+"""
+import os
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-role-key")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
@@ -0,0 +1,76 @@
+"""
+Pruebas del log de acceso ASGI
+"""
+import logging
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+import main
+from app import main as app_main
+from app.config import settings
+from app.middleware.logging import LoggingMiddleware, access_logger
+
+
+class Registros(logging.Handler):
+    """Handler que guarda los datos de acceso en memoria"""
+    
+    def __init__(self):
+        super().__init__()
+        self.accesos = []
+    
+    def emit(self, record):
+        self.accesos.append(record.access)
+
+
+@pytest.fixture
+def registros():
+    handler = Registros()
+    access_logger.addHandler(handler)
+    yield handler.accesos
+    access_logger.removeHandler(handler)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    
+    @app.get("/citas/{cita_id}")
+    async def detalle(cita_id: str):
+        return {"id": cita_id}
+    
+    @app.get("/falla")
+    async def falla():
+        raise HTTPException(status_code=503, detail="no disponible")
+    
+    app.add_middleware(LoggingMiddleware)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.mark.parametrize("aplicacion", [main.app, app_main.app])
+def test_no_hay_base_http_middleware_en_la_pila(aplicacion):
+    clases = [middleware.cls for middleware in aplicacion.user_middleware]
+    assert LoggingMiddleware in clases
+    assert not [cls for cls in clases if isinstance(cls, type) and issubclass(cls, BaseHTTPMiddleware)]
+
+
+def test_registra_una_linea_por_request(client, registros, monkeypatch):
+    monkeypatch.setattr(settings, "access_log_headers", True)
+    response = client.get("/citas/42", headers={"Authorization": "Bearer secreto"})
+    
+    assert len(registros) == 1
+    acceso = registros[0]
+    assert acceso["route"] == "/citas/{cita_id}"
+    assert acceso["status"] == 200
+    assert acceso["bytes"] == len(response.content)
+    assert acceso["headers"]["authorization"] == "[REDACTED]"
+
+
+def test_muestreo_conserva_errores(client, registros, monkeypatch):
+    monkeypatch.setattr(settings, "access_log_sample_rate", 0.0)
+    client.get("/citas/42")
+    client.get("/falla")
+    
+    assert [acceso["status"] for acceso in registros] == [503]
@@ -0,0 +1,100 @@
+"""
+Pruebas de la verificación local de JWT contra el JWKS de Supabase Auth
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+from app.config import settings
+from app.services import auth_service as modulo
+from app.services.auth_service import AuthService, token_cache
+
+PERFIL = {"id": "u1", "email": "u1@example.com", "activo": True}
+
+
+@pytest.fixture
+def clave_rsa():
+    privada = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = privada.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    publica = jwk.construct(pem, "RS256").public_key().to_dict()
+    publica.update(kid="k1", alg="RS256")
+    return pem, publica
+
+
+@pytest.fixture
+def servicio(monkeypatch, clave_rsa):
+    """AuthService en modo local con un JWKS servido por un transporte simulado"""
+    _, publica = clave_rsa
+    descargas = []
+    
+    def responder(request):
+        descargas.append(request.url.path)
+        return httpx.Response(200, json={"keys": [publica]})
+    
+    cliente_real = httpx.AsyncClient
+    monkeypatch.setattr(modulo.httpx, "AsyncClient", lambda **kwargs: cliente_real(transport=httpx.MockTransport(responder)))
+    monkeypatch.setattr(settings, "supabase_jwt_secret", None)
+    monkeypatch.setattr(AuthService, "_jwks", {})
+    monkeypatch.setattr(AuthService, "_jwks_descargado_en", 0.0)
+    token_cache._entries.clear()
+    token_cache._tokens_by_user.clear()
+    
+    service = AuthService()
+    perfiles = [PERFIL]
+    
+    async def identidad(usuario_id):
+        return {"usuario": perfiles[-1], "rol": None, "paciente": None, "medico": None}
+    
+    monkeypatch.setattr(service.identidad_service, "get_identidad", identidad)
+    service.descargas = descargas
+    service.perfiles = perfiles
+    return service
+
+
+def claims():
+    return {"sub": "u1", "aud": settings.supabase_jwt_audience, "exp": int(time.time()) + 3600}
+
+
+def test_token_valido(servicio, clave_rsa):
+    pem, _ = clave_rsa
+    token = jwt.encode(claims(), pem, algorithm="RS256", headers={"kid": "k1"})
+    assert asyncio.run(servicio._get_current_user_local(token)) == PERFIL
+
+
+def test_alg_del_encabezado_no_cambia_el_algoritmo(servicio, clave_rsa):
+    # Un token HS256 contra una clave RSA no debe terminar en 500 ni aceptarse
+    token = jwt.encode(claims(), "secreto", algorithm="HS256", headers={"kid": "k1"})
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(servicio._get_current_user_local(token))
+    assert error.value.status_code == 401
+
+
+def test_kid_desconocido_no_descarga_en_cada_request(servicio, clave_rsa):
+    pem, _ = clave_rsa
+    for i in range(5):
+        token = jwt.encode(claims(), pem, algorithm="RS256", headers={"kid": f"inventado-{i}"})
+        with pytest.raises(HTTPException):
+            asyncio.run(servicio._get_current_user_local(token))
+    assert len(servicio.descargas) == 1
+
+
+def test_desactivacion_se_respeta_con_el_token_cacheado(servicio, clave_rsa, monkeypatch):
+    pem, _ = clave_rsa
+    token = jwt.encode(claims(), pem, algorithm="RS256", headers={"kid": "k1"})
+    assert asyncio.run(servicio._get_current_user_local(token))["activo"]
+    
+    # Otra réplica desactiva al usuario: el token sigue en cache pero el perfil se relee
+    async def sin_verificar(token):
+        raise AssertionError("el token cacheado no se vuelve a verificar")
+    
+    monkeypatch.setattr(servicio, "_decode_token", sin_verificar)
+    servicio.perfiles.append({**PERFIL, "activo": False})
+    assert not asyncio.run(servicio._get_current_user_local(token))["activo"]
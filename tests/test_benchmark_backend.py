@@ -0,0 +1,130 @@
+"""
+Benchmark de los backends de datos contra un PostgREST de prueba local
+
+200 requests concurrentes a GET /api/v1/citas/ con el cliente síncrono ejecutado
+dentro del event loop (el comportamiento anterior), con el backend "sync"
+(supabase-py en un threadpool) y con el backend "async" (pool compartido). El
+servidor de prueba responde cada consulta tras una latencia fija, como una base
+remota. Los percentiles quedan en el reporte de pytest (record_property).
+"""
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import uuid4
+
+import httpx
+import pytest
+from supabase import create_client
+
+import main
+from app.api.dependencies import get_current_user
+from app.api.v1 import citas as citas_api
+from app.config import settings
+from app.database import db_connection
+from app.repositories.cita_repository import CitaRepository
+
+REQUESTS = 200
+LATENCIA_DB = 0.01
+
+FILAS = json.dumps([{
+    "id": str(uuid4()),
+    "paciente_id": str(uuid4()),
+    "medico_id": str(uuid4()),
+    "estado_id": str(uuid4()),
+    "fecha": "2030-01-01",
+    "hora_inicio": "09:00:00",
+    "hora_fin": "09:30:00",
+    "created_at": "2030-01-01T00:00:00+00:00",
+    "updated_at": "2030-01-01T00:00:00+00:00",
+} for _ in range(10)]).encode()
+
+
+class PostgrestDePrueba(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        time.sleep(LATENCIA_DB)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(FILAS)))
+        self.end_headers()
+        self.wfile.write(FILAS)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def postgrest():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), PostgrestDePrueba)
+    servidor.daemon_threads = True
+    servidor.request_queue_size = REQUESTS
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+
+
+def percentil(valores, p):
+    return statistics.quantiles(valores, n=100)[p - 1]
+
+
+async def medir():
+    latencias = []
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+        # Calentamiento: la primera request resuelve imports y modelos
+        assert (await cliente.get("/api/v1/citas/")).status_code == 200
+        
+        async def request():
+            comienzo = time.perf_counter()
+            response = await cliente.get("/api/v1/citas/")
+            latencias.append(time.perf_counter() - comienzo)
+            assert response.status_code == 200 and len(response.json()) == 10
+        
+        await asyncio.gather(*(request() for _ in range(REQUESTS)))
+    return latencias
+
+
+@pytest.fixture
+def app_con_backend(monkeypatch, postgrest):
+    """Apuntar el repositorio de /citas al PostgREST de prueba con el backend indicado"""
+    monkeypatch.setattr(settings, "supabase_url", postgrest)
+    monkeypatch.setattr(settings, "access_log_enabled", False)
+    main.app.dependency_overrides[get_current_user] = lambda: {"id": "u"}
+    
+    def usar(backend):
+        if backend == "async":
+            client = db_connection._create_async_client(settings.supabase_key)
+        else:
+            client = create_client(postgrest, settings.supabase_key)
+        monkeypatch.setattr(citas_api.cita_service, "cita_repo", CitaRepository(client))
+    
+    yield usar
+    main.app.dependency_overrides.clear()
+
+
+async def en_el_event_loop(funcion, *args):
+    """Ejecutar sin threadpool: cada consulta bloquea el event loop"""
+    return funcion(*args)
+
+
+def test_p50_p99_por_backend(app_con_backend, monkeypatch, record_property):
+    resultados = {}
+    for backend in ("bloqueante", "sync", "async"):
+        app_con_backend(backend)
+        with monkeypatch.context() as m:
+            if backend == "bloqueante":
+                m.setattr(asyncio, "to_thread", en_el_event_loop)
+            latencias = asyncio.run(medir())
+        resultados[backend] = (percentil(latencias, 50), percentil(latencias, 99))
+        record_property(f"{backend}_p50_ms", round(resultados[backend][0] * 1000, 1))
+        record_property(f"{backend}_p99_ms", round(resultados[backend][1] * 1000, 1))
+    
+    resumen = ", ".join(f"{backend}: p50 {p50 * 1000:.0f} ms / p99 {p99 * 1000:.0f} ms" for backend, (p50, p99) in resultados.items())
+    # Con el event loop bloqueado las 200 consultas se atienden una tras otra
+    assert resultados["bloqueante"][1] > REQUESTS * LATENCIA_DB * 0.9, resumen
+    # Margen amplio: la ganancia real depende de los núcleos y del tamaño del pool
+    assert resultados["async"][1] < resultados["bloqueante"][1] / 2, resumen
@@ -0,0 +1,79 @@
+"""
+Pruebas del cache de datos de referencia y de las respuestas con ETag
+"""
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import respuesta_cacheada
+from app.database.cache import reference_cache
+from app.middleware.metrics import metrics
+
+TABLA = "especialidades_prueba"
+
+
+@pytest.fixture
+def app_cacheada():
+    cargas = []
+    datos = [{"id": 1, "nombre": "Cardiología"}]
+    
+    async def loader():
+        cargas.append(1)
+        return list(datos)
+    
+    app = FastAPI()
+    
+    @app.get("/especialidades")
+    async def listar(request: Request):
+        return await respuesta_cacheada(request, TABLA, loader)
+    
+    reference_cache.invalidate(TABLA)
+    yield TestClient(app), cargas, datos
+    reference_cache.invalidate(TABLA)
+
+
+def aciertos():
+    return metrics.cache_requests._series.get((TABLA, "hit"), 0)
+
+
+def test_if_none_match_vigente_responde_304(app_cacheada):
+    client, cargas, _ = app_cacheada
+    primera = client.get("/especialidades")
+    etag = primera.headers["etag"]
+    assert primera.status_code == 200
+    assert primera.json() == [{"id": 1, "nombre": "Cardiología"}]
+    
+    for if_none_match in (etag, f"W/{etag}", f'"otro", {etag}', "*"):
+        response = client.get("/especialidades", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+    
+    assert client.get("/especialidades", headers={"If-None-Match": '"otro"'}).status_code == 200
+    assert len(cargas) == 1
+
+
+def test_invalidar_la_tabla_cambia_el_etag(app_cacheada):
+    client, cargas, datos = app_cacheada
+    etag = client.get("/especialidades").headers["etag"]
+    
+    datos.append({"id": 2, "nombre": "Pediatría"})
+    reference_cache.invalidate(TABLA)
+    response = client.get("/especialidades", headers={"If-None-Match": etag})
+    
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()) == 2
+    assert len(cargas) == 2
+
+
+def test_tasa_de_aciertos(app_cacheada, record_property):
+    client, cargas, _ = app_cacheada
+    antes = aciertos()
+    for _ in range(200):
+        client.get("/especialidades")
+    
+    tasa = (aciertos() - antes) / 200
+    record_property("tasa_aciertos", tasa)
+    assert len(cargas) == 1
+    assert tasa == 199 / 200
@@ -0,0 +1,92 @@
+"""
+Pruebas del aplanado de los recursos embebidos en CitaConDetalles
+"""
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.api.dependencies import get_current_user
+from app.api.v1 import citas as citas_api
+from app.models.cita import CitaConDetalles
+
+
+def fila_con_detalles(consultorio=True):
+    return {
+        "id": str(uuid4()),
+        "paciente_id": str(uuid4()),
+        "medico_id": str(uuid4()),
+        "consultorio_id": str(uuid4()) if consultorio else None,
+        "estado_id": str(uuid4()),
+        "fecha": "2019-05-02",
+        "hora_inicio": "09:00:00",
+        "hora_fin": "09:30:00",
+        "precio": "50.00",
+        "created_at": "2019-05-01T10:00:00+00:00",
+        "pacientes": {"usuarios": {"nombre": "Ana", "apellidos": "Pérez"}},
+        "medicos": {"usuarios": {"nombre": "Luis", "apellidos": "Gómez"}, "especialidades": {"nombre": "Cardiología"}},
+        "consultorios": {"nombre": "C1", "ubicacion": "Piso 1"} if consultorio else None,
+        "estados_cita": {"nombre": "Completada", "color": "#00ff00"},
+    }
+
+
+def test_desde_fila_aplana_los_embebidos():
+    cita = CitaConDetalles.desde_fila(fila_con_detalles())
+    
+    assert (cita.paciente_nombre, cita.paciente_apellidos) == ("Ana", "Pérez")
+    assert (cita.medico_nombre, cita.medico_apellidos) == ("Luis", "Gómez")
+    assert cita.especialidad_nombre == "Cardiología"
+    assert (cita.consultorio_nombre, cita.consultorio_ubicacion) == ("C1", "Piso 1")
+    assert (cita.estado_nombre, cita.estado_color) == ("Completada", "#00ff00")
+    assert "pacientes" not in cita.model_dump()
+
+
+def test_embebido_ausente_deja_los_campos_en_none():
+    cita = CitaConDetalles.desde_fila(fila_con_detalles(consultorio=False))
+    
+    assert cita.consultorio_id is None
+    assert cita.consultorio_nombre is None
+    assert cita.consultorio_ubicacion is None
+    assert cita.medico_nombre == "Luis"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    filas = [fila_con_detalles() for _ in range(1000)]
+    
+    async def get_with_details(skip, limit, cursor):
+        return filas[skip:skip + limit]
+    
+    monkeypatch.setattr(citas_api.cita_service, "cita_repo", SimpleNamespace(get_with_details=get_with_details))
+    main.app.dependency_overrides[get_current_user] = lambda: {"id": "u"}
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def test_detalles_devuelve_los_nombres(client, monkeypatch, record_property):
+    llamadas = []
+    validator = CitaConDetalles.__pydantic_validator__
+    
+    class ContarValidaciones:
+        def validate_python(self, *args, **kwargs):
+            llamadas.append(1)
+            return validator.validate_python(*args, **kwargs)
+        
+        def __getattr__(self, name):
+            return getattr(validator, name)
+    
+    monkeypatch.setattr(CitaConDetalles, "__pydantic_validator__", ContarValidaciones())
+    comienzo = time.perf_counter()
+    response = client.get("/api/v1/citas/detalles", params={"limit": 1000})
+    record_property("segundos_1000_citas_con_detalles", round(time.perf_counter() - comienzo, 4))
+    
+    assert response.status_code == 200
+    citas = response.json()
+    assert len(citas) == 1000
+    assert {cita["especialidad_nombre"] for cita in citas} == {"Cardiología"}
+    assert {cita["paciente_nombre"] for cita in citas} == {"Ana"}
+    # Una validación por fila al construirla; response_model no las repite
+    assert len(llamadas) == 1000
@@ -0,0 +1,90 @@
+"""
+Pruebas de la creación de citas por lote (validación en memoria del horario)
+"""
+import asyncio
+from datetime import date, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.models.estado_cita import ESTADOS_SIN_HORARIO
+from app.services.cita_service import CitaService
+
+MEDICO, PACIENTE, CONSULTORIO = str(uuid4()), str(uuid4()), str(uuid4())
+PROGRAMADA, CANCELADA, NO_ASISTIO = str(uuid4()), str(uuid4()), str(uuid4())
+FECHA = (date.today() + timedelta(days=30)).isoformat()
+
+
+def devolver(filas):
+    async def consulta(*args, **kwargs):
+        return filas
+    return consulta
+
+
+def servicio(insertadas):
+    async def create_many(filas):
+        insertadas.extend(filas)
+        return [dict(fila, id=str(uuid4())) for fila in filas]
+    
+    # Ya hay una cita a las 9:00 en el consultorio, que tiene capacidad para una
+    ocupada = {"id": str(uuid4()), "medico_id": MEDICO, "consultorio_id": CONSULTORIO, "fecha": FECHA, "hora_inicio": "09:00:00", "hora_fin": "09:30:00"}
+    service = CitaService()
+    service.medico_repo = SimpleNamespace(get_by_ids=devolver([{"id": MEDICO, "disponible": True}]))
+    service.paciente_repo = SimpleNamespace(get_by_ids=devolver([{"id": PACIENTE}]))
+    service.estado_repo = SimpleNamespace(get_by_ids=devolver([
+        {"id": PROGRAMADA, "nombre": "Programada"},
+        {"id": CANCELADA, "nombre": "Cancelada"},
+        {"id": NO_ASISTIO, "nombre": "No Asistió"},
+    ]))
+    service.consultorio_repo = SimpleNamespace(get_by_ids=devolver([{"id": CONSULTORIO, "activo": True, "capacidad": 1}]))
+    service.cita_repo = SimpleNamespace(
+        get_ocupacion=devolver([ocupada]),
+        get_ocupacion_consultorios=devolver([ocupada]),
+        create_many=create_many
+    )
+    return service
+
+
+def item(estado_id, hora_inicio, hora_fin, consultorio_id=None):
+    return {
+        "paciente_id": PACIENTE, "medico_id": MEDICO, "consultorio_id": consultorio_id,
+        "estado_id": estado_id, "fecha": FECHA, "hora_inicio": hora_inicio, "hora_fin": hora_fin
+    }
+
+
+def test_estados_sin_horario_coinciden_con_el_trigger():
+    assert ESTADOS_SIN_HORARIO == {"Cancelada", "No Asistió"}
+
+
+def test_citas_que_no_ocupan_horario_no_chocan():
+    insertadas = []
+    resultado = asyncio.run(servicio(insertadas).create_citas_lote([
+        item(PROGRAMADA, "09:00", "09:30"),
+        item(CANCELADA, "09:00", "09:30", CONSULTORIO),
+        item(NO_ASISTIO, "09:15", "09:45"),
+        item(CANCELADA, "10:00", "10:30"),
+        item(PROGRAMADA, "10:00", "10:30"),
+        item(PROGRAMADA, "10:15", "10:45"),
+    ]))
+    
+    assert [r.ok for r in resultado.resultados] == [False, True, True, True, True, False]
+    assert resultado.resultados[0].error == "El horario seleccionado no está disponible"
+    assert len(insertadas) == 4
+
+
+def test_cita_cancelada_no_usa_capacidad_del_consultorio():
+    otro_medico = str(uuid4())
+    insertadas = []
+    service = servicio(insertadas)
+    service.medico_repo = SimpleNamespace(get_by_ids=devolver([
+        {"id": MEDICO, "disponible": True}, {"id": otro_medico, "disponible": True}
+    ]))
+    cancelada = dict(item(CANCELADA, "11:00", "11:30", CONSULTORIO), medico_id=otro_medico)
+    resultado = asyncio.run(service.create_citas_lote([
+        cancelada,
+        item(PROGRAMADA, "11:00", "11:30", CONSULTORIO),
+        item(PROGRAMADA, "09:30", "10:00", CONSULTORIO),
+        dict(item(PROGRAMADA, "09:00", "09:30", CONSULTORIO), medico_id=otro_medico),
+    ]))
+    
+    assert [r.ok for r in resultado.resultados] == [True, True, True, False]
+    assert resultado.resultados[3].error == "El consultorio no tiene capacidad en el horario seleccionado"
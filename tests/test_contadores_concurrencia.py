@@ -0,0 +1,40 @@
+"""
+Prueba de concurrencia del incremento atómico de total_consultas
+
+Necesita una base real con database_queries/contadores_medicos.sql aplicado:
+se ejecuta solo si INTEGRATION_MEDICO_ID apunta a un médico existente (con
+SUPABASE_URL y SUPABASE_SERVICE_ROLE_KEY reales).
+"""
+import asyncio
+import os
+
+import pytest
+
+from app.database import db_connection
+from app.repositories.medico_repository import MedicoRepository
+
+MEDICO_ID = os.environ.get("INTEGRATION_MEDICO_ID")
+LLAMADAS = 500
+
+pytestmark = pytest.mark.skipif(not MEDICO_ID, reason="requiere INTEGRATION_MEDICO_ID y una base Supabase real")
+
+
+async def incrementar_en_paralelo():
+    await db_connection.open()
+    try:
+        repo = MedicoRepository(db_connection.service_data_client)
+        antes = (await repo.get_by_id(MEDICO_ID))["total_consultas"] or 0
+        try:
+            await asyncio.gather(*(repo.incrementar_consultas_lote([MEDICO_ID]) for _ in range(LLAMADAS)))
+        finally:
+            despues = (await repo.get_by_id(MEDICO_ID))["total_consultas"]
+            # Dejar el contador como estaba (también con un incremento atómico)
+            await repo.incrementar_consultas_lote([MEDICO_ID], antes - despues)
+        return antes, despues
+    finally:
+        await db_connection.close()
+
+
+def test_incrementos_paralelos_sin_perdidas():
+    antes, despues = asyncio.run(incrementar_en_paralelo())
+    assert despues == antes + LLAMADAS
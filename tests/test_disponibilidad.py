@@ -0,0 +1,121 @@
+"""
+Pruebas de los índices de disponibilidad en memoria
+"""
+from datetime import date
+
+from app.services.disponibilidad_service import (
+    AgendaDia, PlantillaSemanal, OcupacionConsultorio, mascara, a_minutos, a_hora, BLOQUES_DIA
+)
+
+# 2030-01-01 es martes (dia_semana 1)
+MARTES = date(2030, 1, 1)
+
+
+def test_conversion_de_horas():
+    assert a_minutos("09:30:00") == 570
+    assert a_minutos("17:05") == 1025
+    assert a_hora(570) == "09:30:00"
+
+
+def test_mascara():
+    assert mascara(0, 5) == 0b1
+    assert mascara(10, 20) == 0b1100
+    # Los extremos que no caen en un bloque lo ocupan completo
+    assert mascara(7, 12) == 0b110
+    assert mascara(30, 30) == 0
+    assert mascara(0, 24 * 60).bit_length() == BLOQUES_DIA
+
+
+def test_agenda_libre():
+    agenda = AgendaDia(expira_en=0)
+    agenda.agregar("a", 540, 600)
+    agenda.agregar("b", 660, 690)
+    assert agenda.libre(600, 660)
+    assert agenda.libre(480, 540)
+    assert not agenda.libre(570, 630)
+    assert not agenda.libre(500, 700)
+    assert not agenda.libre(670, 680)
+
+
+def test_agenda_quitar_y_mover():
+    agenda = AgendaDia(expira_en=0)
+    agenda.agregar("a", 540, 600)
+    agenda.agregar("a", 600, 630)
+    assert agenda.libre(540, 600)
+    assert not agenda.libre(600, 630)
+    agenda.quitar("a")
+    agenda.quitar("inexistente")
+    assert agenda.inicios == [] and agenda.fines == []
+
+
+def test_agenda_ocupado():
+    agenda = AgendaDia(expira_en=0)
+    agenda.agregar("a", 0, 10)
+    agenda.agregar("b", 20, 25)
+    assert agenda.ocupado() == 0b10011
+
+
+def test_agenda_ocupado_sigue_los_cambios(monkeypatch):
+    agenda = AgendaDia(expira_en=0)
+    agenda.agregar("a", 0, 7)
+    agenda.agregar("b", 7, 10)
+    assert agenda.ocupado() == 0b11
+    # Quitar "a" no libera el bloque 5-10, que "b" sigue ocupando
+    agenda.quitar("a")
+    assert agenda.ocupado() == 0b10
+    agenda.agregar("b", 20, 25)
+    assert agenda.ocupado() == 0b10000
+    # Sin cambios no se vuelve a recorrer la agenda
+    monkeypatch.setattr("app.services.disponibilidad_service.mascara", None)
+    assert agenda.ocupado() == 0b10000
+
+
+def test_plantilla_turnos():
+    plantilla = PlantillaSemanal(expira_en=0)
+    plantilla.agregar_bloque(1, 480, 600, 30, "c1")
+    plantilla.agregar_bloque(1, 840, 900)
+    ocupado = mascara(510, 540)
+    turnos = list(plantilla.turnos(MARTES, ocupado, 20))
+    assert turnos == [
+        (480, 510, "c1"), (540, 570, "c1"), (570, 600, "c1"),
+        (840, 860, None), (860, 880, None), (880, 900, None),
+    ]
+    # La duración pedida manda sobre la del bloque
+    assert [t[:2] for t in plantilla.turnos(MARTES, 0, 20, 60)] == [(480, 540), (540, 600), (840, 900)]
+
+
+def test_plantilla_otro_dia_y_excepciones():
+    plantilla = PlantillaSemanal(expira_en=0)
+    plantilla.agregar_bloque(1, 540, 600)
+    assert list(plantilla.turnos(date(2030, 1, 2), 0, 30)) == []
+    plantilla.agregar_excepcion("2030-01-01", 540, 570)
+    assert list(plantilla.turnos(MARTES, 0, 30)) == [(570, 600, None)]
+    plantilla.agregar_excepcion("2030-01-01")
+    assert plantilla.libres(MARTES) == 0
+    # La semana siguiente no tiene excepciones
+    assert len(list(plantilla.turnos(date(2030, 1, 8), 0, 30))) == 2
+
+
+def test_consultorio_simultaneas():
+    sala = OcupacionConsultorio()
+    sala.agregar("a", 540, 600)
+    sala.agregar("b", 570, 630)
+    sala.agregar("c", 600, 660)
+    assert sala.simultaneas(540, 660) == 2
+    assert sala.simultaneas(600, 610) == 2
+    assert sala.simultaneas(660, 700) == 0
+    assert not sala.libre(580, 590, 2)
+    assert sala.libre(580, 590, 3)
+    # Un fin y un inicio en el mismo minuto no se solapan
+    assert sala.simultaneas(630, 660) == 1
+
+
+def test_consultorio_quitar():
+    sala = OcupacionConsultorio()
+    sala.agregar("a", 540, 600)
+    sala.agregar("b", 540, 600)
+    sala.quitar("a")
+    assert sala.simultaneas(540, 600) == 1
+    sala.agregar("b", 700, 730)
+    assert sala.simultaneas(540, 600) == 0
+    assert sala.intervalos == [(700, 730, "b")]
@@ -0,0 +1,99 @@
+"""
+Pruebas de los caches de DisponibilidadService (límite de entradas y orden LRU)
+"""
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from app.config import settings
+from app.services.disponibilidad_service import DisponibilidadService, PlantillaSemanal, mascara
+
+
+@pytest.fixture(autouse=True)
+def caches_vacios(monkeypatch):
+    for atributo in ("_agendas", "_plantillas"):
+        monkeypatch.setattr(DisponibilidadService, atributo, type(getattr(DisponibilidadService, atributo))())
+    monkeypatch.setattr(DisponibilidadService, "_ubicacion", {})
+    monkeypatch.setattr(settings, "availability_cache_max_entries", 3)
+
+
+def cita(i, inicio="09:00:00", fin="09:30:00"):
+    return {"id": f"c{i}", "hora_inicio": inicio, "hora_fin": fin}
+
+
+def test_agendas_descarta_la_menos_usada():
+    for i in range(3):
+        DisponibilidadService.cargar(f"m{i}", "2030-01-01", [cita(i)])
+    # m0 se vuelve a usar: la menos usada pasa a ser m1
+    DisponibilidadService._agendas.move_to_end(("m0", "2030-01-01"))
+    DisponibilidadService.cargar("m3", "2030-01-01", [cita(3)])
+    assert list(DisponibilidadService._agendas) == [("m2", "2030-01-01"), ("m0", "2030-01-01"), ("m3", "2030-01-01")]
+    # Las citas de la agenda descartada salen del índice de ubicación
+    assert "c1" not in DisponibilidadService._ubicacion
+    assert DisponibilidadService._ubicacion["c3"] == ("m3", "2030-01-01")
+
+
+def test_agendas_recargar_no_duplica():
+    DisponibilidadService.cargar("m0", "2030-01-01", [cita(0)])
+    DisponibilidadService.cargar("m0", "2030-01-01", [cita(1, "10:00:00", "10:30:00")])
+    assert len(DisponibilidadService._agendas) == 1
+    assert "c0" not in DisponibilidadService._ubicacion
+
+
+def test_plantillas_respetan_el_limite():
+    DisponibilidadService.cargar_plantillas(["m0", "m1", "m2"], [], [])
+    DisponibilidadService._plantillas.move_to_end("m0")
+    DisponibilidadService.cargar_plantillas(["m3", "m4"], [], [])
+    assert list(DisponibilidadService._plantillas) == ["m0", "m3", "m4"]
+
+
+def test_plantilla_por_defecto_y_feriado():
+    plantillas = DisponibilidadService.cargar_plantillas(
+        ["m0", "m1"],
+        [{"medico_id": "m1", "dia_semana": 1, "hora_inicio": "08:00:00", "hora_fin": "09:00:00", "duracion_turno": 20, "activo": True}],
+        [{"medico_id": None, "fecha": "2030-01-08", "hora_inicio": None, "hora_fin": None}]
+    )
+    martes = date(2030, 1, 1)
+    assert plantillas["m0"].libres(martes) == mascara(9 * 60, 17 * 60)
+    assert [t[:2] for t in plantillas["m1"].turnos(martes, 0, 30)] == [(480, 500), (500, 520), (520, 540)]
+    assert plantillas["m0"].libres(martes + timedelta(days=7)) == 0
+    assert plantillas["m1"].libres(martes + timedelta(days=7)) == 0
+
+
+def test_plantilla_con_horarios_inactivos_no_atiende():
+    plantillas = DisponibilidadService.cargar_plantillas(
+        ["m0"],
+        [{"medico_id": "m0", "dia_semana": 1, "hora_inicio": "08:00:00", "hora_fin": "09:00:00", "activo": False}],
+        []
+    )
+    assert plantillas["m0"].bits == 0
+
+
+def test_rendimiento_busqueda_1000_medicos_30_dias(monkeypatch, record_property):
+    """
+    Micro-benchmark del camino de buscar(): 1.000 médicos x 30 días con el cache
+    lleno. Con el descarte LRU en O(1) cada carga cuesta lo mismo aunque el cache
+    esté al límite; el descarte por recorrido completo lo volvía cuadrático.
+    """
+    monkeypatch.setattr(settings, "availability_cache_max_entries", 10000)
+    medicos = [f"m{i}" for i in range(1000)]
+    plantillas = DisponibilidadService.cargar_plantillas(medicos, [], [])
+    inicio_rango = date(2030, 1, 1)
+    fechas = [inicio_rango + timedelta(days=d) for d in range(30)]
+    citas = [cita(0), cita(1, "10:00:00", "11:00:00")]
+    
+    comienzo = time.perf_counter()
+    encontrados = 0
+    for medico_id in medicos:
+        for fecha in fechas:
+            agenda = DisponibilidadService.cargar(medico_id, fecha, [dict(c, id=f"{medico_id}-{fecha}-{c['id']}") for c in citas])
+            turno = DisponibilidadService._primer_hueco(plantillas[medico_id], fecha, agenda, 30)
+            encontrados += turno is not None
+    duracion = time.perf_counter() - comienzo
+    
+    assert encontrados == 30000
+    assert len(DisponibilidadService._agendas) == 10000
+    record_property("segundos_1000_medicos_30_dias", round(duracion, 3))
+    # Margen amplio: solo detecta regresiones de orden (descarte cuadrático)
+    assert duracion < 10, f"1000 médicos x 30 días: {duracion:.2f} s ({duracion / 30000 * 1e6:.1f} µs por médico y día)"
@@ -0,0 +1,176 @@
+"""
+Pruebas de propiedades de los índices de disponibilidad contra una versión por fuerza bruta
+"""
+import asyncio
+import operator
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from hypothesis import given, strategies as st
+
+from app.repositories.cita_repository import CitaRepository
+from app.services.disponibilidad_service import AgendaDia, OcupacionConsultorio, a_hora
+
+MINUTOS_DIA = 24 * 60
+
+intervalo = st.tuples(
+    st.integers(0, MINUTOS_DIA - 1), st.integers(1, 240)
+).map(lambda par: (par[0], min(par[0] + par[1], MINUTOS_DIA)))
+
+# Las columnas time no admiten 24:00
+intervalo_hora = intervalo.map(lambda par: (min(par[0], MINUTOS_DIA - 6), min(par[1], MINUTOS_DIA - 5)))
+
+
+@st.composite
+def agenda_sin_solapes(draw):
+    """Intervalos [inicio, fin) disjuntos, como los deja citas_medico_horario_excl"""
+    puntos = sorted(draw(st.sets(st.integers(0, MINUTOS_DIA), max_size=40)))
+    pares = list(zip(puntos[::2], puntos[1::2]))
+    return draw(st.permutations(pares))
+
+
+class ConsultaCitas:
+    """Builder de PostgREST mínimo que evalúa eq/neq/lt/gt y limit sobre filas en memoria"""
+    
+    def __init__(self, filas):
+        self.filas = filas
+        self.condiciones = []
+        self.limite = None
+    
+    def select(self, columnas):
+        return self
+    
+    def _filtro(self, comparar, columna, valor):
+        self.condiciones.append(lambda fila: comparar(fila[columna], valor))
+        return self
+    
+    def eq(self, columna, valor):
+        return self._filtro(operator.eq, columna, valor)
+    
+    def neq(self, columna, valor):
+        return self._filtro(operator.ne, columna, valor)
+    
+    def lt(self, columna, valor):
+        return self._filtro(operator.lt, columna, valor)
+    
+    def gt(self, columna, valor):
+        return self._filtro(operator.gt, columna, valor)
+    
+    def limit(self, limite):
+        self.limite = limite
+        return self
+    
+    async def execute(self):
+        filas = [fila for fila in self.filas if all(condicion(fila) for condicion in self.condiciones)]
+        return SimpleNamespace(data=filas[:self.limite])
+
+
+def repositorio_citas(citas):
+    """CitaRepository sobre filas {id, inicio, fin, ocupa} del médico "m" el 2030-01-01"""
+    filas = [{
+        "id": str(i),
+        "medico_id": "m",
+        "fecha": "2030-01-01",
+        "hora_inicio": a_hora(inicio),
+        "hora_fin": a_hora(fin),
+        # Lo que resuelve trigger_ocupa_horario: canceladas y sin asistencia no ocupan
+        "ocupa_horario": ocupa,
+    } for i, (inicio, fin, ocupa) in enumerate(citas)]
+    return CitaRepository(SimpleNamespace(table=lambda nombre: ConsultaCitas(filas)))
+
+
+def disponible(repo, inicio, fin, excluir_id=None):
+    return asyncio.run(repo.check_horario_disponible("m", date(2030, 1, 1), a_hora(inicio), a_hora(fin), excluir_id))
+
+
+def se_solapan(a, b):
+    """Semántica de tsrange(inicio, fin) && tsrange(...) con límites [)"""
+    return a[0] < b[1] and b[0] < a[1]
+
+
+@given(agenda_sin_solapes(), intervalo)
+def test_agenda_libre_equivale_a_la_exclusion(citas, pedido):
+    agenda = AgendaDia(expira_en=0)
+    for i, (inicio, fin) in enumerate(citas):
+        agenda.agregar(str(i), inicio, fin)
+    assert agenda.libre(*pedido) == (not any(se_solapan(cita, pedido) for cita in citas))
+
+
+@given(agenda_sin_solapes(), st.data())
+def test_agenda_quitar_libera_solo_esa_cita(citas, data):
+    agenda = AgendaDia(expira_en=0)
+    for i, (inicio, fin) in enumerate(citas):
+        agenda.agregar(str(i), inicio, fin)
+    quitadas = data.draw(st.sets(st.sampled_from(range(len(citas))) if citas else st.nothing()))
+    for i in quitadas:
+        agenda.quitar(str(i))
+    restantes = [cita for i, cita in enumerate(citas) if i not in quitadas]
+    assert list(zip(agenda.inicios, agenda.fines)) == sorted(restantes)
+    pedido = data.draw(intervalo)
+    assert agenda.libre(*pedido) == (not any(se_solapan(cita, pedido) for cita in restantes))
+
+
+@given(st.lists(intervalo, max_size=30), intervalo)
+def test_consultorio_simultaneas_por_fuerza_bruta(citas, pedido):
+    ocupacion = OcupacionConsultorio()
+    for i, (inicio, fin) in enumerate(citas):
+        ocupacion.agregar(str(i), inicio, fin)
+    esperado = max(
+        (sum(1 for inicio, fin in citas if inicio <= minuto < fin) for minuto in range(*pedido)),
+        default=0
+    )
+    assert ocupacion.simultaneas(*pedido) == esperado
+
+
+@given(st.lists(intervalo, max_size=30), st.data())
+def test_consultorio_quitar(citas, data):
+    ocupacion = OcupacionConsultorio()
+    for i, (inicio, fin) in enumerate(citas):
+        ocupacion.agregar(str(i), inicio, fin)
+    quitadas = data.draw(st.sets(st.sampled_from(range(len(citas))) if citas else st.nothing()))
+    for i in quitadas:
+        ocupacion.quitar(str(i))
+    restantes = [cita for i, cita in enumerate(citas) if i not in quitadas]
+    pedido = data.draw(intervalo)
+    esperado = max(
+        (sum(1 for inicio, fin in restantes if inicio <= minuto < fin) for minuto in range(*pedido)),
+        default=0
+    )
+    assert ocupacion.simultaneas(*pedido) == esperado
+
+
+@pytest.mark.parametrize("pedido, libre", [
+    ((540, 600), True),    # termina donde empieza la cita
+    ((630, 690), True),    # empieza donde termina la cita
+    ((600, 630), False),   # mismo horario
+    ((610, 620), False),   # contenido en la cita
+    ((570, 660), False),   # contiene a la cita
+    ((590, 610), False),   # solapa el inicio
+    ((620, 640), False),   # solapa el fin
+])
+def test_check_horario_disponible_bordes_y_contencion(pedido, libre):
+    repo = repositorio_citas([(600, 630, True)])
+    assert disponible(repo, *pedido) is libre
+
+
+def test_check_horario_disponible_ignora_canceladas_y_excluida():
+    repo = repositorio_citas([(600, 630, False), (700, 730, True)])
+    # La cita cancelada o sin asistencia no ocupa su horario
+    assert disponible(repo, 600, 630)
+    # Una cita nunca choca consigo misma al modificarla
+    assert not disponible(repo, 700, 730)
+    assert disponible(repo, 700, 730, excluir_id="1")
+    assert disponible(repo, 690, 740, excluir_id="1")
+    assert not disponible(repo, 700, 730, excluir_id="0")
+
+
+@given(st.lists(st.tuples(intervalo_hora, st.booleans()), max_size=20), intervalo_hora, st.data())
+def test_check_horario_disponible_por_fuerza_bruta(citas, pedido, data):
+    filas = [(inicio, fin, ocupa) for (inicio, fin), ocupa in citas]
+    excluir = data.draw(st.sampled_from([None] + [str(i) for i in range(len(filas))]))
+    esperado = not any(
+        ocupa and str(i) != excluir and se_solapan((inicio, fin), pedido)
+        for i, (inicio, fin, ocupa) in enumerate(filas)
+    )
+    assert disponible(repositorio_citas(filas), *pedido, excluir_id=excluir) == esperado
@@ -0,0 +1,107 @@
+"""
+Pruebas del camino de lectura: filas de la base de datos a modelos de respuesta
+"""
+import time
+from datetime import date
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+import main
+from app.api.dependencies import get_current_user
+from app.api.v1 import citas as citas_api
+from app.models.cita import CitaCreate, CitaResponse
+
+# Cita ya atendida: la fecha pasada la rechazaría CitaCreate, no la lectura
+CITA = {
+    "id": str(uuid4()),
+    "paciente_id": str(uuid4()),
+    "medico_id": str(uuid4()),
+    "consultorio_id": None,
+    "estado_id": str(uuid4()),
+    "fecha": "2019-05-02",
+    "hora_inicio": "09:00:00",
+    "hora_fin": "09:30:00",
+    "duracion": 30,
+    "motivo_consulta": "Control",
+    "precio": "50.00",
+    "pagado": True,
+    "created_at": "2019-05-01T10:00:00+00:00",
+    "updated_at": None,
+}
+
+
+class ContarValidaciones:
+    """Envuelve el validador de pydantic-core de un modelo y cuenta sus llamadas"""
+    
+    def __init__(self, validator):
+        self.validator = validator
+        self.llamadas = 0
+    
+    def validate_python(self, *args, **kwargs):
+        self.llamadas += 1
+        return self.validator.validate_python(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self.validator, name)
+
+
+@pytest.fixture
+def validaciones(monkeypatch):
+    contador = ContarValidaciones(CitaResponse.__pydantic_validator__)
+    monkeypatch.setattr(CitaResponse, "__pydantic_validator__", contador)
+    return contador
+
+
+@pytest.fixture
+def client(monkeypatch):
+    filas = [dict(CITA, id=str(uuid4())) for _ in range(1000)]
+    
+    async def get_by_id(cita_id):
+        return CITA
+    
+    async def get_all(skip, limit, cursor, fields):
+        return filas[skip:skip + limit]
+    
+    repo = SimpleNamespace(get_by_id=get_by_id, get_all=get_all)
+    monkeypatch.setattr(citas_api.cita_service, "cita_repo", repo)
+    main.app.dependency_overrides[get_current_user] = lambda: {"id": "u"}
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def test_cita_pasada_se_lee(client):
+    response = client.get(f"/api/v1/citas/{CITA['id']}")
+    
+    assert response.status_code == 200
+    assert response.json()["fecha"] == "2019-05-02"
+    assert response.json()["precio"] == "50.00"
+
+
+def test_cita_pasada_se_rechaza_al_crear():
+    datos = {k: CITA[k] for k in ("paciente_id", "medico_id", "estado_id", "fecha", "hora_inicio", "hora_fin")}
+    with pytest.raises(ValidationError):
+        CitaCreate(**datos)
+
+
+def test_cada_fila_se_valida_una_vez(client, validaciones):
+    response = client.get("/api/v1/citas/", params={"limit": 1000})
+    
+    assert response.status_code == 200
+    assert len(response.json()) == 1000
+    # response_model recibe instancias de CitaResponse y no las vuelve a validar
+    assert validaciones.llamadas == 1000
+
+
+def test_desde_fila_convierte_los_tipos(record_property):
+    filas = [dict(CITA, id=str(uuid4())) for _ in range(1000)]
+    comienzo = time.perf_counter()
+    citas = [CitaResponse.desde_fila(fila) for fila in filas]
+    record_property("segundos_1000_filas", round(time.perf_counter() - comienzo, 4))
+    
+    assert citas[0].fecha == date(2019, 5, 2)
+    assert str(citas[0].precio) == "50.00"
+    assert citas[0].id.hex == filas[0]["id"].replace("-", "")
@@ -0,0 +1,159 @@
+"""
+Pruebas de las lecturas completas por páginas (PostgREST corta en max-rows)
+"""
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.config import settings
+from app.middleware.metrics import metrics
+from app.repositories.cita_repository import CitaRepository
+
+
+class ConsultaFalsa:
+    """Builder de PostgREST mínimo: aplica `in_`, `order`, `gt` y `limit` sobre una tabla en memoria"""
+    
+    def __init__(self, tabla, consultas):
+        self.tabla = tabla
+        self.consultas = consultas
+        self.filtros = []
+        self.desde = None
+        self.limite = None
+        self.en = {}
+    
+    @property
+    def not_(self):
+        return self
+    
+    def __getattr__(self, nombre):
+        # select, eq, gte, lte, in_, or_, is_...: solo se registran
+        def filtro(*args):
+            self.filtros.append((nombre, args))
+            return self
+        return filtro
+    
+    def in_(self, columna, valores):
+        self.filtros.append(("in_", (columna, len(valores))))
+        self.en[columna] = set(valores)
+        return self
+    
+    def order(self, columna):
+        assert columna == "id"
+        return self
+    
+    def gt(self, columna, valor):
+        self.desde = valor
+        return self
+    
+    def limit(self, limite):
+        self.limite = limite
+        return self
+    
+    async def execute(self):
+        self.consultas.append(self)
+        filas = sorted(self.tabla, key=lambda fila: fila["id"])
+        for columna, valores in self.en.items():
+            filas = [fila for fila in filas if fila[columna] in valores]
+        if self.desde is not None:
+            filas = [fila for fila in filas if fila["id"] > self.desde]
+        return SimpleNamespace(data=filas[:self.limite])
+
+
+class ClienteFalso:
+    def __init__(self, filas):
+        self.filas = filas
+        self.consultas = []
+    
+    def table(self, nombre):
+        return ConsultaFalsa(self.filas, self.consultas)
+
+
+def lotes_in(cliente):
+    """Cantidad de valores de cada filtro in_ en la primera página de cada consulta"""
+    return sorted(args[1] for consulta in cliente.consultas if consulta.desde is None for nombre, args in consulta.filtros if nombre == "in_")
+
+
+def citas(n):
+    return [{"id": f"{i:08d}", "medico_id": "m", "consultorio_id": "c"} for i in range(n)]
+
+
+@pytest.fixture(autouse=True)
+def pagina_chica(monkeypatch):
+    monkeypatch.setattr(settings, "db_page_size", 100)
+
+
+@pytest.mark.parametrize("n, consultas", [(0, 1), (99, 1), (100, 2), (250, 3)])
+def test_get_ocupacion_lee_todas_las_paginas(n, consultas):
+    cliente = ClienteFalso(citas(n))
+    repo = CitaRepository(cliente)
+    filas = asyncio.run(repo.get_ocupacion([uuid4()], date(2030, 1, 1), date(2030, 1, 31), uuid4()))
+    assert [fila["id"] for fila in filas] == [fila["id"] for fila in cliente.filas]
+    assert len(cliente.consultas) == consultas
+    # Cada página se arma desde cero con los mismos filtros
+    assert all(consulta.filtros == cliente.consultas[0].filtros for consulta in cliente.consultas)
+
+
+def test_get_ocupacion_por_lotes_de_medicos(monkeypatch):
+    monkeypatch.setattr(settings, "db_in_chunk_size", 150)
+    medicos = [f"m{i:04d}" for i in range(400)]
+    cliente = ClienteFalso([{"id": f"{i:08d}", "medico_id": medicos[i % 400], "consultorio_id": None} for i in range(1000)])
+    repo = CitaRepository(cliente)
+    filas = asyncio.run(repo.get_ocupacion(medicos + medicos[:10], date(2030, 1, 1), date(2030, 1, 31)))
+    assert sorted(fila["id"] for fila in filas) == [fila["id"] for fila in cliente.filas]
+    assert lotes_in(cliente) == [100, 150, 150]
+
+
+def test_get_ocupacion_con_consultorio_unifica_lotes(monkeypatch):
+    monkeypatch.setattr(settings, "db_in_chunk_size", 2)
+    # El filtro or_ no se aplica en la tabla falsa: cada lote devuelve todas las filas
+    cliente = ClienteFalso(citas(30))
+    repo = CitaRepository(cliente)
+    filas = asyncio.run(repo.get_ocupacion([uuid4() for _ in range(5)], date(2030, 1, 1), date(2030, 1, 31), uuid4()))
+    assert sorted(fila["id"] for fila in filas) == [fila["id"] for fila in cliente.filas]
+    assert len(cliente.consultas) == 3
+
+
+def test_get_by_ids_por_lotes(monkeypatch):
+    monkeypatch.setattr(settings, "db_in_chunk_size", 150)
+    cliente = ClienteFalso(citas(1000))
+    repo = CitaRepository(cliente)
+    ids = [f"{i:08d}" for i in range(0, 1000, 2)]
+    filas = asyncio.run(repo.get_by_ids(ids + ids[:50], ["medico_id"]))
+    assert sorted(fila["id"] for fila in filas) == ids
+    assert lotes_in(cliente) == [50, 150, 150, 150]
+
+
+@pytest.mark.parametrize("consultorio_ids", [None, ["c", uuid4()]])
+def test_get_ocupacion_consultorios_lee_todas_las_paginas(consultorio_ids):
+    cliente = ClienteFalso(citas(1234))
+    repo = CitaRepository(cliente)
+    filas = asyncio.run(repo.get_ocupacion_consultorios(date(2030, 1, 1), date(2030, 12, 31), consultorio_ids))
+    assert len(filas) == 1234
+    assert len({fila["id"] for fila in filas}) == 1234
+    assert len(cliente.consultas) == 13
+
+
+def test_get_ocupacion_consultorios_sin_ids_no_consulta():
+    cliente = ClienteFalso(citas(10))
+    repo = CitaRepository(cliente)
+    assert asyncio.run(repo.get_ocupacion_consultorios(date(2030, 1, 1), date(2030, 1, 2), [])) == []
+    assert cliente.consultas == []
+
+
+def test_etiqueta_de_operacion_es_el_metodo_publico(monkeypatch):
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    observadas = []
+    monkeypatch.setattr(metrics, "observe_query", lambda tabla, operacion, duracion, filas: observadas.append(operacion))
+    repo = CitaRepository(ClienteFalso(citas(3)))
+    
+    async def consultas():
+        # get_by_paciente consulta a través de get_by_field; get_by_ids en tareas concurrentes
+        await repo.get_by_paciente(uuid4())
+        await repo.get_by_ids(["00000001"])
+        await repo.get_ocupacion([uuid4()], date(2030, 1, 1), date(2030, 1, 2))
+    
+    asyncio.run(consultas())
+    assert observadas == ["get_by_paciente", "get_by_ids", "get_ocupacion"]
@@ -0,0 +1,61 @@
+"""
+Pruebas de las etiquetas de ruta y del acceso a /metrics
+"""
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.middleware.metrics import MetricsMiddleware, metrics, metrics_authorized
+
+
+@pytest.fixture
+def client():
+    router = APIRouter(prefix="/recursos")
+    
+    @router.get("/")
+    async def listar():
+        return []
+    
+    @router.get("/{tipo}/{nombre}")
+    async def detalle(tipo: str, nombre: str):
+        return {}
+    
+    # Mismo anidamiento que app/api/v1/router.py
+    api_router = APIRouter(prefix="/api/v1")
+    api_router.include_router(router)
+    app = FastAPI()
+    app.include_router(api_router)
+    app.add_middleware(MetricsMiddleware)
+    return TestClient(app)
+
+
+def rutas():
+    return {labels[1] for labels in metrics.http_requests._series}
+
+
+def test_etiqueta_usa_la_plantilla_de_la_ruta(client):
+    client.get("/api/v1/recursos/m/m")
+    client.get("/api/v1/recursos/citas/1234")
+    client.get("/api/v1/recursos/")
+    assert {ruta for ruta in rutas() if "recursos" in ruta} == {"/api/v1/recursos/{tipo}/{nombre}", "/api/v1/recursos/"}
+
+
+def test_ruta_sin_coincidencia(client):
+    client.get("/no/existe")
+    assert "unmatched" in rutas()
+
+
+@pytest.mark.parametrize("token, authorization, esperado", [
+    (None, "Bearer x", False),
+    ("secreto", None, False),
+    ("secreto", "Bearer otro", False),
+    ("secreto", "Basic secreto", False),
+    ("secreto", "Bearer secreto", True),
+    ("secreto", "bearer secreto", True),
+    ("secreto", "Bearer señal", False),
+    ("contraseña", "Bearer contraseña", True),
+])
+def test_metrics_authorized(monkeypatch, token, authorization, esperado):
+    monkeypatch.setattr(settings, "metrics_token", token)
+    assert metrics_authorized(authorization) is esperado
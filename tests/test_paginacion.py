@@ -0,0 +1,87 @@
+"""
+Pruebas de la paginación por cursor (keyset)
+"""
+import pytest
+
+from app.models.paginacion import encode_cursor, decode_cursor, CursorInvalido
+from app.repositories.base import BaseRepository
+
+
+class RepositorioPrueba(BaseRepository[dict]):
+    cursor_columns = (("fecha", False), ("hora_inicio", True), ("id", False))
+
+
+@pytest.fixture
+def repo():
+    return RepositorioPrueba(None, "citas")
+
+
+@pytest.mark.parametrize("values", [
+    ["2030-01-01T00:00:00+00:00", "b0f1"],
+    ["2030-01-01", "09:00:00", 3],
+    ['con "comillas", comas', None],
+])
+def test_cursor_ida_y_vuelta(values):
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == values
+
+
+@pytest.mark.parametrize("cursor", ["", "no-es-base64!", encode_cursor([]), "eyJhIjoxfQ"])
+def test_cursor_invalido(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_keyset_filter(repo):
+    filtro = repo._keyset_filter(["2030-01-01", "09:00:00", "abc"])
+    assert filtro == (
+        'fecha.gt."2030-01-01",'
+        'and(fecha.eq."2030-01-01",hora_inicio.lt."09:00:00"),'
+        'and(fecha.eq."2030-01-01",hora_inicio.eq."09:00:00",id.gt."abc")'
+    )
+
+
+def test_keyset_filter_cita_valores(repo):
+    filtro = repo._keyset_filter(['a"b', "c\\d", "e,f"])
+    assert 'fecha.gt."a\\"b"' in filtro
+    assert 'hora_inicio.lt."c\\\\d"' in filtro
+    assert 'id.gt."e,f"' in filtro
+
+
+def test_next_cursor(repo):
+    filas = [{"fecha": "2030-01-01", "hora_inicio": "09:00:00", "id": str(i)} for i in range(3)]
+    assert repo.next_cursor(filas, 4) is None
+    assert decode_cursor(repo.next_cursor(filas, 3)) == ["2030-01-01", "09:00:00", "2"]
+
+
+def test_columns_incluye_cursor(repo):
+    assert repo._columns(None) == "*"
+    assert repo._columns(["motivo", "id"]) == "motivo,id,fecha,hora_inicio"
+
+
+class ConsultaOrdenable:
+    def order(self, *args, **kwargs):
+        return self
+
+
+@pytest.mark.parametrize("values", [["2030-01-01", "09:00:00"], ["2030-01-01", "09:00:00", "a", "b"]])
+def test_paginate_cursor_con_otra_cantidad_de_valores(repo, values):
+    with pytest.raises(CursorInvalido):
+        repo._paginate(ConsultaOrdenable(), 0, 10, encode_cursor(values))
+
+
+def test_cursor_de_otro_endpoint_responde_400():
+    from fastapi.testclient import TestClient
+    
+    import main
+    from app.api.dependencies import get_current_user
+    
+    main.app.dependency_overrides[get_current_user] = lambda: {"id": "u"}
+    try:
+        # El cursor de pacientes es (created_at, id); uno de citas trae tres valores
+        response = TestClient(main.app).get("/api/v1/pacientes/", params={"cursor": encode_cursor(["2030-01-01", "09:00:00", "abc"])})
+    finally:
+        main.app.dependency_overrides.clear()
+    assert response.status_code == 400
+    assert response.json()["message"] == "Cursor inválido"
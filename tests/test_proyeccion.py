@@ -0,0 +1,99 @@
+"""
+Pruebas de la proyección de columnas (`fields=`) sobre un fixture de 10k citas
+"""
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.api.dependencies import get_current_user
+from app.api.v1 import citas as citas_api
+from app.repositories.cita_repository import CitaRepository
+
+TEXTO_LARGO = "Lorem ipsum dolor sit amet. " * 20
+
+CITAS = [{
+    "id": str(uuid4()),
+    "paciente_id": str(uuid4()),
+    "medico_id": str(uuid4()),
+    "consultorio_id": None,
+    "estado_id": str(uuid4()),
+    "fecha": "2030-01-01",
+    "hora_inicio": "09:00:00",
+    "hora_fin": "09:30:00",
+    "duracion": 30,
+    "motivo_consulta": TEXTO_LARGO,
+    "observaciones_medico": TEXTO_LARGO,
+    "diagnostico": TEXTO_LARGO,
+    "tratamiento": TEXTO_LARGO,
+    "medicamentos_recetados": TEXTO_LARGO,
+    "precio": "50.00",
+    "pagado": False,
+    "recordatorio_enviado": False,
+    "created_at": "2030-01-01T00:00:00+00:00",
+    "updated_at": "2030-01-01T00:00:00+00:00",
+} for _ in range(10000)]
+
+
+class ConsultaProyectada:
+    """Builder de PostgREST mínimo: aplica select (proyección) y range sobre CITAS"""
+    
+    def __init__(self, selects):
+        self.selects = selects
+        self.columnas = None
+        self.desde, self.hasta = 0, len(CITAS) - 1
+    
+    def select(self, columnas):
+        self.selects.append(columnas)
+        self.columnas = None if columnas == "*" else columnas.split(",")
+        return self
+    
+    def range(self, desde, hasta):
+        self.desde, self.hasta = desde, hasta
+        return self
+    
+    async def execute(self):
+        filas = CITAS[self.desde:self.hasta + 1]
+        if self.columnas:
+            filas = [{columna: fila[columna] for columna in self.columnas} for fila in filas]
+        return SimpleNamespace(data=filas)
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    selects = []
+    repo = CitaRepository(SimpleNamespace(table=lambda nombre: ConsultaProyectada(selects)))
+    monkeypatch.setattr(citas_api.cita_service, "cita_repo", repo)
+    main.app.dependency_overrides[get_current_user] = lambda: {"id": "u"}
+    yield TestClient(main.app), selects
+    main.app.dependency_overrides.clear()
+
+
+def medir(client, params):
+    comienzo = time.perf_counter()
+    tamano = 0
+    for skip in range(0, len(CITAS), 1000):
+        response = client.get("/api/v1/citas/", params={"skip": skip, "limit": 1000, **params})
+        assert response.status_code == 200
+        tamano += len(response.content)
+    return tamano, time.perf_counter() - comienzo
+
+
+def test_fields_proyecta_la_consulta_y_reduce_el_payload(cliente, record_property):
+    client, selects = cliente
+    completo, duracion_completo = medir(client, {})
+    assert set(selects) == {"*"}
+    
+    selects.clear()
+    calendario, duracion_calendario = medir(client, {"fields": "fecha,hora_inicio,hora_fin,medico_id"})
+    # Las columnas del cursor se agregan siempre a la proyección
+    assert set(selects) == {"fecha,hora_inicio,hora_fin,medico_id,id"}
+    
+    record_property("bytes_completo", completo)
+    record_property("bytes_proyectado", calendario)
+    record_property("segundos_completo", round(duracion_completo, 3))
+    record_property("segundos_proyectado", round(duracion_calendario, 3))
+    assert calendario < completo / 10, f"{calendario} bytes proyectados vs {completo} completos"
@@ -0,0 +1,59 @@
+"""
+Prueba de concurrencia de la reserva atómica (función reservar_cita)
+
+Necesita una base real con database_queries/reservar_cita.sql aplicado:
+se ejecuta solo si INTEGRATION_MEDICO_ID e INTEGRATION_PACIENTE_ID apuntan a
+un médico disponible y a un paciente existentes (con SUPABASE_URL y
+SUPABASE_SERVICE_ROLE_KEY reales).
+"""
+import asyncio
+import os
+from datetime import date, timedelta
+
+import pytest
+from postgrest.exceptions import APIError
+
+from app.database import db_connection
+from app.repositories.cita_repository import CitaRepository
+from app.repositories.estado_cita_repository import EstadoCitaRepository
+
+MEDICO_ID = os.environ.get("INTEGRATION_MEDICO_ID")
+PACIENTE_ID = os.environ.get("INTEGRATION_PACIENTE_ID")
+RESERVAS = 100
+
+pytestmark = pytest.mark.skipif(
+    not (MEDICO_ID and PACIENTE_ID),
+    reason="requiere INTEGRATION_MEDICO_ID, INTEGRATION_PACIENTE_ID y una base Supabase real"
+)
+
+
+async def reservar_en_paralelo():
+    await db_connection.open()
+    try:
+        repo = CitaRepository(db_connection.service_data_client)
+        estado = await EstadoCitaRepository(db_connection.service_data_client).get_by_nombre("Programada")
+        # Un horario lejano para no chocar con citas reales
+        cita = {
+            "paciente_id": PACIENTE_ID,
+            "medico_id": MEDICO_ID,
+            "estado_id": estado["id"],
+            "fecha": (date.today() + timedelta(days=3650)).isoformat(),
+            "hora_inicio": "03:00:00",
+            "hora_fin": "03:30:00",
+        }
+        resultados = await asyncio.gather(*(repo.reservar(cita) for _ in range(RESERVAS)), return_exceptions=True)
+        creadas = [resultado for resultado in resultados if isinstance(resultado, dict)]
+        try:
+            return creadas, [resultado for resultado in resultados if not isinstance(resultado, dict)]
+        finally:
+            for creada in creadas:
+                await repo.delete(creada["id"])
+    finally:
+        await db_connection.close()
+
+
+def test_una_sola_reserva_por_horario():
+    creadas, errores = asyncio.run(reservar_en_paralelo())
+    assert len(creadas) == 1
+    assert len(errores) == RESERVAS - 1
+    assert all(isinstance(error, APIError) and error.code == "23P01" for error in errores)
@@ -0,0 +1,61 @@
+"""
+Pruebas del cache de tokens validados localmente
+"""
+import time
+
+from app.services.auth_service import TokenCache
+
+
+def perfil(usuario_id):
+    return {"id": usuario_id, "email": f"{usuario_id}@example.com"}
+
+
+def test_get_y_set():
+    cache = TokenCache(max_entries=10, ttl=60)
+    assert cache.get("t1") is None
+    cache.set("t1", perfil("u1"))
+    assert cache.get("t1") == perfil("u1")
+
+
+def test_no_sobrevive_a_exp():
+    cache = TokenCache(max_entries=10, ttl=60)
+    cache.set("t1", perfil("u1"), exp=int(time.time()) - 1)
+    assert cache.get("t1") is None
+
+
+def test_expira_por_ttl(monkeypatch):
+    cache = TokenCache(max_entries=10, ttl=60)
+    ahora = time.time()
+    monkeypatch.setattr(time, "time", lambda: ahora)
+    cache.set("t1", perfil("u1"))
+    monkeypatch.setattr(time, "time", lambda: ahora + 61)
+    assert cache.get("t1") is None
+    assert cache._tokens_by_user == {}
+
+
+def test_lru_descarta_el_menos_usado():
+    cache = TokenCache(max_entries=2, ttl=60)
+    cache.set("t1", perfil("u1"))
+    cache.set("t2", perfil("u2"))
+    cache.get("t1")
+    cache.set("t3", perfil("u3"))
+    assert cache.get("t2") is None
+    assert cache.get("t1") is not None
+    assert cache.get("t3") is not None
+
+
+def test_invalidate_user():
+    cache = TokenCache(max_entries=10, ttl=60)
+    cache.set("t1", perfil("u1"))
+    cache.set("t2", perfil("u1"))
+    cache.set("t3", perfil("u2"))
+    cache.invalidate_user("u1")
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+    assert cache.get("t3") is not None
+
+
+def test_deshabilitado():
+    cache = TokenCache(max_entries=0, ttl=60)
+    cache.set("t1", perfil("u1"))
+    assert cache.get("t1") is None